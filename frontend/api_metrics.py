@@ -0,0 +1,179 @@
+"""
+In-process request metrics for the API.
+
+Provides:
+- Per-route request and error counters keyed by method and status
+- Fixed-bucket latency histograms with p50/p95/p99 estimates
+- Odds-provider call latency and outcome counters
+- Prometheus text exposition (served on ``GET /metrics``)
+
+Recording a request is a ``bisect`` and a few integer increments under one
+lock, so it is cheap enough for the hot ``/api/predict`` path. Counters are
+per process; under a multi-worker server each worker reports its own.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+# log-spaced upper bounds from 50us to ~20s (ratio 2**0.25), so bucket-based
+# percentile estimates are within ~10% of the true value
+BUCKETS = tuple(round(0.00005 * 2 ** (i / 4), 7) for i in range(75))
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyHistogram:
+    """Cumulative-friendly latency histogram over fixed bucket bounds (seconds)."""
+
+    __slots__ = ('bounds', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, bounds: Tuple[float, ...] = BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile by linear interpolation inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def summary(self) -> Dict:
+        out = {'count': self.count, 'mean': self.sum / self.count if self.count else 0.0, 'max': self.max}
+        for q in QUANTILES:
+            out[f'p{int(q * 100)}'] = self.quantile(q)
+        return out
+
+
+class MetricsRegistry:
+    """Thread-safe store of route and provider metrics."""
+
+    def __init__(self, bounds: Tuple[float, ...] = BUCKETS):
+        self.bounds = bounds
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, int], int] = {}
+        self._latency: Dict[str, LatencyHistogram] = {}
+        self._provider_calls: Dict[Tuple[str, str], int] = {}
+        self._provider_latency: Dict[str, LatencyHistogram] = {}
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float):
+        key = (route, method, status)
+        with self._lock:
+            self._requests[key] = self._requests.get(key, 0) + 1
+            hist = self._latency.get(route)
+            if hist is None:
+                hist = self._latency[route] = LatencyHistogram(self.bounds)
+            hist.observe(seconds)
+
+    def observe_provider(self, provider: str, seconds: float, outcome: str = 'ok'):
+        """Record one odds-provider call; ``outcome`` is ok, empty, timeout or error."""
+        key = (provider, outcome)
+        with self._lock:
+            self._provider_calls[key] = self._provider_calls.get(key, 0) + 1
+            hist = self._provider_latency.get(provider)
+            if hist is None:
+                hist = self._provider_latency[provider] = LatencyHistogram(self.bounds)
+            hist.observe(seconds)
+
+    def count_provider_event(self, provider: str, event: str):
+        """Count a provider event without latency (e.g. ``hedge`` or ``retry``)."""
+        key = (provider, event)
+        with self._lock:
+            self._provider_calls[key] = self._provider_calls.get(key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._latency.clear()
+            self._provider_calls.clear()
+            self._provider_latency.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> Dict:
+        """JSON-friendly summary: per-route counts, errors and latency percentiles."""
+        with self._lock:
+            routes: Dict[str, Dict] = {}
+            for (route, _method, status), n in self._requests.items():
+                entry = routes.setdefault(route, {'requests': 0, 'errors': 0, 'status': {}})
+                entry['requests'] += n
+                if status >= 500:
+                    entry['errors'] += n
+                entry['status'][str(status)] = entry['status'].get(str(status), 0) + n
+            for route, hist in self._latency.items():
+                routes[route]['latency'] = hist.summary()
+            providers: Dict[str, Dict] = {}
+            for (provider, outcome), n in self._provider_calls.items():
+                providers.setdefault(provider, {'calls': {}})['calls'][outcome] = n
+            for provider, hist in self._provider_latency.items():
+                providers.setdefault(provider, {'calls': {}})['latency'] = hist.summary()
+        return {'uptime_seconds': time.time() - self.started_at, 'routes': routes, 'providers': providers}
+
+    def render_prometheus(self, cache_stats: Optional[Dict] = None) -> str:
+        """Prometheus text format (v0.0.4) for every metric, plus cache ratios."""
+        lines: List[str] = []
+        with self._lock:
+            lines += ['# HELP api_requests_total Requests by route, method and status.',
+                      '# TYPE api_requests_total counter']
+            for (route, method, status), n in sorted(self._requests.items()):
+                lines.append(f'api_requests_total{{route="{route}",method="{method}",status="{status}"}} {n}')
+            lines += _render_histograms('api_request_duration_seconds', 'Request latency by route.',
+                                        'route', self._latency)
+            lines += ['# HELP odds_provider_calls_total Odds provider calls by outcome.',
+                      '# TYPE odds_provider_calls_total counter']
+            for (provider, outcome), n in sorted(self._provider_calls.items()):
+                lines.append(f'odds_provider_calls_total{{provider="{provider}",outcome="{outcome}"}} {n}')
+            lines += _render_histograms('odds_provider_duration_seconds', 'Odds provider call latency.',
+                                        'provider', self._provider_latency)
+        if cache_stats:
+            lines += ['# HELP response_cache_hit_ratio Response cache hits / lookups by endpoint.',
+                      '# TYPE response_cache_hit_ratio gauge']
+            for endpoint, stats in sorted(cache_stats.get('endpoints', {}).items()):
+                lines.append(f'response_cache_hit_ratio{{endpoint="{endpoint}"}} {stats["hit_ratio"]}')
+            lines += ['# HELP response_cache_lookups_total Response cache lookups by endpoint and result.',
+                      '# TYPE response_cache_lookups_total counter']
+            for endpoint, stats in sorted(cache_stats.get('endpoints', {}).items()):
+                for result in ('hits', 'misses', 'coalesced'):
+                    lines.append(f'response_cache_lookups_total{{endpoint="{endpoint}",result="{result}"}} '
+                                 f'{stats[result]}')
+            lines += ['# TYPE response_cache_size gauge', f'response_cache_size {cache_stats.get("size", 0)}']
+        return '\n'.join(lines) + '\n'
+
+
+def _render_histograms(name: str, help_text: str, label: str, hists: Dict[str, LatencyHistogram]) -> List[str]:
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for key, hist in sorted(hists.items()):
+        cumulative = 0
+        for bound, n in zip(hist.bounds, hist.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{label}="{key}",le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{label}="{key}",le="+Inf"}} {hist.count}')
+        lines.append(f'{name}_sum{{{label}="{key}"}} {hist.sum:.6f}')
+        lines.append(f'{name}_count{{{label}="{key}"}} {hist.count}')
+    summary = f'{name.replace("_seconds", "")}_quantile_seconds'
+    lines += [f'# HELP {summary} Estimated latency percentiles from {name}.', f'# TYPE {summary} gauge']
+    for key, hist in sorted(hists.items()):
+        for q in QUANTILES:
+            lines.append(f'{summary}{{{label}="{key}",quantile="{q}"}} {hist.quantile(q):.6f}')
+    return lines
+
+
+METRICS = MetricsRegistry()
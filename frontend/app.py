@@ -8,28 +8,25 @@ Provides a web UI for:
 - Multi-leg entry analysis
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, g, Response, stream_with_context
+import atexit
+import gc
 import json
+import math
 import os
 import sys
+import time
 from pathlib import Path
 
+import numpy as np
+
 # Add scripts directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
 sys.path.insert(0, str(Path(__file__).parent))  # Add frontend directory for odds module
 
-# Import scipy for normal distribution
-from scipy.stats import norm
-
-try:
-    from metrics import compute_metrics
-except Exception as e:
-    print(f"Warning: Could not import metrics: {e}")
-    compute_metrics = None
-
 # Import odds module
 try:
-    from odds import get_best_odds, american_to_decimal, american_to_implied_probability, POPULAR_PLAYERS, MARKETS, SPORTSBOOKS
+    from odds import get_best_odds, get_best_lines_slate, american_to_decimal, POPULAR_PLAYERS, MARKETS, SPORTSBOOKS
 except Exception as e:
     print(f"Warning: Could not import odds module: {e}")
     get_best_odds = None
@@ -37,19 +34,132 @@ except Exception as e:
     MARKETS = ['passing_yards', 'receiving_yards', 'rushing_yards']
     SPORTSBOOKS = ['DraftKings', 'FanDuel', 'BetMGM', 'PointsBet']
 
+import odds_math
+from api_metrics import METRICS
+from response_cache import RESPONSE_CACHE, normalize_params
+from calibration_registry import CalibrationRegistry
+from player_index import load_or_build as load_player_index
+from line_stream import LineStreamHub, ProviderPollSource, ReplaySource, format_sse
+
 app = Flask(__name__, template_folder='templates', static_folder='static')
 app.config['JSON_SORT_KEYS'] = False
 
-# Load provider calibration data if available
-PROVIDER_DATA = {}
+# Provider calibration data from backtest artifacts. New backtests are picked
+# up automatically (checked at most every poll interval) without a restart.
+CALIBRATION_REGISTRY = CalibrationRegistry(
+    'data/cache/backtests',
+    poll_interval=float(os.environ.get('CALIBRATION_POLL_SECONDS', '5')),
+)
 try:
-    provider_files = Path('data/cache/backtests').glob('*_provider_metrics.json')
-    for pf in provider_files:
-        with open(pf, 'r') as f:
-            PROVIDER_DATA[pf.stem] = json.load(f)
+    CALIBRATION_REGISTRY.refresh()
 except Exception as e:
     print(f"Warning: Could not load provider calibration data: {e}")
 
+# Player autocomplete index, built from fetched game logs and memory-mapped
+CACHE_DIR = 'data/cache'
+PLAYER_INDEX_DIR = os.environ.get('PLAYER_INDEX_DIR', 'data/cache/player_index')
+
+
+@app.before_request
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def _record_request(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # label by route template so /static/<path> etc. stay one series
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        METRICS.observe_request(route, request.method, response.status_code, time.perf_counter() - start)
+    return response
+
+
+def preload():
+    """Load shared read-only state once in a prefork server's master process.
+
+    Called by ``frontend/gunicorn.conf.py`` before workers are forked. Objects
+    created here are then shared copy-on-write by every worker; freezing the GC
+    keeps the collector from touching (and so copying) those pages later.
+    """
+    CALIBRATION_REGISTRY.refresh()
+    get_player_index()
+    if get_best_odds:
+        # build odds lookup tables once in the master
+        get_best_odds(POPULAR_PLAYERS[0], MARKETS[0])
+    gc.collect()
+    gc.freeze()
+
+
+_PLAYER_INDEX = None
+
+
+def get_player_index():
+    """Memory-map the player search index on first use (built if missing)."""
+    global _PLAYER_INDEX
+    if _PLAYER_INDEX is None:
+        _PLAYER_INDEX = load_player_index(PLAYER_INDEX_DIR, CACHE_DIR, featured=POPULAR_PLAYERS)
+    return _PLAYER_INDEX
+
+
+_LINE_STREAM_HUB = None
+_TICK_STORE = None
+
+
+def get_tick_store():
+    """This process's odds tick history under ODDS_TICK_DIR, or None when recording is off.
+
+    Each worker records into its own ``writer-<pid>/`` store; readers merge
+    them with ``odds_ticks.TickReader``.
+    """
+    global _TICK_STORE
+    tick_dir = os.environ.get('ODDS_TICK_DIR')
+    if _TICK_STORE is None and tick_dir:
+        from odds_ticks import writer_store
+        _TICK_STORE = writer_store(tick_dir)
+    return _TICK_STORE
+
+
+def _flush_tick_store():
+    if _TICK_STORE is not None:
+        _TICK_STORE.flush()
+
+
+def _reset_after_fork():
+    # a forked worker must not append to the parent's store (or poll with the
+    # parent's dead hub thread); both are recreated on first use
+    global _TICK_STORE, _LINE_STREAM_HUB
+    _TICK_STORE = None
+    _LINE_STREAM_HUB = None
+
+
+atexit.register(_flush_tick_store)
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_line_stream_hub() -> LineStreamHub:
+    """Shared line-move hub; replays ODDS_STREAM_REPLAY snapshots if set."""
+    global _LINE_STREAM_HUB
+    if _LINE_STREAM_HUB is None:
+        replay = os.environ.get('ODDS_STREAM_REPLAY')
+        if replay:
+            source = ReplaySource(replay, loop=os.environ.get('ODDS_STREAM_REPLAY_LOOP') == '1')
+        else:
+            from odds import configured_providers
+            source = ProviderPollSource(configured_providers(), ticks=get_tick_store())
+        _LINE_STREAM_HUB = LineStreamHub(
+            source,
+            poll_interval=float(os.environ.get('ODDS_STREAM_POLL_SECONDS', '5')),
+            calibration=CALIBRATION_REGISTRY.current,
+            watch=[(p, m) for p in POPULAR_PLAYERS for m in MARKETS],
+        )
+    return _LINE_STREAM_HUB
+
+
+def _normal_cdf(x: float) -> float:
+    """Standard normal CDF via math.erf (avoids importing scipy on the request path)."""
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
 
 @app.route('/')
 def index():
@@ -105,25 +215,117 @@ def get_odds_endpoint():
     if not player or not market:
         return jsonify({'error': 'Missing player or market parameter'}), 400
     
+    if not get_best_odds:
+        return jsonify({'success': False, 'error': 'Odds module not available'}), 500
+
     try:
-        if get_best_odds:
-            odds = get_best_odds(player, market, sportsbook)
-            return jsonify({'success': True, 'data': odds})
-        else:
-            return jsonify({'success': False, 'error': 'Odds module not available'}), 500
+        key = normalize_params({'player': player, 'market': market, 'sportsbook': sportsbook})
+        odds = RESPONSE_CACHE.get_or_compute('odds', key, lambda: get_best_odds(player, market, sportsbook))
+        return jsonify({'success': True, 'data': odds})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/odds/slate', methods=['POST'])
+def get_odds_slate():
+    """
+    Best lines for many props at once, served from the best-line index.
+    
+    Request body:
+    {
+        "props": [{"player": "Patrick Mahomes", "market": "passing_yards"}, ...]
+    }
+    """
+    if not get_best_odds:
+        return jsonify({'success': False, 'error': 'Odds module not available'}), 500
+    
+    data = request.get_json(silent=True) or {}
+    props = data.get('props')
+    if not isinstance(props, list) or not props:
+        return jsonify({'error': 'Missing props list'}), 400
+    try:
+        keys = [(p['player'], p['market']) for p in props]
+    except (KeyError, TypeError):
+        return jsonify({'error': 'Each prop needs player and market'}), 400
+    
+    try:
+        return jsonify({'success': True, 'data': get_best_lines_slate(keys)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+STREAM_HEARTBEAT_SECONDS = (1.0, 60.0, 15.0)  # min, max, default
+
+
+def stream_props(prop_args, player=None, market=None):
+    """(player, market) pairs from repeated ``prop=Player|market`` and ``player``/``market``."""
+    props = [tuple(p.split('|', 1)) for p in prop_args if '|' in p]
+    if player and market:
+        props.append((player, market))
+    return props
+
+
+def stream_heartbeat(value) -> float:
+    """The ``heartbeat`` query parameter clamped to STREAM_HEARTBEAT_SECONDS."""
+    low, high, default = STREAM_HEARTBEAT_SECONDS
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return default
+    if math.isnan(seconds):
+        return default
+    return min(max(seconds, low), high)
+
+
+@app.route('/api/stream/lines', methods=['GET'])
+def stream_lines():
+    """
+    Server-sent event stream of line moves with re-priced p_hit / EV.
+    
+    Query params:
+    - prop: "Player|market", repeatable (default: every watched prop)
+    - player, market: shorthand for a single prop
+    
+    - heartbeat: keepalive interval in seconds (clamped to 1-60, default 15)
+    
+    The first events are ``snapshot`` frames with the current quotes, then
+    ``move`` frames as lines change. Moves are coalesced per prop and book.
+    Under the ASGI entry point (frontend/asgi.py) this route is served
+    natively on the event loop instead.
+    """
+    props = stream_props(request.args.getlist('prop'), request.args.get('player'), request.args.get('market'))
+    hub = get_line_stream_hub()
+    sub = hub.subscribe(props or None)
+    heartbeat = stream_heartbeat(request.args.get('heartbeat'))
+    
+    def events():
+        try:
+            yield 'retry: 3000\n\n'
+            while not sub.closed:
+                batch = sub.next_batch(timeout=heartbeat)
+                if not batch:
+                    yield ': keepalive\n\n'
+                    continue
+                yield ''.join(format_sse(e) for e in batch)
+        finally:
+            hub.unsubscribe(sub)
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/stream/stats', methods=['GET'])
+def stream_stats():
+    """Return line stream poller and subscriber counters."""
+    return jsonify(get_line_stream_hub().stats())
+
+
 @app.route('/api/autocomplete/players', methods=['GET'])
 def autocomplete_players():
-    """Return list of popular players for autocomplete."""
-    query = request.args.get('q', '').lower()
-    if not query:
-        return jsonify(POPULAR_PLAYERS[:10])
-    
-    matches = [p for p in POPULAR_PLAYERS if query in p.lower()]
-    return jsonify(matches[:10])
+    """Return players matching a typed prefix (typo-tolerant), most popular first."""
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    return jsonify(get_player_index().search(query, limit=limit))
 
 
 @app.route('/api/autocomplete/markets', methods=['GET'])
@@ -158,95 +360,181 @@ def predict():
     """
     try:
         data = request.get_json()
-        
-        # Extract inputs
-        sportsbook = data.get('sportsbook', 'draftkings').lower()
-        market = data.get('market', 'passing_yards')
-        player = data.get('player', 'Unknown')
-        projection = float(data.get('projection', 0))
-        actual = float(data.get('actual_or_estimate', 0))
-        odds = float(data.get('odds', -110))
-        correlations = data.get('correlations', [])
-        
-        # Calculate probability of hitting
-        p_hit = 0.5  # Default baseline
-        if projection > 0:
-            # Simple model: p_hit based on how far actual is from projection
-            diff = actual - projection
-            std_dev = projection * 0.15  # Assume 15% std deviation
-            if std_dev > 0:
-                # Simplified: assume normal distribution
-                p_hit = 1 - norm.cdf(0, loc=diff, scale=std_dev)
-                p_hit = max(0.05, min(0.95, p_hit))  # Clip to [0.05, 0.95]
-        
-        # Adjust for provider calibration if available
-        provider_key = f"baseline_sample_{market}"
-        if provider_key in PROVIDER_DATA:
-            provider_data = PROVIDER_DATA[provider_key]
-            # Simple adjustment: use provider's average Brier to adjust confidence
-            if 'provider_metrics' in provider_data and sportsbook.title() in provider_data['provider_metrics']:
-                brier = provider_data['provider_metrics'][sportsbook.title()].get('brier_score', 0.5)
-                # Lower Brier = better calibration; adjust p_hit slightly
-                calibration_factor = 1 - (brier * 0.1)
-                p_hit *= calibration_factor
-                p_hit = max(0.05, min(0.95, p_hit))
-        
-        # Convert American odds to implied probability
-        if odds < 0:
-            implied_prob = abs(odds) / (abs(odds) + 100)
-        else:
-            implied_prob = 100 / (odds + 100)
-        
-        # Calculate EV
-        decimal_odds = (abs(odds) + 100) / 100 if odds < 0 else odds / 100 + 1
-        payout = decimal_odds - 1
-        ev = (p_hit * payout) - (1 - p_hit)
-        roi_pct = (ev * 100)
-        
-        # Kelly Criterion: f* = (bp - q) / b where b=payout, p=p_hit, q=1-p_hit
-        kelly = (payout * p_hit - (1 - p_hit)) / payout if payout > 0 else 0
-        kelly = max(0, kelly)  # Don't suggest negative
-        kelly_pct = kelly * 100
-        
-        # Confidence: based on sample size and calibration
-        confidence = min(0.95, p_hit) if p_hit > 0.5 else min(0.95, 1 - p_hit)
-        
-        response = {
-            'success': True,
-            'prediction': {
-                'player': player,
-                'market': market,
-                'sportsbook': sportsbook,
-                'projection': projection,
-                'estimated_value': round(actual, 2),
-                'p_hit': round(p_hit, 4),
-                'p_hit_pct': round(p_hit * 100, 2),
-                'implied_prob': round(implied_prob, 4),
-                'implied_prob_pct': round(implied_prob * 100, 2),
-            },
-            'valuation': {
-                'odds': odds,
-                'decimal_odds': round(decimal_odds, 2),
-                'ev': round(ev, 4),
-                'ev_pct': round(roi_pct, 2),
-                'kelly_fraction': round(kelly, 4),
-                'kelly_pct': round(kelly_pct, 2),
-                'recommended_bet_size_pct': round(kelly_pct, 2),
-            },
-            'confidence': {
-                'model_confidence': round(confidence, 2),
-                'confidence_pct': round(confidence * 100, 2),
-                'note': 'Confidence based on calibration data and sample size',
-            },
-            'correlations': correlations,
-        }
-        
+        CALIBRATION_REGISTRY.maybe_refresh()
+        calibration = CALIBRATION_REGISTRY.current()
+        # include the calibration version so a reload invalidates cached predictions
+        key = normalize_params(dict(data, _calibration_version=calibration.version),
+                               fold_case=PREDICT_FOLD_CASE, numeric=PREDICT_NUMERIC)
+        response = RESPONSE_CACHE.get_or_compute('predict', key, lambda: _compute_prediction(data, calibration))
         return jsonify(response)
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
 
+# request fields _compute_prediction lower-cases / parses as floats; every
+# other field must match exactly to share a cached response
+PREDICT_FOLD_CASE = ('sportsbook',)
+PREDICT_NUMERIC = ('projection', 'actual_or_estimate', 'odds')
+
+
+def _compute_prediction(data: dict, calibration=None) -> dict:
+    """Compute the /api/predict response body for one bet request."""
+    # Extract inputs
+    sportsbook = data.get('sportsbook', 'draftkings').lower()
+    market = data.get('market', 'passing_yards')
+    player = data.get('player', 'Unknown')
+    projection = float(data.get('projection', 0))
+    actual = float(data.get('actual_or_estimate', 0))
+    odds = float(data.get('odds', -110))
+    correlations = data.get('correlations', [])
+    
+    # Calculate probability of hitting
+    p_hit = 0.5  # Default baseline
+    if projection > 0:
+        # Simple model: p_hit based on how far actual is from projection
+        diff = actual - projection
+        std_dev = projection * 0.15  # Assume 15% std deviation
+        if std_dev > 0:
+            # Simplified: assume normal distribution
+            p_hit = _normal_cdf(diff / std_dev)
+            p_hit = max(0.05, min(0.95, p_hit))  # Clip to [0.05, 0.95]
+    
+    # Map p_hit through the provider's fitted calibration (isotonic/Platt)
+    p_hit_raw = p_hit
+    calibration_method = 'identity'
+    if calibration is not None:
+        p_hit, calibration_method = calibration.calibrate(sportsbook, market, p_hit)
+        p_hit = max(0.05, min(0.95, p_hit))
+    
+    # Convert American odds to implied probability
+    implied_prob = float(odds_math.american_to_implied(odds))
+    
+    # Calculate EV
+    decimal_odds = float(odds_math.american_to_decimal(odds))
+    ev = float(odds_math.expected_value(p_hit, decimal_odds))
+    roi_pct = (ev * 100)
+    
+    # Kelly Criterion: f* = (bp - q) / b where b=payout, p=p_hit, q=1-p_hit (never negative)
+    kelly = float(odds_math.kelly_fraction(p_hit, decimal_odds))
+    kelly_pct = kelly * 100
+    
+    # Confidence: based on sample size and calibration
+    confidence = min(0.95, p_hit) if p_hit > 0.5 else min(0.95, 1 - p_hit)
+    
+    response = {
+        'success': True,
+        'prediction': {
+            'player': player,
+            'market': market,
+            'sportsbook': sportsbook,
+            'projection': projection,
+            'estimated_value': round(actual, 2),
+            'p_hit': round(p_hit, 4),
+            'p_hit_pct': round(p_hit * 100, 2),
+            'p_hit_raw': round(p_hit_raw, 4),
+            'calibration_method': calibration_method,
+            'implied_prob': round(implied_prob, 4),
+            'implied_prob_pct': round(implied_prob * 100, 2),
+        },
+        'valuation': {
+            'odds': odds,
+            'decimal_odds': round(decimal_odds, 2),
+            'ev': round(ev, 4),
+            'ev_pct': round(roi_pct, 2),
+            'kelly_fraction': round(kelly, 4),
+            'kelly_pct': round(kelly_pct, 2),
+            'recommended_bet_size_pct': round(kelly_pct, 2),
+        },
+        'confidence': {
+            'model_confidence': round(confidence, 2),
+            'confidence_pct': round(confidence * 100, 2),
+            'note': 'Confidence based on calibration data and sample size',
+        },
+        'correlations': correlations,
+    }
+    
+    return response
+
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Compute calibrated probability, EV, and Kelly for many bets at once.
+    
+    Request JSON:
+    {
+        "bets": [
+            {"sportsbook": "draftkings", "market": "passing_yards", "player": "Patrick Mahomes",
+             "projection": 300, "actual_or_estimate": 310, "odds": -110},
+            ...
+        ]
+    }
+    """
+    try:
+        data = request.get_json()
+        bets = data.get('bets', [])
+        if not bets:
+            return jsonify({'success': False, 'error': 'No bets provided'}), 400
+        CALIBRATION_REGISTRY.maybe_refresh()
+        return jsonify(_compute_batch(bets, CALIBRATION_REGISTRY.current()))
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+
+def _normal_cdf_array(x: np.ndarray) -> np.ndarray:
+    """Element-wise standard normal CDF; scipy is imported on first use, not at app start-up."""
+    from scipy.special import erf
+    return 0.5 * (1 + erf(x / math.sqrt(2)))
+
+
+def _compute_batch(bets: list, calibration) -> dict:
+    """Vectorized /api/predict for a list of bets; same model as _compute_prediction."""
+    sportsbooks = np.array([str(b.get('sportsbook', 'draftkings')).lower() for b in bets])
+    markets = np.array([str(b.get('market', 'passing_yards')) for b in bets])
+    projection = np.array([float(b.get('projection', 0)) for b in bets])
+    actual = np.array([float(b.get('actual_or_estimate', 0)) for b in bets])
+    odds = np.array([float(b.get('odds', -110)) for b in bets])
+    
+    std_dev = projection * 0.15
+    safe_std = np.where(std_dev > 0, std_dev, 1.0)
+    p_raw = np.where(std_dev > 0, np.clip(_normal_cdf_array((actual - projection) / safe_std), 0.05, 0.95), 0.5)
+    
+    # Calibrate each (sportsbook, market) group with one searchsorted call
+    p_hit = p_raw.copy()
+    methods = np.full(len(bets), 'identity', dtype=object)
+    groups = np.char.add(np.char.add(sportsbooks, '|'), markets)
+    for group in np.unique(groups):
+        mask = groups == group
+        sportsbook, market = group.split('|', 1)
+        p_cal, method = calibration.calibrate(sportsbook, market, p_raw[mask])
+        p_hit[mask] = p_cal
+        methods[mask] = method
+    p_hit = np.clip(p_hit, 0.05, 0.95)
+    
+    implied_prob = odds_math.american_to_implied(odds)
+    decimal_odds = odds_math.american_to_decimal(odds)
+    ev = odds_math.expected_value(p_hit, decimal_odds)
+    kelly = odds_math.kelly_fraction(p_hit, decimal_odds)
+    
+    predictions = []
+    for i, bet in enumerate(bets):
+        predictions.append({
+            'player': bet.get('player', 'Unknown'),
+            'market': markets[i],
+            'sportsbook': sportsbooks[i],
+            'p_hit': round(float(p_hit[i]), 4),
+            'p_hit_raw': round(float(p_raw[i]), 4),
+            'calibration_method': methods[i],
+            'implied_prob': round(float(implied_prob[i]), 4),
+            'decimal_odds': round(float(decimal_odds[i]), 2),
+            'ev': round(float(ev[i]), 4),
+            'kelly_fraction': round(float(kelly[i]), 4),
+        })
+    return {'success': True, 'count': len(predictions), 'predictions': predictions}
+
+
 @app.route('/api/multi-leg', methods=['POST'])
 def predict_multi_leg():
     """
@@ -275,32 +563,20 @@ def predict_multi_leg():
             return jsonify({'success': False, 'error': 'No legs provided'}), 400
         
         # Simple independent probability (no correlation)
-        joint_prob = 1.0
-        for leg in legs:
-            joint_prob *= leg.get('p_hit', 0.5)
+        joint_prob = float(np.prod([leg.get('p_hit', 0.5) for leg in legs]))
         
         # TODO: Apply correlation_matrix adjustment if provided
         # For now, just use independent
         
         # Calculate combined odds and payout
-        combined_decimal_odds = 1.0
-        for leg in legs:
-            odds = leg.get('odds', -110)
-            if odds < 0:
-                decimal = (abs(odds) + 100) / 100
-            else:
-                decimal = odds / 100 + 1
-            combined_decimal_odds *= decimal
-        
+        decimals = odds_math.american_to_decimal([leg.get('odds', -110) for leg in legs])
+        combined_decimal_odds = float(np.prod(decimals))
         combined_payout = combined_decimal_odds - 1
         
-        # EV for multi-leg
-        combined_ev = (joint_prob * combined_payout) - (1 - joint_prob)
+        # EV and Kelly for multi-leg
+        combined_ev = float(odds_math.expected_value(joint_prob, combined_decimal_odds))
         combined_roi = combined_ev * 100
-        
-        # Kelly for multi-leg
-        combined_kelly = (combined_payout * joint_prob - (1 - joint_prob)) / combined_payout if combined_payout > 0 else 0
-        combined_kelly = max(0, combined_kelly)
+        combined_kelly = float(odds_math.kelly_fraction(joint_prob, combined_decimal_odds))
         
         response = {
             'success': True,
@@ -329,13 +605,17 @@ def predict_multi_leg():
 def get_calibration():
     """Return provider calibration data."""
     market = request.args.get('market', 'passing_yards')
-    provider_key = f"baseline_sample_{market}"
+    CALIBRATION_REGISTRY.maybe_refresh()
+    snapshot = CALIBRATION_REGISTRY.current()
+    metrics = snapshot.market_metrics(market)
     
-    if provider_key in PROVIDER_DATA:
+    if metrics is not None:
         return jsonify({
             'success': True,
             'market': market,
-            'data': PROVIDER_DATA[provider_key]
+            'source': snapshot.sources[market],
+            'version': snapshot.version,
+            'data': metrics
         })
     else:
         return jsonify({
@@ -344,6 +624,33 @@ def get_calibration():
         }), 404
 
 
+@app.route('/api/calibration/status', methods=['GET'])
+def calibration_status():
+    """Return the loaded calibration snapshot version and source files."""
+    return jsonify(CALIBRATION_REGISTRY.status())
+
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Return response cache, per-provider odds cache and best-line index counters."""
+    from odds import registered_providers
+    from best_lines import BEST_LINES
+    
+    stats = RESPONSE_CACHE.stats()
+    stats['providers'] = {name: p.cache.snapshot_stats() for name, p in registered_providers().items()}
+    stats['best_lines'] = BEST_LINES.stats()
+    return jsonify(stats)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Request, latency, provider and cache metrics (Prometheus text, or ?format=json)."""
+    if request.args.get('format') == 'json':
+        return jsonify(dict(METRICS.snapshot(), cache=RESPONSE_CACHE.stats()))
+    body = METRICS.render_prometheus(RESPONSE_CACHE.stats())
+    return app.response_class(body, mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint."""
@@ -0,0 +1,286 @@
+"""
+ASGI serving mode for the PrizePicks Correlation ML API.
+
+Keeps every Flask route, but serves ``GET /api/odds`` natively on the event
+loop so that the configured sportsbooks are queried concurrently (with a
+per-provider timeout) instead of blocking a worker. ``GET /api/stream/lines``
+is native too: a server-sent event stream stays open indefinitely and must
+not occupy a WSGI thread while it waits for line moves. All other routes are
+delegated to the Flask WSGI app through ``PooledWsgiToAsgi``, which runs them
+on a bounded per-process thread pool (``ASGI_WSGI_THREADS``, default 32), so
+slow Flask routes in one worker do not queue behind each other.
+
+Run from the repository root:
+    uvicorn frontend.asgi:application --workers 4 --port 5000
+
+Configure live books with ``ODDS_PROVIDER_URLS`` (see ``odds.configured_providers``);
+without it the mock provider is used.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+from frontend.app import (
+    app as flask_app,
+    get_line_stream_hub,
+    METRICS,
+    RESPONSE_CACHE,
+    normalize_params,
+    stream_heartbeat,
+    stream_props,
+)
+from line_stream import format_sse
+from odds import (
+    async_http_client,
+    close_async_http_client,
+    configured_providers,
+    get_best_odds_async,
+    OddsProvider,
+)
+
+
+def build_environ(scope: Dict, body) -> Dict:
+    """PEP 3333 environ for an ASGI HTTP ``scope`` whose request body is the file ``body``."""
+    script_name = scope.get('root_path', '').encode('utf8').decode('latin1')
+    path_info = scope['path'].encode('utf8').decode('latin1')
+    if script_name and path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name,
+        'PATH_INFO': path_info,
+        'QUERY_STRING': scope.get('query_string', b'').decode('ascii'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 0),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.input_terminated': True,  # the whole body is buffered, so EOF ends it
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        name, value = name.decode('latin1'), value.decode('latin1')
+        if name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        elif name == 'content-type':
+            key = 'CONTENT_TYPE'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+class PooledWsgiToAsgi:
+    """ASGI adapter serving a WSGI app concurrently on up to ``max_threads`` threads.
+
+    The request body is read on the event loop (spooled to disk past 1 MB);
+    the WSGI call and iteration of its response run on the pool, and each
+    body chunk is handed back to the loop as it is produced, so streamed
+    responses stay streamed. The pool is created on the first request, so a
+    preloaded app forks without threads and every worker process gets its
+    own pool.
+    """
+
+    def __init__(self, wsgi_application, max_threads: Optional[int] = None):
+        self.wsgi_application = wsgi_application
+        self.max_threads = max_threads or int(os.environ.get('ASGI_WSGI_THREADS', '32'))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix='wsgi')
+            self._pid = os.getpid()
+        return self._executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            raise ValueError(f"WSGI can only handle HTTP requests, not {scope['type']!r}")
+        body = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+        try:
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            body.seek(0)
+            loop = asyncio.get_running_loop()
+
+            def send_sync(message):
+                asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+            await loop.run_in_executor(self.executor, self._run, build_environ(scope, body), send_sync)
+        finally:
+            body.close()
+
+    def _run(self, environ: Dict, send_sync):
+        """Call the WSGI app (on a pool thread), relaying its response through ``send_sync``."""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and response.get('started'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(k.lower().encode('latin1'), v.encode('latin1')) for k, v in headers]
+            return lambda data: send_body(data, True)
+
+        def send_body(data: bytes, more: bool):
+            if not response.get('started'):
+                response['started'] = True
+                send_sync({'type': 'http.response.start', 'status': response['status'],
+                           'headers': response['headers']})
+            send_sync({'type': 'http.response.body', 'body': data, 'more_body': more})
+
+        result = self.wsgi_application(environ, start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    send_body(chunk, True)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        send_body(b'', False)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class AsyncOddsApp:
+    """ASGI app: async odds route + WSGI fallback for the rest of the API."""
+
+    def __init__(self, wsgi_app, providers: Optional[List[OddsProvider]] = None,
+                 provider_timeout: Optional[float] = None):
+        self.wsgi = PooledWsgiToAsgi(wsgi_app)
+        self.providers = providers if providers is not None else configured_providers()
+        self.provider_timeout = provider_timeout or float(os.environ.get('ODDS_PROVIDER_TIMEOUT', '2.0'))
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] == 'http' and scope['path'] == '/api/odds' and scope['method'] == 'GET':
+            start = time.perf_counter()
+            status = await self._odds(scope, send)
+            METRICS.observe_request('/api/odds', 'GET', status, time.perf_counter() - start)
+            return
+        if scope['type'] == 'http' and scope['path'] == '/api/stream/lines' and scope['method'] == 'GET':
+            return await self._stream_lines(scope, receive, send)
+        return await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # warm the pooled HTTP client before the first request arrives
+                async_http_client()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def aclose(self):
+        await close_async_http_client()
+        self.wsgi.shutdown()
+
+    async def _odds(self, scope, send):
+        """Async twin of the Flask ``/api/odds`` route (same params and payloads)."""
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        player = query.get('player', [None])[0]
+        market = query.get('market', [None])[0]
+        sportsbook = query.get('sportsbook', [None])[0]
+
+        if not player or not market:
+            return await _send_json(send, 400, {'error': 'Missing player or market parameter'})
+
+        try:
+            key = normalize_params({'player': player, 'market': market, 'sportsbook': sportsbook})
+            odds = await RESPONSE_CACHE.get_or_compute_async(
+                'odds', key,
+                lambda: get_best_odds_async(player, market, sportsbook,
+                                            providers=self.providers, timeout=self.provider_timeout),
+            )
+            return await _send_json(send, 200, {'success': True, 'data': odds})
+        except Exception as e:
+            return await _send_json(send, 500, {'success': False, 'error': str(e)})
+
+
+    async def _stream_lines(self, scope, receive, send):
+        """Async twin of the Flask ``/api/stream/lines`` SSE route."""
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        props = stream_props(query.get('prop', []), query.get('player', [None])[0], query.get('market', [None])[0])
+        heartbeat = stream_heartbeat(query.get('heartbeat', [None])[0])
+        hub = get_line_stream_hub()
+        sub = hub.subscribe(props or None)
+
+        async def wait_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            sub.close()
+
+        watcher = asyncio.ensure_future(wait_disconnect())
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream; charset=utf-8'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+            await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+            while not sub.closed:
+                batch = await sub.next_batch_async(timeout=heartbeat)
+                if sub.closed:
+                    break
+                chunk = ''.join(format_sse(e) for e in batch) if batch else ': keepalive\n\n'
+                await send({'type': 'http.response.body', 'body': chunk.encode('utf8'), 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        except OSError:
+            pass  # client went away mid-send
+        finally:
+            watcher.cancel()
+            hub.unsubscribe(sub)
+
+
+async def _send_json(send, status: int, payload: Dict) -> int:
+    body = json.dumps(payload).encode('utf8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('ascii')),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+    return status
+
+
+application = AsyncOddsApp(flask_app)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run('frontend.asgi:application', host='127.0.0.1', port=5000,
+                workers=int(os.environ.get('WEB_CONCURRENCY', '4')))
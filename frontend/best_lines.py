@@ -0,0 +1,308 @@
+"""
+Materialized best-line view across sportsbooks.
+
+Provides:
+- One row per (player, market, book) with the latest line and prices
+- Per-prop best over (lowest line, then best price) and best under
+  (highest line, then best price), consensus line and no-vig fair
+  probabilities, kept up to date as individual book quotes change
+- O(1) summaries for one prop and vectorized scans over a whole slate
+
+Per-prop state lives in growable NumPy columns indexed by a prop id, so a
+slate of hundreds of props is a handful of ``np.take`` calls.
+"""
+
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+from odds_math import american_to_decimal, fair_probabilities
+
+PropKey = Tuple[str, str]
+
+
+def prop_key(player: str, market: str) -> PropKey:
+    return (str(player).strip().lower(), str(market).strip().lower())
+
+
+class _Column:
+    """Append-only growable NumPy column."""
+
+    __slots__ = ('data', 'size')
+
+    def __init__(self, dtype, fill, capacity: int = 64):
+        self.data = np.full(capacity, fill, dtype=dtype)
+        self.size = 0
+
+    def append(self, value) -> int:
+        if self.size == self.data.shape[0]:
+            grown = np.empty(self.data.shape[0] * 2, dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size] = value
+        self.size += 1
+        return self.size - 1
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+class BestLineIndex:
+    """Incrementally maintained best lines per (player, market)."""
+
+    PROP_COLUMNS = {
+        'best_over_price': (np.float64, np.nan), 'best_over_line': (np.float64, np.nan),
+        'best_over_book': (np.int32, -1),
+        'best_under_price': (np.float64, np.nan), 'best_under_line': (np.float64, np.nan),
+        'best_under_book': (np.int32, -1),
+        'consensus_line': (np.float64, np.nan), 'fair_over': (np.float64, np.nan),
+        'n_books': (np.int32, 0),
+    }
+
+    def __init__(self, vig_method: str = 'multiplicative'):
+        self.vig_method = vig_method
+        self._lock = threading.RLock()
+        self.books: List[str] = []
+        self._book_ids: Dict[str, int] = {}
+        self.props: List[Tuple[str, str]] = []  # display (player, market) per prop id
+        self._prop_ids: Dict[PropKey, int] = {}
+        # per prop: {book_id: (line, over, under, fair_over)}
+        self._quotes: List[Dict[int, Tuple[float, float, float, float]]] = []
+        self._sources: List[str] = []
+        self._book_sources: List[Dict[int, str]] = []  # per prop: {book_id: source of its last payload}
+        self._cols = {name: _Column(dtype, fill) for name, (dtype, fill) in self.PROP_COLUMNS.items()}
+        self.updates = 0
+        self.recomputes = 0
+
+    def __len__(self) -> int:
+        return len(self.props)
+
+    def _book_id(self, book: str) -> int:
+        bid = self._book_ids.get(book)
+        if bid is None:
+            bid = self._book_ids[book] = len(self.books)
+            self.books.append(book)
+        return bid
+
+    def _prop_id(self, player: str, market: str) -> int:
+        key = prop_key(player, market)
+        pid = self._prop_ids.get(key)
+        if pid is None:
+            pid = self._prop_ids[key] = len(self.props)
+            self.props.append((player, market))
+            self._quotes.append({})
+            self._sources.append('')
+            self._book_sources.append({})
+            for name, (_dtype, fill) in self.PROP_COLUMNS.items():
+                self._cols[name].append(fill)
+        return pid
+
+    def update(self, player: str, market: str, book: str, line: Optional[float],
+               over: Optional[float], under: Optional[float]) -> bool:
+        """Apply one book's quote. Returns False if it didn't change anything."""
+        line = float('nan') if line is None else float(line)
+        over = float('nan') if over is None else float(over)
+        under = float('nan') if under is None else float(under)
+        with self._lock:
+            pid = self._prop_id(player, market)
+            bid = self._book_id(book)
+            quotes = self._quotes[pid]
+            old = quotes.get(bid)
+            if old is not None and _same(old[:3], (line, over, under)):
+                return False
+            quotes[bid] = (line, over, under, float(fair_probabilities(over, under, self.vig_method)[0]))
+            self.updates += 1
+            self._refresh_prop(pid, bid, old)
+            return True
+
+    def remove(self, player: str, market: str, book: str) -> bool:
+        """Drop a book's quote (e.g. the book pulled the prop)."""
+        with self._lock:
+            pid = self._prop_ids.get(prop_key(player, market))
+            bid = self._book_ids.get(book)
+            if pid is None or bid is None or bid not in self._quotes[pid]:
+                return False
+            old = self._quotes[pid].pop(bid)
+            self._book_sources[pid].pop(bid, None)
+            self._refresh_prop(pid, bid, old)
+            return True
+
+    def ingest(self, odds_data: Optional[Dict]) -> int:
+        """Apply a provider payload as the full set of that source's books for the prop.
+
+        Books the same source quoted before but left out of this payload have
+        pulled the prop and are removed; books from other sources are kept.
+        A payload with ``errors`` (a fan-out round where some books timed out
+        or failed) is partial, so it only updates: a missing book may simply
+        not have answered. Returns the number of changed quotes.
+        """
+        if not odds_data:
+            return 0
+        player, market = odds_data['player'], odds_data['market']
+        source = odds_data.get('source', '')
+        books = odds_data.get('sportsbooks', {})
+        changed = 0
+        with self._lock:
+            for book, q in books.items():
+                changed += self.update(player, market, book, q.get('line'), q.get('over'), q.get('under'))
+            pid = self._prop_id(player, market)
+            owners = self._book_sources[pid]
+            if not odds_data.get('errors'):
+                for bid in [b for b in self._quotes[pid] if self.books[b] not in books and owners.get(b) == source]:
+                    changed += self.remove(player, market, self.books[bid])
+            for book in books:
+                owners[self._book_ids[book]] = source
+            self._sources[pid] = source
+        return changed
+
+    def _refresh_prop(self, pid: int, bid: int, old: Optional[Tuple]):
+        """Update the prop's materialized columns after ``bid`` changed.
+
+        If the changed book was not the current best, comparing it with the
+        current best is enough; only when the best book got worse (or was
+        removed) are the prop's books rescanned.
+        """
+        c = {name: col.data for name, col in self._cols.items()}
+        quotes = self._quotes[pid]
+        new = quotes.get(bid)
+        was_best = bid in (c['best_over_book'][pid], c['best_under_book'][pid])
+        if new is not None and not was_best and c['best_over_book'][pid] >= 0:
+            line, over, under, _fair = new
+            if _over_key(line, over) > _over_key(c['best_over_line'][pid], c['best_over_price'][pid]):
+                c['best_over_book'][pid], c['best_over_line'][pid], c['best_over_price'][pid] = bid, line, over
+            if _under_key(line, under) > _under_key(c['best_under_line'][pid], c['best_under_price'][pid]):
+                c['best_under_book'][pid], c['best_under_line'][pid], c['best_under_price'][pid] = bid, line, under
+        else:
+            self.recomputes += 1
+            best_over = max(quotes.items(), key=lambda kv: _over_key(kv[1][0], kv[1][1]), default=None)
+            best_under = max(quotes.items(), key=lambda kv: _under_key(kv[1][0], kv[1][2]), default=None)
+            if best_over is None:
+                for name, (_dtype, fill) in self.PROP_COLUMNS.items():
+                    c[name][pid] = fill
+                return
+            c['best_over_book'][pid], (c['best_over_line'][pid], c['best_over_price'][pid]) = (
+                best_over[0], best_over[1][:2])
+            c['best_under_book'][pid], c['best_under_line'][pid], c['best_under_price'][pid] = (
+                best_under[0], best_under[1][0], best_under[1][2])
+        lines = [q[0] for q in quotes.values() if q[0] == q[0]]
+        fairs = [q[3] for q in quotes.values() if q[3] == q[3]]
+        c['consensus_line'][pid] = float(np.median(lines)) if lines else np.nan
+        c['fair_over'][pid] = sum(fairs) / len(fairs) if fairs else np.nan
+        c['n_books'][pid] = len(quotes)
+
+    def summary(self, player: str, market: str) -> Optional[Dict]:
+        """Best over/under, consensus line and fair probabilities for one prop."""
+        with self._lock:
+            pid = self._prop_ids.get(prop_key(player, market))
+            if pid is None or not self._quotes[pid]:
+                return None
+            c = {name: col.data[pid] for name, col in self._cols.items()}
+            quotes = dict(self._quotes[pid])
+            source = self._sources[pid]
+        all_books = {self.books[b]: {'over': _num(q[1]), 'under': _num(q[2]), 'line': _num(q[0])}
+                     for b, q in quotes.items()}
+        fair_over = _num(c['fair_over'])
+        return {
+            'player': player,
+            'market': market,
+            'line': _num(c['consensus_line']),
+            'over': {'odds': _num(c['best_over_price']), 'sportsbook': self.books[c['best_over_book']],
+                     'line': _num(c['best_over_line'])},
+            'under': {'odds': _num(c['best_under_price']), 'sportsbook': self.books[c['best_under_book']],
+                      'line': _num(c['best_under_line'])},
+            'fair': {
+                'over': round(fair_over, 4) if fair_over is not None else None,
+                'under': round(1 - fair_over, 4) if fair_over is not None else None,
+                'by_book': {self.books[b]: round(q[3], 4) for b, q in quotes.items() if q[3] == q[3]},
+            },
+            'all_sportsbooks': all_books,
+            'source': source,
+        }
+
+    def slate(self, props: Optional[Iterable[Tuple[str, str]]] = None) -> Dict[str, np.ndarray]:
+        """Column arrays for many props at once (all props when ``props`` is None).
+
+        Unknown props get NaN prices and ``-1`` book ids; ``found`` marks them.
+        Book columns are returned as names.
+        """
+        with self._lock:
+            n = len(self.props)
+            if props is None:
+                ids = np.arange(n, dtype=np.int64)
+                keys = list(self.props)
+            else:
+                keys = list(props)
+                ids = np.array([self._prop_ids.get(prop_key(p, m), -1) for p, m in keys], dtype=np.int64)
+            found = ids >= 0
+            safe = np.where(found, ids, 0)
+            out = {'player': np.array([k[0] for k in keys], dtype=object),
+                   'market': np.array([k[1] for k in keys], dtype=object),
+                   'found': found}
+            for name, col in self._cols.items():
+                values = col.view()
+                if n == 0:
+                    taken = np.full(len(keys), self.PROP_COLUMNS[name][1], dtype=values.dtype)
+                else:
+                    taken = np.take(values, safe)
+                    taken = np.where(found, taken, self.PROP_COLUMNS[name][1])
+                out[name] = taken
+            book_names = np.array(self.books + [None], dtype=object)
+        for side in ('over', 'under'):
+            out[f'best_{side}_book'] = book_names[out[f'best_{side}_book']]
+        return out
+
+    def summaries(self, props: List[Tuple[str, str]]) -> List[Dict]:
+        """Compact per-prop rows built from one ``slate`` pass (no per-book detail)."""
+        cols = self.slate(props)
+        fair_over = np.round(cols['fair_over'], 4)
+        rows = []
+        for i, (player, market) in enumerate(props):
+            if not cols['found'][i]:
+                rows.append({'player': player, 'market': market,
+                             'error': f'No odds found for {player} {market}'})
+                continue
+            rows.append({
+                'player': player,
+                'market': market,
+                'line': _num(cols['consensus_line'][i]),
+                'over': {'odds': _num(cols['best_over_price'][i]), 'sportsbook': cols['best_over_book'][i],
+                         'line': _num(cols['best_over_line'][i])},
+                'under': {'odds': _num(cols['best_under_price'][i]), 'sportsbook': cols['best_under_book'][i],
+                          'line': _num(cols['best_under_line'][i])},
+                'fair': {'over': _num(fair_over[i]),
+                         'under': None if _num(fair_over[i]) is None else round(1 - fair_over[i], 4)},
+                'books': int(cols['n_books'][i]),
+            })
+        return rows
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'props': len(self.props), 'books': len(self.books),
+                    'updates': self.updates, 'recomputes': self.recomputes}
+
+
+def _same(a, b) -> bool:
+    return all(x == y or (x != x and y != y) for x, y in zip(a, b))
+
+
+def _num(x):
+    x = float(x)
+    return None if x != x else x
+
+
+def _over_key(line: float, price: float):
+    # lower line is better for the over; then the bigger payout
+    return (-line if line == line else float('-inf'), float(american_to_decimal(price)) if price == price else float('-inf'))
+
+
+def _under_key(line: float, price: float):
+    return (line if line == line else float('-inf'), float(american_to_decimal(price)) if price == price else float('-inf'))
+
+
+BEST_LINES = BestLineIndex(os.environ.get('ODDS_VIG_METHOD', 'multiplicative'))
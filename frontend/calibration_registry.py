@@ -0,0 +1,266 @@
+"""
+Hot-reloadable registry of provider calibration data.
+
+Provides:
+- Discovery of ``*_provider_metrics.json`` and ``*_calibration_maps.json``
+  backtest artifacts
+- Change detection from a manifest of file names, sizes and mtimes
+- Atomic swap of immutable snapshots, rebuilt off the request path
+- Compact NumPy calibration curves with O(log n) lookup
+"""
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+from calibration import CalibrationMap, MAPS_SUFFIX, MIN_SAMPLES
+
+
+SUFFIX = '_provider_metrics'
+
+KNOWN_MARKETS = [
+    'passing_yards',
+    'receiving_yards',
+    'rushing_yards',
+    'passing_touchdowns',
+    'receiving_touchdowns',
+    'rushing_touchdowns',
+]
+
+
+def parse_metrics_filename(path: Path, markets: Iterable[str] = KNOWN_MARKETS,
+                           suffix: str = SUFFIX) -> Optional[Tuple[str, str]]:
+    """Split ``{date_tag}_{market}{suffix}.json`` into (date_tag, market)."""
+    stem = path.stem
+    if not stem.endswith(suffix):
+        return None
+    stem = stem[:-len(suffix)]
+    for market in sorted(markets, key=len, reverse=True):
+        if stem.endswith('_' + market):
+            return stem[:-len(market) - 1], market
+    # unknown market: assume the last two tokens (e.g. "receiving_yards")
+    parts = stem.rsplit('_', 2)
+    if len(parts) == 3:
+        return parts[0], f'{parts[1]}_{parts[2]}'
+    return None
+
+
+class ProviderCalibration:
+    """Calibration curve for one provider/market held as sorted NumPy arrays."""
+
+    __slots__ = ('provider', 'market', 'p_mean', 'y_mean', 'counts', 'brier_score', 'n_predictions')
+
+    def __init__(self, provider: str, market: str, p_mean: np.ndarray, y_mean: np.ndarray,
+                 counts: np.ndarray, brier_score: float, n_predictions: int):
+        self.provider = provider
+        self.market = market
+        self.p_mean = p_mean
+        self.y_mean = y_mean
+        self.counts = counts
+        self.brier_score = brier_score
+        self.n_predictions = n_predictions
+
+    @classmethod
+    def from_metrics(cls, provider: str, market: str, metrics: Dict) -> 'ProviderCalibration':
+        """Build from one provider entry of a provider_metrics JSON file."""
+        bins = [b for b in metrics.get('calibration', [])
+                if b.get('n') and b.get('p_mean') is not None and b.get('y_mean') is not None]
+        p_mean = np.array([b['p_mean'] for b in bins], dtype=np.float64)
+        y_mean = np.array([b['y_mean'] for b in bins], dtype=np.float64)
+        counts = np.array([b['n'] for b in bins], dtype=np.int32)
+        order = np.argsort(p_mean, kind='stable')
+        return cls(provider, market, p_mean[order], y_mean[order], counts[order],
+                   float(metrics.get('brier_score', float('nan'))),
+                   int(metrics.get('n_predictions', int(counts.sum()))))
+
+    def lookup(self, p):
+        """Observed hit frequency at predicted probability ``p`` (scalar or array).
+
+        Linear interpolation between bin means, located with ``np.searchsorted``;
+        values outside the fitted range are clamped to the end bins. Returns ``p``
+        unchanged when the curve has no populated bins.
+        """
+        p_arr = np.asarray(p, dtype=np.float64)
+        if self.p_mean.size == 0:
+            return p_arr if p_arr.ndim else float(p_arr)
+        if self.p_mean.size == 1:
+            out = np.full_like(p_arr, self.y_mean[0])
+            return out if out.ndim else float(out)
+        idx = np.clip(np.searchsorted(self.p_mean, p_arr, side='right'), 1, self.p_mean.size - 1)
+        x0, x1 = self.p_mean[idx - 1], self.p_mean[idx]
+        y0, y1 = self.y_mean[idx - 1], self.y_mean[idx]
+        span = np.where(x1 > x0, x1 - x0, 1.0)
+        t = np.clip((p_arr - x0) / span, 0.0, 1.0)
+        out = y0 + t * (y1 - y0)
+        return out if out.ndim else float(out)
+
+
+class CalibrationSnapshot:
+    """Immutable view of every calibration loaded from one directory scan."""
+
+    def __init__(self, version: int, manifest: Tuple, curves: Dict[Tuple[str, str], ProviderCalibration],
+                 raw: Dict[str, Dict], sources: Dict[str, str], loaded_at: float,
+                 maps: Optional[Dict[Tuple[str, str], CalibrationMap]] = None):
+        self.version = version
+        self.manifest = manifest
+        self.curves = curves
+        self.raw = raw
+        self.sources = sources
+        self.loaded_at = loaded_at
+        self.maps = maps or {}
+
+    def get(self, provider: str, market: str) -> Optional[ProviderCalibration]:
+        return self.curves.get((provider.lower(), market))
+
+    def get_map(self, provider: str, market: str) -> Optional[CalibrationMap]:
+        return self.maps.get((provider.lower(), market))
+
+    def calibrate(self, provider: str, market: str, p):
+        """Calibrate ``p`` (scalar or array) for one provider/market.
+
+        Uses the fitted map when one exists, otherwise the binned curve from
+        the provider metrics (only if it has at least ``MIN_SAMPLES``
+        predictions behind it), otherwise returns ``p`` unchanged. Returns
+        ``(p_calibrated, method)``.
+        """
+        fitted = self.get_map(provider, market)
+        if fitted is not None:
+            return fitted.apply(p), fitted.method
+        curve = self.get(provider, market)
+        if curve is not None and curve.p_mean.size and curve.n_predictions >= MIN_SAMPLES:
+            return curve.lookup(p), 'binned'
+        return p, 'identity'
+
+    def market_metrics(self, market: str) -> Optional[Dict]:
+        """Raw provider metrics JSON (newest backtest) for a market."""
+        return self.raw.get(market)
+
+    def markets(self) -> List[str]:
+        return sorted(self.raw)
+
+
+EMPTY_SNAPSHOT = CalibrationSnapshot(0, (), {}, {}, {}, 0.0)
+
+
+class CalibrationRegistry:
+    """Watches a backtest directory and serves the latest calibration snapshot.
+
+    Readers call ``current()`` and get an immutable snapshot; reloads build a
+    new snapshot off to the side and replace the reference in one assignment,
+    so requests never block on, or observe, a half-loaded state.
+    """
+
+    def __init__(self, directory='data/cache/backtests', poll_interval: float = 5.0,
+                 markets: Iterable[str] = KNOWN_MARKETS):
+        self.directory = Path(directory)
+        self.poll_interval = poll_interval
+        self.markets = list(markets)
+        self._snapshot = EMPTY_SNAPSHOT
+        self._reload_lock = threading.Lock()
+        self._last_check = 0.0
+
+    def current(self) -> CalibrationSnapshot:
+        return self._snapshot
+
+    def manifest(self) -> Tuple:
+        """(name, mtime_ns, size) for every metrics/maps file, sorted by name."""
+        if not self.directory.exists():
+            return ()
+        entries = []
+        paths = list(self.directory.glob(f'*{SUFFIX}.json')) + list(self.directory.glob(f'*{MAPS_SUFFIX}.json'))
+        for path in paths:
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((path.name, st.st_mtime_ns, st.st_size))
+        return tuple(sorted(entries))
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rescan synchronously; swap in a new snapshot if anything changed.
+
+        Returns True when a new snapshot was installed.
+        """
+        with self._reload_lock:
+            self._last_check = time.monotonic()
+            manifest = self.manifest()
+            old = self._snapshot
+            if not force and manifest == old.manifest and old.version:
+                return False
+            self._snapshot = self._build(manifest, old)
+            return True
+
+    def maybe_refresh(self):
+        """Cheap per-request hook: at most once per poll interval, check for
+        changes in a background thread without blocking the caller."""
+        if time.monotonic() - self._last_check < self.poll_interval:
+            return
+        if not self._reload_lock.acquire(blocking=False):
+            return  # a reload is already running
+        self._last_check = time.monotonic()
+        self._reload_lock.release()
+        threading.Thread(target=self.refresh, daemon=True).start()
+
+    def _build(self, manifest: Tuple, previous: CalibrationSnapshot) -> CalibrationSnapshot:
+        curves: Dict[Tuple[str, str], ProviderCalibration] = {}
+        maps: Dict[Tuple[str, str], CalibrationMap] = {}
+        raw: Dict[str, Dict] = {}
+        sources: Dict[str, str] = {}
+        # oldest first so the newest backtest for a market wins
+        for name, _mtime, _size in sorted(manifest, key=lambda e: e[1]):
+            path = self.directory / name
+            maps_parsed = parse_metrics_filename(path, self.markets, suffix=MAPS_SUFFIX)
+            if maps_parsed is not None:
+                self._load_maps(path, maps_parsed[1], maps, previous)
+                continue
+            parsed = parse_metrics_filename(path, self.markets)
+            if parsed is None:
+                continue
+            _tag, market = parsed
+            try:
+                with open(path, 'r') as f:
+                    metrics = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not load provider calibration {path}: {e}")
+                # keep whatever the previous snapshot had for this market
+                if market in previous.raw:
+                    raw[market] = previous.raw[market]
+                    sources[market] = previous.sources[market]
+                    curves.update({k: v for k, v in previous.curves.items() if k[1] == market})
+                continue
+            raw[market] = metrics
+            sources[market] = name
+            curves = {k: v for k, v in curves.items() if k[1] != market}
+            for provider, provider_metrics in metrics.items():
+                curves[(provider.lower(), market)] = ProviderCalibration.from_metrics(provider, market, provider_metrics)
+        return CalibrationSnapshot(previous.version + 1, manifest, curves, raw, sources, time.time(), maps)
+
+    def _load_maps(self, path: Path, market: str, maps: Dict, previous: CalibrationSnapshot):
+        try:
+            with open(path, 'r') as f:
+                payload = json.load(f)
+            loaded = {(provider.lower(), market): CalibrationMap.from_dict(d)
+                      for provider, d in payload.get('providers', {}).items()}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Could not load calibration maps {path}: {e}")
+            loaded = {k: v for k, v in previous.maps.items() if k[1] == market}
+        for k in [k for k in maps if k[1] == market]:
+            del maps[k]
+        maps.update(loaded)
+
+    def status(self) -> Dict:
+        snap = self._snapshot
+        return {
+            'version': snap.version,
+            'loaded_at': snap.loaded_at,
+            'markets': {m: snap.sources[m] for m in snap.markets()},
+            'curves': len(snap.curves),
+            'maps': {f'{provider}/{market}': m.method for (provider, market), m in sorted(snap.maps.items())},
+        }
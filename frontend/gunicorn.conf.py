@@ -0,0 +1,29 @@
+"""
+Gunicorn config for the prefork (preload) serving mode.
+
+The master process imports the app and loads shared read-only state (the
+provider calibration registry, odds tables) once, then forks workers that
+share those pages copy-on-write instead of each re-loading everything.
+
+Run from the repository root:
+    gunicorn -c frontend/gunicorn.conf.py frontend.asgi:application
+
+Set ``GUNICORN_WORKER_CLASS=sync`` and serve ``frontend.app:app`` to run the
+plain Flask app with the same preload behaviour.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'uvicorn.workers.UvicornWorker')
+preload_app = True
+
+
+def when_ready(server):
+    """Runs in the master after the app is imported and before any fork."""
+    from frontend.app import preload
+
+    preload()
+    server.log.info('Preloaded shared API state before forking workers')
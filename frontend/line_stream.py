@@ -0,0 +1,421 @@
+"""
+Line-move streaming for the API.
+
+Provides:
+- Odds sources: a provider poller and a replay source for recorded snapshots
+- Change detection per (player, market, book) with re-priced p_hit / EV
+- A hub with one background poller fanned out to every subscriber
+- Per-subscriber coalescing (latest quote per prop wins) and bounded queues,
+  so a slow client never holds more than ``max_pending`` props in memory
+- Server-sent event formatting
+
+Snapshots (recorded or replayed) are JSON lines:
+    {"ts": "...", "quotes": [{"player": ..., "market": ..., "book": ...,
+                              "line": ..., "over": ..., "under": ...}, ...]}
+
+Record a replay file from the configured providers:
+    python frontend/line_stream.py --record data/cache/odds_snapshots.jsonl --count 20 --interval 30
+"""
+
+import asyncio
+import json
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from odds import OddsProvider, american_to_decimal, american_to_implied_probability, get_provider
+from best_lines import BEST_LINES
+from odds_cache import odds_cache_key
+
+PropKey = Tuple[str, str]  # (normalized player, market)
+
+
+def prop_key(player: str, market: str) -> PropKey:
+    return (str(player).strip().lower(), str(market).strip().lower())
+
+
+def quotes_from_odds(odds_data: Optional[Dict]) -> List[Dict]:
+    """Flatten a provider ``get_odds`` payload into one quote per book."""
+    if not odds_data:
+        return []
+    return [
+        {'player': odds_data['player'], 'market': odds_data['market'], 'book': book,
+         'line': q.get('line'), 'over': q.get('over'), 'under': q.get('under')}
+        for book, q in odds_data.get('sportsbooks', {}).items()
+    ]
+
+
+class ProviderPollSource:
+    """Polls odds providers for the props subscribers are watching."""
+
+    def __init__(self, providers: Optional[List[OddsProvider]] = None, ticks=None):
+        self.providers = providers or [get_provider('mock')]
+        self.ticks = ticks  # optional scripts.odds_ticks.TickStore recording every poll
+
+    def poll(self, props: Iterable[Tuple[str, str]]) -> List[Dict]:
+        quotes = []
+        for player, market in props:
+            for provider in self.providers:
+                try:
+                    # always hit the source, but refresh the provider cache for API lookups
+                    odds_data = provider._fetch(player, market)
+                    provider.cache.store(odds_cache_key(player, market), odds_data)
+                    BEST_LINES.ingest(odds_data)
+                    if self.ticks is not None:
+                        self.ticks.append_odds(odds_data)
+                    quotes.extend(quotes_from_odds(odds_data))
+                except Exception as e:
+                    print(f"Warning: odds poll failed for {provider.name} {player} {market}: {e}")
+        return quotes
+
+
+class ReplaySource:
+    """Feeds recorded snapshots, one per poll, for tests and local demos."""
+
+    def __init__(self, path, loop: bool = False):
+        self.path = Path(path)
+        self.loop = loop
+        with open(self.path, 'r') as f:
+            self.snapshots = [json.loads(line)['quotes'] for line in f if line.strip()]
+        self.position = 0
+
+    @property
+    def exhausted(self) -> bool:
+        return not self.loop and self.position >= len(self.snapshots)
+
+    def poll(self, props=None) -> List[Dict]:
+        if not self.snapshots or self.exhausted:
+            return []
+        quotes = self.snapshots[self.position % len(self.snapshots)]
+        self.position += 1
+        return quotes
+
+
+def record_snapshots(source, props: List[Tuple[str, str]], path, count: int = 10,
+                     interval: float = 30.0) -> Path:
+    """Append ``count`` polled snapshots to a JSONL replay file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as f:
+        for i in range(count):
+            f.write(json.dumps({'ts': datetime.now().isoformat(), 'quotes': source.poll(props)}) + '\n')
+            f.flush()
+            if i < count - 1:
+                time.sleep(interval)
+    return path
+
+
+def _ev(p: float, american: Optional[float]) -> Optional[float]:
+    if american is None:
+        return None
+    return p * (american_to_decimal(american) - 1) - (1 - p)
+
+
+def price_quote(quote: Dict, projection: Optional[float], calibration=None) -> Dict:
+    """Re-price one quote with the /api/predict model.
+
+    p_over is the normal-CDF probability that the stat beats the line given
+    our projection (std = 15% of the line), calibrated per book when a
+    calibration snapshot is supplied.
+    """
+    line = quote.get('line')
+    priced = {}
+    if projection is None or not line:
+        return priced
+    std_dev = abs(line) * 0.15
+    p_over = 0.5 * (1 + math.erf((projection - line) / std_dev / math.sqrt(2))) if std_dev else 0.5
+    p_over = max(0.05, min(0.95, p_over))
+    if calibration is not None:
+        p_over, _method = calibration.calibrate(quote['book'], quote['market'], p_over)
+        p_over = max(0.05, min(0.95, float(p_over)))
+    ev_over = _ev(p_over, quote.get('over'))
+    ev_under = _ev(1 - p_over, quote.get('under'))
+    priced['projection'] = round(projection, 2)
+    priced['p_hit'] = round(p_over, 4)
+    if quote.get('over') is not None:
+        priced['implied_prob'] = round(american_to_implied_probability(quote['over']), 4)
+    priced['ev_over'] = round(ev_over, 4) if ev_over is not None else None
+    priced['ev_under'] = round(ev_under, 4) if ev_under is not None else None
+    return priced
+
+
+class Subscription:
+    """One client's pending events, coalesced per (player, market, book).
+
+    A newer quote for a prop replaces the pending one but keeps the original
+    ``previous`` values, so the client sees the net move; a burst that ends
+    where it started is dropped entirely.
+    """
+
+    def __init__(self, props: Optional[Set[PropKey]] = None, max_pending: int = 500,
+                 coalesce_window: float = 0.1):
+        self.props = props
+        self.max_pending = max_pending
+        self.coalesce_window = coalesce_window
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.closed = False
+        self._pending: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+        self._cond = threading.Condition()
+        # (loop, asyncio.Event) of async readers parked in next_batch_async
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    def wants(self, event: Dict) -> bool:
+        return self.props is None or prop_key(event['player'], event['market']) in self.props
+
+    def offer(self, events: List[Dict]):
+        with self._cond:
+            for event in events:
+                if not self.wants(event):
+                    continue
+                key = (prop_key(event['player'], event['market']), event['book'])
+                queued = self._pending.pop(key, None)
+                if queued is not None:
+                    self.coalesced += 1
+                    if 'snapshot' in (queued['type'], event['type']):
+                        event = dict(event, type='snapshot')
+                        event.pop('previous', None)
+                    else:
+                        event = dict(event, previous=queued['previous'])
+                        if all(event['previous'].get(f) == event.get(f) for f in ('line', 'over', 'under')):
+                            continue  # moved and moved back before the client read it
+                self._pending[key] = event
+                # backpressure: a client this far behind loses its oldest props
+                while len(self._pending) > self.max_pending:
+                    self._pending.popitem(last=False)
+                    self.dropped += 1
+            if self._pending:
+                self._wake()
+
+    def next_batch(self, timeout: Optional[float] = None) -> List[Dict]:
+        """Block until events are pending (or timeout/close), then drain them.
+
+        After the first event arrives we wait ``coalesce_window`` more so a
+        burst of moves goes out as one batch.
+        """
+        with self._cond:
+            if not self._pending and not self.closed:
+                self._cond.wait(timeout)
+            if not self._pending:
+                return []
+        if self.coalesce_window:
+            time.sleep(self.coalesce_window)
+        return self._drain()
+
+    async def next_batch_async(self, timeout: Optional[float] = None) -> List[Dict]:
+        """``next_batch`` for event-loop readers: waits without holding a thread."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            if self._pending or self.closed:
+                waiter[1].set()
+            else:
+                self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        with self._cond:
+            if not self._pending:
+                return []
+        if self.coalesce_window:
+            await asyncio.sleep(self.coalesce_window)
+        return self._drain()
+
+    def _drain(self) -> List[Dict]:
+        with self._cond:
+            batch = list(self._pending.values())
+            self._pending.clear()
+        self.delivered += len(batch)
+        return batch
+
+    def _wake(self):
+        """Wake blocked and async readers; called with ``_cond`` held."""
+        self._cond.notify_all()
+        for loop, event in self._waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # that reader's loop is gone
+        self._waiters.clear()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._wake()
+
+
+class LineStreamHub:
+    """Single odds poller fanned out to many subscribers.
+
+    The poller thread starts with the first subscriber and stops when the
+    last one leaves; only props someone is watching are polled (all of the
+    default ``watch`` list when a subscriber asks for everything).
+    """
+
+    def __init__(self, source, poll_interval: float = 5.0,
+                 projections: Optional[Dict[PropKey, float]] = None,
+                 calibration: Optional[Callable] = None,
+                 watch: Iterable[Tuple[str, str]] = (),
+                 max_pending: int = 500, coalesce_window: float = 0.1):
+        self.source = source
+        self.poll_interval = poll_interval
+        self.projections = dict(projections or {})
+        self.calibration = calibration
+        self.watch = [(p, m) for p, m in watch]
+        self.max_pending = max_pending
+        self.coalesce_window = coalesce_window
+        self.polls = 0
+        self.moves = 0
+        self._state: Dict[Tuple, Dict] = {}
+        self._seq = 0
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def subscribe(self, props: Optional[Iterable[Tuple[str, str]]] = None) -> Subscription:
+        """Register a client; it first receives the current quote for each prop."""
+        keys = {prop_key(p, m) for p, m in props} if props else None
+        sub = Subscription(keys, self.max_pending, self.coalesce_window)
+        with self._lock:
+            self._subscribers.append(sub)
+            current = [dict(e, type='snapshot') for e in self._state.values()]
+            self._ensure_running()
+        sub.offer(current)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        sub.close()
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    def watched_props(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            subs = list(self._subscribers)
+        wanted = {}
+        for sub in subs:
+            for player, market in (self.watch if sub.props is None else sub.props):
+                wanted.setdefault(prop_key(player, market), (player, market))
+        return list(wanted.values())
+
+    def poll_once(self) -> List[Dict]:
+        """Poll the source, detect moves, re-price them and fan out. Returns the events."""
+        quotes = self.source.poll(self.watched_props())
+        with self._lock:
+            self.polls += 1
+            events = self._apply(quotes)
+            subs = list(self._subscribers)
+        for sub in subs:
+            sub.offer(events)
+        return events
+
+    def _apply(self, quotes: List[Dict]) -> List[Dict]:
+        calibration = self.calibration() if self.calibration else None
+        # opening consensus stands in for a projection we weren't given
+        for pk, lines in _group_lines(quotes).items():
+            if pk not in self.projections and lines:
+                self.projections[pk] = sum(lines) / len(lines)
+        events = []
+        for quote in quotes:
+            pk = prop_key(quote['player'], quote['market'])
+            key = (pk, quote['book'])
+            prev = self._state.get(key)
+            if prev is not None and all(prev.get(f) == quote.get(f) for f in ('line', 'over', 'under')):
+                continue
+            self._seq += 1
+            event = {
+                'id': self._seq,
+                'type': 'snapshot' if prev is None else 'move',
+                'ts': time.time(),
+                'player': quote['player'], 'market': quote['market'], 'book': quote['book'],
+                'line': quote.get('line'), 'over': quote.get('over'), 'under': quote.get('under'),
+            }
+            event.update(price_quote(quote, self.projections.get(pk), calibration))
+            if prev is not None:
+                event['previous'] = {f: prev.get(f) for f in ('line', 'over', 'under', 'p_hit')}
+                self.moves += 1
+            self._state[key] = event
+            events.append(event)
+        return events
+
+    def _ensure_running(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='line-stream-poller', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"Warning: line stream poll failed: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            subs, self._subscribers = list(self._subscribers), []
+        for sub in subs:
+            sub.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            subs = list(self._subscribers)
+        return {
+            'subscribers': len(subs),
+            'polls': self.polls,
+            'moves': self.moves,
+            'props_tracked': len(self._state),
+            'poll_interval': self.poll_interval,
+            'delivered': sum(s.delivered for s in subs),
+            'coalesced': sum(s.coalesced for s in subs),
+            'dropped': sum(s.dropped for s in subs),
+        }
+
+
+def _group_lines(quotes: List[Dict]) -> Dict[PropKey, List[float]]:
+    grouped: Dict[PropKey, List[float]] = {}
+    for q in quotes:
+        if q.get('line') is not None:
+            grouped.setdefault(prop_key(q['player'], q['market']), []).append(q['line'])
+    return grouped
+
+
+def format_sse(event: Dict) -> str:
+    """Render one event as a server-sent event frame."""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from odds import configured_providers, MARKETS, POPULAR_PLAYERS
+
+    parser = argparse.ArgumentParser(description='Record odds snapshots for stream replay.')
+    parser.add_argument('--record', required=True, help='JSONL file to append snapshots to')
+    parser.add_argument('--count', type=int, default=10)
+    parser.add_argument('--interval', type=float, default=30.0)
+    args = parser.parse_args()
+
+    props = [(p, m) for p in POPULAR_PLAYERS for m in MARKETS]
+    out = record_snapshots(ProviderPollSource(configured_providers()), props, args.record,
+                           count=args.count, interval=args.interval)
+    print(f'Recorded {args.count} snapshots to {out}')
@@ -4,36 +4,145 @@ Odds integration module for PrizePicks Correlation ML frontend.
 Provides methods to:
 - Fetch live odds from multiple sportsbooks
 - Cache and update odds
-- Convert between different odds formats
+- Convert between different odds formats (scalar wrappers over odds_math)
 - Provide fallback mock data for demo purposes
+- Fetch several sportsbooks concurrently (async serving mode)
+- Share one cached instance per provider across the process
 """
 
+import asyncio
+import atexit
 import json
+import os
+import re
+import sys
+import threading
+import time
+import weakref
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+import odds_math
+from api_metrics import METRICS
+from best_lines import BEST_LINES
+from odds_cache import FRESH, STALE, OddsCache, odds_cache_key
+from odds_fanout import fan_out, fan_out_async, fanout_settings
 
 
 class OddsProvider:
-    """Base class for odds providers."""
+    """Base class for odds providers.
+    
+    ``get_odds``/``get_odds_async`` always hit the source; the ``*_cached``
+    variants go through ``self.cache``. Cache lifetimes come from
+    ``ODDS_CACHE_TTL`` (fresh, default 60s), ``ODDS_CACHE_STALE_TTL`` (served
+    stale while refreshing, default 300s) and ``ODDS_CACHE_NEGATIVE_TTL``
+    (empty results, default 30s). Set ``ODDS_CACHE_DIR`` to persist caches.
+    """
     
-    def __init__(self, name: str):
+    def __init__(self, name: str, cache_ttl: Optional[float] = None, cache_path: Optional[Path] = None):
         self.name = name
-        self.cache = {}
-        self.cache_ttl = 3600  # 1 hour
+        self.cache_ttl = float(os.environ.get('ODDS_CACHE_TTL', '60')) if cache_ttl is None else cache_ttl
+        cache_dir = os.environ.get('ODDS_CACHE_DIR')
+        if cache_path is None and cache_dir:
+            cache_path = Path(cache_dir) / f"{re.sub(r'[^A-Za-z0-9_-]+', '_', name).lower()}.json"
+        self.cache = OddsCache(
+            ttl=self.cache_ttl,
+            stale_ttl=float(os.environ.get('ODDS_CACHE_STALE_TTL', '300')),
+            negative_ttl=float(os.environ.get('ODDS_CACHE_NEGATIVE_TTL', '30')),
+            path=cache_path,
+        )
+        self._refresh_tasks = set()
     
     def get_odds(self, player: str, market: str) -> Optional[Dict]:
         """Fetch odds for a player in a market."""
         raise NotImplementedError
     
+    def _fetch(self, player: str, market: str) -> Optional[Dict]:
+        """Call the source and record its latency."""
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = self.get_odds(player, market)
+            outcome = 'ok' if result else 'empty'
+            return result
+        finally:
+            METRICS.observe_provider(self.name, time.perf_counter() - start, outcome)
+    
+    async def _fetch_async(self, player: str, market: str) -> Optional[Dict]:
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = await self.get_odds_async(player, market)
+            outcome = 'ok' if result else 'empty'
+            return result
+        except asyncio.CancelledError:
+            outcome = 'timeout'  # cancelled by the caller's deadline
+            raise
+        finally:
+            METRICS.observe_provider(self.name, time.perf_counter() - start, outcome)
+    
+    def get_odds_cached(self, player: str, market: str) -> Optional[Dict]:
+        """Cached get_odds: fresh hits return immediately, stale hits return
+        the old payload and refresh it in a background thread, misses fetch
+        (and cache empty results too)."""
+        key = odds_cache_key(player, market)
+        state, value, _ = self.cache.lookup(key)
+        if state == FRESH:
+            return value
+        if state == STALE:
+            if self.cache.begin_refresh(key):
+                threading.Thread(target=self._refresh, args=(key, player, market), daemon=True).start()
+            return value
+        value = self._fetch(player, market)
+        self.cache.store(key, value)
+        return value
+    
+    async def get_odds_cached_async(self, player: str, market: str) -> Optional[Dict]:
+        """Awaitable get_odds_cached; stale refreshes run as event-loop tasks."""
+        key = odds_cache_key(player, market)
+        state, value, _ = self.cache.lookup(key)
+        if state == FRESH:
+            return value
+        if state == STALE:
+            if self.cache.begin_refresh(key):
+                task = asyncio.get_running_loop().create_task(self._refresh_async(key, player, market))
+                self._refresh_tasks.add(task)
+                task.add_done_callback(self._refresh_tasks.discard)
+            return value
+        value = await self._fetch_async(player, market)
+        self.cache.store(key, value)
+        return value
+    
+    def _refresh(self, key: str, player: str, market: str):
+        try:
+            self.cache.store(key, self._fetch(player, market))
+        except Exception as e:
+            print(f"Warning: odds refresh failed for {self.name} {player} {market}: {e}")
+        finally:
+            self.cache.end_refresh(key)
+    
+    async def _refresh_async(self, key: str, player: str, market: str):
+        try:
+            self.cache.store(key, await self._fetch_async(player, market))
+        except Exception as e:
+            print(f"Warning: odds refresh failed for {self.name} {player} {market}: {e}")
+        finally:
+            self.cache.end_refresh(key)
+    
+    async def get_odds_async(self, player: str, market: str) -> Optional[Dict]:
+        """Awaitable variant of get_odds.
+
+        The default runs the blocking fetch in a worker thread; providers with a
+        native async client override this.
+        """
+        return await asyncio.to_thread(self.get_odds, player, market)
+    
     def is_cached_fresh(self, key: str) -> bool:
         """Check if cached data is still fresh."""
-        if key not in self.cache:
-            return False
-        timestamp, _ = self.cache[key]
-        age = (datetime.now() - timestamp).total_seconds()
-        return age < self.cache_ttl
+        return self.cache.lookup(key)[0] == FRESH
 
 
 class MockOddsProvider(OddsProvider):
@@ -98,6 +207,111 @@ class MockOddsProvider(OddsProvider):
                 'PointsBet': {'over': -110, 'under': -110, 'line': 50.0},
             },
         }
+    
+    async def get_odds_async(self, player: str, market: str) -> Optional[Dict]:
+        """Mock data is in-memory, so no thread hop is needed."""
+        return self.get_odds(player, market)
+
+
+# One pooled async HTTP client per event loop, shared by every HTTP provider
+_ASYNC_CLIENTS = weakref.WeakKeyDictionary()
+
+
+def async_http_client():
+    """Return the shared httpx.AsyncClient for the running event loop.
+
+    Building a client is comparatively expensive (TLS context setup), so it is
+    created once per loop and reused for keep-alive connections to every book.
+    """
+    import httpx
+    
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(limits=httpx.Limits(max_connections=200, max_keepalive_connections=50))
+        _ASYNC_CLIENTS[loop] = client
+    return client
+
+
+async def close_async_http_client():
+    """Close the shared client bound to the running loop, if any."""
+    client = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+_HTTP_SESSION = None
+_HTTP_SESSION_LOCK = threading.Lock()
+
+
+def http_session():
+    """Shared requests.Session with a connection pool sized for book fan-out."""
+    global _HTTP_SESSION
+    with _HTTP_SESSION_LOCK:
+        if _HTTP_SESSION is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _HTTP_SESSION = session
+        return _HTTP_SESSION
+
+
+def _reset_http_session():
+    # a forked worker must not reuse the parent's pooled sockets (gunicorn
+    # --preload builds one during preload()); the child opens its own
+    global _HTTP_SESSION, _HTTP_SESSION_LOCK
+    _HTTP_SESSION = None
+    _HTTP_SESSION_LOCK = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_http_session)
+
+
+class HTTPOddsProvider(OddsProvider):
+    """Single sportsbook served over HTTP as JSON.
+
+    Expects ``GET {base_url}/odds?player=...&market=...`` to return
+    ``{"over": -110, "under": -110, "line": 300.5}`` (the same per-book shape
+    used in ``MockOddsProvider.MOCK_ODDS_DATA``), or 404 when the book has
+    no quote for the prop.
+    """
+    
+    def __init__(self, name: str, base_url: str, timeout: float = 2.0):
+        super().__init__(name)
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+    
+    def _wrap(self, player: str, market: str, quote: Dict) -> Dict:
+        return {
+            'player': player,
+            'market': market,
+            'timestamp': datetime.now().isoformat(),
+            'source': self.name,
+            'sportsbooks': {self.name: quote},
+        }
+    
+    def _parse(self, player: str, market: str, response) -> Optional[Dict]:
+        # 404 is the book's "no quote for this prop": an empty result the
+        # negative cache can hold, not an error
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return self._wrap(player, market, response.json())
+    
+    def get_odds(self, player: str, market: str) -> Optional[Dict]:
+        response = http_session().get(f'{self.base_url}/odds', params={'player': player, 'market': market},
+                                      timeout=self.timeout)
+        return self._parse(player, market, response)
+    
+    async def get_odds_async(self, player: str, market: str) -> Optional[Dict]:
+        response = await async_http_client().get(f'{self.base_url}/odds',
+                                                 params={'player': player, 'market': market},
+                                                 timeout=self.timeout)
+        return self._parse(player, market, response)
 
 
 class TheOddsAPIProvider(OddsProvider):
@@ -107,6 +321,8 @@ class TheOddsAPIProvider(OddsProvider):
         super().__init__('TheOddsAPI')
         self.api_key = api_key or 'demo'  # Use demo key by default
         self.base_url = 'https://api.the-odds-api.com/v4'
+        # demo fallback, built once so its OddsCache is reused across calls
+        self._mock = MockOddsProvider()
     
     def get_odds(self, player: str, market: str) -> Optional[Dict]:
         """
@@ -136,30 +352,93 @@ class TheOddsAPIProvider(OddsProvider):
         #     return None
         
         # For now, use mock data
-        mock_provider = MockOddsProvider()
-        return mock_provider.get_odds(player, market)
+        return self._mock.get_odds(player, market)
     
     def _map_market_to_sport(self, market: str) -> str:
         """Map prop market to sport code."""
         return 'americanfootball_nfl'
 
 
-def get_best_odds(player: str, market: str, sportsbook: Optional[str] = None) -> Dict:
+# Process-wide provider instances, so every caller shares one cache per provider
+_PROVIDERS: Dict[str, OddsProvider] = {}
+_PROVIDERS_LOCK = threading.Lock()
+
+
+def register_provider(provider: OddsProvider, key: Optional[str] = None) -> OddsProvider:
+    """Make ``provider`` the shared instance for ``key`` (default: its name)."""
+    with _PROVIDERS_LOCK:
+        _PROVIDERS[key or provider.name] = provider
+    return provider
+
+
+def get_provider(key: str = 'mock', factory=None) -> OddsProvider:
+    """Return the shared provider for ``key``, creating it with ``factory`` once."""
+    with _PROVIDERS_LOCK:
+        provider = _PROVIDERS.get(key)
+        if provider is None:
+            if factory is None:
+                if key != 'mock':
+                    raise KeyError(f'Unknown odds provider: {key}')
+                factory = MockOddsProvider
+            provider = _PROVIDERS[key] = factory()
+        return provider
+
+
+def registered_providers() -> Dict[str, OddsProvider]:
+    with _PROVIDERS_LOCK:
+        return dict(_PROVIDERS)
+
+
+def save_odds_caches():
+    """Persist every provider cache that has a path (runs at exit)."""
+    for provider in registered_providers().values():
+        try:
+            provider.cache.save()
+        except OSError as e:
+            print(f"Warning: Could not save odds cache for {provider.name}: {e}")
+
+
+atexit.register(save_odds_caches)
+
+
+def configured_providers() -> List[OddsProvider]:
+    """Return the shared odds providers configured for this process.
+
+    ``ODDS_PROVIDER_URLS`` is a comma-separated list of ``Book=url`` pairs,
+    e.g. ``DraftKings=http://127.0.0.1:8765/DraftKings``. When unset the mock
+    provider is used. ``ODDS_PROVIDER_TIMEOUT`` sets the per-provider timeout.
     """
-    Get the best odds for a player prop across sportsbooks.
-    
-    Args:
-        player: Player name (e.g., "Patrick Mahomes")
-        market: Market type (e.g., "passing_yards")
-        sportsbook: Specific sportsbook to query (optional)
+    spec = os.environ.get('ODDS_PROVIDER_URLS', '').strip()
+    if not spec:
+        return [get_provider('mock')]
+    timeout = float(os.environ.get('ODDS_PROVIDER_TIMEOUT', '2.0'))
+    providers = []
+    for item in spec.split(','):
+        if '=' not in item:
+            continue
+        name, url = (part.strip() for part in item.split('=', 1))
+        providers.append(get_provider(f'{name}={url}', lambda: HTTPOddsProvider(name, url, timeout=timeout)))
+    return providers
+
+
+async def gather_odds(player: str, market: str, providers: List[OddsProvider],
+                      timeout: float = 2.0, deadline: Optional[float] = None,
+                      hedge_after: Optional[float] = None, retries: int = 1) -> Optional[Dict]:
+    """Fetch odds from several providers concurrently and merge the sportsbooks.
     
-    Returns:
-        Dict with odds data including best line and which book has it
+    Each provider gets its own timeout (``provider.timeout`` if set, otherwise
+    ``timeout``), a hedge request after ``hedge_after`` seconds and
+    ``retries`` retries of fast failures. Books still pending at ``deadline``
+    and providers that fail or time out are listed under ``errors`` rather
+    than failing the whole lookup.
     """
-    # Use mock provider for demo
-    provider = MockOddsProvider()
-    odds_data = provider.get_odds(player, market)
-    
+    return await fan_out_async(player, market, providers, timeout, deadline=deadline,
+                               hedge_after=hedge_after, retries=retries)
+
+
+def summarize_best_odds(odds_data: Optional[Dict], player: str, market: str,
+                        sportsbook: Optional[str] = None) -> Dict:
+    """Reduce per-book odds to the response returned by the odds endpoint."""
     if not odds_data:
         return {'error': f'No odds found for {player} {market}'}
     
@@ -178,70 +457,82 @@ def get_best_odds(player: str, market: str, sportsbook: Optional[str] = None) ->
                 }
         return {'error': f'Sportsbook {sportsbook} not found'}
     
-    # Return best over/under odds across all books
-    best_over = None
-    best_under = None
-    best_over_book = None
-    best_under_book = None
-    best_line = None
+    # Best over/under come from the materialized index, which only re-ranks
+    # the books whose quotes changed since the last lookup
+    BEST_LINES.ingest(odds_data)
+    summary = BEST_LINES.summary(player, market)
+    summary['source'] = odds_data['source']
+    if odds_data.get('errors'):
+        summary['errors'] = odds_data['errors']
+    return summary
+
+
+def get_best_lines_slate(props: List[Tuple[str, str]], fetch_missing: bool = True) -> List[Dict]:
+    """Best-line summaries for many props, reading the index in one vectorized pass.
+
+    Props the index hasn't seen yet are fetched first (unless
+    ``fetch_missing`` is False, in which case they come back as errors).
+    """
+    if fetch_missing:
+        cols = BEST_LINES.slate(props)
+        for (player, market), found in zip(props, cols['found']):
+            if not found:
+                get_best_odds(player, market)
+    return BEST_LINES.summaries(props)
+
+
+def get_best_odds(player: str, market: str, sportsbook: Optional[str] = None) -> Dict:
+    """
+    Get the best odds for a player prop across sportsbooks.
     
-    for sb_name, sb_odds in sportsbooks.items():
-        over_odds = sb_odds.get('over', 0)
-        under_odds = sb_odds.get('under', 0)
-        line = sb_odds.get('line', 0)
-        
-        if best_over is None or over_odds > best_over:
-            best_over = over_odds
-            best_over_book = sb_name
-        
-        if best_under is None or under_odds > best_under:
-            best_under = under_odds
-            best_under_book = sb_name
-        
-        if best_line is None:
-            best_line = line
+    Args:
+        player: Player name (e.g., "Patrick Mahomes")
+        market: Market type (e.g., "passing_yards")
+        sportsbook: Specific sportsbook to query (optional)
     
-    return {
-        'player': player,
-        'market': market,
-        'line': best_line,
-        'over': {'odds': best_over, 'sportsbook': best_over_book},
-        'under': {'odds': best_under, 'sportsbook': best_under_book},
-        'all_sportsbooks': sportsbooks,
-        'source': odds_data['source'],
-    }
+    Returns:
+        Dict with odds data including best line and which book has it
+    """
+    providers = configured_providers()
+    if len(providers) == 1 and isinstance(providers[0], MockOddsProvider):
+        # in-memory demo data; no fan-out needed
+        odds_data = providers[0].get_odds_cached(player, market)
+    else:
+        odds_data = fan_out(player, market, providers, **fanout_settings())
+    return summarize_best_odds(odds_data, player, market, sportsbook)
+
+
+async def get_best_odds_async(player: str, market: str, sportsbook: Optional[str] = None,
+                              providers: Optional[List[OddsProvider]] = None,
+                              timeout: float = 2.0) -> Dict:
+    """Awaitable get_best_odds that queries all providers concurrently."""
+    if providers is None:
+        providers = configured_providers()
+    settings = fanout_settings()
+    odds_data = await gather_odds(player, market, providers, timeout=timeout,
+                                  deadline=settings['deadline'], hedge_after=settings['hedge_after'],
+                                  retries=settings['retries'])
+    return summarize_best_odds(odds_data, player, market, sportsbook)
 
 
 def american_to_decimal(american_odds: float) -> float:
     """Convert American odds to decimal odds."""
-    if american_odds < 0:
-        return 1 + (100 / abs(american_odds))
-    else:
-        return 1 + (american_odds / 100)
+    return float(odds_math.american_to_decimal(american_odds))
 
 
 def decimal_to_american(decimal_odds: float) -> float:
     """Convert decimal odds to American odds."""
-    if decimal_odds > 2:
-        return (decimal_odds - 1) * 100
-    else:
-        return -100 / (decimal_odds - 1)
+    return float(odds_math.decimal_to_american(decimal_odds))
 
 
 def american_to_implied_probability(american_odds: float) -> float:
     """Convert American odds to implied probability."""
-    if american_odds < 0:
-        return abs(american_odds) / (abs(american_odds) + 100)
-    else:
-        return 100 / (american_odds + 100)
+    return float(odds_math.american_to_implied(american_odds))
 
 
 def implied_probability_to_american(prob: float) -> float:
     """Convert implied probability to American odds."""
-    if prob >= 0.5:
-        return -(prob * 100) / (1 - prob)
-    else:
-        return ((1 - prob) * 100) / prob
+    return float(odds_math.implied_to_american(prob))
 
 
 # Common player names and markets for autocomplete
@@ -0,0 +1,147 @@
+"""
+Per-provider odds cache.
+
+Provides:
+- A bounded LRU of provider payloads keyed by (player, market)
+- A fresh TTL, then a stale window in which the old value is served while a
+  single background refresh runs (stale-while-revalidate)
+- Negative caching, so props a book doesn't offer aren't re-requested on
+  every lookup
+- Optional JSON persistence so a restart doesn't re-spend the API quota
+
+Entries are stamped with wall-clock time so they stay meaningful after being
+reloaded from disk.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+FRESH = 'fresh'
+STALE = 'stale'
+MISS = 'miss'
+
+# marker stored for lookups that returned nothing
+_NEGATIVE = {'__negative__': True}
+
+
+def odds_cache_key(player: str, market: str) -> str:
+    return f'{str(player).strip().lower()}|{str(market).strip().lower()}'
+
+
+class OddsCache:
+    """Thread-safe LRU + TTL cache for one odds provider."""
+
+    def __init__(self, max_entries: int = 4096, ttl: float = 60.0, stale_ttl: float = 300.0,
+                 negative_ttl: float = 30.0, path: Optional[Path] = None,
+                 clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.path = Path(path) if path else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._refreshing = set()
+        self.stats = {'fresh': 0, 'stale': 0, 'miss': 0, 'negative': 0, 'evictions': 0, 'refreshes': 0}
+        if self.path is not None:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def lookup(self, key: str) -> Tuple[str, Optional[Any], float]:
+        """Return (state, value, stored_at); value is None for negative entries."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['miss'] += 1
+                return MISS, None, 0.0
+            stored_at, value = entry
+            age = now - stored_at
+            negative = value is _NEGATIVE
+            fresh_for = self.negative_ttl if negative else self.ttl
+            if age < fresh_for:
+                state = FRESH
+            elif not negative and age < self.ttl + self.stale_ttl:
+                state = STALE
+            else:
+                del self._entries[key]
+                self.stats['miss'] += 1
+                return MISS, None, 0.0
+            self._entries.move_to_end(key)
+            self.stats['negative' if negative else state] += 1
+            return state, None if negative else value, stored_at
+
+    def store(self, key: str, value: Optional[Any]):
+        """Cache a payload; ``None`` is cached as a negative entry."""
+        with self._lock:
+            self._entries[key] = (self._clock(), _NEGATIVE if value is None else value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def begin_refresh(self, key: str) -> bool:
+        """Claim the background refresh for ``key``; False if one is running."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.stats['refreshes'] += 1
+            return True
+
+    def end_refresh(self, key: str):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def invalidate(self, key: Optional[str] = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def save(self) -> Optional[Path]:
+        """Write unexpired entries to ``path`` atomically."""
+        if self.path is None:
+            return None
+        now = self._clock()
+        with self._lock:
+            entries = [[k, t, None if v is _NEGATIVE else v] for k, (t, v) in self._entries.items()
+                       if now - t < (self.negative_ttl if v is _NEGATIVE else self.ttl + self.stale_ttl)]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'entries': entries}, f)
+        os.replace(tmp, self.path)
+        return self.path
+
+    def load(self):
+        """Merge entries saved by a previous process (missing/corrupt file is ignored)."""
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f).get('entries', [])
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Warning: Could not load odds cache {self.path}: {e}")
+            return
+        with self._lock:
+            for key, stored_at, value in sorted(entries, key=lambda e: e[1]):
+                self._entries[key] = (stored_at, _NEGATIVE if value is None else value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def snapshot_stats(self) -> Dict:
+        with self._lock:
+            return dict(self.stats, size=len(self._entries), max_entries=self.max_entries,
+                        ttl=self.ttl, stale_ttl=self.stale_ttl, negative_ttl=self.negative_ttl)
@@ -0,0 +1,266 @@
+"""
+Hedged, deadline-bounded fan-out to several sportsbooks.
+
+Provides:
+- ``hedged_call_async`` / ``hedged_call``: run one book's fetch with a
+  per-book timeout, fire a duplicate (hedge) request if the first is slower
+  than ``hedge_after``, retry fast failures, and return the first success
+- ``fan_out_async`` / ``fan_out``: query every book in parallel and keep
+  whatever has arrived by the overall deadline
+- ``merge_book_results``: fold per-book results into the ``get_odds``
+  payload shape that ``summarize_best_odds`` expects
+
+The sync variants use a shared thread pool so Flask workers get the same
+behaviour as the async serving mode.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from api_metrics import METRICS
+
+
+class BookTimeout(Exception):
+    """A book produced no successful response before its time limit."""
+
+
+def fanout_settings() -> Dict[str, float]:
+    """Defaults from the environment: per-book timeout, hedge delay, retries, deadline."""
+    timeout = float(os.environ.get('ODDS_PROVIDER_TIMEOUT', '2.0'))
+    return {
+        'timeout': timeout,
+        'hedge_after': float(os.environ.get('ODDS_HEDGE_AFTER', '0.3')),
+        'retries': int(os.environ.get('ODDS_RETRIES', '1')),
+        'deadline': float(os.environ.get('ODDS_DEADLINE', str(timeout))),
+    }
+
+
+async def hedged_call_async(name: str, make_call: Callable[[], Awaitable[Any]], timeout: float,
+                            hedge_after: Optional[float] = None, retries: int = 1) -> Any:
+    """Await ``make_call()`` with a hedge request and fast-failure retries.
+
+    At most one hedge and ``retries`` retries are started; whichever attempt
+    succeeds first wins and the rest are cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    end = loop.time() + timeout
+    hedge_at = loop.time() + hedge_after if hedge_after and hedge_after < timeout else None
+    attempts = {loop.create_task(make_call())}
+    last_error: Optional[BaseException] = None
+    try:
+        while attempts:
+            now = loop.time()
+            if now >= end:
+                break
+            wake = end if hedge_at is None else min(end, hedge_at)
+            done, attempts = await asyncio.wait(attempts, timeout=max(wake - now, 0),
+                                                return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                last_error = task.exception()
+            if done and not attempts and retries > 0:
+                retries -= 1
+                METRICS.count_provider_event(name, 'retry')
+                attempts = {loop.create_task(make_call())}
+            if hedge_at is not None and loop.time() >= hedge_at:
+                hedge_at = None
+                if attempts:
+                    METRICS.count_provider_event(name, 'hedge')
+                    attempts.add(loop.create_task(make_call()))
+    finally:
+        for task in attempts:
+            task.cancel()
+    if last_error is not None and not attempts:
+        raise last_error
+    raise BookTimeout(name)
+
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=int(os.environ.get('ODDS_FANOUT_THREADS', '32')),
+                                           thread_name_prefix='odds-fanout')
+        return _EXECUTOR
+
+
+def _reset_executor():
+    # the pool's threads do not survive fork(); a worker forked after
+    # preload() would queue fetches on threads that no longer exist
+    global _EXECUTOR, _EXECUTOR_LOCK
+    _EXECUTOR = None
+    _EXECUTOR_LOCK = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_executor)
+
+
+class _BookAttempts:
+    """Bookkeeping for one book inside the sync coordinator."""
+
+    __slots__ = ('name', 'call', 'end', 'hedge_at', 'retries', 'pending', 'last_error')
+
+    def __init__(self, name, call, start, timeout, hedge_after, retries):
+        self.name = name
+        self.call = call
+        self.end = start + timeout
+        self.hedge_at = start + hedge_after if hedge_after and hedge_after < timeout else None
+        self.retries = retries
+        self.pending = set()
+        self.last_error: Optional[BaseException] = None
+
+
+def _coordinate(calls: List[Tuple[str, Callable[[], Any], float]], deadline: Optional[float],
+                hedge_after: Optional[float], retries: int) -> List[Tuple[str, Any]]:
+    """Drive every book's attempts from the calling thread.
+
+    Only the fetches themselves run on the pool, so a burst of requests can't
+    fill the pool with coordinators waiting on their own sub-tasks. Abandoned
+    attempts can't be interrupted; they finish in the pool and are discarded.
+    """
+    pool = _executor()
+    start = time.monotonic()
+    stop = start + deadline if deadline else None
+    books = [_BookAttempts(name, call, start, limit, hedge_after, retries) for name, call, limit in calls]
+    results: Dict[str, Any] = {}
+    owner = {}
+    for book in books:
+        future = pool.submit(book.call)
+        book.pending.add(future)
+        owner[future] = book
+
+    active = list(books)
+    while active:
+        now = time.monotonic()
+        for book in list(active):
+            if now >= book.end or (stop is not None and now >= stop):
+                results[book.name] = BookTimeout(book.name)
+                active.remove(book)
+        if not active:
+            break
+        wakes = [b.end if b.hedge_at is None else min(b.end, b.hedge_at) for b in active]
+        if stop is not None:
+            wakes.append(stop)
+        pending = set().union(*(b.pending for b in active))
+        done, _ = wait(pending, timeout=max(min(wakes) - now, 0), return_when=FIRST_COMPLETED)
+        for future in done:
+            book = owner.pop(future)
+            book.pending.discard(future)
+            if book not in active:
+                continue
+            if future.exception() is None:
+                results[book.name] = future.result()
+                active.remove(book)
+                continue
+            book.last_error = future.exception()
+            if not book.pending:
+                if book.retries > 0:
+                    book.retries -= 1
+                    METRICS.count_provider_event(book.name, 'retry')
+                    retry = pool.submit(book.call)
+                    book.pending.add(retry)
+                    owner[retry] = book
+                else:
+                    results[book.name] = book.last_error
+                    active.remove(book)
+        now = time.monotonic()
+        for book in active:
+            if book.hedge_at is not None and now >= book.hedge_at:
+                book.hedge_at = None
+                if book.pending:
+                    METRICS.count_provider_event(book.name, 'hedge')
+                    hedge = pool.submit(book.call)
+                    book.pending.add(hedge)
+                    owner[hedge] = book
+    return [(name, results[name]) for name, _, _ in calls]
+
+
+def hedged_call(name: str, call: Callable[[], Any], timeout: float,
+                hedge_after: Optional[float] = None, retries: int = 1) -> Any:
+    """Thread-pool twin of ``hedged_call_async``."""
+    (_, result), = _coordinate([(name, call, timeout)], None, hedge_after, retries)
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+
+def _error_label(error: BaseException) -> str:
+    if isinstance(error, (BookTimeout, asyncio.TimeoutError, TimeoutError)):
+        return 'timeout'
+    return str(error) or type(error).__name__
+
+
+def merge_book_results(player: str, market: str,
+                       results: List[Tuple[str, Any]]) -> Optional[Dict]:
+    """Merge (provider name, payload or exception) pairs into one odds payload."""
+    sportsbooks: Dict[str, Dict] = {}
+    sources: List[str] = []
+    errors: Dict[str, str] = {}
+    for name, result in results:
+        if isinstance(result, BaseException):
+            errors[name] = _error_label(result)
+        elif result:
+            sportsbooks.update(result.get('sportsbooks', {}))
+            sources.append(result.get('source', name))
+    if not sportsbooks:
+        return None
+    odds_data = {
+        'player': player,
+        'market': market,
+        'timestamp': datetime.now().isoformat(),
+        'source': sources[0] if len(sources) == 1 else 'aggregate',
+        'sportsbooks': sportsbooks,
+    }
+    if errors:
+        odds_data['errors'] = errors
+    return odds_data
+
+
+async def fan_out_async(player: str, market: str, providers: List, timeout: float,
+                        deadline: Optional[float] = None, hedge_after: Optional[float] = None,
+                        retries: int = 1) -> Optional[Dict]:
+    """Query every provider concurrently; books still pending at ``deadline`` are dropped."""
+    if not providers:
+        return merge_book_results(player, market, [])
+
+    def limit_for(provider):
+        limit = getattr(provider, 'timeout', None) or timeout
+        return min(limit, deadline) if deadline else limit
+
+    tasks = [
+        asyncio.ensure_future(hedged_call_async(
+            p.name, lambda p=p: p.get_odds_cached_async(player, market), limit_for(p), hedge_after, retries))
+        for p in providers
+    ]
+    await asyncio.wait(tasks, timeout=deadline)
+    results = []
+    for provider, task in zip(providers, tasks):
+        if not task.done():
+            task.cancel()
+            results.append((provider.name, BookTimeout(provider.name)))
+        elif task.exception() is not None:
+            results.append((provider.name, task.exception()))
+        else:
+            results.append((provider.name, task.result()))
+    return merge_book_results(player, market, results)
+
+
+def fan_out(player: str, market: str, providers: List, timeout: float,
+            deadline: Optional[float] = None, hedge_after: Optional[float] = None,
+            retries: int = 1) -> Optional[Dict]:
+    """Blocking ``fan_out_async`` for the WSGI app; fetches run on the shared thread pool."""
+    calls = [
+        (p.name, lambda p=p: p.get_odds_cached(player, market), getattr(p, 'timeout', None) or timeout)
+        for p in providers
+    ]
+    return merge_book_results(player, market, _coordinate(calls, deadline, hedge_after, retries))
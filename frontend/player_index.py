@@ -0,0 +1,325 @@
+"""
+Player search index for keystroke autocomplete.
+
+Provides:
+- Roster collection from fetched game logs (``nfl_{team}_{player}_{season}.csv``),
+  normalized provider props (``PlayerName``) and an optional
+  ``data/mapping/player_ids.csv`` lookup
+- Sorted-array prefix search over every name token ("mahomes" finds
+  "Patrick Mahomes"), ranked by popularity
+- Trigram postings for typo-tolerant matches when prefixes run out
+- Build-once persistence as plain ``.npy`` arrays that are memory-mapped on load
+
+Build or rebuild the on-disk index:
+    python frontend/player_index.py --cache-dir data/cache --out data/cache/player_index
+"""
+
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+INDEX_VERSION = 1
+ARRAYS = ('names', 'popularity', 'keys', 'key_ids', 'by_popularity',
+          'tri_codes', 'tri_offsets', 'tri_ids', 'tri_counts')
+
+# a game-log file name is nfl_{team}_{player}_{season}.csv; team pages end in _team
+GAMELOG_RE = re.compile(r'^nfl_([a-z]{2,3})_(.+)_(\d{4})$')
+# popular players from odds.POPULAR_PLAYERS get this many extra "games" so they
+# rank first for short prefixes even before any game logs are fetched
+FEATURED_BOOST = 1000
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip accents and punctuation: "Ja'Marr Chase" -> "jamarr chase"."""
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    text = re.sub(r"['.]", '', text)
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text).split())
+
+
+def _trigram_codes(normalized: str) -> np.ndarray:
+    """Unique trigram codes of each token padded as "  token "."""
+    grams = set()
+    for token in normalized.split():
+        padded = f'  {token} '
+        for i in range(len(padded) - 2):
+            a, b, c = padded[i:i + 3]
+            grams.add((ord(a) << 42) | (ord(b) << 21) | ord(c))
+    return np.fromiter(sorted(grams), dtype=np.int64, count=len(grams))
+
+
+def collect_players(cache_dir='data/cache', mapping_path='data/mapping/player_ids.csv',
+                    featured: Iterable[str] = ()) -> Dict[str, int]:
+    """Collect ``{display name: popularity}`` from every local source.
+
+    Popularity is the number of game-log rows plus provider prop rows for the
+    player, so regulars outrank one-game backups.
+    """
+    cache_dir = Path(cache_dir)
+    counts: Counter = Counter()
+    display: Dict[str, str] = {}
+
+    def add(name, weight):
+        key = normalize_name(name)
+        if not key:
+            return
+        # keep the best-formatted spelling seen (mixed case beats slugs)
+        if key not in display or (name != name.lower() and display[key] == display[key].lower()):
+            display[key] = name
+        counts[key] += int(weight)
+
+    for path in sorted(cache_dir.glob('nfl_*.csv')):
+        match = GAMELOG_RE.match(path.stem)
+        if not match or match.group(2) == 'team':
+            continue
+        try:
+            with open(path, 'r') as f:
+                rows = max(sum(1 for _ in f) - 1, 0)
+        except OSError:
+            continue
+        add(match.group(2).replace('_', ' ').title(), max(rows, 1))
+
+    for path in sorted(cache_dir.glob('provider/*_normalized.csv')):
+        import pandas as pd
+
+        try:
+            names = pd.read_csv(path, usecols=['PlayerName'])['PlayerName'].dropna()
+        except (OSError, ValueError):
+            continue
+        for name, n in names.astype(str).value_counts().items():
+            add(name, n)
+
+    mapping_path = Path(mapping_path)
+    if mapping_path.exists():
+        import pandas as pd
+
+        try:
+            mapping = pd.read_csv(mapping_path)
+        except (OSError, ValueError):
+            mapping = None
+        if mapping is not None:
+            col = next((c for c in mapping.columns if c.lower() in ('name', 'player', 'player_name')), None)
+            if col is not None:
+                for name in mapping[col].dropna().astype(str):
+                    add(name, 1)
+
+    for name in featured:
+        add(name, FEATURED_BOOST)
+
+    # game-log slugs are often just a surname ("mahomes"); fold them into the
+    # one full name that ends with it, if there is exactly one
+    for key in [k for k in counts if ' ' not in k]:
+        fuller = [k for k in counts if k.endswith(' ' + key)]
+        if len(fuller) == 1:
+            counts[fuller[0]] += counts.pop(key)
+            display.pop(key)
+
+    return {display[key]: n for key, n in counts.items()}
+
+
+class PlayerIndex:
+    """Immutable search index over player names.
+
+    All state is a handful of NumPy arrays: ``keys`` holds every name-token
+    suffix ("patrick mahomes", "mahomes") sorted, so a prefix is one pair of
+    ``np.searchsorted`` calls; ``tri_*`` is a CSR trigram -> player postings
+    table used for fuzzy matches.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+
+    def __len__(self) -> int:
+        return int(self.names.shape[0])
+
+    @classmethod
+    def build(cls, players: Dict[str, int]) -> 'PlayerIndex':
+        """Build from ``{display name: popularity}``."""
+        items = sorted(players.items(), key=lambda kv: (-kv[1], kv[0]))
+        names = [name for name, _ in items]
+        popularity = np.array([n for _, n in items], dtype=np.int64)
+        normalized = [normalize_name(name) for name in names]
+
+        keys, key_ids = [], []
+        tri_codes, tri_ids, tri_counts = [], [], []
+        for pid, norm in enumerate(normalized):
+            tokens = norm.split()
+            for i in range(len(tokens)):
+                keys.append(' '.join(tokens[i:]))
+                key_ids.append(pid)
+            codes = _trigram_codes(norm)
+            tri_codes.append(codes)
+            tri_ids.append(np.full(codes.size, pid, dtype=np.int32))
+            tri_counts.append(codes.size)
+
+        keys_arr = np.array(keys, dtype=str) if keys else np.array([], dtype='<U1')
+        order = np.argsort(keys_arr, kind='stable')
+        codes = np.concatenate(tri_codes) if tri_codes else np.array([], dtype=np.int64)
+        ids = np.concatenate(tri_ids) if tri_ids else np.array([], dtype=np.int32)
+        tri_order = np.argsort(codes, kind='stable')
+        codes, ids = codes[tri_order], ids[tri_order]
+        unique_codes, starts = np.unique(codes, return_index=True)
+
+        return cls({
+            'names': np.array(names, dtype=str) if names else np.array([], dtype='<U1'),
+            'popularity': popularity,
+            'keys': keys_arr[order],
+            'key_ids': np.array(key_ids, dtype=np.int32)[order],
+            # ids are assigned in popularity order already
+            'by_popularity': np.arange(len(names), dtype=np.int32),
+            'tri_codes': unique_codes,
+            'tri_offsets': np.append(starts, codes.size).astype(np.int64),
+            'tri_ids': ids,
+            'tri_counts': np.array(tri_counts, dtype=np.int32),
+        })
+
+    def save(self, directory) -> Path:
+        """Write one ``.npy`` per array plus a small manifest.
+
+        Files go to a temporary sibling directory that then replaces
+        ``directory``, so a concurrent or crashed build never leaves a
+        half-written index behind.
+        """
+        directory = Path(directory)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=f'.{directory.name}.', dir=directory.parent))
+        try:
+            for name in ARRAYS:
+                np.save(tmp / f'{name}.npy', getattr(self, name))
+            with open(tmp / 'manifest.json', 'w') as f:
+                json.dump({'version': INDEX_VERSION, 'players': len(self)}, f)
+            # a directory can only be renamed over an empty one: move the old index aside first
+            old = None
+            if directory.exists():
+                old = Path(tempfile.mkdtemp(prefix=f'.{directory.name}.old.', dir=directory.parent))
+                os.replace(directory, old)
+            os.replace(tmp, directory)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        if old is not None:
+            shutil.rmtree(old, ignore_errors=True)
+        return directory
+
+    @classmethod
+    def load(cls, directory, mmap: bool = True) -> 'PlayerIndex':
+        """Load a saved index; arrays are memory-mapped so forked workers share pages."""
+        directory = Path(directory)
+        with open(directory / 'manifest.json', 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != INDEX_VERSION:
+            raise ValueError(f'Player index version {manifest.get("version")} != {INDEX_VERSION}')
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(directory / f'{name}.npy', mmap_mode=mode) for name in ARRAYS}
+        sizes = {name: a.shape[0] for name, a in arrays.items()}
+        players = {sizes[name] for name in ('names', 'popularity', 'by_popularity', 'tri_counts')}
+        if (players != {manifest.get('players')} or sizes['keys'] != sizes['key_ids']
+                or sizes['tri_offsets'] != sizes['tri_codes'] + 1
+                or sizes['tri_ids'] != int(arrays['tri_offsets'][-1])):
+            raise ValueError(f'Player index {directory} is inconsistent with its manifest')
+        return cls(arrays)
+
+    def prefix_ids(self, prefix: str) -> np.ndarray:
+        """Player ids having a name token starting with ``prefix`` (normalized)."""
+        lo = np.searchsorted(self.keys, prefix, side='left')
+        hi = np.searchsorted(self.keys, prefix + '\uffff', side='left')
+        return np.unique(self.key_ids[lo:hi])
+
+    def fuzzy_ids(self, query: str, min_score: float = 0.5) -> Tuple[np.ndarray, np.ndarray]:
+        """Players sharing at least ``min_score`` of the query's trigrams.
+
+        Returns (ids, scores) sorted best first; ties favour names whose
+        trigram sets are closest in size to the query's (Dice coefficient).
+        """
+        q = _trigram_codes(query)
+        if q.size == 0 or self.tri_codes.size == 0:
+            return np.array([], dtype=np.int64), np.array([])
+        pos = np.clip(np.searchsorted(self.tri_codes, q), 0, self.tri_codes.size - 1)
+        pos = pos[self.tri_codes[pos] == q]
+        if pos.size == 0:
+            return np.array([], dtype=np.int64), np.array([])
+        postings = np.concatenate([self.tri_ids[self.tri_offsets[p]:self.tri_offsets[p + 1]] for p in pos])
+        ids, shared = np.unique(postings, return_counts=True)
+        containment = shared / q.size
+        keep = containment >= min_score
+        ids, shared, containment = ids[keep], shared[keep], containment[keep]
+        dice = 2 * shared / (q.size + self.tri_counts[ids])
+        order = np.lexsort((ids, -dice, -containment))
+        return ids[order], containment[order]
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> List[str]:
+        """Autocomplete: prefix matches by popularity, then fuzzy matches."""
+        q = normalize_name(query)
+        if not q:
+            return self.names[self.by_popularity[:limit]].tolist()
+        ids = self.prefix_ids(q)
+        # ids are popularity ranks, so ascending id order is most popular first
+        result = ids[:limit].tolist()
+        if fuzzy and len(result) < limit and len(q) >= 4:
+            fuzzy_ids, _ = self.fuzzy_ids(q)
+            seen = set(result)
+            for pid in fuzzy_ids.tolist():
+                if pid not in seen:
+                    result.append(pid)
+                    seen.add(pid)
+                    if len(result) >= limit:
+                        break
+        return self.names[result].tolist() if result else []
+
+
+def load_or_build(index_dir='data/cache/player_index', cache_dir='data/cache',
+                  featured: Iterable[str] = (), rebuild: bool = False) -> PlayerIndex:
+    """Memory-map the saved index, building and saving it first if missing.
+
+    The index is rebuilt when any game log or provider CSV is newer than it,
+    or when it can't be loaded (missing, truncated or inconsistent files).
+    """
+    index_dir = Path(index_dir)
+    manifest = index_dir / 'manifest.json'
+    if not rebuild and manifest.exists():
+        built = manifest.stat().st_mtime
+        sources = list(Path(cache_dir).glob('nfl_*.csv')) + list(Path(cache_dir).glob('provider/*_normalized.csv'))
+        if all(p.stat().st_mtime <= built for p in sources):
+            try:
+                return PlayerIndex.load(index_dir)
+            except Exception as e:
+                print(f"Warning: Could not load player index {index_dir}, rebuilding: {e}")
+    index = PlayerIndex.build(collect_players(cache_dir, featured=featured))
+    try:
+        index.save(index_dir)
+        return PlayerIndex.load(index_dir)
+    except OSError as e:
+        print(f"Warning: Could not save player index {index_dir}: {e}")
+        return index
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    sys.path.insert(0, str(Path(__file__).parent))
+    from odds import POPULAR_PLAYERS
+
+    parser = argparse.ArgumentParser(description='Build the player autocomplete index.')
+    parser.add_argument('--cache-dir', default='data/cache')
+    parser.add_argument('--out', default='data/cache/player_index')
+    parser.add_argument('--query', action='append', default=[], help='Run a sample search after building')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    index = load_or_build(args.out, args.cache_dir, featured=POPULAR_PLAYERS, rebuild=True)
+    print(f'Indexed {len(index)} players in {(time.perf_counter() - t0) * 1000:.1f} ms -> {args.out}')
+    for q in args.query:
+        t0 = time.perf_counter()
+        hits = index.search(q)
+        print(f'{q!r}: {hits} ({(time.perf_counter() - t0) * 1e6:.0f} us)')
@@ -0,0 +1,241 @@
+"""
+In-process response cache for the frontend API.
+
+Provides:
+- Cache keys built from normalized request parameters
+- Per-endpoint TTLs with a bounded LRU eviction policy
+- Single-flight de-duplication so concurrent identical misses compute once
+- Hit/miss/eviction counters for monitoring
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+# Default time-to-live (seconds) per endpoint. Odds move slowly relative to
+# dashboard polling; predictions are pure functions of their inputs so they
+# can live longer.
+DEFAULT_TTLS = {
+    'odds': 30.0,
+    'predict': 300.0,
+}
+
+
+def normalize_params(params: Dict[str, Any], fold_case: Iterable[str] = (),
+                     numeric: Iterable[str] = ()) -> str:
+    """Build a canonical cache key from request parameters.
+
+    Keys are order-insensitive and None values are dropped. Values are
+    otherwise kept exactly, since handlers echo them back: only the fields
+    in ``fold_case`` (ones the handler itself lower-cases) are lower-cased,
+    and only the fields in ``numeric`` (ones the handler parses with
+    ``float``) have "300", 300 and "300.0" share an entry.
+    """
+    fold_case, numeric = set(fold_case), set(numeric)
+
+    def norm(name, value):
+        if name in fold_case and isinstance(value, str):
+            return value.lower()
+        if name in numeric and not isinstance(value, bool):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return value
+        return value
+
+    cleaned = {k: norm(k, v) for k, v in params.items() if v is not None}
+    return json.dumps(cleaned, sort_keys=True, separators=(',', ':'), default=str)
+
+
+class _InFlight:
+    """Placeholder for a value currently being computed by another thread."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache shared by the API endpoints."""
+
+    def __init__(self, max_entries: int = 2048, ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]' = OrderedDict()
+        self._inflight: Dict[Tuple[str, Hashable], _InFlight] = {}
+        self._async_inflight: Dict[Tuple[str, Hashable], 'asyncio.Future'] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def _bump(self, endpoint: str, counter: str):
+        stats = self._stats.setdefault(endpoint, {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0})
+        stats[counter] += 1
+
+    def get(self, endpoint: str, key: Hashable) -> Tuple[bool, Any]:
+        """Return (found, value) for a fresh entry without computing."""
+        full_key = (endpoint, key)
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(full_key)
+                    return True, value
+                del self._entries[full_key]
+        return False, None
+
+    def set(self, endpoint: str, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl_for(endpoint) if ttl is None else ttl
+        with self._lock:
+            self._store(endpoint, (endpoint, key), value, ttl)
+
+    def _store(self, endpoint: str, full_key, value, ttl: float):
+        # caller must hold self._lock
+        self._entries[full_key] = (self._clock() + ttl, value)
+        self._entries.move_to_end(full_key)
+        while len(self._entries) > self.max_entries:
+            (evicted_endpoint, _), _ = self._entries.popitem(last=False)
+            self._bump(evicted_endpoint, 'evictions')
+
+    def get_or_compute(self, endpoint: str, key: Hashable, compute: Callable[[], Any],
+                       ttl: Optional[float] = None) -> Any:
+        """Return a cached value or compute it exactly once per concurrent miss.
+
+        If another thread is already computing the same key, wait for its
+        result instead of computing again. Exceptions are propagated to every
+        waiter and are never cached.
+        """
+        full_key = (endpoint, key)
+        ttl = self.ttl_for(endpoint) if ttl is None else ttl
+
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(full_key)
+                self._bump(endpoint, 'hits')
+                return entry[1]
+            if entry is not None:
+                del self._entries[full_key]
+
+            flight = self._inflight.get(full_key)
+            if flight is not None:
+                self._bump(endpoint, 'coalesced')
+                leader = False
+            else:
+                flight = _InFlight()
+                self._inflight[full_key] = flight
+                self._bump(endpoint, 'misses')
+                leader = True
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = compute()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._inflight.pop(full_key, None)
+            flight.event.set()
+            raise
+
+        flight.value = value
+        with self._lock:
+            self._store(endpoint, full_key, value, ttl)
+            self._inflight.pop(full_key, None)
+        flight.event.set()
+        return value
+
+    async def get_or_compute_async(self, endpoint: str, key: Hashable,
+                                   compute: Callable[[], Awaitable[Any]],
+                                   ttl: Optional[float] = None) -> Any:
+        """Async counterpart of get_or_compute for the ASGI serving mode.
+
+        Concurrent misses on the same event loop await one shared future
+        instead of blocking the loop on a thread event.
+        """
+        full_key = (endpoint, key)
+        ttl = self.ttl_for(endpoint) if ttl is None else ttl
+
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(full_key)
+                self._bump(endpoint, 'hits')
+                return entry[1]
+            if entry is not None:
+                del self._entries[full_key]
+
+            future = self._async_inflight.get(full_key)
+            if future is not None:
+                self._bump(endpoint, 'coalesced')
+                leader = False
+            else:
+                future = asyncio.get_running_loop().create_future()
+                self._async_inflight[full_key] = future
+                self._bump(endpoint, 'misses')
+                leader = True
+
+        if not leader:
+            return await asyncio.shield(future)
+
+        try:
+            value = await compute()
+        except BaseException as e:
+            with self._lock:
+                self._async_inflight.pop(full_key, None)
+            future.set_exception(e)
+            # Mark retrieved so an unobserved failure does not log a warning
+            future.exception()
+            raise
+
+        with self._lock:
+            self._store(endpoint, full_key, value, ttl)
+            self._async_inflight.pop(full_key, None)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, endpoint: Optional[str] = None):
+        """Drop all entries, or only those belonging to one endpoint."""
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+                return
+            for full_key in [k for k in self._entries if k[0] == endpoint]:
+                del self._entries[full_key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters per endpoint plus overall occupancy."""
+        with self._lock:
+            endpoints = {}
+            for endpoint, counters in self._stats.items():
+                lookups = counters['hits'] + counters['misses'] + counters['coalesced']
+                served = counters['hits'] + counters['coalesced']
+                endpoints[endpoint] = dict(
+                    counters,
+                    ttl=self.ttl_for(endpoint),
+                    hit_ratio=round(served / lookups, 4) if lookups else 0.0,
+                )
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'endpoints': endpoints,
+            }
+
+
+# Shared cache used by all API routes in this process
+RESPONSE_CACHE = ResponseCache()
@@ -0,0 +1,167 @@
+"""
+Local stub sportsbook server for tests and async-mode demos.
+
+Serves ``GET /{book}/odds?player=...&market=...`` and returns that book's
+quote from ``MockOddsProvider.MOCK_ODDS_DATA`` as
+``{"over": ..., "under": ..., "line": ...}``. Individual books can be made
+slow (``delay`` seconds), failing (HTTP 503) or flaky to exercise timeouts,
+hedged requests and retries. A delay may be a list of seconds, cycled per
+request (``[0.8, 0]`` = every other request is slow); flakiness is a failure
+probability or a cycled list of booleans.
+
+Run standalone:
+    python frontend/stub_odds_server.py --port 8765 --delay BetMGM=3 --delay FanDuel=0.8,0 \
+        --flaky Caesars=0.3 --fail PointsBet
+
+then point the ASGI app at it:
+    ODDS_PROVIDER_URLS=DraftKings=http://127.0.0.1:8765/DraftKings,...
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from odds import MockOddsProvider, SPORTSBOOKS
+
+
+class StubOddsServer:
+    """Threaded HTTP server simulating one endpoint per sportsbook."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 books: Optional[List[str]] = None,
+                 delays: Optional[Dict[str, Union[float, Sequence[float]]]] = None,
+                 failing: Optional[List[str]] = None,
+                 flaky: Optional[Dict[str, Union[float, Sequence[bool]]]] = None,
+                 seed: int = 0):
+        self.books = list(books or SPORTSBOOKS)
+        self.delays = dict(delays or {})
+        self.failing = set(failing or [])
+        self.flaky = dict(flaky or {})
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.request_counts: Dict[str, int] = {book: 0 for book in self.books}
+        self._mock = MockOddsProvider()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def provider_urls(self) -> Dict[str, str]:
+        """Map each simulated book to its base URL."""
+        return {book: f'{self.base_url}/{book}' for book in self.books}
+
+    def quote(self, book: str, player: str, market: str) -> Optional[Dict]:
+        odds_data = self._mock.get_odds(player, market)
+        return odds_data['sportsbooks'].get(book)
+
+    def _plan(self, book: str):
+        """Count the request and decide its (delay, fail) from the configured patterns."""
+        with self._lock:
+            n = self.request_counts.get(book, 0)
+            self.request_counts[book] = n + 1
+            delay = self.delays.get(book, 0.0)
+            if isinstance(delay, (list, tuple)):
+                delay = delay[n % len(delay)] if delay else 0.0
+            flaky = self.flaky.get(book)
+            if isinstance(flaky, (list, tuple)):
+                fail = bool(flaky[n % len(flaky)]) if flaky else False
+            else:
+                fail = flaky is not None and self._rng.random() < flaky
+        return delay, fail or book in self.failing
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                parts = [p for p in parsed.path.split('/') if p]
+                if len(parts) != 2 or parts[1] != 'odds' or parts[0] not in server.books:
+                    return self._send(404, {'error': 'not found'})
+                book = parts[0]
+                delay, fail = server._plan(book)
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    return self._send(503, {'error': f'{book} unavailable'})
+
+                query = parse_qs(parsed.query)
+                player = query.get('player', [''])[0]
+                market = query.get('market', [''])[0]
+                quote = server.quote(book, player, market)
+                if quote is None:
+                    return self._send(404, {'error': 'no quote'})
+                return self._send(200, quote)
+
+            def _send(self, status: int, payload: Dict):
+                body = json.dumps(payload).encode('utf8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # client gave up (timeout); nothing to do
+                    pass
+
+            def log_message(self, format, *args):
+                # keep test output quiet
+                pass
+
+        return Handler
+
+    def start(self) -> 'StubOddsServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run a local stub sportsbook odds server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', action='append', default=[],
+                        help='Book=seconds or Book=s1,s2,... cycled per request (repeatable)')
+    parser.add_argument('--fail', action='append', default=[], help='Book that returns HTTP 503 (repeatable)')
+    parser.add_argument('--flaky', action='append', default=[], help='Book=failure probability (repeatable)')
+    args = parser.parse_args()
+
+    delays = {}
+    for item in args.delay:
+        book, seconds = item.split('=', 1)
+        values = [float(s) for s in seconds.split(',')]
+        delays[book] = values if len(values) > 1 else values[0]
+    flaky = {book: float(p) for book, p in (item.split('=', 1) for item in args.flaky)}
+
+    stub = StubOddsServer(args.host, args.port, delays=delays, failing=args.fail, flaky=flaky)
+    print('Stub odds server on', stub.base_url)
+    print('ODDS_PROVIDER_URLS=' + ','.join(f'{b}={u}' for b, u in stub.provider_urls().items()))
+    try:
+        stub._httpd.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
@@ -2,25 +2,21 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from .metrics import compute_metrics, bootstrap_ci
+from . import odds_math
 
 
 def ev_and_roi(df: pd.DataFrame, p_col='p_hit', outcome_col='outcome', payout=2.0):
     df = df.copy()
     df = df.dropna(subset=[p_col, outcome_col])
-    df['ev'] = df[p_col] * (payout - 1) - (1 - df[p_col])
+    df['ev'] = odds_math.expected_value(df[p_col].to_numpy(dtype=float), payout)
     total_ev = df['ev'].sum()
     roi = total_ev / len(df) if len(df) > 0 else 0.0
     return {'n': len(df), 'total_ev': float(total_ev), 'roi_per_bet': float(roi)}
 
 
 def kelly_fraction(p, b):
-    b = float(b)
-    p = float(p)
-    denom = b
-    if denom == 0:
-        return 0.0
-    f = (p * (b + 1) - 1) / denom
-    return max(0.0, f)
+    """Kelly stake for win probability ``p`` at net odds ``b`` (payout - 1)."""
+    return float(odds_math.kelly_fraction(p, float(b) + 1))
 
 
 def simulate_bankroll(df: pd.DataFrame, stake_strategy: str = 'fixed', stake_val: float = 1.0, p_col='p_hit', payout=2.0):
@@ -72,12 +68,11 @@ def run_backtest(data, p_col='p_hit', outcome_col='outcome', payout=2.0, n_boots
     metrics = compute_metrics(df[outcome_col], df[p_col])
     ev = ev_and_roi(df, p_col=p_col, outcome_col=outcome_col, payout=payout)
     # kelly suggestion
-    df['kelly'] = df[p_col].apply(lambda prob: kelly_fraction(prob, payout - 1))
+    df['kelly'] = odds_math.kelly_fraction(df[p_col].to_numpy(dtype=float), payout)
     # bootstrap CI for ROI (using mean EV per bet)
     def mean_ev(y, p):
         # y here is outcomes, p is predicted probs
-        evs = p * (payout - 1) - (1 - p)
-        return np.nanmean(evs)
+        return np.nanmean(odds_math.expected_value(p, payout))
 
     median, lo, hi = bootstrap_ci(lambda y, p: mean_ev(y, p), df[outcome_col].values, df[p_col].values, n_bootstrap=n_bootstrap)
     return {'metrics': metrics, 'ev_summary': ev, 'kelly_median': float(df['kelly'].median()), 'ev_bootstrap_median': median, 'ev_bootstrap_lo': lo, 'ev_bootstrap_hi': hi}
@@ -21,6 +21,7 @@ from .backtest import run_backtest
 from .metrics import compute_metrics, calibration_by_bin
 from .demo_backtest import plot_calibration, plot_roc
 from .provider_metrics import compute_provider_metrics, plot_provider_calibration
+from .calibration import fit_calibration_maps, save_calibration_maps
 
 
 MARKETS = [
@@ -112,9 +113,14 @@ def run_market_backtest(
         outcome_col='outcome'
     )
     
+    # Fit per-provider calibration maps used by the API's prediction path
+    maps, acc = fit_calibration_maps(df, provider_col='provider', p_col='p_hit', outcome_col='outcome')
+    maps_path = save_calibration_maps(maps, acc, out_dir / f'{date_tag}_{market}_calibration_maps.json')
+    
     # Combine core and provider-specific results
     results.update({
         'provider_metrics': provider_results['metrics'],
+        'calibration_maps': str(maps_path),
         'plots': {
             'calibration': str(plot_path),
             'roc': str(roc_path),
@@ -135,7 +141,8 @@ def main(
     end_date: str,
     market: str = None,
     tiny: bool = False,
-    out_dir: str = 'data/cache/backtests'
+    out_dir: str = 'data/cache/backtests',
+    data_dir: str = 'data/cache'
 ):
     out_path = Path(out_dir)
     out_path.mkdir(parents=True, exist_ok=True)
@@ -151,7 +158,7 @@ def main(
     results = {}
     for mkt in markets_to_run:
         print(f"Running backtest for {mkt}")
-        df = load_market_data(start_date, end_date, mkt)
+        df = load_market_data(start_date, end_date, mkt, Path(data_dir))
         if len(df) == 0:
             print(f"No data found for {mkt} between {start_date} and {end_date}")
             continue
@@ -182,6 +189,7 @@ if __name__ == '__main__':
     parser.add_argument('--market', choices=MARKETS, help='Specific market to backtest')
     parser.add_argument('--tiny', action='store_true', help='Run on small sample for testing')
     parser.add_argument('--out', default='data/cache/backtests', help='Output directory')
+    parser.add_argument('--data-dir', default='data/cache', help='Directory holding merged_eval.csv')
     
     args = parser.parse_args()
     main(
@@ -189,5 +197,6 @@ if __name__ == '__main__':
         end_date=args.end,
         market=args.market,
         tiny=args.tiny,
-        out_dir=args.out
+        out_dir=args.out,
+        data_dir=args.data_dir
     )
\ No newline at end of file
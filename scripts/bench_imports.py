@@ -0,0 +1,74 @@
+"""Import-time benchmark for the API and CLI entry points.
+
+Each module is imported in a fresh interpreter (so nothing is already cached in
+sys.modules) and we report the cold import wall time plus any heavy
+dependencies that got pulled in. Heavy libraries (scipy, sklearn, matplotlib,
+seaborn) must only be imported inside the functions that use them.
+
+Usage:
+  python -m scripts.bench_imports
+  python -m scripts.bench_imports --repeat 5 --max-seconds 1.0
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+HOT_MODULES = [
+    'frontend.app',
+    'frontend.asgi',
+    'scripts.backtest_nfl',
+    'scripts.fetch_pfr_nfl',
+    'scripts.fetch_prizepicks',
+]
+
+HEAVY_MODULES = ['scipy', 'sklearn', 'matplotlib', 'seaborn']
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{'seconds': elapsed, 'heavy': heavy}}))
+"""
+
+
+def measure(module: str, repeat: int = 3) -> dict:
+    """Cold-import `module` `repeat` times and return timing + heavy imports."""
+    root = Path(__file__).resolve().parent.parent
+    samples = []
+    heavy = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=root, capture_output=True, text=True, check=True,
+        )
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        samples.append(result['seconds'])
+        heavy = result['heavy']
+    return {'module': module, 'median_s': statistics.median(samples), 'max_s': max(samples), 'heavy': heavy}
+
+
+def main(modules=None, repeat: int = 3, max_seconds: float = None) -> int:
+    failures = 0
+    print(f"{'module':<28}{'median':>10}{'max':>10}  heavy imports")
+    for module in modules or HOT_MODULES:
+        r = measure(module, repeat=repeat)
+        flag = ''
+        if r['heavy'] or (max_seconds is not None and r['median_s'] > max_seconds):
+            failures += 1
+            flag = '  <-- FAIL'
+        print(f"{module:<28}{r['median_s']:>9.3f}s{r['max_s']:>9.3f}s  {', '.join(r['heavy']) or '-'}{flag}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure cold import time of hot-path modules.')
+    parser.add_argument('modules', nargs='*', help='Modules to measure (default: API + CLI entry points)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-seconds', type=float, default=None, help='Fail if median import time exceeds this')
+    args = parser.parse_args()
+    sys.exit(main(args.modules, repeat=args.repeat, max_seconds=args.max_seconds))
@@ -9,7 +9,7 @@ def build():
     wr   = pd.read_csv("data/cache/nfl_kc_rashee_rice_2023.csv", parse_dates=['Date'])
 
     df = join_qb_wr(team, qb, wr)
-    df = clean_numeric(df)
+    df = clean_numeric(df, 'nfl_features')
 
     Path("data/cache").mkdir(parents=True, exist_ok=True)
     df.to_csv("data/cache/nfl_features.csv", index=False)
@@ -1,15 +1,37 @@
 import json
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 
 def get_latest_cache(out_dir: Path, prefix: str) -> Optional[Path]:
-    if not out_dir.exists():
+    """Blob path of the newest payload whose provider name starts with ``prefix``.
+
+    Looks the fetch up in the payload store index (``scripts/payload_store.py``)
+    rather than listing and stat-ing every file in ``out_dir``.
+    """
+    from scripts.payload_store import PayloadStore
+
+    out_dir = Path(out_dir)
+    if not (out_dir / 'index.sqlite').exists():
         return None
-    files = sorted([p for p in out_dir.iterdir() if p.name.startswith(prefix)], key=lambda p: p.stat().st_mtime, reverse=True)
-    return files[0] if files else None
+    store = PayloadStore(out_dir)
+    try:
+        providers = [p for p in store.providers() if p.startswith(prefix) or f'provider_{p}'.startswith(prefix)]
+        entries = [e for e in (store.latest(p) for p in providers) if e is not None]
+        if not entries:
+            return None
+        return store.blob_path(max(entries, key=lambda e: e['ts'])['hash'])
+    finally:
+        store.close()
+
 
+def read_json(path: Path) -> Any:
+    """Read a JSON file, transparently gunzipping store blobs (``*.json.gz``)."""
+    path = Path(path)
+    if path.suffix == '.gz':
+        import gzip
 
-def read_json(path: Path):
+        with gzip.open(path, 'rt', encoding='utf8') as f:
+            return json.load(f)
     with open(path, 'r', encoding='utf8') as f:
         return json.load(f)
@@ -0,0 +1,283 @@
+"""Probability calibration maps fitted from backtest outcomes.
+
+Maps are fitted per provider (within one market backtest) with isotonic
+regression (pool-adjacent-violators) or Platt scaling and are stored as sorted
+breakpoint arrays. Applying a map is one `np.searchsorted` plus a linear
+interpolation, so the same code calibrates a single prop or a whole slate.
+
+Outcomes are accumulated as per-provider sufficient statistics on a fixed
+probability grid, so new outcomes are folded in with a vectorized `np.add.at`
+and every provider is refit from at most `grid_size` points.
+
+Usage:
+  python -m scripts.calibration --backtest-dir data/cache/backtests
+  python -m scripts.calibration --maps data/cache/backtests/X_passing_yards_calibration_maps.json --add new_outcomes.csv
+"""
+import json
+import os
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+# pandas is only needed by the batch/CLI helpers; the API imports this module
+# for CalibrationMap, so keep it to numpy at import time.
+
+GRID_SIZE = 100
+MIN_SAMPLES = 20
+EPS = 1e-6
+MAPS_SUFFIX = '_calibration_maps'
+
+
+class CalibrationMap:
+    """Monotone piecewise-linear map from predicted to calibrated probability."""
+
+    __slots__ = ('x', 'y', 'method', 'n')
+
+    def __init__(self, x, y, method: str = 'isotonic', n: int = 0):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.method = method
+        self.n = int(n)
+
+    @classmethod
+    def identity(cls, n: int = 0) -> 'CalibrationMap':
+        return cls([0.0, 1.0], [0.0, 1.0], method='identity', n=n)
+
+    def apply(self, p):
+        """Calibrate a scalar or array of probabilities.
+
+        Inputs outside the breakpoint range are clamped to the end values.
+        """
+        p_arr = np.asarray(p, dtype=np.float64)
+        if self.x.size == 1:
+            out = np.full_like(p_arr, self.y[0])
+        else:
+            idx = np.clip(np.searchsorted(self.x, p_arr, side='right'), 1, self.x.size - 1)
+            x0 = self.x[idx - 1]
+            x1 = self.x[idx]
+            y0 = self.y[idx - 1]
+            y1 = self.y[idx]
+            span = np.where(x1 > x0, x1 - x0, 1.0)
+            out = y0 + np.clip((p_arr - x0) / span, 0.0, 1.0) * (y1 - y0)
+        return out if out.ndim else float(out)
+
+    def to_dict(self) -> Dict:
+        return {'method': self.method, 'n': self.n, 'x': self.x.tolist(), 'y': self.y.tolist()}
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> 'CalibrationMap':
+        return cls(d['x'], d['y'], method=d.get('method', 'isotonic'), n=d.get('n', 0))
+
+
+def _pav(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Weighted pool-adjacent-violators: best non-decreasing fit to `values`."""
+    means = []
+    wsums = []
+    sizes = []
+    for v, w in zip(values, weights):
+        means.append(v)
+        wsums.append(w)
+        sizes.append(1)
+        # merge backwards while the monotone constraint is violated
+        while len(means) > 1 and means[-2] > means[-1]:
+            w_tot = wsums[-2] + wsums[-1]
+            m = (means[-2] * wsums[-2] + means[-1] * wsums[-1]) / w_tot
+            size = sizes[-2] + sizes[-1]
+            del means[-1], wsums[-1], sizes[-1]
+            means[-1], wsums[-1], sizes[-1] = m, w_tot, size
+    return np.repeat(means, sizes)
+
+
+def isotonic_map(p_mean: np.ndarray, hit_rate: np.ndarray, counts: np.ndarray) -> CalibrationMap:
+    """Fit an isotonic map from grid aggregates (bin mean p, hit rate, count)."""
+    fitted = _pav(hit_rate, counts)
+    return CalibrationMap(p_mean, np.clip(fitted, 0.0, 1.0), method='isotonic', n=int(counts.sum()))
+
+
+def platt_map(p_mean: np.ndarray, hit_rate: np.ndarray, counts: np.ndarray,
+              grid_size: int = GRID_SIZE, iters: int = 50) -> CalibrationMap:
+    """Fit sigmoid(a * logit(p) + b) by weighted Newton-Raphson on grid aggregates,
+    then tabulate it on a uniform grid of breakpoints."""
+    p = np.clip(p_mean, EPS, 1 - EPS)
+    z = np.log(p / (1 - p))
+    X = np.column_stack([z, np.ones_like(z)])
+    beta = np.array([1.0, 0.0])
+    for _ in range(iters):
+        q = 1 / (1 + np.exp(-X @ beta))
+        grad = X.T @ (counts * (hit_rate - q))
+        hess = (X * (counts * q * (1 - q))[:, None]).T @ X + 1e-9 * np.eye(2)
+        step = np.linalg.solve(hess, grad)
+        beta = beta + step
+        if np.abs(step).max() < 1e-8:
+            break
+    x = np.linspace(0.0, 1.0, grid_size + 1)
+    xc = np.clip(x, EPS, 1 - EPS)
+    y = 1 / (1 + np.exp(-(beta[0] * np.log(xc / (1 - xc)) + beta[1])))
+    return CalibrationMap(x, y, method='platt', n=int(counts.sum()))
+
+
+class OutcomeAccumulator:
+    """Per-provider outcome statistics on a fixed probability grid.
+
+    `counts`, `hits` and `p_sum` are (n_providers, grid_size) arrays; adding a
+    batch of outcomes is a single vectorized scatter-add.
+    """
+
+    def __init__(self, grid_size: int = GRID_SIZE):
+        self.grid_size = grid_size
+        self.providers = []
+        self._index = {}
+        self.counts = np.zeros((0, grid_size), dtype=np.int64)
+        self.hits = np.zeros((0, grid_size), dtype=np.float64)
+        self.p_sum = np.zeros((0, grid_size), dtype=np.float64)
+
+    def _provider_rows(self, providers: np.ndarray) -> np.ndarray:
+        names, inverse = np.unique(providers.astype(str), return_inverse=True)
+        new = [n for n in names if n not in self._index]
+        if new:
+            for n in new:
+                self._index[n] = len(self.providers)
+                self.providers.append(n)
+            pad = ((0, len(new)), (0, 0))
+            self.counts = np.pad(self.counts, pad)
+            self.hits = np.pad(self.hits, pad)
+            self.p_sum = np.pad(self.p_sum, pad)
+        lookup = np.array([self._index[n] for n in names], dtype=np.int64)
+        return lookup[inverse]
+
+    def add(self, providers, p, y):
+        """Fold a batch of (provider, predicted p, 0/1 outcome) into the stats."""
+        providers = np.asarray(providers)
+        p = np.asarray(p, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        mask = ~(np.isnan(p) | np.isnan(y))
+        providers, p, y = providers[mask], np.clip(p[mask], 0.0, 1.0), y[mask]
+        if p.size == 0:
+            return self
+        rows = self._provider_rows(providers)
+        cols = np.minimum((p * self.grid_size).astype(np.int64), self.grid_size - 1)
+        np.add.at(self.counts, (rows, cols), 1)
+        np.add.at(self.hits, (rows, cols), y)
+        np.add.at(self.p_sum, (rows, cols), p)
+        return self
+
+    def fit(self, method: str = 'isotonic', min_samples: int = MIN_SAMPLES) -> Dict[str, CalibrationMap]:
+        """Refit a map for every provider; providers with too few outcomes get
+        the identity map."""
+        maps = {}
+        for name, row in self._index.items():
+            counts = self.counts[row]
+            n = int(counts.sum())
+            if n < min_samples:
+                maps[name] = CalibrationMap.identity(n)
+                continue
+            nz = counts > 0
+            c = counts[nz].astype(np.float64)
+            p_mean = self.p_sum[row][nz] / c
+            hit_rate = self.hits[row][nz] / c
+            if method == 'platt':
+                maps[name] = platt_map(p_mean, hit_rate, c, grid_size=self.grid_size)
+            else:
+                maps[name] = isotonic_map(p_mean, hit_rate, c)
+        return maps
+
+    def to_dict(self) -> Dict:
+        return {
+            'grid_size': self.grid_size,
+            'providers': list(self.providers),
+            'counts': self.counts.tolist(),
+            'hits': self.hits.tolist(),
+            'p_sum': self.p_sum.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> 'OutcomeAccumulator':
+        acc = cls(d.get('grid_size', GRID_SIZE))
+        acc.providers = list(d.get('providers', []))
+        acc._index = {n: i for i, n in enumerate(acc.providers)}
+        shape = (len(acc.providers), acc.grid_size)
+        acc.counts = np.asarray(d.get('counts') or np.zeros(shape), dtype=np.int64).reshape(shape)
+        acc.hits = np.asarray(d.get('hits') or np.zeros(shape), dtype=np.float64).reshape(shape)
+        acc.p_sum = np.asarray(d.get('p_sum') or np.zeros(shape), dtype=np.float64).reshape(shape)
+        return acc
+
+
+def fit_calibration_maps(df: 'pd.DataFrame', provider_col='provider', p_col='p_hit', outcome_col='outcome',
+                         method: str = 'isotonic', min_samples: int = MIN_SAMPLES):
+    """Fit per-provider maps from a backtest frame. Returns (maps, accumulator)."""
+    acc = OutcomeAccumulator().add(df[provider_col].values, df[p_col].values, df[outcome_col].values)
+    return acc.fit(method=method, min_samples=min_samples), acc
+
+
+def save_calibration_maps(maps: Dict[str, CalibrationMap], acc: OutcomeAccumulator, path: Path,
+                          method: str = 'isotonic'):
+    """Write maps plus the accumulated stats (for later refits) atomically."""
+    payload = {
+        'method': method,
+        'providers': {name: m.to_dict() for name, m in maps.items()},
+        'stats': acc.to_dict(),
+    }
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_calibration_maps(path: Path) -> Dict[str, CalibrationMap]:
+    with open(path, 'r') as f:
+        payload = json.load(f)
+    return {name: CalibrationMap.from_dict(d) for name, d in payload.get('providers', {}).items()}
+
+
+def refit_with_outcomes(path: Path, df: 'pd.DataFrame', provider_col='provider', p_col='p_hit',
+                        outcome_col='outcome', min_samples: int = MIN_SAMPLES) -> Dict[str, CalibrationMap]:
+    """Add new outcomes to a saved maps file and refit every provider in place."""
+    with open(path, 'r') as f:
+        payload = json.load(f)
+    method = payload.get('method', 'isotonic')
+    acc = OutcomeAccumulator.from_dict(payload.get('stats', {}))
+    acc.add(df[provider_col].values, df[p_col].values, df[outcome_col].values)
+    maps = acc.fit(method=method, min_samples=min_samples)
+    save_calibration_maps(maps, acc, path, method=method)
+    return maps
+
+
+def main(backtest_dir: str = 'data/cache/backtests', method: str = 'isotonic', min_samples: int = MIN_SAMPLES):
+    """Fit maps for every backtest CSV that has provider/p_hit/outcome columns."""
+    import pandas as pd
+
+    out_dir = Path(backtest_dir)
+    written = 0
+    for csv_path in sorted(out_dir.glob('*.csv')):
+        df = pd.read_csv(csv_path)
+        if not {'provider', 'p_hit', 'outcome'}.issubset(df.columns):
+            continue
+        maps, acc = fit_calibration_maps(df, method=method, min_samples=min_samples)
+        out = save_calibration_maps(maps, acc, out_dir / f'{csv_path.stem}{MAPS_SUFFIX}.json', method=method)
+        print('Wrote', out, {name: m.method for name, m in maps.items()})
+        written += 1
+    if not written:
+        print('No backtest CSVs with provider/p_hit/outcome columns in', out_dir)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Fit per-provider calibration maps from backtest outcomes.')
+    parser.add_argument('--backtest-dir', default='data/cache/backtests')
+    parser.add_argument('--method', choices=['isotonic', 'platt'], default='isotonic')
+    parser.add_argument('--min-samples', type=int, default=MIN_SAMPLES)
+    parser.add_argument('--maps', help='Existing *_calibration_maps.json to refit with --add outcomes')
+    parser.add_argument('--add', help='CSV of new outcomes (provider, p_hit, outcome) to fold into --maps')
+    args = parser.parse_args()
+
+    if args.maps and args.add:
+        import pandas as pd
+
+        maps = refit_with_outcomes(Path(args.maps), pd.read_csv(args.add), min_samples=args.min_samples)
+        print('Refit', args.maps, {name: m.method for name, m in maps.items()})
+    else:
+        main(args.backtest_dir, method=args.method, min_samples=args.min_samples)
@@ -1,7 +1,13 @@
 import argparse
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 
+from scripts import schema
+from scripts.gamelog_join import football_season
+
 """Clean merged evaluation CSVs by removing season-aggregate / implausible rows.
 
 This script applies conservative filters to drop rows that look like season totals
@@ -12,81 +18,138 @@ Usage:
 """
 
 
-def clean_df(df: pd.DataFrame) -> pd.DataFrame:
-    # Coerce common numeric columns
-    num_cols = ['QB_PassYds', 'WR_RecYds', 'Rec', 'Tgt', 'PF', 'PA']
-    for c in num_cols:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors='coerce')
-
-    # Start with all rows marked as good
-    keep = pd.Series(True, index=df.index)
-
-    # Heuristic: some scraped tables are season-to-date (cumulative) rather than
-    # per-game. Detect cumulative patterns for receiving columns and convert to
-    # per-game by differencing where appropriate.
-    def detect_and_diff(col_name: str, max_threshold: float = 200.0):
-        """If the series looks monotonic non-decreasing and has a large max,
-        convert it to per-game diffs (first value kept as-is). Returns True if
-        conversion was applied."""
-        if col_name not in df.columns:
-            return False
-        s = df[col_name].ffill()
-        # require at least 3 non-null values to consider conversion
-        if s.dropna().shape[0] < 3:
-            return False
-        is_mono = s.dropna().is_monotonic_increasing
-        # also convert if the median increment is meaningfully positive
-        inc = s.diff().dropna()
-        median_inc = inc.median() if not inc.empty else 0
-        if is_mono and (s.max() > max_threshold or median_inc > 1):
-            # convert to per-game: first value as-is, then differences
-            diff = s.diff().fillna(s)
-            # If differencing produced negative values (unlikely for cumulative), abort
-            if (diff < 0).any():
-                return False
-            df[col_name] = diff
-            return True
-        return False
-
-    # Try detect/convert for usual cumulative columns
-    converted_any = False
-    for c in ['WR_RecYds', 'Rec', 'Tgt']:
-        try:
-            if detect_and_diff(c, max_threshold=300.0):
-                converted_any = True
-        except Exception:
-            continue
-
-    # Rule 1: drop rows where WR receiving yards are implausibly large for a single game
+# Columns that some scraped tables carry season-to-date instead of per game
+CUMULATIVE_COLS = ['WR_RecYds', 'Rec', 'Tgt']
+DATE_COLS = ['Date_qb', 'Date_team', 'Date']
+PLAYER_COLS = ('player', 'Player', 'player_wr')
+SEASON_COLS = ('Season', 'season')
+
+
+def _group_codes(df: pd.DataFrame, by: Optional[List[str]]) -> np.ndarray:
+    """One integer code per (player, season) group.
+
+    Without explicit ``by`` the player comes from the first of PLAYER_COLS
+    present and the season from SEASON_COLS, else from the first date column.
+    A frame with none of those (a single QB/WR pair) is one group.
+    """
+    if by is None:
+        keys = {}
+        player = next((c for c in PLAYER_COLS if c in df.columns), None)
+        if player:
+            keys['player'] = df[player]
+        season = next((c for c in SEASON_COLS if c in df.columns), None)
+        if season:
+            keys['season'] = df[season]
+        else:
+            date_col = next((c for c in DATE_COLS if c in df.columns), None)
+            if date_col:
+                dates = pd.to_datetime(df[date_col], errors='coerce', format='mixed')
+                keys['season'] = football_season(dates).bfill().ffill()
+        keys = pd.DataFrame(keys, index=df.index)
+    else:
+        keys = df[by]
+    if keys.shape[1] == 0:
+        return np.zeros(len(df), dtype=np.int64)
+    return keys.groupby(list(keys.columns), sort=False, dropna=False).ngroup().to_numpy()
+
+
+def _diff_cumulative(values: np.ndarray, codes: np.ndarray, max_threshold: float):
+    """Per-game values for the groups whose column looks cumulative.
+
+    ``values`` and ``codes`` are in chronological order. A group converts when
+    it has at least 3 values, never decreases (it equals its running max) and
+    either exceeds ``max_threshold`` or grows by more than 1 per game on
+    median; its first value is kept and the rest become differences. Returns
+    the converted column, the mask of converted rows and the number of groups.
+    """
+    s = pd.Series(values)
+    gb = s.groupby(codes, sort=False)
+    filled = gb.ffill()
+    fg = filled.groupby(codes, sort=False)
+    inc = fg.diff()
+    count = s.notna().groupby(codes, sort=False).transform('sum')
+    mono = (filled.isna() | (filled == fg.cummax())).groupby(codes, sort=False).transform('all')
+    large = (fg.transform('max') > max_threshold) | (inc.groupby(codes, sort=False).transform('median') > 1)
+    mask = ((count >= 3) & mono & large).to_numpy()
+    out = values.copy()
+    out[mask] = inc.fillna(filled).to_numpy()[mask]
+    return out, mask, len(np.unique(codes[mask]))
+
+
+def _violations(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Boolean row mask per plausibility rule (True = drop)."""
+    def col(name):
+        return df[name].to_numpy(float)
+
+    rules = {}
+    # after conversion, 500+ yards is still unrealistic for a single game
     if 'WR_RecYds' in df.columns:
-        # after conversion, 400+ yards is still unrealistic; before conversion we
-        # allowed larger values because they may be cumulative.
-        keep &= ~(df['WR_RecYds'] > 500)
-        keep &= ~(df['WR_RecYds'] < 0)
-
-    # Rule 2: drop rows with implausible target/rec counts
+        rules['WR_RecYds out of [0, 500]'] = (col('WR_RecYds') > 500) | (col('WR_RecYds') < 0)
     if 'Rec' in df.columns:
-        keep &= ~(df['Rec'] > 20)
-        keep &= ~(df['Rec'] < 0)
+        rules['Rec out of [0, 20]'] = (col('Rec') > 20) | (col('Rec') < 0)
     if 'Tgt' in df.columns:
-        keep &= ~(df['Tgt'] > 40)
-        keep &= ~(df['Tgt'] < 0)
-
-    # Rule 3: drop rows where WR yards massively exceed QB yards times a factor
+        rules['Tgt out of [0, 40]'] = (col('Tgt') > 40) | (col('Tgt') < 0)
+    # WR yards massively exceeding QB yards
     if 'QB_PassYds' in df.columns and 'WR_RecYds' in df.columns:
-        qb = df['QB_PassYds'].fillna(0).abs()
-        keep &= ~((df['WR_RecYds'] > qb * 10) & (qb > 0))
-
-    # Rule 4: drop rows missing all date columns (often aggregate rows have no date)
-    date_cols_present = [c for c in ['Date_qb', 'Date_team', 'Date'] if c in df.columns]
+        qb = np.abs(np.nan_to_num(col('QB_PassYds')))
+        rules['WR_RecYds > 10x QB_PassYds'] = (col('WR_RecYds') > qb * 10) & (qb > 0)
+    # rows missing every date column are usually aggregate rows
+    date_cols_present = [c for c in DATE_COLS if c in df.columns]
     if date_cols_present:
-        # keep rows where at least one date column is present
-        any_date = ~df[date_cols_present].isna().all(axis=1)
-        keep &= any_date
-
-    cleaned = df[keep].copy()
-    return cleaned
+        rules['no date'] = df[date_cols_present].isna().all(axis=1).to_numpy()
+    return rules
+
+
+def clean_report(df: pd.DataFrame, by: Optional[List[str]] = None,
+                 max_threshold: float = 300.0) -> Tuple[pd.DataFrame, Dict]:
+    """Clean ``df`` and report what was converted and dropped.
+
+    Season-to-date receiving columns are detected and differenced per
+    (player, season) group (see ``_group_codes``), in date order, so one
+    cumulative player no longer hinges on every other row in a league-wide
+    merge. All plausibility rules are then applied as one mask.
+
+    The report has ``converted`` ({column: groups differenced}), ``dropped``
+    ({rule: rows violating it}; a row can violate several) and ``removed``.
+    """
+    # Typed frames (schema.read) pass through; raw ones are parsed here once
+    schema.get('merged_eval').coerce(df)
+
+    report = {'converted': {}, 'dropped': {}, 'removed': 0}
+    cum_cols = [c for c in CUMULATIVE_COLS if c in df.columns]
+    if cum_cols and len(df):
+        codes = _group_codes(df, by)
+        date_col = next((c for c in DATE_COLS if c in df.columns), None)
+        if date_col:
+            dates = pd.to_datetime(df[date_col], errors='coerce', format='mixed')
+            # by date within each group; undated rows keep frame order at the end
+            ns = dates.to_numpy('datetime64[ns]').view('int64').copy()
+            ns[dates.isna().to_numpy()] = np.iinfo(np.int64).max
+            order = np.lexsort((ns, codes))
+        else:
+            order = np.argsort(codes, kind='stable')
+        for c in cum_cols:
+            values = df[c].to_numpy(float)
+            out, mask, groups = _diff_cumulative(values[order], codes[order], max_threshold)
+            if groups:
+                values = values.copy()
+                values[order[mask]] = out[mask]
+                df[c] = values
+            report['converted'][c] = groups
+
+    rules = _violations(df)
+    if rules:
+        bad = np.vstack(list(rules.values()))
+        report['dropped'] = dict(zip(rules, bad.sum(axis=1).tolist()))
+        keep = ~bad.any(axis=0)
+    else:
+        keep = np.ones(len(df), dtype=bool)
+    report['removed'] = int(len(df) - keep.sum())
+    return df[keep].copy(), report
+
+
+def clean_df(df: pd.DataFrame, by: Optional[List[str]] = None) -> pd.DataFrame:
+    return clean_report(df, by)[0]
 
 
 def main(in_path: str, out_path: str):
@@ -94,16 +157,20 @@ def main(in_path: str, out_path: str):
     if not p.exists():
         raise FileNotFoundError(in_path)
 
-    df = pd.read_csv(p)
+    df = schema.read('merged_eval', p)
     before = len(df)
-    cleaned = clean_df(df)
+    cleaned, report = clean_report(df)
     after = len(cleaned)
 
-    outp = Path(out_path)
-    outp.parent.mkdir(parents=True, exist_ok=True)
-    cleaned.to_csv(outp, index=False)
+    schema.write('merged_eval', cleaned, out_path)
 
     print(f'Cleaned {in_path}: {before} -> {after} rows (removed {before-after})')
+    for col, groups in report['converted'].items():
+        if groups:
+            print(f'  {col}: {groups} cumulative player-season(s) converted to per-game')
+    for rule, n in report['dropped'].items():
+        if n:
+            print(f'  {rule}: {n} row(s)')
 
 
 if __name__ == '__main__':
@@ -2,8 +2,6 @@ import json
 from pathlib import Path
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from sklearn.metrics import roc_curve, auc
 
 from scripts.metrics import compute_metrics, calibration_by_bin
 from scripts.backtest import run_backtest
@@ -25,6 +23,8 @@ def synth_data(n=200, seed=42):
 
 
 def plot_calibration(df, out_path: Path, n_bins=10):
+    import matplotlib.pyplot as plt
+
     cb = calibration_by_bin(df['outcome'], df['p_hit'], n_bins=n_bins, strategy='quantile')
     fig, ax = plt.subplots(figsize=(6, 4))
     ax.plot(cb['p_mean'], cb['y_mean'], marker='o')
@@ -38,6 +38,9 @@ def plot_calibration(df, out_path: Path, n_bins=10):
 
 
 def plot_roc(df, out_path: Path):
+    import matplotlib.pyplot as plt
+    from sklearn.metrics import roc_curve, auc
+
     fpr, tpr, _ = roc_curve(df['outcome'], df['p_hit'])
     roc_auc = auc(fpr, tpr)
     fig, ax = plt.subplots(figsize=(6,4))
@@ -3,6 +3,8 @@ import numpy as np
 from pathlib import Path
 import sys
 
+from scripts.gamelog_join import GamelogJoin
+
 """Simple evaluation script for NFL demo data.
 
 Loads CSVs from data/samples (team, qb, wr), joins on Date, computes:
@@ -32,47 +34,17 @@ def merge_dfs(team_csv, qb_csv, wr_csv):
         if 'Date' in df.columns:
             df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
 
-    # Determine best join key: prefer Date, then Week, then G#; otherwise align by position
-    def has_col(df, col):
-        return col in df.columns
-
-    # prefer Date if all have it
-    if has_col(team, 'Date') and has_col(qb, 'Date') and has_col(wr, 'Date'):
-        merged = team.merge(qb, on='Date', how='inner', suffixes=('_team', '_qb'))
-        merged = merged.merge(wr, on='Date', how='inner', suffixes=('', '_wr'))
-        return merged
-
-    # prefer Week
-    if has_col(team, 'Week') and has_col(qb, 'Week') and has_col(wr, 'Week'):
-        merged = team.merge(qb, on='Week', how='inner', suffixes=('_team', '_qb'))
-        merged = merged.merge(wr, on='Week', how='inner', suffixes=('', '_wr'))
-        return merged
-
-    # prefer game number
-    if has_col(team, 'G#') and has_col(qb, 'G#') and has_col(wr, 'G#'):
-        merged = team.merge(qb, on='G#', how='inner', suffixes=('_team', '_qb'))
-        merged = merged.merge(wr, on='G#', how='inner', suffixes=('', '_wr'))
-        return merged
-
-    # Last resort: align by row order (positional)
-    team2 = team.reset_index(drop=True).copy()
-    qb2 = qb.reset_index(drop=True).copy()
-    wr2 = wr.reset_index(drop=True).copy()
-    # trim to shortest length
-    n = min(len(team2), len(qb2), len(wr2))
-    if n == 0:
+    # Key every log on (season, week, team, game_id) and align all three at
+    # once; each log falls back from Week to Date, G# and finally row position
+    # against the team schedule on its own (see scripts/gamelog_join.py).
+    join = GamelogJoin()
+    join.add_team(team, suffix='_team')
+    join.add_player(qb, 'qb')
+    join.add_player(wr, 'wr')
+    merged = join.frame(how='inner')
+    if merged.empty:
         raise RuntimeError('No overlapping rows to merge')
-    team2 = team2.head(n).copy()
-    qb2 = qb2.head(n).copy()
-    wr2 = wr2.head(n).copy()
-    # add positional key
-    team2['_pos'] = range(n)
-    qb2['_pos'] = range(n)
-    wr2['_pos'] = range(n)
-    merged = team2.merge(qb2, on='_pos', how='inner', suffixes=('_team', '_qb'))
-    merged = merged.merge(wr2, on='_pos', how='inner', suffixes=('', '_wr'))
-    merged = merged.drop(columns=['_pos'])
-    return merged
+    return merged.reset_index(drop=True)
 
 
 def compute_metrics(df, x_col='QB_PassYds', y_col='WR_RecYds'):
@@ -110,13 +82,13 @@ def compute_metrics(df, x_col='QB_PassYds', y_col='WR_RecYds'):
     }
 
 
-def main():
+def main(team_csv=None, qb_csv=None, wr_csv=None, out_path=None):
     base = Path('data/samples')
     base = Path('data/cache')
     # Default to 2025 demo files (update as you fetch different players/teams)
-    team_csv = base / 'nfl_kc_2025_team.csv'
-    qb_csv = base / 'nfl_kc_mahomes_2025.csv'
-    wr_csv = base / 'nfl_kc_rashee_rice_2025.csv'
+    team_csv = team_csv or base / 'nfl_kc_2025_team.csv'
+    qb_csv = qb_csv or base / 'nfl_kc_mahomes_2025.csv'
+    wr_csv = wr_csv or base / 'nfl_kc_rashee_rice_2025.csv'
 
     try:
         merged = merge_dfs(team_csv, qb_csv, wr_csv)
@@ -124,7 +96,7 @@ def main():
         print('Error merging CSVs:', e)
         sys.exit(1)
 
-    out_path = base / 'merged_eval.csv'
+    out_path = out_path or base / 'merged_eval.csv'
     merged.to_csv(out_path, index=False)
     print(f'Merged {len(merged)} rows written to {out_path}')
 
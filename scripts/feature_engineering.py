@@ -1,6 +1,9 @@
 import pandas as pd
 from pathlib import Path
 
+from scripts import schema
+from scripts.feature_store import grouped_rolling
+
 """Compute simple per-game features from merged_eval.csv.
 
 Produces data/samples/features.csv with features used by the ranking model.
@@ -12,15 +15,13 @@ def main(in_path: str = 'data/samples/merged_eval.csv', out_path: str = 'data/sa
     if not p.exists():
         raise FileNotFoundError(f"Missing input merged CSV: {in_path}")
 
-    df = pd.read_csv(p)
-
-    # Ensure numeric columns
-    for c in ['QB_PassYds', 'WR_RecYds', 'Rec', 'Tgt', 'PF', 'PA']:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors='coerce')
+    # numeric and date columns come back typed (and unparsed while the CSV is unchanged)
+    df = schema.read('merged_eval', p)
 
-    # Rolling features for WR: previous 3-game avg yards and targets (per player/season not available in demo)
-    df['WR_RecYds_roll3'] = df['WR_RecYds'].rolling(3, min_periods=1).mean()
+    # Rolling features for WR: 3-game avg yards, restarted per player/season when
+    # the frame carries them (scripts/feature_store.py keeps these incrementally)
+    by = [c for c in ('player', 'Season') if c in df.columns]
+    df['WR_RecYds_roll3'] = grouped_rolling(df, ['WR_RecYds'], 3, by)['WR_RecYds']
     if 'Rec' in df.columns and 'Tgt' in df.columns:
         df['TargetShare'] = df['Rec'] / df['Tgt'].replace({0: pd.NA})
     else:
@@ -34,7 +35,7 @@ def main(in_path: str = 'data/samples/merged_eval.csv', out_path: str = 'data/sa
     # Normalize column names for downstream scripts
     features = features.rename(columns={'Date_qb':'Date','Week_qb':'Week'})
 
-    features.to_csv(out_path, index=False)
+    schema.write('features', features, out_path)
     print(f'Wrote features to {out_path} with {len(features)} rows')
 
 
@@ -0,0 +1,336 @@
+"""Per-player rolling, EWMA and share features, persisted columnar and updated incrementally.
+
+Features are computed per (player, season), in week order, as of the end of
+each game, so a player's latest row holds the features for their next game:
+
+- ``{stat}_roll{w}``: mean of the last ``w`` games (fewer early in the season)
+- ``{stat}_ewm{span}``: exponentially weighted mean (``adjust=False``,
+  missing games skipped)
+- ``{stat}_share``: the player's share of the team total for that game,
+  summed over the players in the store
+
+Input is a long game-log frame with ``player``, ``season``, ``week`` and
+optionally ``team``/``game_id`` columns, e.g. ``GamelogJoin.long()``.
+``update`` compares it with what is stored and only recomputes affected
+tails:
+
+- for each (player, season) with a new or corrected game, the games from the
+  first changed week on, using the ``w - 1`` stored games before it as
+  rolling context and the stored EWMA value before it as the seed
+- shares for every player in the team-games touched
+
+Recomputed rows are written as a new segment: one ``.npy`` file per column,
+strings dictionary-encoded, as in ``scripts/odds_ticks.py``. A later segment
+supersedes earlier rows with the same (player, season, week). ``compact``
+rewrites the store as one segment; it runs automatically past
+``max_segments``.
+
+Usage:
+  python -m scripts.feature_store update --season 2025
+  python -m scripts.feature_store latest --players rashee_rice --out data/cache/slate_features.csv
+  python -m scripts.feature_store compact
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+FEATURE_VERSION = 1
+GROUP = ['player', 'season']
+ROW_KEY = ['player', 'season', 'week']
+STRING_COLUMNS = ('player', 'team', 'game_id')
+KEY_COLUMNS = ('player', 'season', 'week', 'team', 'game_id')
+DEFAULT_WINDOWS = (3,)
+DEFAULT_SPANS = (4,)
+DEFAULT_SHARES = ('Tgt', 'Rec', 'WR_RecYds')
+
+
+def grouped_rolling(df: pd.DataFrame, cols: Sequence[str], window: int, by: Sequence[str]) -> pd.DataFrame:
+    """``rolling(window, min_periods=1).mean()`` of ``cols`` within each ``by`` group, aligned to ``df``.
+
+    ``df`` must already be in game order within each group.
+    """
+    if not by:
+        return df[list(cols)].rolling(window, min_periods=1).mean()
+    rolled = df.groupby(list(by), sort=False)[list(cols)].rolling(window, min_periods=1).mean()
+    return rolled.reset_index(level=list(range(len(by))), drop=True).reindex(df.index)
+
+
+def grouped_ewm(df: pd.DataFrame, cols: Sequence[str], span: float, by: Sequence[str]) -> pd.DataFrame:
+    ewm = df.groupby(list(by), sort=False)[list(cols)].ewm(span=span, adjust=False, ignore_na=True).mean()
+    return ewm.reset_index(level=list(range(len(by))), drop=True).reindex(df.index)
+
+
+def feature_names(stats: Sequence[str], windows: Sequence[int], spans: Sequence[float],
+                  shares: Sequence[str]) -> List[str]:
+    names = [f'{s}_roll{w}' for w in windows for s in stats]
+    names += [f'{s}_ewm{span:g}' for span in spans for s in stats]
+    names += [f'{s}_share' for s in shares]
+    return names
+
+
+class FeatureStore:
+    """Feature rows under ``root`` (``manifest.json`` plus segment directories)."""
+
+    def __init__(self, root='data/cache/features', stats: Optional[Sequence[str]] = None,
+                 windows: Optional[Sequence[int]] = None, spans: Optional[Sequence[float]] = None,
+                 shares: Optional[Sequence[str]] = None, max_segments: int = 16):
+        self.root = Path(root)
+        self.max_segments = max_segments
+        manifest = self._read_manifest()
+        self.segments: List[Dict] = manifest['segments']
+        self.next_segment: int = manifest['next_segment']
+        self.dictionaries: Dict[str, List[str]] = manifest['dictionaries']
+        spec = manifest.get('spec')
+        wanted = {'stats': stats, 'windows': windows, 'spans': spans, 'shares': shares}
+        if spec is not None:
+            for name, value in wanted.items():
+                if value is not None and list(value) != spec[name]:
+                    raise ValueError(f'Feature store {self.root} was built with {name}={spec[name]}; '
+                                     f'rebuild it to use {list(value)}')
+            self.spec = spec
+        else:
+            self.spec = {'stats': list(stats) if stats is not None else None,
+                         'windows': list(windows or DEFAULT_WINDOWS),
+                         'spans': list(spans or DEFAULT_SPANS),
+                         'shares': list(shares) if shares is not None else None}
+
+    # -- manifest ------------------------------------------------------------
+
+    def _read_manifest(self) -> Dict:
+        path = self.root / 'manifest.json'
+        if not path.exists():
+            return {'version': FEATURE_VERSION, 'next_segment': 0, 'segments': [],
+                    'dictionaries': {col: [] for col in STRING_COLUMNS}}
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != FEATURE_VERSION:
+            raise ValueError(f'Feature store version {manifest.get("version")} != {FEATURE_VERSION}')
+        return manifest
+
+    def _write_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / 'manifest.json.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'version': FEATURE_VERSION, 'spec': self.spec, 'next_segment': self.next_segment,
+                       'segments': self.segments, 'dictionaries': self.dictionaries}, f)
+        os.replace(tmp, self.root / 'manifest.json')
+
+    @property
+    def stats(self) -> List[str]:
+        return self.spec['stats'] or []
+
+    @property
+    def features(self) -> List[str]:
+        return feature_names(self.stats, self.spec['windows'], self.spec['spans'], self.spec['shares'] or [])
+
+    @property
+    def columns(self) -> List[str]:
+        return list(KEY_COLUMNS) + self.stats + self.features
+
+    # -- reading -------------------------------------------------------------
+
+    def _encode(self, column: str, values: pd.Series) -> np.ndarray:
+        dictionary = self.dictionaries[column]
+        known = pd.Index(dictionary)
+        new = [v for v in pd.unique(values.to_numpy()) if v not in known]
+        dictionary.extend(new)
+        return pd.Index(dictionary).get_indexer(values.to_numpy()).astype(np.int32)
+
+    def _decode(self, column: str, codes: np.ndarray) -> np.ndarray:
+        return np.asarray(self.dictionaries[column], dtype=object)[codes]
+
+    def frame(self, players: Optional[Iterable[str]] = None, season: Optional[int] = None) -> pd.DataFrame:
+        """Current feature rows, sorted by player, season and week."""
+        if not self.segments:
+            return pd.DataFrame({c: pd.Series(dtype=object if c in STRING_COLUMNS else float)
+                                 for c in self.columns})
+        arrays = {col: [] for col in self.columns}
+        for meta in self.segments:
+            directory = self.root / meta['name']
+            for col in self.columns:
+                arrays[col].append(np.load(directory / f'{col}.npy', mmap_mode='r'))
+        df = pd.DataFrame({col: np.concatenate(parts) for col, parts in arrays.items()})
+        # later segments supersede earlier rows for the same game
+        df = df.drop_duplicates(ROW_KEY, keep='last')
+        if players is not None:
+            codes = pd.Index(self.dictionaries['player']).get_indexer(list(players))
+            df = df[df['player'].isin(codes[codes >= 0])]
+        if season is not None:
+            df = df[df['season'] == season]
+        for col in STRING_COLUMNS:
+            df[col] = self._decode(col, df[col].to_numpy())
+        return df.sort_values(ROW_KEY, kind='stable').reset_index(drop=True)
+
+    def latest(self, players: Optional[Iterable[str]] = None, season: Optional[int] = None) -> pd.DataFrame:
+        """Each player's most recent row: the features going into their next game."""
+        return self.frame(players, season).groupby('player', sort=False).tail(1).reset_index(drop=True)
+
+    # -- writing -------------------------------------------------------------
+
+    def _write_segment(self, df: pd.DataFrame) -> Dict:
+        name = f'seg-{self.next_segment:06d}'
+        self.next_segment += 1
+        directory = self.root / name
+        directory.mkdir(parents=True, exist_ok=True)
+        for col in self.columns:
+            if col in STRING_COLUMNS:
+                values = self._encode(col, df[col].astype(object))
+            elif col in ('season', 'week'):
+                values = df[col].to_numpy(dtype=np.int32)
+            else:
+                values = df[col].to_numpy(dtype=np.float64)
+            np.save(directory / f'{col}.npy', np.ascontiguousarray(values))
+        return {'name': name, 'rows': int(len(df))}
+
+    def _incoming(self, games: pd.DataFrame) -> pd.DataFrame:
+        missing = [c for c in ROW_KEY if c not in games.columns]
+        if missing:
+            raise KeyError(f'Game rows need columns {missing}')
+        if self.spec['stats'] is None:
+            self.spec['stats'] = [c for c in games.columns if c not in KEY_COLUMNS
+                                  and pd.api.types.is_numeric_dtype(games[c])]
+        if self.spec['shares'] is None:
+            self.spec['shares'] = [s for s in DEFAULT_SHARES if s in self.stats]
+        out = pd.DataFrame({'player': games['player'].astype(str).to_numpy(),
+                            'season': pd.to_numeric(games['season']).astype(int).to_numpy(),
+                            'week': pd.to_numeric(games['week']).astype(int).to_numpy()})
+        for col in ('team', 'game_id'):
+            out[col] = games[col].fillna('').astype(str).to_numpy() if col in games.columns else ''
+        for stat in self.stats:
+            out[stat] = pd.to_numeric(games[stat], errors='coerce').astype(float).to_numpy() \
+                if stat in games.columns else np.nan
+        return out.drop_duplicates(ROW_KEY, keep='last')
+
+    def update(self, games: pd.DataFrame) -> Dict:
+        """Ingest game rows; recompute and persist only the affected tails."""
+        incoming = self._incoming(games)
+        stats = self.stats
+        state = self.frame()
+
+        # which incoming rows are new or differ from what is stored
+        pos = pd.MultiIndex.from_frame(state[ROW_KEY]).get_indexer(pd.MultiIndex.from_frame(incoming[ROW_KEY]))
+        found = pos >= 0
+        changed = ~found
+        if found.any():
+            old = state.iloc[pos[found]]
+            a, b = incoming.loc[found, stats].to_numpy(float), old[stats].to_numpy(float)
+            same = ((a == b) | (np.isnan(a) & np.isnan(b))).all(axis=1)
+            for col in ('team', 'game_id'):
+                same &= incoming.loc[found, col].to_numpy() == old[col].to_numpy()
+            changed[found] = ~same
+        fresh = incoming[changed]
+        summary = {'rows': int(len(incoming)), 'changed': int(len(fresh)), 'groups': 0, 'written': 0,
+                   'segment': None}
+        if fresh.empty:
+            return summary
+
+        # each touched (player, season) is recomputed from its first changed week
+        cut = fresh.groupby(GROUP, sort=False)['week'].min().rename('_cut')
+        summary['groups'] = int(len(cut))
+        stored = state.join(cut, on=GROUP)
+        touched = stored['_cut'].notna()
+        before = stored[touched & (stored['week'] < stored['_cut'])]
+        tail = stored[touched & (stored['week'] >= stored['_cut'])]
+        replaced = pd.MultiIndex.from_frame(tail[ROW_KEY]).isin(pd.MultiIndex.from_frame(fresh[ROW_KEY]))
+        work = pd.concat([tail.loc[~replaced, list(KEY_COLUMNS) + stats], fresh], ignore_index=True)
+        work = work.sort_values(ROW_KEY, kind='stable').reset_index(drop=True)
+
+        # rolling: the last w - 1 stored games before the cut are context
+        windows, spans = self.spec['windows'], self.spec['spans']
+        if windows:
+            context = before.groupby(GROUP, sort=False).tail(max(windows) - 1)
+            seq = pd.concat([context[ROW_KEY + stats].assign(_ctx=True), work[ROW_KEY + stats].assign(_ctx=False)],
+                            ignore_index=True).sort_values(ROW_KEY, kind='stable').reset_index(drop=True)
+            keep = ~seq['_ctx'].to_numpy(bool)
+            for w in windows:
+                rolled = grouped_rolling(seq, stats, w, GROUP)[keep]
+                work[[f'{s}_roll{w}' for s in stats]] = rolled.to_numpy()
+        # EWMA: the stored value before the cut seeds the recurrence
+        seeds = before.groupby(GROUP, sort=False).tail(1)
+        for span in spans:
+            names = [f'{s}_ewm{span:g}' for s in stats]
+            seed = seeds[ROW_KEY + names].rename(columns=dict(zip(names, stats)))
+            seq = pd.concat([seed.assign(_ctx=True), work[ROW_KEY + stats].assign(_ctx=False)],
+                            ignore_index=True).sort_values(ROW_KEY, kind='stable').reset_index(drop=True)
+            work[names] = grouped_ewm(seq, stats, span, GROUP)[~seq['_ctx'].to_numpy(bool)].to_numpy()
+
+        # shares: a changed game also rewrites its stored teammates' shares
+        shares = self.spec['shares'] or []
+        delta = work
+        if shares:
+            games_key = ['team', 'season', 'week']
+            others = state[~pd.MultiIndex.from_frame(state[ROW_KEY]).isin(pd.MultiIndex.from_frame(work[ROW_KEY]))]
+            others = others[pd.MultiIndex.from_frame(others[games_key]).isin(
+                pd.MultiIndex.from_frame(work.loc[work['team'] != '', games_key]))]
+            rows = pd.concat([work, others], ignore_index=True)
+            totals = rows[rows['team'] != ''].groupby(games_key)[shares].sum(min_count=1)
+            totals = totals.reindex(pd.MultiIndex.from_frame(rows[games_key])).to_numpy()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values = rows[shares].to_numpy(float) / np.where(totals == 0, np.nan, totals)
+            rows[[f'{s}_share' for s in shares]] = values
+            changed_games = pd.MultiIndex.from_frame(fresh.loc[fresh['team'] != '', games_key])
+            is_work = np.arange(len(rows)) < len(work)
+            delta = rows[is_work | pd.MultiIndex.from_frame(rows[games_key]).isin(changed_games)]
+        for col in self.features:
+            if col not in delta.columns:
+                delta[col] = np.nan
+
+        meta = self._write_segment(delta[self.columns])
+        self.segments.append(meta)
+        self._write_manifest()
+        summary.update(written=meta['rows'], segment=meta['name'])
+        if len(self.segments) > self.max_segments:
+            self.compact()
+        return summary
+
+    def compact(self) -> Dict:
+        """Rewrite every segment as one, dropping superseded rows."""
+        if len(self.segments) <= 1:
+            return {'segments': len(self.segments), 'rows': sum(s['rows'] for s in self.segments)}
+        df = self.frame()
+        old = [s['name'] for s in self.segments]
+        meta = self._write_segment(df)
+        self.segments = [meta]
+        self._write_manifest()
+        for name in old:
+            shutil.rmtree(self.root / name, ignore_errors=True)
+        return {'segments': 1, 'rows': meta['rows']}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Incremental per-player feature store')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p_update = sub.add_parser('update', help='Ingest cached game logs for a season')
+    p_update.add_argument('--season', type=int, required=True)
+    p_update.add_argument('--teams', nargs='*')
+    p_update.add_argument('--cache-dir', default='data/cache')
+    p_latest = sub.add_parser('latest', help="Each player's features for their next game")
+    p_latest.add_argument('--players', nargs='*')
+    p_latest.add_argument('--season', type=int)
+    p_latest.add_argument('--out')
+    sub.add_parser('compact')
+    for p in (p_update, p_latest, sub.choices['compact']):
+        p.add_argument('--root', default='data/cache/features')
+    args = parser.parse_args()
+
+    store = FeatureStore(args.root)
+    if args.cmd == 'update':
+        from scripts.gamelog_join import cache_join
+
+        print(store.update(cache_join(args.cache_dir, args.season, args.teams).long()))
+    elif args.cmd == 'latest':
+        latest = store.latest(args.players, args.season)
+        if args.out:
+            latest.to_csv(args.out, index=False)
+            print(f'Wrote {len(latest)} rows to {args.out}')
+        else:
+            print(latest.to_string(index=False))
+    else:
+        print(store.compact())
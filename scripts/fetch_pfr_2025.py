@@ -2,6 +2,9 @@
 
 This script calls existing `fetch_qb_gamelog`, `fetch_wr_gamelog`, and
 `fetch_team_offense_gamelog` to save sample 2025 CSVs into `data/cache`.
+Pass `--league` to crawl every team's roster instead (see `scripts.pfr_crawler`),
+or `--incremental` to add only the games played since the last run
+(see `scripts.gamelog_store`).
 """
 from pathlib import Path
 from scripts.fetch_pfr_nfl import fetch_team_offense_gamelog, fetch_qb_gamelog, fetch_wr_gamelog, save_csv
@@ -25,5 +28,41 @@ def main(out_dir='data/cache'):
     print('Wrote 2025 demo PFR CSVs to', outdir)
 
 
+def crawl_league(out_dir='data/cache', season: int = 2025):
+    """Resumable whole-league crawl of the season's team and player game logs."""
+    from scripts.pfr_crawler import JobLedger, PFRCrawler
+
+    crawler = PFRCrawler(JobLedger(Path(out_dir) / 'pfr_crawl.sqlite'), out_dir=out_dir)
+    crawler.seed([season])
+    print(crawler.run())
+
+
+def refresh_incremental(out_dir='data/cache', season: int = 2025):
+    """Append the demo team's and players' newly played games to their CSVs."""
+    from scripts.gamelog_store import GamelogStore, IncrementalIngestor
+
+    outdir = Path(out_dir)
+    players = [
+        {'team': 'KC', 'pfr_id': 'MahoPa00', 'name': 'Patrick Mahomes', 'pos': 'QB',
+         'csv': outdir / f'nfl_kc_mahomes_{season}.csv'},
+        {'team': 'KC', 'pfr_id': 'RiceRa00', 'name': 'Rashee Rice', 'pos': 'WR',
+         'csv': outdir / f'nfl_kc_rashee_rice_{season}.csv'},
+    ]
+    store = GamelogStore(outdir / 'gamelogs.sqlite')
+    try:
+        summary = IncrementalIngestor(store, out_dir=outdir).refresh(season, ['KC'], players)
+    finally:
+        store.close()
+    print(f"{len(summary['changes'])} new or corrected game rows "
+          f"({summary['players_fetched']} players fetched, {summary['players_skipped']} skipped)")
+
+
 if __name__ == '__main__':
-    main()
+    import sys
+
+    if '--league' in sys.argv[1:]:
+        crawl_league()
+    elif '--incremental' in sys.argv[1:]:
+        refresh_incremental()
+    else:
+        main()
@@ -23,24 +23,58 @@ import urllib.request
 import urllib.error
 from io import StringIO
 
+from scripts.page_cache import get_page_cache
+from scripts.pfr_tables import extract_tables
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
+PFR_BASE_URL = "https://www.pro-football-reference.com"
+
+# ids of the game-log tables on team pages and player gamelog pages (older
+# layouts split passing and receiving into separate tables)
+TEAM_GAMELOG_TABLE_IDS = ("games",)
+PLAYER_GAMELOG_TABLE_IDS = ("stats", "passing", "receiving_and_rushing", "rushing_and_receiving")
+
 PFR_TEAM_CODES = {
-    # Extend this map as needed. Keys are common 2-3 letter team abbreviations
-    # used elsewhere in the project; values are the PFR team slug used in URLs.
-    "KC": "kan",  # Kansas City Chiefs
-    "PHI": "phi",
-    "DAL": "dal",
+    # Keys are common 2-3 letter team abbreviations used elsewhere in the
+    # project; values are the PFR team slug used in URLs (franchise-historic,
+    # hence e.g. "rav" for Baltimore and "oti" for Tennessee).
+    "ARI": "crd", "ATL": "atl", "BAL": "rav", "BUF": "buf",
+    "CAR": "car", "CHI": "chi", "CIN": "cin", "CLE": "cle",
+    "DAL": "dal", "DEN": "den", "DET": "det", "GB": "gnb",
+    "HOU": "htx", "IND": "clt", "JAX": "jax", "KC": "kan",  # Kansas City Chiefs
+    "LV": "rai", "LAC": "sdg", "LAR": "ram", "MIA": "mia",
+    "MIN": "min", "NE": "nwe", "NO": "nor", "NYG": "nyg",
+    "NYJ": "nyj", "PHI": "phi", "PIT": "pit", "SF": "sfo",
+    "SEA": "sea", "TB": "tam", "TEN": "oti", "WAS": "was",
 }
 
 
-def _fetch_html(url: str, retries: int = 3, backoff: float = 1.0, timeout: int = 20) -> str:
+_USE_DEFAULT_CACHE = object()
+
+
+def _fetch_html(url: str, retries: int = 3, backoff: float = 1.0, timeout: int = 20,
+                cache=_USE_DEFAULT_CACHE, cached=_USE_DEFAULT_CACHE) -> str:
     """Fetch HTML from a URL with a browser-like User-Agent and retry logic.
 
     Uses urllib from the stdlib so we don't add new pip dependencies.
     Returns the decoded HTML string on success or raises an informative error.
+
+    Pages go through the on-disk ``PageCache`` (see ``scripts/page_cache.py``):
+    finished seasons are served from disk, other cached pages are revalidated
+    with a conditional GET, and a cached copy is returned if the site is down
+    (network errors and 5xx). Client errors, 429 in particular, are raised so
+    callers can back off. Pass ``cache=None`` to always download, and
+    ``cached`` when the caller already looked the page up.
     """
+    if cache is _USE_DEFAULT_CACHE:
+        cache = get_page_cache()
+    if cached is _USE_DEFAULT_CACHE:
+        cached = cache.get(url) if cache is not None else None
+    if cache is not None and cache.usable_without_network(cached):
+        return cached.html
+
     headers = {
         "User-Agent": (
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -48,6 +82,8 @@ def _fetch_html(url: str, retries: int = 3, backoff: float = 1.0, timeout: int =
             "Chrome/115.0 Safari/537.36"
         )
     }
+    if cached is not None:
+        headers.update(cached.validators())
 
     last_exc = None
     for attempt in range(1, retries + 1):
@@ -58,8 +94,12 @@ def _fetch_html(url: str, retries: int = 3, backoff: float = 1.0, timeout: int =
                 # Try to decode using resp headers if available
                 encoding = resp.headers.get_content_charset(failobj="utf-8")
                 html = content.decode(encoding, errors="replace")
+                if cache is not None:
+                    cache.put(url, html, resp.headers)
                 return html
         except urllib.error.HTTPError as e:
+            if e.code == 304 and cached is not None:
+                return cache.touch(cached).html
             last_exc = e
             logger.warning("HTTPError %s for %s (attempt %d)", e.code, url, attempt)
             if 400 <= e.code < 500:
@@ -69,10 +109,15 @@ def _fetch_html(url: str, retries: int = 3, backoff: float = 1.0, timeout: int =
             last_exc = e
             logger.warning("Error fetching %s: %s (attempt %d)", url, e, attempt)
 
-        # backoff with jitter
-        sleep = backoff * (2 ** (attempt - 1)) + random.random() * 0.5
-        time.sleep(sleep)
+        # backoff with jitter (not after the last attempt)
+        if attempt < retries:
+            sleep = backoff * (2 ** (attempt - 1)) + random.random() * 0.5
+            time.sleep(sleep)
 
+    client_error = isinstance(last_exc, urllib.error.HTTPError) and 400 <= last_exc.code < 500
+    if cached is not None and not client_error:
+        logger.warning("Serving cached copy of %s after fetch failure", url)
+        return cached.html
     raise RuntimeError(f"Failed to fetch {url}") from last_exc
 
 
@@ -116,6 +161,38 @@ def _read_tables_from_html(html: str, header: int = 1):
     return tables
 
 
+def _gamelog_tables(html: str, table_ids, newer_than=None):
+    """Parse just the game-log table(s) by id; fall back to every table on the page.
+
+    ``newer_than=(column, value)`` keeps only rows past a high-water mark
+    (see ``pfr_tables.extract_table``).
+    """
+    tables = extract_tables(html, table_ids, newer_than=newer_than)
+    if tables:
+        return tables
+    logger.debug("No table with id in %s; parsing every table", table_ids)
+    tables = _read_tables_from_html(html, header=1)
+    if newer_than is not None:
+        column, value = newer_than
+        tables = [t[_rows_after(t[column], value)] if column in t.columns else t for t in tables]
+    return tables
+
+
+def _rows_after(values: pd.Series, threshold) -> pd.Series:
+    numeric = pd.to_numeric(values, errors="coerce")
+    try:
+        after = numeric > float(threshold)
+    except (TypeError, ValueError):
+        after = values.astype(str) > str(threshold)
+    return after | values.isna()
+
+
+def team_url(team_abbr: str, year: int, base_url: str = PFR_BASE_URL) -> str:
+    if team_abbr not in PFR_TEAM_CODES:
+        raise KeyError(f"Unknown team abbreviation: {team_abbr}. Update PFR_TEAM_CODES.")
+    return f"{base_url}/teams/{PFR_TEAM_CODES[team_abbr]}/{year}.htm"
+
+
 def fetch_team_offense_gamelog(team_abbr: str, year: int) -> pd.DataFrame:
     """Fetch a team's game log page and return a cleaned offense game-log DataFrame.
 
@@ -123,14 +200,12 @@ def fetch_team_offense_gamelog(team_abbr: str, year: int) -> pd.DataFrame:
     table that contains at least the columns 'Opp', 'PF', and 'PA' and will
     return a narrowed, cleaned DataFrame with standard columns.
     """
-    if team_abbr not in PFR_TEAM_CODES:
-        raise KeyError(f"Unknown team abbreviation: {team_abbr}. Update PFR_TEAM_CODES.")
+    html = _fetch_html(team_url(team_abbr, year))
+    return team_gamelog_from_tables(_gamelog_tables(html, TEAM_GAMELOG_TABLE_IDS), year)
 
-    code = PFR_TEAM_CODES[team_abbr]
-    url = f"https://www.pro-football-reference.com/teams/{code}/{year}.htm"
-    html = _fetch_html(url)
-    tables = _read_tables_from_html(html, header=1)
 
+def team_gamelog_from_tables(tables, year: int) -> pd.DataFrame:
+    """Pick and clean the team game-log table out of a page's parsed tables."""
     # Find candidate tables that include an Opponent column and at least one
     # plausible score/stat column. PFR team pages use slightly different
     # column names across seasons, so be flexible here.
@@ -194,28 +269,31 @@ def fetch_team_offense_gamelog(team_abbr: str, year: int) -> pd.DataFrame:
     return out
 
 
+def _player_gamelog_tables(player_id_url: str):
+    """Fetch and parse a player gamelog page, falling back to the canonical player page."""
+    html = _fetch_html(player_id_url)
+    try:
+        return _gamelog_tables(html, PLAYER_GAMELOG_TABLE_IDS)
+    except Exception:
+        # Fallback: try canonical player page (strip 'gamelog/*' to 'players/X/Name.htm')
+        base = player_id_url.rstrip('/')
+        if "/gamelog" not in base:
+            raise
+        canonical = base.split('/gamelog')[0] + '.htm'
+        return _gamelog_tables(_fetch_html(canonical), PLAYER_GAMELOG_TABLE_IDS)
+
+
 def fetch_qb_gamelog(player_id_url: str) -> pd.DataFrame:
     """Fetch a QB game log from a player gamelog URL (PFR player gamelog page).
 
     Example URL: https://www.pro-football-reference.com/players/M/MahoPa00/gamelog/2023/
     Returns a DataFrame with renamed columns for passing yards/TDs.
     """
-    html = _fetch_html(player_id_url)
-    try:
-        tables = _read_tables_from_html(html, header=1)
-    except Exception:
-        # Fallback: try canonical player page (strip 'gamelog/*' to 'players/X/Name.htm')
-        if player_id_url.endswith('/'):
-            base = player_id_url.rstrip('/')
-        else:
-            base = player_id_url
-        if "/gamelog" in base:
-            canonical = base.split('/gamelog')[0] + '.htm'
-            html = _fetch_html(canonical)
-            tables = _read_tables_from_html(html, header=1)
-        else:
-            raise
+    return qb_gamelog_from_tables(_player_gamelog_tables(player_id_url))
+
 
+def qb_gamelog_from_tables(tables) -> pd.DataFrame:
+    """Pick and clean the passing game-log table out of a page's parsed tables."""
     candidates = [t for t in tables if {"Cmp", "Att", "Yds", "TD"}.issubset(set(t.columns.astype(str)))]
     if not candidates:
         raise RuntimeError("QB game log table not found.")
@@ -280,22 +358,11 @@ def fetch_wr_gamelog(player_id_url: str) -> pd.DataFrame:
 
     Returns a DataFrame with receiving yards and TD columns if available.
     """
-    html = _fetch_html(player_id_url)
-    try:
-        tables = _read_tables_from_html(html, header=1)
-    except Exception:
-        # Fallback to canonical player page where many tables are embedded in comments
-        if player_id_url.endswith('/'):
-            base = player_id_url.rstrip('/')
-        else:
-            base = player_id_url
-        if "/gamelog" in base:
-            canonical = base.split('/gamelog')[0] + '.htm'
-            html = _fetch_html(canonical)
-            tables = _read_tables_from_html(html, header=1)
-        else:
-            raise
+    return wr_gamelog_from_tables(_player_gamelog_tables(player_id_url))
+
 
+def wr_gamelog_from_tables(tables) -> pd.DataFrame:
+    """Pick and clean the receiving game-log table out of a page's parsed tables."""
     candidates = [t for t in tables if {"Tgt", "Rec", "Yds", "TD"}.issubset(set(t.columns.astype(str)))]
     if not candidates:
         raise RuntimeError("WR game log table not found.")
@@ -346,6 +413,61 @@ def fetch_wr_gamelog(player_id_url: str) -> pd.DataFrame:
     return out
 
 
+def fetch_rb_gamelog(player_id_url: str) -> pd.DataFrame:
+    """Fetch an RB game log (rushing stats) from a player gamelog URL.
+
+    Returns a DataFrame with rushing yards and TD columns if available.
+    """
+    return rb_gamelog_from_tables(_player_gamelog_tables(player_id_url))
+
+
+def rb_gamelog_from_tables(tables) -> pd.DataFrame:
+    """Pick and clean the rushing game-log table out of a page's parsed tables."""
+    candidates = [t for t in tables
+                  if {"Att", "Yds", "TD"}.issubset(set(t.columns.astype(str))) and "Cmp" not in t.columns]
+    if not candidates:
+        raise RuntimeError("RB game log table not found.")
+    df = candidates[0].copy()
+
+    if "Rk" in df.columns:
+        df = df[pd.to_numeric(df["Rk"], errors="coerce").notna()]
+
+    if "Date" in df.columns:
+        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+
+    # rushing Yds/TD are the ones after Att: first on rushing_and_receiving
+    # pages, 'Yds.1'/'TD.1' on receiving_and_rushing ones
+    cols = list(df.columns.astype(str))
+    att_col = "Att"
+    after_att = cols[cols.index(att_col) + 1:]
+
+    def find_col(name):
+        return next((c for c in after_att if c == name or c.startswith(name + ".")), None)
+
+    yds_col = find_col("Yds")
+    td_col = find_col("TD")
+
+    if yds_col:
+        df = df.rename(columns={yds_col: "RB_RushYds"})
+    if td_col:
+        df = df.rename(columns={td_col: "RB_RushTD"})
+
+    possible_game_cols = ["G#", "Gtm", "Gcar", "Gnum", "Gtm#"]
+    game_col = next((c for c in possible_game_cols if c in df.columns), None)
+    if game_col and game_col != "G#":
+        df = df.rename(columns={game_col: "G#"})
+
+    possible_opp = ["Opp", "Opponent", "Unnamed: 6", "Vis", "HomeAway"]
+    opp_col = next((c for c in possible_opp if c in df.columns), None)
+    if opp_col and opp_col != "Opp":
+        df = df.rename(columns={opp_col: "Opp"})
+
+    desired = ["Date", "G#", "Week", "Opp", "RB_RushYds", "RB_RushTD", att_col]
+    keep = [c for c in desired if c in df.columns]
+    out = df[keep].reset_index(drop=True)
+    return out
+
+
 def save_csv(df: pd.DataFrame, path: str):
     Path(path).parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(path, index=False)
@@ -3,7 +3,7 @@ import json
 import time
 from pathlib import Path
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 import requests
 
@@ -11,228 +11,189 @@ logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
 
-def _write_cache(data: Any, out_dir: Path, name: str):
-    out_dir.mkdir(parents=True, exist_ok=True)
-    ts = int(time.time())
-    path = out_dir / f"{name}.{ts}.json"
-    with open(path, 'w', encoding='utf8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    logger.info('Wrote cache to %s', path)
-    return path
+def _write_cache(data: Any, out_dir: Path, name: str, params: Optional[Dict] = None) -> Dict:
+    """Record a fetch in the content-addressed payload store under ``out_dir``.
+
+    Unchanged payloads are only stored once; see ``scripts/payload_store.py``.
+    """
+    from scripts.payload_store import PayloadStore
+
+    store = PayloadStore(out_dir, max_age_days=float(os.environ.get('PROVIDER_CACHE_MAX_AGE_DAYS', 90)))
+    try:
+        entry = store.put(name, data, params=params)
+    finally:
+        store.close()
+    logger.info('Cached %s payload %s (%s)', name, entry['hash'][:12], 'new' if entry['new_blob'] else 'unchanged')
+    return entry
 
 
-def fetch_from_provider(provider: str, api_key: str, params: Optional[Dict] = None) -> Dict:
+def fetch_from_provider(provider: str, api_key: str, params: Optional[Dict] = None,
+                        base_url: Optional[str] = None) -> Dict:
     """Fetch PrizePicks-like projections from a third-party provider API.
 
-    This function is a placeholder showing how to call a provider. Each
-    provider will require its own endpoint, parameter mapping, and auth.
+    Requests go through the provider's pooled, rate-limited client (see
+    ``scripts/provider_client.py``), which holds the endpoint, parameter
+    mapping and auth for each supported provider.
     """
     if not api_key:
         raise RuntimeError('Provider API key required')
+    from scripts.provider_client import get_client
 
-    # Placeholder provider implementations. Add specific provider logic here.
-    if provider.lower() == 'opticodds':
-        url = 'https://api.opticodds.com/v1/prizepicks/projections'
-        headers = {'Authorization': f'Bearer {api_key}'}
-        r = requests.get(url, headers=headers, params=params, timeout=15)
-        r.raise_for_status()
-        return r.json()
-
-    if provider.lower() == 'betstamp':
-        url = 'https://api.betstamp.io/prizepicks'
-        headers = {'x-api-key': api_key}
-        r = requests.get(url, headers=headers, params=params, timeout=15)
-        r.raise_for_status()
-        return r.json()
-
-    if provider.lower() in ('theoddsapi', 'theodds'):
-        # The Odds API v4/v3 endpoints. Example docs: https://the-odds-api.com/
-        # We'll call the odds endpoint for a sport (defaults to NFL) and return JSON.
-        sport = (params or {}).get('sport', 'americanfootball_nfl')
-        region = (params or {}).get('region', 'us')
-        market = (params or {}).get('market', 'totals')
-        url = f'https://api.the-odds-api.com/v4/sports/{sport}/odds'
-        # The Odds API uses an apiKey query parameter
-        query = {'apiKey': api_key, 'regions': region, 'markets': market, 'oddsFormat': 'american'}
-        r = requests.get(url, params=query, timeout=15)
-        r.raise_for_status()
-        return r.json()
-
-    if provider.lower() in ('theoddsapi', 'oddsapi'):
-        # The Odds API (https://the-odds-api.com) typically expects the API key as a query param 'apiKey'.
-        # We'll default to fetching NFL odds (americanfootball_nfl) unless params override the sport_key.
-        sport = (params or {}).get('sport', 'americanfootball_nfl')
-        url = f'https://api.the-odds-api.com/v4/sports/{sport}/odds/'
-        # default params: US region, totals and spreads markets, decimal odds
-        default_params = {'regions': 'us', 'markets': 'totals,spreads', 'oddsFormat': 'decimal'}
-        req_params = {} if params is None else dict(params)
-        for k, v in default_params.items():
-            req_params.setdefault(k, v)
-        req_params['apiKey'] = api_key
-        r = requests.get(url, params=req_params, timeout=15)
-        r.raise_for_status()
-        return r.json()
-
-    raise NotImplementedError(f'Provider {provider} not implemented')
+    return get_client(provider, api_key, base_url=base_url).fetch(params)
 
 
-def normalize_provider_response(provider: str, data: Dict) -> 'pd.DataFrame':
-    """Normalize provider JSON into a DataFrame with columns we use downstream.
+def fetch_batch(provider: str, api_key: str, param_sets: List[Dict], base_url: Optional[str] = None,
+                max_workers: Optional[int] = None) -> List[Dict]:
+    """Fetch several parameter sets (sports, dates, markets) in one concurrent batch.
 
-    Output columns: Date, PlayerName, PlayerID (optional), Team, PropType, Line, Projection
+    Returns ``[{'params': ..., 'data': ..., 'error': ...}, ...]`` in input order.
     """
-    import pandas as pd
+    if not api_key:
+        raise RuntimeError('Provider API key required')
+    from scripts.provider_client import get_client
+
+    return get_client(provider, api_key, base_url=base_url).fetch_many(param_sets, max_workers=max_workers)
 
-    rows = []
-    # Provider-specific mapping attempts
-    if provider.lower() in ('theoddsapi', 'theodds'):
+
+NORMALIZED_COLUMNS = ('Date', 'PlayerName', 'PlayerID', 'Team', 'PropType', 'Line', 'Projection')
+
+# providers whose payload is a list of events with bookmakers -> markets -> outcomes
+ODDS_PROVIDERS = ('theoddsapi', 'theodds', 'oddsapi')
+# list-valued keys holding the projections, in order of preference
+PROJECTION_KEYS = {
+    'opticodds': ('projections', 'data'),
+    'betstamp': ('items', 'projections'),
+}
+GENERIC_KEYS = ('projections', 'data', 'items', 'results')
+
+
+def payload_keys(provider: str):
+    """Keys under which ``provider`` nests its item list (empty for top-level lists)."""
+    provider = provider.lower()
+    if provider in ODDS_PROVIDERS:
+        return ()
+    return PROJECTION_KEYS.get(provider, GENERIC_KEYS)
+
+
+def payload_skips_empty(provider: str) -> bool:
+    """Whether an empty list under a preferred key falls through to the next key."""
+    return provider.lower() in PROJECTION_KEYS
+
+
+def payload_items(provider: str, data):
+    """The list of events/projections inside a provider payload."""
+    keys = payload_keys(provider)
+    if not keys or isinstance(data, list):
+        return data or []
+    if payload_skips_empty(provider):
+        for k in keys:
+            if data.get(k):
+                return data[k]
+        return []
+    for k in keys:
+        if k in data:
+            return data[k] or []
+    return []
+
+
+def _decimal_implied(price):
+    try:
+        proj = float(price)
+        # If price looks like decimal odds, convert to implied prob
+        return 1.0 / proj if proj > 0 else None
+    except Exception:
+        return None
+
+
+def provider_rows(provider: str, item: Dict):
+    """Yield normalized row tuples (``NORMALIZED_COLUMNS`` order) for one event/projection.
+
+    For The Odds API (``theoddsapi``) the Projection is still the American
+    price; ``finish_frame`` converts it to an implied probability.
+    """
+    provider = provider.lower()
+    if provider in ('theoddsapi', 'theodds'):
         # The Odds API returns a list of games with bookmakers and markets. We'll flatten totals/spreads/moneyline
         # Example item keys: {"id":"...","sport_key":"americanfootball_nfl","home_team":"NE Patriots","away_team":"KC Chiefs","bookmakers": [...]}
-        for game in data or []:
-            game_time = game.get('commence_time') or game.get('start_time')
-            home = game.get('home_team')
-            away = game.get('away_team')
-            for bm in game.get('bookmakers', [])[:1]:  # pick first bookmaker to keep things simple
-                for market in bm.get('markets', []):
-                    mkey = market.get('key')
-                    # for each outcome in market, create a row
-                    for outcome in market.get('outcomes', []):
-                        rows.append({
-                            'Date': game_time,
-                            'PlayerName': None,
-                            'PlayerID': None,
-                            'Team': home if outcome.get('name') == home else (away if outcome.get('name') == away else None),
-                            'PropType': mkey,
-                            'Line': outcome.get('point'),
-                            # The Odds API uses 'price' as American odds; we convert to implied probability when possible
-                            'Projection': None if outcome.get('price') is None else _american_odds_to_prob(outcome.get('price'))
-                        })
-        df = pd.DataFrame(rows)
-        if 'Date' in df.columns:
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-        return df
-    if provider.lower() == 'opticodds':
+        game_time = item.get('commence_time') or item.get('start_time')
+        home = item.get('home_team')
+        away = item.get('away_team')
+        for bm in item.get('bookmakers', [])[:1]:  # pick first bookmaker to keep things simple
+            for market in bm.get('markets', []):
+                mkey = market.get('key')
+                for outcome in market.get('outcomes', []):
+                    name = outcome.get('name')
+                    team = home if name == home else (away if name == away else None)
+                    yield (game_time, None, None, team, mkey, outcome.get('point'), outcome.get('price'))
+    elif provider == 'opticodds':
         # Hypothetical structure: {'projections': [{'player': 'X', 'team':'KC', 'prop':'rec_yds', 'line':55.5, 'projection':54.2, 'ts':'2023-10-01T...'}]}
-        projs = data.get('projections') or data.get('data') or []
-        for p in projs:
-            rows.append({
-                'Date': p.get('ts') or p.get('date'),
-                'PlayerName': p.get('player') or p.get('name'),
-                'PlayerID': p.get('player_id'),
-                'Team': p.get('team'),
-                'PropType': p.get('prop') or p.get('market'),
-                'Line': p.get('line') or p.get('market_line') or p.get('value'),
-                'Projection': p.get('projection') or p.get('pred')
-            })
-    elif provider.lower() == 'betstamp':
+        yield (item.get('ts') or item.get('date'), item.get('player') or item.get('name'), item.get('player_id'),
+               item.get('team'), item.get('prop') or item.get('market'),
+               item.get('line') or item.get('market_line') or item.get('value'),
+               item.get('projection') or item.get('pred'))
+    elif provider == 'betstamp':
         # Hypothetical Betstamp format
-        projs = data.get('items') or data.get('projections') or []
-        for p in projs:
-            rows.append({
-                'Date': p.get('timestamp'),
-                'PlayerName': p.get('player_name') or p.get('player'),
-                'PlayerID': p.get('id'),
-                'Team': p.get('team'),
-                'PropType': p.get('market') or p.get('prop'),
-                'Line': p.get('line'),
-                'Projection': p.get('projection')
-            })
-    elif provider.lower() in ('theoddsapi', 'oddsapi'):
+        yield (item.get('timestamp'), item.get('player_name') or item.get('player'), item.get('id'),
+               item.get('team'), item.get('market') or item.get('prop'), item.get('line'), item.get('projection'))
+    elif provider == 'oddsapi':
         # The Odds API returns a list of events with markets and bookmakers.
         # We'll flatten totals/spreads markets into rows. We create a human-readable "PlayerName"
         # field as the fixture identifier and use 'Projection' as the implied probability for the
         # relevant outcome (e.g., Over for totals). This is a pragmatic mapping so downstream
         # metrics/backtest code can operate on the data.
-        events = data or []
-        for ev in events:
-            commence = ev.get('commence_time') or ev.get('start_time')
-            home = ev.get('home_team') or ev.get('home')
-            away = ev.get('away_team') or ev.get('away')
-            fixture = f"{away} @ {home}" if home and away else ev.get('id') or ''
-            # Some providers include multiple bookmakers; prefer the first/bookmaker with markets
-            bookmakers = ev.get('bookmakers') or []
-            for bm in bookmakers:
-                for market in bm.get('markets', []):
-                    mkey = market.get('key') or market.get('market_key')
-                    outcomes = market.get('outcomes') or []
-                    # totals: outcomes often have a 'point' field and 'name' = 'Over'/'Under'
-                    if mkey == 'totals':
-                        for o in outcomes:
-                            name = o.get('name')
-                            point = o.get('point') or o.get('price') or market.get('point')
-                            price = o.get('price')
-                            try:
-                                proj = float(price)
-                                # If price looks like decimal odds, convert to implied prob
-                                implied = 1.0 / proj if proj > 0 else None
-                            except Exception:
-                                implied = None
-                            rows.append({
-                                'Date': commence,
-                                'PlayerName': fixture,
-                                'PlayerID': None,
-                                'Team': None,
-                                'PropType': f'game_total_{name.lower()}',
-                                'Line': point,
-                                'Projection': implied
-                            })
-                    elif mkey == 'spreads':
-                        for o in outcomes:
-                            name = o.get('name')
-                            point = o.get('point')
-                            price = o.get('price')
-                            try:
-                                proj = float(price)
-                                implied = 1.0 / proj if proj > 0 else None
-                            except Exception:
-                                implied = None
-                            rows.append({
-                                'Date': commence,
-                                'PlayerName': fixture,
-                                'PlayerID': None,
-                                'Team': name,
-                                'PropType': 'spread',
-                                'Line': point,
-                                'Projection': implied
-                            })
+        commence = item.get('commence_time') or item.get('start_time')
+        home = item.get('home_team') or item.get('home')
+        away = item.get('away_team') or item.get('away')
+        fixture = f"{away} @ {home}" if home and away else item.get('id') or ''
+        # Some providers include multiple bookmakers; prefer the first/bookmaker with markets
+        for bm in item.get('bookmakers') or []:
+            for market in bm.get('markets', []):
+                mkey = market.get('key') or market.get('market_key')
+                outcomes = market.get('outcomes') or []
+                # totals: outcomes often have a 'point' field and 'name' = 'Over'/'Under'
+                if mkey == 'totals':
+                    for o in outcomes:
+                        point = o.get('point') or o.get('price') or market.get('point')
+                        yield (commence, fixture, None, None, f"game_total_{o.get('name').lower()}", point,
+                               _decimal_implied(o.get('price')))
+                elif mkey == 'spreads':
+                    for o in outcomes:
+                        yield (commence, fixture, None, o.get('name'), 'spread', o.get('point'),
+                               _decimal_implied(o.get('price')))
     else:
-        # Generic attempt: search for list entries with common keys
-        items = None
-        for k in ('projections', 'data', 'items', 'results'):
-            if k in data:
-                items = data[k]
-                break
-        if items is None and isinstance(data, list):
-            items = data
-        items = items or []
-        for p in items:
-            rows.append({
-                'Date': p.get('date') or p.get('ts'),
-                'PlayerName': p.get('player_name') or p.get('player') or p.get('name'),
-                'PlayerID': p.get('player_id') or p.get('id'),
-                'Team': p.get('team'),
-                'PropType': p.get('prop') or p.get('market'),
-                'Line': p.get('line') or p.get('value'),
-                'Projection': p.get('projection') or p.get('pred')
-            })
-
-    df = pd.DataFrame(rows)
-    # Basic normalization
+        # Generic attempt: entries with common keys
+        yield (item.get('date') or item.get('ts'), item.get('player_name') or item.get('player') or item.get('name'),
+               item.get('player_id') or item.get('id'), item.get('team'), item.get('prop') or item.get('market'),
+               item.get('line') or item.get('value'), item.get('projection') or item.get('pred'))
+
+
+def finish_frame(provider: str, df: 'pd.DataFrame') -> 'pd.DataFrame':
+    """Column typing shared by the in-memory and streaming normalizers."""
+    import pandas as pd
+
+    if provider.lower() in ('theoddsapi', 'theodds') and 'Projection' in df.columns:
+        from scripts.odds_math import american_to_implied
+
+        df['Projection'] = american_to_implied(pd.to_numeric(df['Projection'], errors='coerce').to_numpy())
     if 'Date' in df.columns:
         df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
     return df
 
 
-def _american_odds_to_prob(odds: int) -> float:
-    """Convert American odds to implied probability (0-1)."""
-    try:
-        o = int(odds)
-    except Exception:
-        return None
-    if o > 0:
-        return 100 / (o + 100)
-    else:
-        return -o / (-o + 100)
+def normalize_provider_response(provider: str, data: Dict) -> 'pd.DataFrame':
+    """Normalize provider JSON into a DataFrame with columns we use downstream.
+
+    Output columns: Date, PlayerName, PlayerID (optional), Team, PropType, Line, Projection
+
+    This needs the whole payload in memory; ``scripts/stream_normalize.py``
+    handles large payloads in bounded batches with the same row mapping.
+    """
+    import pandas as pd
+
+    rows = [row for item in payload_items(provider, data) for row in provider_rows(provider, item)]
+    if not rows:
+        return pd.DataFrame()
+    return finish_frame(provider, pd.DataFrame.from_records(rows, columns=list(NORMALIZED_COLUMNS)))
 
 
 def _synthetic_provider_response(provider: str, n: int = 100):
@@ -284,7 +245,8 @@ def fetch_by_scrape(url: str) -> Dict:
     return {'html': r.text}
 
 
-def main(mode: str = 'unofficial', provider: Optional[str] = None, out_dir: str = 'data/samples/prizepicks', api_key: Optional[str] = None):
+def main(mode: str = 'unofficial', provider: Optional[str] = None, out_dir: str = 'data/samples/prizepicks',
+         api_key: Optional[str] = None, param_sets: Optional[List[Dict]] = None, base_url: Optional[str] = None):
     out = Path(out_dir)
     if mode == 'provider':
         # prefer explicit api_key argument, fall back to environment variable
@@ -293,9 +255,17 @@ def main(mode: str = 'unofficial', provider: Optional[str] = None, out_dir: str
             raise RuntimeError('Provider name required when mode=provider')
         if not api_key:
             raise RuntimeError('Provider API key required (set PRIZEPICKS_PROVIDER_KEY or pass --api-key)')
+        if param_sets and len(param_sets) > 1:
+            logger.info('Fetching %d parameter sets from provider %s', len(param_sets), provider)
+            results = fetch_batch(provider, api_key, param_sets, base_url=base_url)
+            for result in results:
+                if result['error'] is None:
+                    _write_cache(result['data'], out, provider, result['params'])
+            return results
         logger.info('Fetching from provider %s', provider)
-        data = fetch_from_provider(provider, api_key)
-        _write_cache(data, out, f'provider_{provider}')
+        params = (param_sets or [None])[0]
+        data = fetch_from_provider(provider, api_key, params=params, base_url=base_url)
+        _write_cache(data, out, provider, params)
         return data
 
     if mode == 'unofficial':
@@ -322,6 +292,10 @@ if __name__ == '__main__':
     parser.add_argument('--out', default='data/samples/prizepicks')
     parser.add_argument('--simulate', action='store_true', help='Generate synthetic provider response and normalize to CSV')
     parser.add_argument('--api-key', dest='api_key', help='Provider API key (optional; falls back to PRIZEPICKS_PROVIDER_KEY env var)')
+    parser.add_argument('--sport', action='append', help='Provider sport key (repeatable; fetched as one batch)')
+    parser.add_argument('--market', action='append', help='Provider market (repeatable)')
+    parser.add_argument('--date', action='append', help='Game date YYYY-MM-DD (repeatable)')
+    parser.add_argument('--base-url', help='Override the provider host, e.g. a local stub_provider_server')
     args = parser.parse_args()
 
     try:
@@ -335,6 +309,10 @@ if __name__ == '__main__':
             df.to_csv(outpath, index=False)
             print('Wrote synthetic provider CSV to', outpath)
         else:
-            main(mode=args.mode, provider=args.provider, out_dir=args.out, api_key=args.api_key)
+            from scripts.provider_client import batch_params
+
+            param_sets = batch_params(args.sport, args.market, args.date) if (args.sport or args.market or args.date) else None
+            main(mode=args.mode, provider=args.provider, out_dir=args.out, api_key=args.api_key,
+                 param_sets=param_sets, base_url=args.base_url)
     except Exception as e:
         logger.exception('Fetch failed: %s', e)
@@ -0,0 +1,392 @@
+"""Align team and player game logs on one canonical game key.
+
+``evaluate_nfl.merge_dfs`` used to pick a join column per call (Date, then
+Week, then G#, then row position) and merge one team, one QB and one WR
+pairwise. This module gives every game-log row the same key instead:
+
+    (season, week, team, game_id)
+
+- ``season``: the ``Season`` column, else the football season of ``Date``
+  (January/February games belong to the previous year), else the season of
+  the team schedule or the ``season`` argument
+- ``week``: the ``Week`` column, else the schedule week of ``Date``, else the
+  schedule week of the team's ``G#``-th game. A log with none of those
+  columns is aligned by position with the schedule (the old last resort)
+- ``team``: the row's ``Tm``/``Team`` column if present (so a traded player's
+  rows land on the right team), else the team the log was added for
+- ``game_id``: ``{season}-{week:02d}-{A}-{B}`` with both teams' codes sorted,
+  so the two sides of one game share an id; ``{season}-{week:02d}-{team}``
+  when the opponent is unknown
+
+``GamelogJoin`` stacks the logs long, keys them all in one vectorized pass,
+indexes and sorts once, and pivots the players into columns with a single
+unstack rather than N-1 pairwise merges:
+
+    join = GamelogJoin()
+    join.add_team(team_df, 'KC')
+    join.add_player(mahomes_df, 'mahomes', 'KC', columns=['QB_PassYds'])
+    join.add_player(rice_df, 'rice', 'KC', columns=['WR_RecYds'])
+    wide = join.frame()            # one row per KC game, one column per stat
+
+Team logs are stacked into one block (one row per team game). Columns that
+appear in more than one log get that log's suffix (``_team`` for teams,
+``_{name}`` for players by default), as ``DataFrame.merge`` does.
+``from_cache`` builds the frame for every cached team and player of a season,
+i.e. a whole roster or the league.
+
+Usage:
+  python -m scripts.gamelog_join --season 2025 --teams KC --out data/cache/roster_kc_2025.csv
+"""
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scripts.fetch_pfr_nfl import PFR_TEAM_CODES
+
+KEY = ['season', 'week', 'team', 'game_id']
+
+# PFR game logs abbreviate some teams differently, and team pages spell out
+# the opponent; both map onto the PFR_TEAM_CODES keys.
+TEAM_ALIASES = {
+    'GNB': 'GB', 'KAN': 'KC', 'NWE': 'NE', 'NOR': 'NO', 'SFO': 'SF', 'TAM': 'TB',
+    'LVR': 'LV', 'OAK': 'LV', 'SDG': 'LAC', 'STL': 'LAR', 'LA': 'LAR', 'WSH': 'WAS',
+    'Arizona Cardinals': 'ARI', 'Atlanta Falcons': 'ATL', 'Baltimore Ravens': 'BAL',
+    'Buffalo Bills': 'BUF', 'Carolina Panthers': 'CAR', 'Chicago Bears': 'CHI',
+    'Cincinnati Bengals': 'CIN', 'Cleveland Browns': 'CLE', 'Dallas Cowboys': 'DAL',
+    'Denver Broncos': 'DEN', 'Detroit Lions': 'DET', 'Green Bay Packers': 'GB',
+    'Houston Texans': 'HOU', 'Indianapolis Colts': 'IND', 'Jacksonville Jaguars': 'JAX',
+    'Kansas City Chiefs': 'KC', 'Las Vegas Raiders': 'LV', 'Oakland Raiders': 'LV',
+    'Los Angeles Chargers': 'LAC', 'San Diego Chargers': 'LAC', 'Los Angeles Rams': 'LAR',
+    'St. Louis Rams': 'LAR', 'Miami Dolphins': 'MIA', 'Minnesota Vikings': 'MIN',
+    'New England Patriots': 'NE', 'New Orleans Saints': 'NO', 'New York Giants': 'NYG',
+    'New York Jets': 'NYJ', 'Philadelphia Eagles': 'PHI', 'Pittsburgh Steelers': 'PIT',
+    'San Francisco 49ers': 'SF', 'Seattle Seahawks': 'SEA', 'Tampa Bay Buccaneers': 'TB',
+    'Tennessee Titans': 'TEN', 'Washington Commanders': 'WAS', 'Washington Football Team': 'WAS',
+    'Washington Redskins': 'WAS',
+}
+
+
+def team_code(value) -> Optional[str]:
+    """Project team code (a ``PFR_TEAM_CODES`` key) for an abbreviation or full name, else None."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    text = str(value).strip()
+    # PFR marks away games on the opponent ("@ DEN") in some layouts
+    text = text.lstrip('@').strip()
+    if text.upper() in PFR_TEAM_CODES:
+        return text.upper()
+    return TEAM_ALIASES.get(text) or TEAM_ALIASES.get(text.upper())
+
+
+def football_season(dates: pd.Series) -> pd.Series:
+    """Season of each game date: January/February games count toward the previous year."""
+    return dates.dt.year - (dates.dt.month < 3).astype('Int64')
+
+
+def _numeric(df: pd.DataFrame, col: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series(np.nan, index=df.index, dtype=float)
+    return pd.to_numeric(df[col], errors='coerce').astype(float)
+
+
+def _dates(df: pd.DataFrame) -> pd.Series:
+    if 'Date' not in df.columns:
+        return pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+    return pd.to_datetime(df['Date'], errors='coerce')
+
+
+# columns a log's keys are derived from; carried through stacking whatever columns are kept
+_KEY_SOURCES = ('Season', 'Week', 'Date', 'G#', 'Tm', 'Team', 'Opp', 'Opponent')
+
+
+def _game_ids(season: pd.Series, week: pd.Series, team: pd.Series, opponent: pd.Series) -> pd.Series:
+    prefix = season.astype(str) + '-' + week.map('{:02d}'.format)
+    pair = [('-'.join(sorted((t, o))) if isinstance(o, str) else t) for t, o in zip(team, opponent)]
+    return prefix + '-' + pd.Series(pair, index=season.index, dtype=object)
+
+
+def _lookup(table: pd.Series, index: pd.Index, *arrays) -> pd.Series:
+    """``table`` (unique MultiIndex) looked up at the tuples zipped from ``arrays``, aligned to ``index``."""
+    keys = pd.MultiIndex.from_arrays([np.asarray(a) for a in arrays])
+    return pd.Series(table.reindex(keys).to_numpy(), index=index)
+
+
+def _concat(parts) -> np.ndarray:
+    arrays = [np.asarray(p) for p in parts]
+    try:
+        return np.concatenate(arrays)
+    except TypeError:
+        # no common dtype (e.g. parsed dates next to missing ones): fall back to objects
+        return np.concatenate([pd.Series(p).astype(object).to_numpy() for p in parts])
+
+
+def _stack(sources: List[Dict]) -> Tuple[pd.DataFrame, List[List[str]]]:
+    """All logs in one long frame, tagged with their position (``_src``) and team (``_arg_team``).
+
+    Returns the frame and each log's requested columns.
+    """
+    columns, kept = [], []
+    for source in sources:
+        df = source['df']
+        cols = list(source['columns']) if source['columns'] is not None else list(df.columns)
+        columns.append(cols)
+        kept.append(list(dict.fromkeys(cols + [c for c in _KEY_SOURCES if c in df.columns])))
+    # built column by column from numpy arrays: per-log frame selection and
+    # concat dominate at league scale (thousands of short logs)
+    lengths = [len(source['df']) for source in sources]
+    data = {}
+    for name in dict.fromkeys(c for cols in kept for c in cols):
+        data[name] = _concat([source['df'][name] if name in cols else np.full(n, np.nan)
+                              for source, cols, n in zip(sources, kept, lengths)])
+    stacked = pd.DataFrame(data)
+    stacked['_src'] = np.repeat(np.arange(len(sources)), lengths)
+    teams = [team_code(source['team']) or source['team'] or '' for source in sources]
+    stacked['_arg_team'] = np.repeat(np.array(teams, dtype=object), lengths)
+    # a log with no Week, Date or G# lines up with the n-th game by position
+    stacked['_pos'] = np.concatenate([
+        np.arange(1, n + 1, dtype=float) if not any(c in cols for c in ('Week', 'Date', 'G#')) else np.full(n, np.nan)
+        for cols, n in zip(kept, lengths)])
+    if 'Date' in stacked.columns:
+        stacked['Date'] = pd.to_datetime(stacked['Date'], errors='coerce', format='mixed')
+    return stacked, columns
+
+
+def _keys(df: pd.DataFrame, season: Optional[int], schedule: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Key columns (plus ``date``/``opponent``) for a stacked frame, in one vectorized pass.
+
+    ``schedule`` is the keyed team block; rows whose week cannot be derived are dropped.
+    """
+    dates = _dates(df)
+    seasons = _numeric(df, 'Season').fillna(football_season(dates).astype(float))
+    if season is not None:
+        seasons = seasons.fillna(float(season))
+
+    teams = df['_arg_team'].astype(object)
+    row_team = next((df[c] for c in ('Tm', 'Team') if c in df.columns), None)
+    if row_team is not None:
+        teams = row_team.map(team_code).fillna(teams)
+
+    week = _numeric(df, 'Week')
+    game_no = _numeric(df, 'G#').fillna(df['_pos'])
+    scheduled = pd.Series(False, index=df.index)
+    if schedule is not None and not schedule.empty:
+        scheduled = teams.isin(schedule['team'].unique())
+        by_date = schedule.dropna(subset=['date']).drop_duplicates(['team', 'date']).set_index(['team', 'date'])
+        week = week.fillna(_lookup(by_date['week'], df.index, teams, dates).astype(float))
+        # n-th game of the season -> schedule week (bye weeks make G# and Week differ)
+        ordered = schedule.sort_values(['team', 'season', 'week'])
+        nth = ordered.groupby(['team', 'season']).cumcount() + 1
+        by_game = pd.Series(ordered['week'].to_numpy(), index=pd.MultiIndex.from_arrays(
+            [ordered['team'].to_numpy(), ordered['season'].to_numpy(), nth.to_numpy()]))
+        week = week.fillna(_lookup(by_game, df.index, teams, seasons, game_no).astype(float))
+    # without a schedule the game number is the best guess at the week
+    week = week.fillna(game_no.where(~scheduled))
+
+    ok = seasons.notna() & week.notna()
+    out = pd.DataFrame({'season': seasons[ok].astype(int), 'week': week[ok].astype(int),
+                        'team': teams[ok], 'date': dates[ok]}, index=df.index[ok])
+    out['opponent'] = None
+    if schedule is not None and not schedule.empty:
+        opp = schedule.drop_duplicates(['season', 'week', 'team']).set_index(['season', 'week', 'team'])
+        out['opponent'] = _lookup(opp['opponent'], out.index, out['season'], out['week'], out['team'])
+    own = next((df[c] for c in ('Opponent', 'Opp') if c in df.columns), None)
+    if own is not None:
+        out['opponent'] = out['opponent'].fillna(own[ok].map(team_code))
+    out['opponent'] = out['opponent'].astype(object).where(out['opponent'].notna(), None)
+    out['game_id'] = _game_ids(out['season'], out['week'], out['team'], out['opponent'])
+    return out
+
+
+def _schedule_keys(df: pd.DataFrame, season: Optional[int]) -> pd.DataFrame:
+    """Keys for stacked team logs; bye-week rows are dropped."""
+    keys = _keys(df, season, schedule=None)
+    if 'Opponent' in df.columns:
+        bye = df['Opponent'].astype(str).str.contains('Bye', case=False, na=False)
+        keys = keys.loc[~bye.loc[keys.index]]
+    return keys
+
+
+class GamelogJoin:
+    """Collects team and player logs and aligns them in one multi-way join."""
+
+    def __init__(self, season: Optional[int] = None):
+        self.season = season
+        self._teams: List[Dict] = []
+        self._players: List[Dict] = []
+
+    def add_team(self, df: pd.DataFrame, team: Optional[str] = None,
+                 columns: Optional[Sequence[str]] = None, suffix: str = '_team') -> 'GamelogJoin':
+        """Add a team game log; it also serves as the schedule for that team's players."""
+        self._teams.append({'df': df.reset_index(drop=True), 'team': team, 'columns': columns, 'suffix': suffix})
+        return self
+
+    def add_player(self, df: pd.DataFrame, name: str, team: Optional[str] = None,
+                   columns: Optional[Sequence[str]] = None, suffix: Optional[str] = None) -> 'GamelogJoin':
+        self._players.append({'df': df.reset_index(drop=True), 'name': name, 'team': team, 'columns': columns,
+                              'suffix': f'_{name}' if suffix is None else suffix})
+        return self
+
+    def _team_block(self) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame], List[str]]:
+        """(team frame indexed by KEY, schedule keys, team columns); Nones without team logs."""
+        if not self._teams:
+            return None, None, []
+        # team logs share one schema and cover disjoint games: they form one block
+        stacked, cols = _stack(self._teams)
+        schedule = _schedule_keys(stacked, self.season)
+        team_cols = list(dict.fromkeys(c for cs in cols for c in cs))
+        teams = stacked.loc[schedule.index, team_cols]
+        teams.index = pd.MultiIndex.from_frame(schedule[KEY])
+        teams = teams[~teams.index.duplicated(keep='last')].sort_index()
+        return teams, schedule, team_cols
+
+    def _keyed_players(self, schedule: Optional[pd.DataFrame]):
+        season = self.season
+        if season is None and schedule is not None and schedule['season'].nunique() == 1:
+            # a log with neither dates nor seasons takes the schedules' season
+            season = int(schedule['season'].iloc[0])
+        stacked, cols = _stack(self._players)
+        return stacked, _keys(stacked, season, schedule), cols
+
+    def long(self) -> pd.DataFrame:
+        """Player logs as one long frame: ``player`` plus ``KEY`` columns, then the kept stats.
+
+        Sorted by player and game; a game listed twice keeps its last row.
+        """
+        if not self._players:
+            raise RuntimeError('No player logs')
+        _, schedule, _ = self._team_block()
+        stacked, keys, cols = self._keyed_players(schedule)
+        stats = list(dict.fromkeys(c for cs in cols for c in cs))
+        names = np.array([source['name'] for source in self._players], dtype=object)
+        out = pd.concat([keys[KEY].assign(player=names[stacked.loc[keys.index, '_src'].to_numpy()]),
+                         stacked.loc[keys.index, stats]], axis=1)
+        out = out[['player'] + KEY + stats]
+        out = out.drop_duplicates(['player', 'season', 'week'], keep='last')
+        return out.sort_values(['player', 'season', 'week'], kind='stable').reset_index(drop=True)
+
+    def frame(self, how: str = 'left') -> pd.DataFrame:
+        """Aligned frame indexed by ``KEY``.
+
+        ``how``: ``'left'`` keeps the team-schedule games (every game when no
+        team log was added), ``'inner'`` the games every log has and
+        ``'outer'`` the games any log has. With several teams, ``'inner'``
+        only keeps games between them.
+        """
+        if how not in ('left', 'inner', 'outer'):
+            raise ValueError(f'Unknown join type: {how}')
+        if not self._teams and not self._players:
+            raise RuntimeError('No game logs to join')
+
+        teams, schedule, team_cols = self._team_block()
+        players = present = None
+        player_cols: List[List[str]] = []
+        if self._players:
+            # every player log is keyed in one pass and pivoted to columns with a
+            # single unstack, rather than merged in one log at a time
+            stacked, keys, player_cols = self._keyed_players(schedule)
+            stats = list(dict.fromkeys(c for cs in player_cols for c in cs))
+            long = stacked.loc[keys.index, stats].assign(_present=1.0)
+            long.index = pd.MultiIndex.from_frame(keys[KEY].assign(_src=stacked.loc[keys.index, '_src']))
+            # a game listed twice (e.g. a re-scraped row) keeps its last version
+            long = long[~long.index.duplicated(keep='last')]
+            wide = long.unstack('_src')
+            sources = range(len(self._players))
+            present = wide['_present'].reindex(columns=sources).notna()
+            pairs = pd.MultiIndex.from_tuples([(c, i) for i, cs in enumerate(player_cols) for c in cs])
+            players = wide.reindex(columns=pairs)
+
+        counts = pd.Series(team_cols + [c for cs in player_cols for c in cs]).value_counts()
+        names = []
+        if teams is not None:
+            suffix = self._teams[0]['suffix']
+            teams.columns = [c + suffix if counts[c] > 1 else c for c in team_cols]
+            names += list(teams.columns)
+        if players is not None:
+            players.columns = [c + self._players[i]['suffix'] if counts[c] > 1 else c for c, i in players.columns]
+            names += list(players.columns)
+        dupes = sorted({n for n in names if names.count(n) > 1})
+        if dupes:
+            raise ValueError(f'Columns {dupes} appear in several logs; give them distinct suffixes')
+
+        if teams is None:
+            result = players
+        elif players is None:
+            result = teams
+        else:
+            result = pd.concat([teams, players], axis=1, sort=True)
+        if how == 'inner':
+            keep = pd.Series(True, index=result.index)
+            if present is not None:
+                keep &= present.all(axis=1).reindex(result.index, fill_value=False)
+            if teams is not None:
+                keep &= result.index.isin(teams.index)
+            result = result[keep]
+        elif how == 'left' and teams is not None:
+            result = result.reindex(teams.index)
+        if players is not None:
+            # the pivot makes every player column nullable; restore integer
+            # stats that came through complete
+            complete = result[list(players.columns)].notna().all()
+            casts = {name: self._players[i]['df'][c].dtype for name, (c, i) in zip(players.columns, pairs)
+                     if complete[name] and pd.api.types.is_integer_dtype(self._players[i]['df'][c])}
+            result = result.astype(casts)
+        result.index.names = KEY
+        return result
+
+
+_PLAYER_CSV = re.compile(r'^nfl_(?P<team>[a-z]+)_(?P<slug>.+)_(?P<season>\d{4})$')
+
+
+def cache_join(cache_dir='data/cache', season: int = None, teams: Optional[Iterable[str]] = None,
+               columns: Optional[Sequence[str]] = None) -> GamelogJoin:
+    """A ``GamelogJoin`` over every cached team and player log (crawler CSV naming) of a season.
+
+    ``columns`` limits the player stats carried (default: every numeric
+    column); team logs contribute ``PF``/``PA``/``is_away`` where present.
+    """
+    cache_dir = Path(cache_dir)
+    wanted = {t.lower() for t in teams} if teams else None
+    join = GamelogJoin(season)
+    for path in sorted(cache_dir.glob(f'nfl_*_{season}_team.csv')):
+        team = path.stem.split('_')[1]
+        if wanted is None or team in wanted:
+            df = pd.read_csv(path)
+            join.add_team(df, team.upper(), columns=[c for c in ('PF', 'PA', 'is_away') if c in df.columns])
+    for path in sorted(cache_dir.glob(f'nfl_*_{season}.csv')):
+        m = _PLAYER_CSV.match(path.stem)
+        if not m or (wanted is not None and m['team'] not in wanted):
+            continue
+        df = pd.read_csv(path)
+        stats = [c for c in (columns or df.columns) if c in df.columns
+                 and c not in ('Season', 'Week', 'G#', 'Date', 'Opp', 'Opponent', 'Tm', 'Team')
+                 and pd.api.types.is_numeric_dtype(df[c])]
+        join.add_player(df, m['slug'], m['team'].upper(), columns=stats)
+    return join
+
+
+def from_cache(cache_dir='data/cache', season: int = None, teams: Optional[Iterable[str]] = None,
+               columns: Optional[Sequence[str]] = None, how: str = 'left') -> pd.DataFrame:
+    """Join every cached team and player log of a season (see ``cache_join``)."""
+    return cache_join(cache_dir, season, teams, columns).frame(how)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Join cached team and player game logs on one game key')
+    parser.add_argument('--season', type=int, required=True)
+    parser.add_argument('--teams', nargs='*', help='Team codes (default: every cached team)')
+    parser.add_argument('--columns', nargs='*', help='Player stat columns to keep')
+    parser.add_argument('--cache-dir', default='data/cache')
+    parser.add_argument('--how', choices=['left', 'inner', 'outer'], default='left')
+    parser.add_argument('--out', help='Write the joined frame to this CSV')
+    args = parser.parse_args()
+
+    wide = from_cache(args.cache_dir, args.season, args.teams, args.columns, args.how)
+    print(f'{len(wide)} games x {wide.shape[1]} columns')
+    if args.out:
+        wide.reset_index().to_csv(args.out, index=False)
+        print('Wrote', args.out)
@@ -0,0 +1,314 @@
+"""Incremental ingestion of PFR game logs.
+
+A full refresh refetches every season page and rewrites every CSV through
+``save_csv``. ``GamelogStore`` (SQLite, ``data/cache/gamelogs.sqlite`` by
+default) instead keeps, per team or player and season:
+
+- the game rows, keyed by week (teams; playoff rounds as weeks 19-22) or
+  game date (players)
+- a high-water mark: the last ingested key, plus the team week as of the
+  entity's last check
+- an append-only change log (``changes``) that downstream jobs (correlation
+  updates, re-pricing) can tail with ``changes_since(seq)``
+
+``IncrementalIngestor.refresh`` fetches each team page first. Only teams that
+completed a game past their mark are considered further, and only their
+players are fetched. Rows past the mark are the only ones parsed
+(``extract_table(..., newer_than=...)``). Upserts are idempotent: re-ingesting
+an unchanged row records nothing, and a corrected row is logged as an
+``update``. The CSVs in ``out_dir`` (crawler naming) are rewritten only for
+entities that changed, so a weekly refresh costs O(new games) rather than
+O(season x players).
+
+Usage:
+  python -m scripts.gamelog_store refresh --season 2025 --teams KC
+  python -m scripts.gamelog_store refresh --season 2025 --ledger data/cache/pfr_crawl.sqlite
+  python -m scripts.gamelog_store changes --since 0
+"""
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from scripts.fetch_pfr_nfl import (
+    PFR_BASE_URL,
+    PFR_TEAM_CODES,
+    PLAYER_GAMELOG_TABLE_IDS,
+    TEAM_GAMELOG_TABLE_IDS,
+    _fetch_html,
+    _gamelog_tables,
+    save_csv,
+    team_gamelog_from_tables,
+    team_url,
+)
+from scripts.page_cache import get_page_cache
+from scripts.pfr_crawler import DEFAULT_RATE, PARSERS, player_slug
+from scripts.pfr_tables import week_number
+from scripts.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    entity TEXT NOT NULL,
+    season INTEGER NOT NULL,
+    game_key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (entity, season, game_key)
+);
+CREATE TABLE IF NOT EXISTS marks (
+    entity TEXT NOT NULL,
+    season INTEGER NOT NULL,
+    last_key TEXT,
+    checked_week REAL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (entity, season)
+);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity TEXT NOT NULL,
+    season INTEGER NOT NULL,
+    game_key TEXT NOT NULL,
+    op TEXT NOT NULL,
+    data TEXT NOT NULL,
+    ts REAL NOT NULL
+);
+"""
+
+
+def _records(df: pd.DataFrame) -> List[Dict]:
+    """JSON-safe row dicts: dates as YYYY-MM-DD, NaN as None."""
+    out = df.copy()
+    for col in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[col]):
+            out[col] = out[col].dt.strftime('%Y-%m-%d')
+    records = out.astype(object).to_dict('records')
+    for record in records:
+        for k, v in record.items():
+            if v is None or (isinstance(v, float) and math.isnan(v)) or v is pd.NaT:
+                record[k] = None
+            elif hasattr(v, 'item'):
+                record[k] = v.item()
+    return records
+
+
+def team_game_key(record: Dict) -> Optional[str]:
+    """Zero-padded week; playoff rounds key past week 18 (``week_number``)."""
+    week = week_number(record.get('Week'))
+    return None if week is None or math.isnan(week) else f'{int(week):02d}'
+
+
+def player_game_key(record: Dict) -> Optional[str]:
+    return record.get('Date') or None
+
+
+class GamelogStore:
+    """Game rows, high-water marks and a change log in one SQLite file."""
+
+    def __init__(self, path='data/cache/gamelogs.sqlite'):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(_SCHEMA)
+
+    def mark(self, entity: str, season: int) -> Tuple[Optional[str], Optional[float]]:
+        """(last ingested game key, team week at the last check) for an entity-season."""
+        with self._lock:
+            row = self._db.execute('SELECT last_key, checked_week FROM marks WHERE entity = ? AND season = ?',
+                                   (entity, season)).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def upsert(self, entity: str, season: int, records: Iterable[Dict], key: Callable[[Dict], Optional[str]],
+               checked_week: Optional[float] = None) -> List[Dict]:
+        """Insert new rows and replace changed ones; returns the change set (unchanged rows are skipped)."""
+        now = time.time()
+        changes = []
+        with self._lock, self._db:
+            for record in records:
+                game_key = key(record)
+                if game_key is None:
+                    continue
+                existing = self._db.execute('SELECT data FROM games WHERE entity = ? AND season = ? AND game_key = ?',
+                                            (entity, season, game_key)).fetchone()
+                if existing is not None and json.loads(existing[0]) == record:
+                    continue
+                data = json.dumps(record)
+                self._db.execute('INSERT OR REPLACE INTO games (entity, season, game_key, data, updated) '
+                                 'VALUES (?, ?, ?, ?, ?)', (entity, season, game_key, data, now))
+                op = 'insert' if existing is None else 'update'
+                cur = self._db.execute('INSERT INTO changes (entity, season, game_key, op, data, ts) '
+                                       'VALUES (?, ?, ?, ?, ?, ?)', (entity, season, game_key, op, data, now))
+                changes.append({'seq': cur.lastrowid, 'entity': entity, 'season': season, 'game_key': game_key,
+                                'op': op, 'row': record})
+            last = self._db.execute('SELECT MAX(game_key) FROM games WHERE entity = ? AND season = ?',
+                                    (entity, season)).fetchone()[0]
+            self._db.execute('INSERT INTO marks (entity, season, last_key, checked_week, updated) '
+                             'VALUES (?, ?, ?, ?, ?) ON CONFLICT (entity, season) DO UPDATE SET '
+                             'last_key = excluded.last_key, '
+                             'checked_week = COALESCE(excluded.checked_week, marks.checked_week), '
+                             'updated = excluded.updated', (entity, season, last, checked_week, now))
+        return changes
+
+    def frame(self, entity: str, season: int) -> pd.DataFrame:
+        with self._lock:
+            rows = self._db.execute('SELECT data FROM games WHERE entity = ? AND season = ? ORDER BY game_key',
+                                    (entity, season)).fetchall()
+        return pd.DataFrame([json.loads(r[0]) for r in rows])
+
+    def changes_since(self, seq: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """Change log entries after ``seq``, oldest first."""
+        sql = 'SELECT seq, entity, season, game_key, op, data FROM changes WHERE seq > ? ORDER BY seq'
+        args: Tuple = (seq,)
+        if limit is not None:
+            sql += ' LIMIT ?'
+            args += (limit,)
+        with self._lock:
+            rows = self._db.execute(sql, args).fetchall()
+        return [{'seq': s, 'entity': e, 'season': season, 'game_key': k, 'op': op, 'row': json.loads(d)}
+                for s, e, season, k, op, d in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class IncrementalIngestor:
+    """Refreshes team and player game logs past their high-water marks."""
+
+    def __init__(self, store: GamelogStore, out_dir='data/cache', base_url: str = PFR_BASE_URL,
+                 fetch: Optional[Callable[[str], str]] = None, rate: float = DEFAULT_RATE, burst: float = 1.0,
+                 cache=None):
+        self.store = store
+        self.out_dir = Path(out_dir)
+        self.base_url = base_url.rstrip('/')
+        cache = cache if cache is not None else get_page_cache()
+        self.fetch = fetch or (lambda url: _fetch_html(url, retries=2, cache=cache))
+        self.bucket = TokenBucket(rate, burst)
+        self.requests = 0
+
+    def _get(self, url: str) -> str:
+        self.bucket.acquire()
+        self.requests += 1
+        return self.fetch(url)
+
+    def _export(self, entity: str, season: int, path: Path):
+        save_csv(self.store.frame(entity, season), path)
+
+    def refresh_team(self, team: str, season: int, full: bool = False) -> Tuple[List[Dict], Optional[float]]:
+        """Ingest the team's newly completed games; returns (changes, last completed week)."""
+        entity = f'team:{team}'
+        last_key, _ = self.store.mark(entity, season)
+        newer = None if full or last_key is None else ('Week', float(last_key))
+        html = self._get(team_url(team, season, self.base_url))
+        tables = _gamelog_tables(html, TEAM_GAMELOG_TABLE_IDS, newer_than=newer)
+        try:
+            df = team_gamelog_from_tables(tables, season)
+        except RuntimeError:
+            if newer is None:
+                raise
+            df = pd.DataFrame()  # nothing past the mark
+        # unplayed games have no score yet; they must not move the mark
+        if 'PF' in df.columns:
+            df = df[pd.to_numeric(df['PF'], errors='coerce').notna()]
+        changes = self.store.upsert(entity, season, _records(df), team_game_key)
+        if changes:
+            self._export(entity, season, self.out_dir / f'nfl_{team.lower()}_{season}_team.csv')
+        last_key, _ = self.store.mark(entity, season)
+        return changes, (float(last_key) if last_key is not None else None)
+
+    def refresh_player(self, player: Dict, season: int, team_week: Optional[float] = None,
+                       full: bool = False) -> Optional[List[Dict]]:
+        """Ingest a player's games past the mark; None if the team hasn't played since the last check."""
+        entity = f'player:{player["pfr_id"]}'
+        last_key, checked_week = self.store.mark(entity, season)
+        if not full and team_week is not None and checked_week is not None and checked_week >= team_week:
+            return None
+        pfr_id = player['pfr_id']
+        html = self._get(f'{self.base_url}/players/{pfr_id[0]}/{pfr_id}/gamelog/{season}/')
+        newer = None if full or last_key is None else ('Date', last_key)
+        try:
+            df = PARSERS[player['pos']](_gamelog_tables(html, PLAYER_GAMELOG_TABLE_IDS, newer_than=newer))
+        except RuntimeError:
+            if newer is None:
+                raise
+            df = pd.DataFrame()
+        changes = self.store.upsert(entity, season, _records(df), player_game_key, checked_week=team_week)
+        if changes:
+            path = player.get('csv') or (self.out_dir /
+                                         f'nfl_{player["team"].lower()}_{player_slug(player["name"])}_{season}.csv')
+            self._export(entity, season, Path(path))
+        return changes
+
+    def refresh(self, season: int, teams: Optional[Iterable[str]] = None, players: Iterable[Dict] = (),
+                full: bool = False) -> Dict:
+        """Refresh teams, then only the players whose team completed a game since their last check."""
+        players = list(players)
+        teams = list(teams or sorted({p['team'] for p in players}) or PFR_TEAM_CODES)
+        changes: List[Dict] = []
+        team_weeks: Dict[str, Optional[float]] = {}
+        for team in teams:
+            team_changes, team_weeks[team] = self.refresh_team(team, season, full)
+            changes += team_changes
+        fetched = skipped = 0
+        for player in players:
+            if player['team'] not in team_weeks:
+                continue
+            result = self.refresh_player(player, season, team_weeks[player['team']], full)
+            if result is None:
+                skipped += 1
+            else:
+                fetched += 1
+                changes += result
+        logger.info('Season %s: %d teams, %d players fetched, %d skipped, %d changed rows',
+                    season, len(teams), fetched, skipped, len(changes))
+        return {'season': season, 'teams': len(teams), 'players_fetched': fetched, 'players_skipped': skipped,
+                'requests': self.requests, 'changes': changes}
+
+
+def players_from_ledger(ledger_path, season: int) -> List[Dict]:
+    """Player specs (team, pfr_id, name, pos) discovered by a ``pfr_crawler`` run."""
+    from scripts.pfr_crawler import JobLedger
+
+    ledger = JobLedger(ledger_path)
+    try:
+        return [job['payload'] for job in ledger.jobs()
+                if job['kind'] == 'player' and job['payload']['season'] == season]
+    finally:
+        ledger.close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Incrementally refresh PFR game logs')
+    parser.add_argument('command', choices=['refresh', 'changes'])
+    parser.add_argument('--db', default='data/cache/gamelogs.sqlite')
+    parser.add_argument('--out', default='data/cache')
+    parser.add_argument('--season', type=int, default=2025)
+    parser.add_argument('--teams', nargs='*')
+    parser.add_argument('--ledger', help='pfr_crawler ledger to take the player list from')
+    parser.add_argument('--full', action='store_true', help='Ignore high-water marks (picks up stat corrections)')
+    parser.add_argument('--since', type=int, default=0, help='Change log sequence to read after')
+    args = parser.parse_args()
+
+    store = GamelogStore(args.db)
+    if args.command == 'refresh':
+        players = players_from_ledger(args.ledger, args.season) if args.ledger else []
+        if args.teams:
+            players = [p for p in players if p['team'] in args.teams]
+        summary = IncrementalIngestor(store, out_dir=args.out).refresh(args.season, args.teams, players, args.full)
+        summary['changes'] = len(summary['changes'])
+        print(json.dumps(summary, indent=2))
+    else:
+        for change in store.changes_since(args.since):
+            print(json.dumps(change))
+    store.close()
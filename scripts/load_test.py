@@ -0,0 +1,170 @@
+"""Local load generator for the API with a latency report.
+
+Drives a weighted mix of routes (predict, batch predict, odds, autocomplete,
+health) from several threads, either in-process through the Flask test client
+or against a running server, then prints per-route request counts, errors and
+client-side p50/p95/p99 latency alongside the server's own /metrics view.
+
+Usage:
+  python -m scripts.load_test --requests 2000 --concurrency 8
+  python -m scripts.load_test --url http://127.0.0.1:5000 --duration 30
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+PLAYERS = ['Patrick Mahomes', 'Travis Kelce', 'Josh Allen', 'Tyreek Hill', "Ja'Marr Chase"]
+MARKETS = ['passing_yards', 'receiving_yards', 'rushing_yards']
+BOOKS = ['draftkings', 'fanduel', 'betmgm']
+
+
+def _bet(rng: random.Random) -> Dict:
+    projection = rng.choice([60, 75, 250, 280, 300])
+    return {
+        'sportsbook': rng.choice(BOOKS),
+        'market': rng.choice(MARKETS),
+        'player': rng.choice(PLAYERS),
+        'projection': projection,
+        'actual_or_estimate': projection + rng.randint(-40, 40),
+        'odds': rng.choice([-130, -115, -110, 100, 120]),
+    }
+
+
+# (name, weight, request builder) -> (method, path, json body or None)
+SCENARIOS: List[Tuple[str, int, Callable[[random.Random], Tuple[str, str, object]]]] = [
+    ('/api/predict', 50, lambda rng: ('POST', '/api/predict', _bet(rng))),
+    ('/api/predict/batch', 5, lambda rng: ('POST', '/api/predict/batch', {'bets': [_bet(rng) for _ in range(50)]})),
+    ('/api/odds', 25, lambda rng: ('GET', f'/api/odds?player={urllib.request.quote(rng.choice(PLAYERS))}'
+                                          f'&market={rng.choice(MARKETS)}', None)),
+    ('/api/autocomplete/players', 15, lambda rng: ('GET', '/api/autocomplete/players?q='
+                                                    + urllib.request.quote(rng.choice(PLAYERS)[:rng.randint(1, 6)]),
+                                                    None)),
+    ('/health', 5, lambda rng: ('GET', '/health', None)),
+]
+
+
+def _in_process_client():
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from frontend.app import app
+
+    local = threading.local()
+
+    def send(method, path, body):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        resp = client.open(path, method=method, json=body)
+        return resp.status_code, resp.get_data()
+
+    return send
+
+
+def _http_client(base_url: str, timeout: float = 10.0):
+    def send(method, path, body):
+        data = json.dumps(body).encode('utf8') if body is not None else None
+        req = urllib.request.Request(base_url.rstrip('/') + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                return resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            return 599, b''
+
+    return send
+
+
+def run_load(send, n_requests: int = 1000, concurrency: int = 4, duration: float = None,
+             seed: int = 0) -> Dict[str, Dict]:
+    """Fire requests from `concurrency` threads; return per-route latency samples and errors."""
+    names = [s[0] for s in SCENARIOS]
+    weights = [s[1] for s in SCENARIOS]
+    builders = {s[0]: s[2] for s in SCENARIOS}
+    results = {name: {'latencies': [], 'errors': 0} for name in names}
+    lock = threading.Lock()
+    remaining = [n_requests]
+    deadline = time.monotonic() + duration if duration else None
+
+    def worker(worker_seed):
+        rng = random.Random(worker_seed)
+        while True:
+            if deadline is not None:
+                if time.monotonic() >= deadline:
+                    return
+            else:
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+            name = rng.choices(names, weights)[0]
+            method, path, body = builders[name](rng)
+            start = time.perf_counter()
+            status, _ = send(method, path, body)
+            elapsed = time.perf_counter() - start
+            with lock:
+                results[name]['latencies'].append(elapsed)
+                if status >= 400:
+                    results[name]['errors'] += 1
+
+    threads = [threading.Thread(target=worker, args=(seed + i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results['_elapsed'] = time.perf_counter() - start
+    return results
+
+
+def report(results: Dict, server_metrics: Dict = None) -> str:
+    elapsed = results.pop('_elapsed', None)
+    lines = [f"{'route':<28}{'reqs':>7}{'errs':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"]
+    total = 0
+    for name, r in results.items():
+        lat = np.array(r['latencies']) * 1000
+        total += lat.size
+        if not lat.size:
+            continue
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+        lines.append(f"{name:<28}{lat.size:>7}{r['errors']:>6}{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}{lat.max():>9.2f}")
+    if elapsed:
+        lines.append(f"\n{total} requests in {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+    if server_metrics:
+        lines.append('\nserver-side (from /metrics):')
+        for route, m in sorted(server_metrics.get('routes', {}).items()):
+            lat = m.get('latency', {})
+            lines.append(f"  {route:<26}{m['requests']:>7}{m['errors']:>6}"
+                         f"{lat.get('p50', 0) * 1000:>9.2f}{lat.get('p95', 0) * 1000:>9.2f}"
+                         f"{lat.get('p99', 0) * 1000:>9.2f}")
+        for endpoint, stats in sorted(server_metrics.get('cache', {}).get('endpoints', {}).items()):
+            lines.append(f"  cache {endpoint}: hit ratio {stats['hit_ratio']:.2%}")
+    return '\n'.join(lines)
+
+
+def main(url: str = None, n_requests: int = 1000, concurrency: int = 4, duration: float = None) -> int:
+    send = _http_client(url) if url else _in_process_client()
+    results = run_load(send, n_requests=n_requests, concurrency=concurrency, duration=duration)
+    status, body = send('GET', '/metrics?format=json', None)
+    server_metrics = json.loads(body) if status == 200 else None
+    print(report(results, server_metrics))
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate load against the API and report latency.')
+    parser.add_argument('--url', default=None, help='Base URL of a running server (default: in-process)')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=None, help='Run for N seconds instead of --requests')
+    args = parser.parse_args()
+    sys.exit(main(args.url, args.requests, args.concurrency, args.duration))
@@ -1,10 +1,10 @@
 import numpy as np
 import pandas as pd
-from sklearn.metrics import brier_score_loss, log_loss, roc_auc_score, mean_squared_error, mean_absolute_error
-from sklearn.calibration import calibration_curve
-from scipy.stats import pearsonr
 from typing import Callable, Tuple, Dict
 
+# sklearn/scipy are imported inside the functions that need them so that
+# importing this module (and everything that imports it) stays cheap.
+
 
 def calibration_by_bin(y_true, p_pred, n_bins=10, strategy='quantile'):
     """Return calibration by bin (count, mean predicted prob, observed freq).
@@ -33,6 +33,8 @@ def expected_calibration_error(y_true, p_pred, n_bins=10) -> float:
 
 
 def rmse_mae(y_true, y_pred) -> Dict[str, float]:
+    from sklearn.metrics import mean_squared_error, mean_absolute_error
+
     y = np.asarray(y_true)
     p = np.asarray(y_pred)
     mask = ~np.isnan(p)
@@ -45,6 +47,9 @@ def rmse_mae(y_true, y_pred) -> Dict[str, float]:
 
 def compute_metrics(y_true, p_pred) -> Dict:
     """Compute a set of metrics for binary outcomes and predicted probabilities."""
+    from sklearn.metrics import brier_score_loss, log_loss, roc_auc_score
+    from scipy.stats import pearsonr
+
     y = np.asarray(y_true)
     p = np.asarray(p_pred)
     mask = ~np.isnan(p)
@@ -0,0 +1,147 @@
+"""Array-native odds math shared by the API and the backtests.
+
+Every function takes scalars or NumPy arrays (anything ``np.asarray`` accepts)
+and broadcasts, so pricing a whole slate is a handful of element-wise ops:
+
+- conversions between American, decimal and implied-probability odds
+- vig removal for two-sided markets: multiplicative (proportional), power
+  and Shin
+- consensus fair probabilities across books (NaN = book not quoting)
+- expected value and Kelly stake for a win probability at given odds
+
+Missing prices are NaN and stay NaN. Scalar inputs return NumPy scalars,
+which are ``float`` subclasses and serialize as such.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+VIG_METHODS = ('multiplicative', 'power', 'shin')
+
+
+def _f(x) -> np.ndarray:
+    return np.asarray(x, dtype=np.float64)
+
+
+def american_to_decimal(american):
+    """American odds (-110, +150) to decimal odds (1.909, 2.5)."""
+    a = _f(american)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(a < 0, 1 + 100 / np.abs(a), 1 + a / 100)[()]
+
+
+def decimal_to_american(decimal):
+    """Decimal odds to American; 2.0 maps to -100, like the scalar helper it replaces."""
+    d = _f(decimal)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(d > 2, (d - 1) * 100, -100 / (d - 1))[()]
+
+
+def american_to_implied(american):
+    """American odds to the book's implied probability (vig included)."""
+    a = _f(american)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(a < 0, -a / (-a + 100), 100 / (a + 100))[()]
+
+
+def implied_to_american(prob):
+    """Probability to American odds (negative at 50% and above)."""
+    p = _f(prob)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(p >= 0.5, -(p * 100) / (1 - p), (1 - p) * 100 / p)[()]
+
+
+def decimal_to_implied(decimal):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (1 / _f(decimal))[()]
+
+
+def implied_to_decimal(prob):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (1 / _f(prob))[()]
+
+
+def _bisect(excess, lo: float, hi: float, shape, iters: int = 60) -> np.ndarray:
+    """Solve ``excess(x) == 0`` element-wise for an ``excess`` decreasing in x."""
+    lo = np.full(shape, lo)
+    hi = np.full(shape, hi)
+    for _ in range(iters):
+        mid = (lo + hi) / 2
+        above = excess(mid) > 0
+        lo = np.where(above, mid, lo)
+        hi = np.where(above, hi, mid)
+    return (lo + hi) / 2
+
+
+def remove_vig(p_over, p_under, method: str = 'multiplicative') -> Tuple[np.ndarray, np.ndarray]:
+    """Fair (over, under) probabilities from the two implied probabilities.
+
+    - ``multiplicative``: scale both sides by the overround
+    - ``power``: find k with ``p_over**k + p_under**k == 1``; takes more
+      margin off the longshot side
+    - ``shin``: Shin's insider-trading model (z = share of informed money),
+      also shading the favourite-longshot bias
+    """
+    po, pu = np.broadcast_arrays(_f(p_over), _f(p_under))
+    total = po + pu
+    if method == 'multiplicative':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fair = po / total
+        return fair[()], (1 - fair)[()]
+    ok = np.isfinite(total) & (po > 0) & (pu > 0)
+    safe_o, safe_u = np.where(ok, po, 0.5), np.where(ok, pu, 0.5)
+    if method == 'power':
+        k = _bisect(lambda k: safe_o ** k + safe_u ** k - 1, 0.01, 50.0, po.shape)
+        fair_o, fair_u = safe_o ** k, safe_u ** k
+    elif method == 'shin':
+        booksum = safe_o + safe_u
+
+        def shin(p, z):
+            return (np.sqrt(z ** 2 + 4 * (1 - z) * p ** 2 / booksum) - z) / (2 * (1 - z))
+
+        # no informed money (z = 0) when the book has no margin
+        z = np.where(booksum > 1, _bisect(lambda z: shin(safe_o, z) + shin(safe_u, z) - 1, 0.0, 0.99,
+                                          po.shape), 0.0)
+        fair_o, fair_u = shin(safe_o, z), shin(safe_u, z)
+        fair_o = np.where(booksum > 1, fair_o, safe_o / booksum)
+        fair_u = np.where(booksum > 1, fair_u, safe_u / booksum)
+    else:
+        raise ValueError(f'Unknown vig removal method: {method} (expected one of {VIG_METHODS})')
+    norm = fair_o + fair_u  # absorb the solver's last ~1e-15
+    return np.where(ok, fair_o / norm, np.nan)[()], np.where(ok, fair_u / norm, np.nan)[()]
+
+
+def fair_probabilities(over_american, under_american, method: str = 'multiplicative'):
+    """``remove_vig`` straight from American prices."""
+    return remove_vig(american_to_implied(over_american), american_to_implied(under_american), method)
+
+
+def consensus_fair(over_american, under_american, method: str = 'multiplicative',
+                   weights: Optional[np.ndarray] = None, axis: int = -1) -> np.ndarray:
+    """Consensus fair over-probability per prop from a (props x books) price grid.
+
+    Each book is de-vigged on its own, then books are averaged along ``axis``
+    (optionally weighted), skipping books with a NaN price. Props no book
+    quotes come back NaN.
+    """
+    fair_over, _ = fair_probabilities(over_american, under_american, method)
+    fair_over = np.asarray(fair_over)
+    quoted = np.isfinite(fair_over)
+    w = np.ones_like(fair_over) if weights is None else np.broadcast_to(_f(weights), fair_over.shape)
+    w = np.where(quoted, w, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (np.where(quoted, fair_over, 0.0) * w).sum(axis=axis) / w.sum(axis=axis)
+
+
+def expected_value(p_win, decimal_odds):
+    """EV per unit staked: ``p * (d - 1) - (1 - p)``."""
+    p = _f(p_win)
+    return (p * (_f(decimal_odds) - 1) - (1 - p))[()]
+
+
+def kelly_fraction(p_win, decimal_odds):
+    """Full-Kelly stake ``(b p - q) / b`` with ``b = d - 1``; 0 when negative or b <= 0."""
+    p = _f(p_win)
+    b = _f(decimal_odds) - 1
+    safe_b = np.where(b > 0, b, 1.0)
+    return np.where(b > 0, np.maximum(0.0, (b * p - (1 - p)) / safe_b), 0.0)[()]
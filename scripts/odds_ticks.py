@@ -0,0 +1,412 @@
+"""Append-only columnar history of odds ticks.
+
+Every tick is one row of (ts, book, player, market, line, over, under).
+Strings are dictionary-encoded to int32 codes and rows are buffered in memory,
+then flushed as immutable segments: one ``.npy`` file per column, memory-mapped
+on read. Flushed segments are sorted by time, so a time-range query is a
+``np.searchsorted`` per segment plus min/max pruning from the manifest.
+
+``compact`` rewrites all segments into large ones sorted by
+(player, market, book, ts), dropping ticks that repeat the previous quote for
+the same book, so per-player queries become a binary-searched slice. Pollers
+re-record an unchanged quote every few seconds; most of the history is
+such repeats.
+
+Each store is single-writer: one process appends and compacts, any number
+of processes can read. Server workers therefore each record into their own
+``writer-<pid>/`` store under the shared root (``writer_store``), and
+``TickReader`` merges every store under a root for queries.
+
+Usage:
+  python -m scripts.odds_ticks import data/cache/odds_snapshots.jsonl --root data/cache/ticks
+  python -m scripts.odds_ticks compact --root data/cache/ticks      # with the recording app stopped
+  python -m scripts.odds_ticks query --root data/cache/ticks --player "Patrick Mahomes" --start 2025-09-07
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+TICK_VERSION = 1
+COLUMNS = {
+    'ts': np.float64,
+    'book': np.int32,
+    'player': np.int32,
+    'market': np.int32,
+    'line': np.float32,
+    'over': np.float32,
+    'under': np.float32,
+}
+STRING_COLUMNS = ('book', 'player', 'market')
+PRICE_COLUMNS = ('line', 'over', 'under')
+WRITER_PREFIX = 'writer-'
+
+
+def _normalize(value: str) -> str:
+    return str(value).strip().lower()
+
+
+def _to_epoch(value) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float, np.floating, np.integer)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(str(value)).timestamp()
+
+
+class TickStore:
+    """Odds tick history under ``root`` (``manifest.json`` plus segment directories)."""
+
+    def __init__(self, root, segment_rows: int = 65536, flush_seconds: Optional[float] = 60.0):
+        self.root = Path(root)
+        self.segment_rows = segment_rows
+        self.flush_seconds = flush_seconds
+        self._lock = threading.RLock()
+        self._buffer: Dict[str, list] = {name: [] for name in COLUMNS}
+        self._buffer_started: Optional[float] = None
+        self._loaded: Dict[str, Dict[str, np.ndarray]] = {}
+        manifest = self._read_manifest()
+        self.segments: List[Dict] = manifest['segments']
+        self.next_segment: int = manifest['next_segment']
+        # code -> display string, and normalized string -> code
+        self.dictionaries: Dict[str, List[str]] = manifest['dictionaries']
+        self._codes = {col: {_normalize(v): i for i, v in enumerate(values)}
+                       for col, values in self.dictionaries.items()}
+
+    def _read_manifest(self) -> Dict:
+        path = self.root / 'manifest.json'
+        if not path.exists():
+            return {'version': TICK_VERSION, 'next_segment': 0, 'segments': [],
+                    'dictionaries': {col: [] for col in STRING_COLUMNS}}
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != TICK_VERSION:
+            raise ValueError(f'Tick store version {manifest.get("version")} != {TICK_VERSION}')
+        return manifest
+
+    def _write_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / 'manifest.json.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'version': TICK_VERSION, 'next_segment': self.next_segment,
+                       'segments': self.segments, 'dictionaries': self.dictionaries}, f)
+        os.replace(tmp, self.root / 'manifest.json')
+
+    def __len__(self) -> int:
+        return sum(s['rows'] for s in self.segments) + len(self._buffer['ts'])
+
+    def code(self, column: str, value: str, create: bool = False) -> int:
+        """Dictionary code for a book/player/market string (-1 if unknown)."""
+        key = _normalize(value)
+        codes = self._codes[column]
+        code = codes.get(key)
+        if code is None:
+            if not create:
+                return -1
+            code = codes[key] = len(self.dictionaries[column])
+            self.dictionaries[column].append(str(value).strip())
+        return code
+
+    # -- writing -----------------------------------------------------------
+
+    def append(self, ts, book: str, player: str, market: str, line: Optional[float],
+               over: Optional[float], under: Optional[float]):
+        """Buffer one tick; full or old buffers are flushed to a new segment."""
+        with self._lock:
+            buf = self._buffer
+            buf['ts'].append(time.time() if ts is None else _to_epoch(ts))
+            buf['book'].append(self.code('book', book, create=True))
+            buf['player'].append(self.code('player', player, create=True))
+            buf['market'].append(self.code('market', market, create=True))
+            for name, value in zip(PRICE_COLUMNS, (line, over, under)):
+                buf[name].append(np.nan if value is None else value)
+            if self._buffer_started is None:
+                self._buffer_started = time.monotonic()
+            if len(buf['ts']) >= self.segment_rows or (
+                    self.flush_seconds is not None
+                    and time.monotonic() - self._buffer_started >= self.flush_seconds):
+                self.flush()
+
+    def append_quotes(self, quotes: Iterable[Dict], ts=None) -> int:
+        """Append flattened quotes (``player, market, book, line, over, under``)."""
+        n = 0
+        for q in quotes:
+            self.append(q.get('ts', ts), q['book'], q['player'], q['market'],
+                        q.get('line'), q.get('over'), q.get('under'))
+            n += 1
+        return n
+
+    def append_odds(self, odds_data: Optional[Dict], ts=None) -> int:
+        """Append every book of a provider ``get_odds`` payload."""
+        if not odds_data:
+            return 0
+        ts = odds_data.get('timestamp') if ts is None else ts
+        return self.append_quotes(
+            ({'book': book, 'player': odds_data['player'], 'market': odds_data['market'], **q}
+             for book, q in odds_data.get('sportsbooks', {}).items()), ts=ts)
+
+    def append_columns(self, ts, book, player, market, line, over, under) -> int:
+        """Bulk-append equal-length arrays; strings are encoded once per distinct value."""
+        cols = {'ts': np.asarray(ts, dtype=np.float64)}
+        with self._lock:
+            for col, values in (('book', book), ('player', player), ('market', market)):
+                uniques, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+                codes = np.array([self.code(col, u, create=True) for u in uniques], dtype=np.int32)
+                cols[col] = codes[inverse]
+            for col, values in zip(PRICE_COLUMNS, (line, over, under)):
+                cols[col] = np.asarray(values, dtype=np.float32)
+            self.flush()
+            order = np.argsort(cols['ts'], kind='stable')
+            for i in range(0, order.size, self.segment_rows):
+                rows = order[i:i + self.segment_rows]
+                self.segments.append(self._write_segment({col: v[rows] for col, v in cols.items()}, 'ts'))
+            self._write_manifest()
+        return int(order.size)
+
+    def flush(self) -> Optional[str]:
+        """Write buffered ticks as a time-sorted segment; returns its name."""
+        with self._lock:
+            if not self._buffer['ts']:
+                return None
+            arrays = {name: np.asarray(values, dtype=COLUMNS[name]) for name, values in self._buffer.items()}
+            order = np.argsort(arrays['ts'], kind='stable')
+            meta = self._write_segment({name: a[order] for name, a in arrays.items()}, 'ts')
+            self.segments.append(meta)
+            self._write_manifest()
+            self._buffer = {name: [] for name in COLUMNS}
+            self._buffer_started = None
+            return meta['name']
+
+    def _write_segment(self, arrays: Dict[str, np.ndarray], order: str) -> Dict:
+        name = f'seg-{self.next_segment:06d}'
+        self.next_segment += 1
+        directory = self.root / name
+        directory.mkdir(parents=True, exist_ok=True)
+        for col, values in arrays.items():
+            np.save(directory / f'{col}.npy', np.ascontiguousarray(values, dtype=COLUMNS[col]))
+        return {'name': name, 'rows': int(arrays['ts'].size), 'order': order,
+                'ts_min': float(arrays['ts'].min()), 'ts_max': float(arrays['ts'].max()),
+                'player_min': int(arrays['player'].min()), 'player_max': int(arrays['player'].max())}
+
+    # -- reading -----------------------------------------------------------
+
+    def _segment(self, meta: Dict) -> Dict[str, np.ndarray]:
+        arrays = self._loaded.get(meta['name'])
+        if arrays is None:
+            directory = self.root / meta['name']
+            arrays = {col: np.load(directory / f'{col}.npy', mmap_mode='r') for col in COLUMNS}
+            self._loaded[meta['name']] = arrays
+        return arrays
+
+    def query(self, start=None, end=None, player: Optional[str] = None, market: Optional[str] = None,
+              book: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """Ticks with ``start <= ts < end`` matching the filters, sorted by time.
+
+        Returns encoded columns; use ``decode`` or ``frame`` for strings.
+        Buffered (not yet flushed) ticks are included.
+        """
+        start, end = _to_epoch(start), _to_epoch(end)
+        with self._lock:
+            filters = {}
+            for col, value in (('player', player), ('market', market), ('book', book)):
+                if value is not None:
+                    filters[col] = self.code(col, value)
+                    if filters[col] < 0:
+                        return {col: np.empty(0, dtype=dtype) for col, dtype in COLUMNS.items()}
+            parts = []
+            for meta in self.segments:
+                if (start is not None and meta['ts_max'] < start) or (end is not None and meta['ts_min'] >= end):
+                    continue
+                if 'player' in filters and not meta['player_min'] <= filters['player'] <= meta['player_max']:
+                    continue
+                parts.append(self._select(self._segment(meta), meta['order'], start, end, filters))
+            if self._buffer['ts']:
+                buffered = {name: np.asarray(values, dtype=COLUMNS[name]) for name, values in self._buffer.items()}
+                parts.append(self._select(buffered, None, start, end, filters))
+        out = {col: np.concatenate([p[col] for p in parts]) if parts else np.empty(0, dtype=dtype)
+               for col, dtype in COLUMNS.items()}
+        order = np.argsort(out['ts'], kind='stable')
+        return {col: values[order] for col, values in out.items()}
+
+    @staticmethod
+    def _select(arrays: Dict[str, np.ndarray], order: Optional[str], start, end,
+                filters: Dict[str, int]) -> Dict[str, np.ndarray]:
+        lo, hi = 0, arrays['ts'].shape[0]
+        if order == 'ts':
+            if start is not None:
+                lo = int(np.searchsorted(arrays['ts'], start, side='left'))
+            if end is not None:
+                hi = int(np.searchsorted(arrays['ts'], end, side='left'))
+        elif order == 'player' and 'player' in filters:
+            lo = int(np.searchsorted(arrays['player'], filters['player'], side='left'))
+            hi = int(np.searchsorted(arrays['player'], filters['player'], side='right'))
+        cols = {col: arrays[col][lo:hi] for col in COLUMNS}
+        mask = np.ones(hi - lo, dtype=bool)
+        if order != 'ts':
+            if start is not None:
+                mask &= cols['ts'] >= start
+            if end is not None:
+                mask &= cols['ts'] < end
+        for col, code in filters.items():
+            if not (order == 'player' and col == 'player'):
+                mask &= cols[col] == code
+        return {col: np.asarray(values[mask]) for col, values in cols.items()}
+
+    def decode(self, column: str, codes: np.ndarray) -> np.ndarray:
+        """Map dictionary codes back to strings."""
+        return np.asarray(self.dictionaries[column], dtype=object)[codes]
+
+    def frame(self, **filters) -> 'pd.DataFrame':
+        """``query`` as a DataFrame with categorical book/player/market columns."""
+        import pandas as pd
+
+        cols = self.query(**filters)
+        data = {'ts': pd.to_datetime(cols['ts'], unit='s')}
+        for col in STRING_COLUMNS:
+            data[col] = pd.Categorical.from_codes(cols[col], categories=pd.Index(self.dictionaries[col]))
+        for col in PRICE_COLUMNS:
+            data[col] = cols[col]
+        return pd.DataFrame(data)
+
+    # -- maintenance -------------------------------------------------------
+
+    def compact(self, max_rows: int = 1_000_000, drop_unchanged: bool = True) -> Dict:
+        """Merge every segment into player-sorted segments of at most ``max_rows``.
+
+        With ``drop_unchanged``, a tick that repeats the previous quote of the
+        same (player, market, book) is dropped; the first tick of each quote
+        is kept, so line-move timing is preserved.
+        """
+        with self._lock:
+            self.flush()
+            old = list(self.segments)
+            if not old:
+                return {'segments_before': 0, 'segments_after': 0, 'rows_before': 0, 'rows_after': 0}
+            parts = [self._segment(meta) for meta in old]
+            arrays = {col: np.concatenate([np.asarray(p[col]) for p in parts]) for col in COLUMNS}
+            rows_before = arrays['ts'].size
+            order = np.lexsort((arrays['ts'], arrays['book'], arrays['market'], arrays['player']))
+            arrays = {col: values[order] for col, values in arrays.items()}
+            if drop_unchanged and rows_before > 1:
+                same_key = np.ones(rows_before - 1, dtype=bool)
+                for col in STRING_COLUMNS:
+                    same_key &= arrays[col][1:] == arrays[col][:-1]
+                for col in PRICE_COLUMNS:
+                    a, b = arrays[col][1:], arrays[col][:-1]
+                    same_key &= (a == b) | (np.isnan(a) & np.isnan(b))
+                keep = np.concatenate([[True], ~same_key])
+                arrays = {col: values[keep] for col, values in arrays.items()}
+            rows_after = arrays['ts'].size
+            new = [self._write_segment({col: values[i:i + max_rows] for col, values in arrays.items()}, 'player')
+                   for i in range(0, rows_after, max_rows)]
+            self.segments = new
+            self._write_manifest()
+            for meta in old:
+                self._loaded.pop(meta['name'], None)
+                shutil.rmtree(self.root / meta['name'], ignore_errors=True)
+        return {'segments_before': len(old), 'segments_after': len(new),
+                'rows_before': int(rows_before), 'rows_after': int(rows_after)}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'rows': len(self), 'segments': len(self.segments), 'buffered': len(self._buffer['ts']),
+                    **{f'{col}s': len(values) for col, values in self.dictionaries.items()}}
+
+
+def writer_store(root, **kwargs) -> TickStore:
+    """This process's own store under a shared ``root`` (``writer-<pid>/``)."""
+    return TickStore(Path(root) / f'{WRITER_PREFIX}{os.getpid()}', **kwargs)
+
+
+def open_stores(root) -> List[TickStore]:
+    """The store at ``root`` (if any) followed by each writer's store under it."""
+    root = Path(root)
+    paths = [root] if (root / 'manifest.json').exists() else []
+    if root.is_dir():
+        paths += sorted(p for p in root.iterdir()
+                        if p.name.startswith(WRITER_PREFIX) and (p / 'manifest.json').exists())
+    return [TickStore(p, flush_seconds=None) for p in paths]
+
+
+class TickReader:
+    """Read-only view merging every store under ``root`` (see ``open_stores``).
+
+    Each store has its own dictionaries, so results are merged decoded:
+    ``frame`` takes the same filters as ``TickStore.query``.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.stores = open_stores(root)
+
+    def __len__(self) -> int:
+        return sum(len(store) for store in self.stores)
+
+    def frame(self, **filters) -> 'pd.DataFrame':
+        import pandas as pd
+
+        frames = [store.frame(**filters) for store in self.stores]
+        if not frames:
+            return pd.DataFrame({'ts': pd.to_datetime([], unit='s'),
+                                 **{col: pd.Categorical([]) for col in STRING_COLUMNS},
+                                 **{col: np.empty(0, dtype=COLUMNS[col]) for col in PRICE_COLUMNS}})
+        out = pd.concat(frames, ignore_index=True)
+        for col in STRING_COLUMNS:
+            out[col] = out[col].astype('category')
+        return out.sort_values('ts', kind='stable').reset_index(drop=True)
+
+    def stats(self) -> Dict:
+        stats = [store.stats() for store in self.stores]
+        return {'stores': len(stats), 'rows': sum(s['rows'] for s in stats),
+                'segments': sum(s['segments'] for s in stats)}
+
+
+def import_replay(store: TickStore, paths: Iterable) -> int:
+    """Load recorded line-stream snapshots (JSONL of ``{ts, quotes}``) into ``store``."""
+    n = 0
+    for path in paths:
+        with open(path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    snapshot = json.loads(line)
+                    n += store.append_quotes(snapshot['quotes'], ts=snapshot.get('ts'))
+    store.flush()
+    return n
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Odds tick history: import, compact and query.')
+    parser.add_argument('command', choices=['import', 'compact', 'query', 'stats'])
+    parser.add_argument('paths', nargs='*', help='JSONL snapshot files for import')
+    parser.add_argument('--root', default='data/cache/ticks')
+    parser.add_argument('--player')
+    parser.add_argument('--market')
+    parser.add_argument('--book')
+    parser.add_argument('--start', help='ISO time or epoch seconds')
+    parser.add_argument('--end', help='ISO time or epoch seconds')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        print(f'Imported {import_replay(TickStore(args.root), args.paths)} ticks into {args.root}')
+    elif args.command == 'compact':
+        for store in open_stores(args.root):
+            print(store.root, store.compact())
+    elif args.command == 'query':
+        frame = TickReader(args.root).frame(start=args.start, end=args.end, player=args.player,
+                                            market=args.market, book=args.book)
+        print(frame.to_string(index=False))
+    else:
+        print(TickReader(args.root).stats())
@@ -0,0 +1,148 @@
+"""On-disk cache of fetched HTML pages, keyed by URL.
+
+Each page is stored gzip-compressed next to a small JSON sidecar holding the
+URL, fetch time and the ``ETag`` / ``Last-Modified`` validators:
+
+    data/cache/html/3f/3f9c...e1.html.gz
+    data/cache/html/3f/3f9c...e1.json
+
+``fetch_pfr_nfl._fetch_html`` consults it before going to the network:
+
+- pages for a season that had already finished when they were fetched are
+  final and served straight from disk
+- anything else is revalidated with a conditional GET; a ``304`` reuses the
+  stored copy
+- in offline mode (``PFR_OFFLINE=1``) every cached page is served as-is, so
+  re-running a parser over a backfill costs no downloads
+
+The cache directory comes from ``PFR_HTML_CACHE`` (default
+``data/cache/html``); set it to ``off`` to disable caching.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+# NFL seasons end with the Super Bowl in February
+SEASON_END_MONTH = 3
+_SEASON_IN_URL = re.compile(r'/(\d{4})(?:\.htm|_roster\.htm|/|$)')
+
+
+def season_of(url: str) -> Optional[int]:
+    """Season a PFR team/roster/gamelog URL refers to, if any."""
+    match = _SEASON_IN_URL.search(url)
+    return int(match.group(1)) if match else None
+
+
+def season_end(season: int) -> float:
+    return datetime(season + 1, SEASON_END_MONTH, 1).timestamp()
+
+
+class CachedPage:
+    __slots__ = ('url', 'html', 'etag', 'last_modified', 'fetched_at')
+
+    def __init__(self, url: str, html: str, etag: Optional[str], last_modified: Optional[str], fetched_at: float):
+        self.url = url
+        self.html = html
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    @property
+    def final(self) -> bool:
+        """True if the page was fetched after its season finished (it won't change)."""
+        season = season_of(self.url)
+        return season is not None and self.fetched_at >= season_end(season)
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional-GET headers for revalidating this copy."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """gzip-compressed HTML pages plus validators under ``root``."""
+
+    def __init__(self, root, offline: bool = False, compresslevel: int = 6):
+        self.root = Path(root)
+        self.offline = offline
+        self.compresslevel = compresslevel
+        self.stats = {'hits': 0, 'revalidated': 0, 'stored': 0, 'misses': 0}
+
+    def _paths(self, url: str):
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        directory = self.root / digest[:2]
+        return directory / f'{digest}.html.gz', directory / f'{digest}.json'
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            with gzip.open(body_path, 'rb') as f:
+                html = f.read().decode('utf-8')
+        except (OSError, ValueError):
+            self.stats['misses'] += 1
+            return None
+        return CachedPage(url, html, meta.get('etag'), meta.get('last_modified'), meta['fetched_at'])
+
+    def put(self, url: str, html: str, headers=None, fetched_at: Optional[float] = None) -> CachedPage:
+        """Store a page with the validators from its response ``headers``."""
+        headers = headers or {}
+        page = CachedPage(url, html, headers.get('ETag'), headers.get('Last-Modified'),
+                          time.time() if fetched_at is None else fetched_at)
+        body_path, meta_path = self._paths(url)
+        body_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = body_path.with_suffix('.tmp')
+        with gzip.open(tmp, 'wb', compresslevel=self.compresslevel) as f:
+            f.write(html.encode('utf-8'))
+        os.replace(tmp, body_path)
+        self._write_meta(page)
+        self.stats['stored'] += 1
+        return page
+
+    def touch(self, page: CachedPage) -> CachedPage:
+        """Record a successful revalidation (304): the copy is current as of now."""
+        page.fetched_at = time.time()
+        self._write_meta(page)
+        self.stats['revalidated'] += 1
+        return page
+
+    def _write_meta(self, page: CachedPage):
+        _, meta_path = self._paths(page.url)
+        tmp = meta_path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'url': page.url, 'etag': page.etag, 'last_modified': page.last_modified,
+                       'fetched_at': page.fetched_at}, f)
+        os.replace(tmp, meta_path)
+
+    def usable_without_network(self, page: Optional[CachedPage]) -> bool:
+        if page is None:
+            return False
+        if self.offline or page.final:
+            self.stats['hits'] += 1
+            return True
+        return False
+
+
+_DEFAULT_CACHE: Optional[PageCache] = None
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Process-wide cache from ``PFR_HTML_CACHE`` / ``PFR_OFFLINE`` (None if disabled)."""
+    global _DEFAULT_CACHE
+    root = os.environ.get('PFR_HTML_CACHE', 'data/cache/html')
+    if root.lower() in ('off', 'none', '0', ''):
+        return None
+    if _DEFAULT_CACHE is None or _DEFAULT_CACHE.root != Path(root):
+        _DEFAULT_CACHE = PageCache(root, offline=os.environ.get('PFR_OFFLINE') == '1')
+    return _DEFAULT_CACHE
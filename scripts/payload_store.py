@@ -0,0 +1,307 @@
+"""Content-addressed, de-duplicated store for provider payloads.
+
+Every fetch used to land in its own pretty-printed ``{name}.{ts}.json``, so
+unchanged slates were stored over and over, and finding the newest one meant
+stat-ing every file in the directory. ``PayloadStore`` keeps:
+
+    data/cache/provider/blobs/3f/3f9c...e1.json.gz   gzip'd canonical JSON, keyed by SHA-256
+    data/cache/provider/index.sqlite                 fetches(provider, params, ts) -> blob hash
+
+An identical payload is written once, however often it is fetched. ``latest``
+and ``between`` are index lookups on ``(provider, params_key, ts)``, so they
+cost O(log n) regardless of how many fetches are on disk.
+
+Retention is enforced on every ``put`` when limits are set:
+
+- ``max_age_days``: drop fetches older than this
+- ``keep_per_key``: keep only the newest N fetches per (provider, params)
+- ``max_bytes``: drop the oldest fetches until the compressed blobs fit
+
+A blob is deleted once no fetch refers to it.
+
+Usage:
+  python -m scripts.payload_store stats
+  python -m scripts.payload_store latest --provider theoddsapi
+  python -m scripts.payload_store evict --max-age-days 30 --max-mb 500
+  python -m scripts.payload_store gc
+  python -m scripts.payload_store import data/cache/provider/*.json   # legacy {name}.{ts}.json files
+"""
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_ROOT = 'data/cache/provider'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    raw_size INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fetches (
+    id INTEGER PRIMARY KEY,
+    provider TEXT NOT NULL,
+    params_key TEXT NOT NULL,
+    ts REAL NOT NULL,
+    hash TEXT NOT NULL REFERENCES blobs(hash)
+);
+CREATE INDEX IF NOT EXISTS fetches_key_ts ON fetches(provider, params_key, ts);
+CREATE INDEX IF NOT EXISTS fetches_provider_ts ON fetches(provider, ts);
+CREATE INDEX IF NOT EXISTS fetches_ts ON fetches(ts);
+CREATE INDEX IF NOT EXISTS fetches_hash ON fetches(hash);
+"""
+
+
+def canonical_json(data: Any) -> bytes:
+    """Stable serialization, so equal payloads hash equal."""
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf8')
+
+
+def params_key(params: Optional[Dict]) -> str:
+    return canonical_json(params or {}).decode('utf8')
+
+
+class PayloadStore:
+    """gzip'd, hash-keyed payload blobs plus a SQLite index of fetches."""
+
+    def __init__(self, root=DEFAULT_ROOT, max_bytes: Optional[int] = None, max_age_days: Optional[float] = None,
+                 keep_per_key: Optional[int] = None, compresslevel: int = 6):
+        self.root = Path(root)
+        self.blob_dir = self.root / 'blobs'
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.keep_per_key = keep_per_key
+        self.compresslevel = compresslevel
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / 'index.sqlite'), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(_SCHEMA)
+        self._total_bytes = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / f'{digest}.json.gz'
+
+    def put(self, provider: str, data: Any, params: Optional[Dict] = None, ts: Optional[float] = None) -> Dict:
+        """Record a fetch; the blob is only written if this payload hasn't been seen."""
+        raw = canonical_json(data)
+        digest = hashlib.sha256(raw).hexdigest()
+        ts = time.time() if ts is None else ts
+        with self._lock, self._db:
+            # claiming the hash takes SQLite's write lock, so a concurrent writer
+            # or evict can't race the blob file in between
+            new_blob = self._db.execute(
+                'INSERT OR IGNORE INTO blobs (hash, size, raw_size, created) VALUES (?, 0, ?, ?)',
+                (digest, len(raw), time.time())).rowcount == 1
+            path = self.blob_path(digest)
+            if new_blob or not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix('.tmp')
+                with open(tmp, 'wb') as f:
+                    # mtime=0 keeps the compressed bytes a pure function of the payload
+                    with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=self.compresslevel, mtime=0) as gz:
+                        gz.write(raw)
+                os.replace(tmp, path)
+            if new_blob:
+                size = path.stat().st_size
+                self._db.execute('UPDATE blobs SET size = ? WHERE hash = ?', (size, digest))
+                self._total_bytes += size
+            cur = self._db.execute('INSERT INTO fetches (provider, params_key, ts, hash) VALUES (?, ?, ?, ?)',
+                                   (provider, params_key(params), ts, digest))
+            entry = {'id': cur.lastrowid, 'provider': provider, 'params': dict(params or {}), 'ts': ts,
+                     'hash': digest, 'new_blob': new_blob}
+        if self.max_bytes is not None or self.max_age_days is not None or self.keep_per_key is not None:
+            self.evict(key=(provider, params_key(params)))
+        return entry
+
+    def load(self, digest: str) -> Any:
+        with gzip.open(self.blob_path(digest), 'rb') as f:
+            return json.loads(f.read().decode('utf8'))
+
+    def _entry(self, row) -> Optional[Dict]:
+        if row is None:
+            return None
+        fetch_id, provider, key, ts, digest = row
+        return {'id': fetch_id, 'provider': provider, 'params': json.loads(key), 'ts': ts, 'hash': digest}
+
+    def _where(self, provider: Optional[str], params: Optional[Dict]):
+        clauses, args = [], []
+        if provider is not None:
+            clauses.append('provider = ?')
+            args.append(provider)
+        if params is not None:
+            clauses.append('params_key = ?')
+            args.append(params_key(params))
+        return clauses, args
+
+    @staticmethod
+    def _select(clauses: List[str]) -> str:
+        sql = 'SELECT id, provider, params_key, ts, hash FROM fetches'
+        return sql + (' WHERE ' + ' AND '.join(clauses) if clauses else '')
+
+    def latest(self, provider: Optional[str] = None, params: Optional[Dict] = None) -> Optional[Dict]:
+        """Newest fetch for ``provider`` (and exactly ``params``, if given); None if there is none."""
+        clauses, args = self._where(provider, params)
+        with self._lock:
+            row = self._db.execute(self._select(clauses) + ' ORDER BY ts DESC, id DESC LIMIT 1', args).fetchone()
+        return self._entry(row)
+
+    def load_latest(self, provider: Optional[str] = None, params: Optional[Dict] = None) -> Any:
+        entry = self.latest(provider, params)
+        return None if entry is None else self.load(entry['hash'])
+
+    def between(self, start: Optional[float] = None, end: Optional[float] = None, provider: Optional[str] = None,
+                params: Optional[Dict] = None) -> List[Dict]:
+        """Fetches with ``start <= ts < end``, oldest first."""
+        clauses, args = self._where(provider, params)
+        if start is not None:
+            clauses.append('ts >= ?')
+            args.append(start)
+        if end is not None:
+            clauses.append('ts < ?')
+            args.append(end)
+        with self._lock:
+            rows = self._db.execute(self._select(clauses) + ' ORDER BY ts, id', args).fetchall()
+        return [self._entry(r) for r in rows]
+
+    def providers(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._db.execute('SELECT DISTINCT provider FROM fetches ORDER BY provider')]
+
+    def evict(self, max_age_days: Optional[float] = None, keep_per_key: Optional[int] = None,
+              max_bytes: Optional[int] = None, now: Optional[float] = None, key=None) -> Dict[str, int]:
+        """Apply retention (arguments override the store's defaults); returns what was removed."""
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        keep_per_key = self.keep_per_key if keep_per_key is None else keep_per_key
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        now = time.time() if now is None else now
+        removed = 0
+        with self._lock, self._db:
+            hashes = []
+            if max_age_days is not None:
+                hashes += self._db.execute('DELETE FROM fetches WHERE ts < ? RETURNING hash',
+                                           (now - max_age_days * 86400,)).fetchall()
+            if keep_per_key is not None:
+                if key is not None:
+                    # after a put only the key just written can have grown past the limit
+                    hashes += self._db.execute(
+                        'DELETE FROM fetches WHERE provider = ? AND params_key = ? AND id NOT IN '
+                        '(SELECT id FROM fetches WHERE provider = ? AND params_key = ? '
+                        'ORDER BY ts DESC, id DESC LIMIT ?) RETURNING hash', key + key + (keep_per_key,)).fetchall()
+                else:
+                    hashes += self._db.execute(
+                        'DELETE FROM fetches WHERE id IN (SELECT id FROM (SELECT id, ROW_NUMBER() OVER '
+                        '(PARTITION BY provider, params_key ORDER BY ts DESC, id DESC) AS n FROM fetches) '
+                        'WHERE n > ?) RETURNING hash', (keep_per_key,)).fetchall()
+            removed += len(hashes)
+            blobs, freed = self._collect(sorted({h for (h,) in hashes}))
+            if max_bytes is not None:
+                # oldest first, one fetch at a time, only re-checking the blob it pointed at
+                while self._total_bytes > max_bytes:
+                    row = self._db.execute('SELECT id, hash FROM fetches ORDER BY ts, id LIMIT 1').fetchone()
+                    if row is None:
+                        break
+                    self._db.execute('DELETE FROM fetches WHERE id = ?', (row[0],))
+                    removed += 1
+                    more_blobs, more_freed = self._collect([row[1]])
+                    blobs += more_blobs
+                    freed += more_freed
+        return {'fetches': removed, 'blobs': blobs, 'bytes': freed}
+
+    def _collect(self, hashes: Optional[List[str]] = None):
+        """Delete blobs no fetch refers to (caller holds the lock and a transaction).
+
+        With ``hashes`` only those blobs are checked, which is an index lookup each.
+        """
+        orphaned = 'NOT EXISTS (SELECT 1 FROM fetches WHERE fetches.hash = blobs.hash)'
+        if hashes is None:
+            rows = self._db.execute(f'SELECT hash, size FROM blobs WHERE {orphaned}').fetchall()
+        else:
+            rows = [r for h in hashes
+                    for r in self._db.execute(f'SELECT hash, size FROM blobs WHERE hash = ? AND {orphaned}', (h,))]
+        for digest, size in rows:
+            try:
+                self.blob_path(digest).unlink()
+            except FileNotFoundError:
+                pass
+            self._total_bytes -= size
+        self._db.executemany('DELETE FROM blobs WHERE hash = ?', [(d,) for d, _ in rows])
+        return len(rows), sum(size for _, size in rows)
+
+    def gc(self) -> Dict[str, int]:
+        """Full sweep for orphaned blobs (e.g. left behind by an interrupted eviction)."""
+        with self._lock, self._db:
+            blobs, freed = self._collect()
+        return {'blobs': blobs, 'bytes': freed}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            fetches, oldest, newest = self._db.execute('SELECT COUNT(*), MIN(ts), MAX(ts) FROM fetches').fetchone()
+            blobs, raw = self._db.execute('SELECT COUNT(*), COALESCE(SUM(raw_size), 0) FROM blobs').fetchone()
+        return {'fetches': fetches, 'blobs': blobs, 'bytes': self._total_bytes, 'raw_bytes': raw,
+                'oldest': oldest, 'newest': newest}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def legacy_name(path: Path):
+    """Split a legacy ``{name}.{ts}.json`` cache file name into (provider, params, ts)."""
+    parts = path.name[:-len('.json')].split('.')
+    ts = float(parts[-1]) if len(parts) > 1 and parts[-1].isdigit() else path.stat().st_mtime
+    name = parts[0]
+    provider = name[len('provider_'):] if name.startswith('provider_') else name
+    params = {'batch': parts[1]} if len(parts) > 2 else None
+    return provider, params, ts
+
+
+def import_legacy(store: PayloadStore, paths: Iterable[Path]) -> int:
+    """Move legacy JSON cache files into the store (identical payloads collapse to one blob)."""
+    n = 0
+    for path in sorted(Path(p) for p in paths):
+        with open(path, 'r', encoding='utf8') as f:
+            data = json.load(f)
+        provider, params, ts = legacy_name(path)
+        store.put(provider, data, params=params, ts=ts)
+        n += 1
+    return n
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect and maintain the provider payload store')
+    parser.add_argument('command', choices=['stats', 'latest', 'evict', 'gc', 'import'])
+    parser.add_argument('paths', nargs='*', help='Legacy JSON files for import')
+    parser.add_argument('--root', default=DEFAULT_ROOT)
+    parser.add_argument('--provider')
+    parser.add_argument('--max-age-days', type=float)
+    parser.add_argument('--keep-per-key', type=int)
+    parser.add_argument('--max-mb', type=float)
+    parser.add_argument('--remove', action='store_true', help='Delete legacy files after importing them')
+    args = parser.parse_args()
+
+    store = PayloadStore(args.root)
+    if args.command == 'stats':
+        print(json.dumps(store.stats(), indent=2))
+    elif args.command == 'latest':
+        print(json.dumps(store.latest(args.provider), indent=2))
+    elif args.command == 'evict':
+        max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb is not None else None
+        print(json.dumps(store.evict(args.max_age_days, args.keep_per_key, max_bytes), indent=2))
+    elif args.command == 'gc':
+        print(json.dumps(store.gc(), indent=2))
+    elif args.command == 'import':
+        print(f'Imported {import_legacy(store, args.paths)} files')
+        if args.remove:
+            for p in args.paths:
+                Path(p).unlink()
+    store.close()
@@ -0,0 +1,330 @@
+"""League-wide, rate-limited crawl of Pro-Football-Reference game logs.
+
+For each (team, season) the crawler fetches the team game log and the roster
+page; every QB/RB/WR/TE found on a roster becomes a player game-log job. Jobs
+run on a small worker pool, and every HTTP request first takes a token from a
+shared token bucket. The default of 20 requests/minute is Sports Reference's
+published limit, and a 429 pauses the whole bucket for the server's
+``Retry-After``. Other retryable failures (timeouts, 5xx) go back in the
+queue with an exponential backoff so a struggling server isn't hammered.
+
+Jobs live in a SQLite ledger (``data/cache/pfr_crawl.sqlite`` by default), so
+an interrupted crawl resumes where it stopped. Jobs that were running at the
+time go back to pending, finished jobs are never refetched, and re-seeding
+is a no-op for jobs that already exist.
+
+Fetched pages go through the on-disk page cache (``scripts/page_cache.py``),
+so finished seasons are read from disk without spending rate-limit tokens.
+
+Output CSVs use the existing cache naming: ``nfl_{team}_{season}_team.csv``
+and ``nfl_{team}_{player_slug}_{season}.csv``.
+
+Usage:
+  python -m scripts.pfr_crawler --seasons 2024 2025
+  python -m scripts.pfr_crawler --seasons 2025 --teams KC PHI --workers 2
+  python -m scripts.pfr_crawler --status
+  PFR_OFFLINE=1 python -m scripts.pfr_crawler --reparse
+"""
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import urllib.error
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from scripts.fetch_pfr_nfl import (
+    PFR_BASE_URL,
+    PFR_TEAM_CODES,
+    PLAYER_GAMELOG_TABLE_IDS,
+    TEAM_GAMELOG_TABLE_IDS,
+    _fetch_html,
+    _gamelog_tables,
+    qb_gamelog_from_tables,
+    rb_gamelog_from_tables,
+    save_csv,
+    team_gamelog_from_tables,
+    team_url,
+    wr_gamelog_from_tables,
+)
+from scripts.page_cache import get_page_cache
+from scripts.rate_limit import TokenBucket, retry_after
+
+logger = logging.getLogger(__name__)
+
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+DEFAULT_RATE = 20 / 60  # requests per second
+PARSERS = {'QB': qb_gamelog_from_tables, 'RB': rb_gamelog_from_tables, 'WR': wr_gamelog_from_tables,
+           'TE': wr_gamelog_from_tables}
+
+_ROW = re.compile(r'<tr[^>]*>(.*?)</tr>', re.S)
+_PLAYER = re.compile(r'<a href="/players/([A-Z])/([A-Za-z0-9.]+)\.htm">([^<]+)</a>')
+_POS = re.compile(r'data-stat="pos"[^>]*>([^<]*)<')
+
+
+class JobLedger:
+    """Persistent crawl job table; safe to share between worker threads."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS jobs (key TEXT PRIMARY KEY, kind TEXT, payload TEXT, status TEXT, '
+            'attempts INTEGER DEFAULT 0, error TEXT, output TEXT, updated REAL, not_before REAL DEFAULT 0)')
+        if 'not_before' not in {row[1] for row in self._db.execute('PRAGMA table_info(jobs)')}:
+            self._db.execute('ALTER TABLE jobs ADD COLUMN not_before REAL DEFAULT 0')   # pre-backoff ledgers
+        self._db.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)')
+        with self._db:
+            # jobs that were in flight when the last crawl died are retried
+            self._db.execute('UPDATE jobs SET status = ? WHERE status = ?', (PENDING, RUNNING))
+
+    def add(self, key: str, kind: str, payload: Dict) -> bool:
+        """Queue a job; False if it already exists (in any state)."""
+        with self._lock, self._db:
+            cur = self._db.execute('INSERT OR IGNORE INTO jobs (key, kind, payload, status, updated) '
+                                   'VALUES (?, ?, ?, ?, ?)', (key, kind, json.dumps(payload), PENDING, time.time()))
+            return cur.rowcount == 1
+
+    def claim(self) -> Optional[Tuple[str, str, Dict, int]]:
+        """Mark the oldest due pending job running and return (key, kind, payload, attempts)."""
+        with self._lock, self._db:
+            row = self._db.execute('SELECT key, kind, payload, attempts FROM jobs WHERE status = ? '
+                                   'AND not_before <= ? ORDER BY rowid LIMIT 1', (PENDING, time.time())).fetchone()
+            if row is None:
+                return None
+            self._db.execute('UPDATE jobs SET status = ?, updated = ? WHERE key = ?', (RUNNING, time.time(), row[0]))
+        return row[0], row[1], json.loads(row[2]), row[3]
+
+    def complete(self, key: str, output: Optional[str] = None):
+        with self._lock, self._db:
+            self._db.execute('UPDATE jobs SET status = ?, output = ?, error = NULL, updated = ? WHERE key = ?',
+                             (DONE, output, time.time(), key))
+
+    def fail(self, key: str, error: str, retry: bool, delay: float = 0.0):
+        """Record a failed attempt; ``retry`` puts the job back in the queue, due in ``delay`` seconds."""
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute('UPDATE jobs SET status = ?, attempts = attempts + 1, error = ?, updated = ?, '
+                             'not_before = ? WHERE key = ?',
+                             (PENDING if retry else FAILED, error, now, now + delay if retry else 0, key))
+
+    def next_due(self) -> Optional[float]:
+        """When the earliest pending job may be claimed (epoch seconds); None if nothing is pending."""
+        with self._lock:
+            return self._db.execute('SELECT MIN(not_before) FROM jobs WHERE status = ?', (PENDING,)).fetchone()[0]
+
+    def retry_failed(self) -> int:
+        with self._lock, self._db:
+            return self._db.execute('UPDATE jobs SET status = ?, attempts = 0, not_before = 0 WHERE status = ?',
+                                    (PENDING, FAILED)).rowcount
+
+    def requeue_done(self) -> int:
+        """Put finished jobs back in the queue, e.g. to re-parse cached pages after a parser fix."""
+        with self._lock, self._db:
+            return self._db.execute('UPDATE jobs SET status = ?, attempts = 0, not_before = 0 WHERE status = ?',
+                                    (PENDING, DONE)).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return {status: n for status, n in rows}
+
+    def jobs(self, status: Optional[str] = None) -> List[Dict]:
+        query = 'SELECT key, kind, payload, status, attempts, error, output FROM jobs'
+        args: Tuple = ()
+        if status:
+            query, args = query + ' WHERE status = ?', (status,)
+        with self._lock:
+            rows = self._db.execute(query + ' ORDER BY rowid', args).fetchall()
+        return [{'key': k, 'kind': kind, 'payload': json.loads(p), 'status': st, 'attempts': a,
+                 'error': e, 'output': o} for k, kind, p, st, a, e, o in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def parse_roster(html: str) -> List[Tuple[str, str, str]]:
+    """(pfr_id, name, position) for each player row on a roster page.
+
+    Rows are matched by regex so tables inside HTML comments are found too.
+    """
+    players = []
+    for row in _ROW.findall(html):
+        link = _PLAYER.search(row)
+        if link is None:
+            continue
+        pos = _POS.search(row)
+        players.append((link.group(2), link.group(3).strip(), pos.group(1).strip().upper() if pos else ''))
+    return players
+
+
+def player_slug(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+
+
+def _http_status(error: BaseException) -> Optional[int]:
+    while error is not None:
+        if isinstance(error, urllib.error.HTTPError):
+            return error.code
+        error = error.__cause__
+    return None
+
+
+def _retry_after(error: BaseException, default: float) -> float:
+    while error is not None:
+        if isinstance(error, urllib.error.HTTPError):
+            return retry_after(error.headers, default)
+        error = error.__cause__
+    return default
+
+
+class PFRCrawler:
+    """Schedules and runs team, roster and player game-log jobs from a ledger."""
+
+    def __init__(self, ledger: JobLedger, out_dir='data/cache', base_url: str = PFR_BASE_URL,
+                 fetch: Optional[Callable[[str], str]] = None, rate: float = DEFAULT_RATE, burst: float = 1.0,
+                 workers: int = 4, max_attempts: int = 3,
+                 positions: Iterable[str] = ('QB', 'RB', 'WR', 'TE'), rate_limit_pause: float = 60.0,
+                 retry_backoff: float = 5.0, cache=None):
+        self.ledger = ledger
+        self.out_dir = Path(out_dir)
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache if cache is not None else get_page_cache()
+        self.fetch = fetch
+        self.bucket = TokenBucket(rate, burst)
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.positions = {p.upper() for p in positions}
+        self.rate_limit_pause = rate_limit_pause
+        self.retry_backoff = retry_backoff
+        self.requests = 0
+
+    def seed(self, seasons: Iterable[int], teams: Optional[Iterable[str]] = None) -> int:
+        """Queue team and roster jobs; returns how many were new."""
+        added = 0
+        for season in seasons:
+            for team in teams or PFR_TEAM_CODES:
+                payload = {'team': team, 'season': int(season)}
+                added += self.ledger.add(f'team:{team}:{season}', 'team', payload)
+                added += self.ledger.add(f'roster:{team}:{season}', 'roster', payload)
+        return added
+
+    def _get(self, url: str) -> str:
+        # final pages (finished seasons) come off disk without spending a token
+        cached = self.cache.get(url) if self.cache is not None else None
+        if cached is not None and self.cache.usable_without_network(cached):
+            return cached.html
+        self.bucket.acquire()
+        self.requests += 1
+        if self.fetch is not None:
+            return self.fetch(url)
+        # hand over the entry looked up above rather than decompressing it again
+        return _fetch_html(url, retries=1, cache=self.cache, cached=cached)
+
+    def _handle(self, kind: str, payload: Dict) -> Optional[str]:
+        team, season = payload['team'], payload['season']
+        if kind == 'team':
+            html = self._get(team_url(team, season, self.base_url))
+            df = team_gamelog_from_tables(_gamelog_tables(html, TEAM_GAMELOG_TABLE_IDS), season)
+            path = self.out_dir / f'nfl_{team.lower()}_{season}_team.csv'
+        elif kind == 'roster':
+            html = self._get(f'{self.base_url}/teams/{PFR_TEAM_CODES[team]}/{season}_roster.htm')
+            queued = 0
+            for pfr_id, name, pos in parse_roster(html):
+                if pos in self.positions:
+                    queued += self.ledger.add(f'player:{pfr_id}:{season}', 'player',
+                                              {'team': team, 'season': season, 'pfr_id': pfr_id,
+                                               'name': name, 'pos': pos})
+            return f'{queued} players'
+        elif kind == 'player':
+            pfr_id = payload['pfr_id']
+            html = self._get(f'{self.base_url}/players/{pfr_id[0]}/{pfr_id}/gamelog/{season}/')
+            df = PARSERS[payload['pos']](_gamelog_tables(html, PLAYER_GAMELOG_TABLE_IDS))
+            path = self.out_dir / f'nfl_{team.lower()}_{player_slug(payload["name"])}_{season}.csv'
+        else:
+            raise ValueError(f'Unknown job kind: {kind}')
+        save_csv(df, path)
+        return str(path)
+
+    def _run_job(self, key: str, kind: str, payload: Dict, attempts: int):
+        try:
+            output = self._handle(kind, payload)
+        except Exception as e:
+            status = _http_status(e)
+            if status == 429:
+                pause = _retry_after(e, self.rate_limit_pause)
+                logger.warning('Rate limited on %s; pausing all requests for %.0fs', key, pause)
+                self.bucket.pause(pause)
+            # missing pages and parse failures won't fix themselves on retry
+            retry = (status is None or status == 429 or status >= 500) and not isinstance(e, (KeyError, ValueError))
+            retry = retry and attempts + 1 < self.max_attempts
+            self.ledger.fail(key, f'{type(e).__name__}: {e}', retry=retry,
+                             delay=self.retry_backoff * 2 ** attempts)
+            if not retry:
+                logger.warning('Giving up on %s: %s', key, e)
+            return
+        self.ledger.complete(key, output)
+
+    def run(self, max_jobs: Optional[int] = None) -> Dict[str, int]:
+        """Work the queue until it is empty (or ``max_jobs`` have been started)."""
+        started = 0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='pfr-crawl') as pool:
+            in_flight = set()
+            while True:
+                while len(in_flight) < self.workers and (max_jobs is None or started < max_jobs):
+                    job = self.ledger.claim()
+                    if job is None:
+                        break
+                    in_flight.add(pool.submit(self._run_job, *job))
+                    started += 1
+                if not in_flight:
+                    # only backed-off retries left: sleep until the first is due
+                    due = None if max_jobs is not None and started >= max_jobs else self.ledger.next_due()
+                    if due is None:
+                        break
+                    time.sleep(max(0.0, due - time.time()))
+                    continue
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+        return self.ledger.counts()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    parser = argparse.ArgumentParser(description='Crawl PFR team, roster and player game logs for whole seasons.')
+    parser.add_argument('--seasons', nargs='*', type=int, default=[])
+    parser.add_argument('--teams', nargs='*', help='Team abbreviations (default: all 32)')
+    parser.add_argument('--ledger', default='data/cache/pfr_crawl.sqlite')
+    parser.add_argument('--out', default='data/cache')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help='Requests per second')
+    parser.add_argument('--max-jobs', type=int)
+    parser.add_argument('--retry-failed', action='store_true')
+    parser.add_argument('--reparse', action='store_true',
+                        help='Re-run finished jobs (use with PFR_OFFLINE=1 to parse cached pages only)')
+    parser.add_argument('--status', action='store_true', help='Print job counts and exit')
+    args = parser.parse_args()
+
+    ledger = JobLedger(args.ledger)
+    if args.status:
+        print(ledger.counts())
+        for job in ledger.jobs(FAILED):
+            print(job['key'], job['error'])
+    else:
+        crawler = PFRCrawler(ledger, out_dir=args.out, rate=args.rate, workers=args.workers)
+        if args.retry_failed:
+            print(f'Re-queued {ledger.retry_failed()} failed jobs')
+        if args.reparse:
+            print(f'Re-queued {ledger.requeue_done()} finished jobs')
+        print(f'Queued {crawler.seed(args.seasons, args.teams)} new jobs')
+        print(crawler.run(max_jobs=args.max_jobs))
@@ -0,0 +1,169 @@
+"""Targeted extraction of a single table from a Sports-Reference page.
+
+``pd.read_html`` parses every table on a page and, for tables hidden inside
+HTML comments, the page has to be parsed a second time. Game-log pages only
+need one table, whose id is known up front (``games`` on team pages,
+``stats`` on player game logs). ``extract_table`` locates the opening tag by
+id (commented out or not), feeds just that ``<table>...</table>`` slice to
+lxml's pull parser and builds typed columns row by row:
+
+    df = extract_table(html, 'stats')      # None if the page has no such table
+
+so the cost per page depends on the size of the table, not the page.
+"""
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from lxml import etree
+
+# Rows PFR repeats inside <tbody> as visual separators
+_SKIP_ROW_CLASSES = ('thead', 'over_header', 'spacer')
+_TABLE_END = re.compile(r'</table\s*>', re.I)
+_CHUNK = 1 << 16
+# PFR labels postseason games by round in the Week column; number them after
+# the regular season (at most 18 weeks) so they order and key like weeks
+PLAYOFF_WEEKS = {'wildcard': 19, 'division': 20, 'confchamp': 21, 'superbowl': 22}
+
+
+def find_table_html(html: str, table_id: str) -> Optional[str]:
+    """Return the ``<table id=table_id>...</table>`` markup, including from inside a comment."""
+    start = re.search(r'<table\b[^>]*?\bid\s*=\s*["\']?%s(?:["\'\s>/])' % re.escape(table_id), html, re.I)
+    if start is None:
+        return None
+    end = _TABLE_END.search(html, start.end())
+    if end is None:
+        return None
+    return html[start.start():end.end()]
+
+
+def iter_rows(table_html: str) -> Iterator[Tuple[str, str, List[Tuple[str, int]]]]:
+    """Stream ``(section, row_class, [(text, colspan), ...])`` for every ``<tr>``."""
+    parser = etree.HTMLPullParser(events=('start', 'end'))
+    section = 'tbody'
+    cells: List[Tuple[str, int]] = []
+    chunks = [table_html[i:i + _CHUNK] for i in range(0, len(table_html), _CHUNK)] + [None]
+    for chunk in chunks:
+        if chunk is None:
+            parser.close()
+        else:
+            parser.feed(chunk)
+        for event, el in parser.read_events():
+            tag = el.tag if isinstance(el.tag, str) else ''
+            if event == 'start':
+                if tag in ('thead', 'tbody', 'tfoot'):
+                    section = tag
+                elif tag == 'tr':
+                    cells = []
+                continue
+            if tag in ('td', 'th'):
+                try:
+                    span = max(int(el.get('colspan', 1)), 1)
+                except ValueError:
+                    span = 1
+                cells.append((''.join(el.itertext()).strip(), span))
+            elif tag == 'tr':
+                yield section, el.get('class') or '', cells
+                el.clear()
+
+
+def _column_names(header: List[Tuple[str, int]]) -> List[str]:
+    """Expand colspans and mangle blanks/duplicates the way ``read_html`` does."""
+    names, seen = [], {}
+    for text, span in header:
+        for _ in range(span):
+            name = text or f'Unnamed: {len(names)}'
+            if name in seen:
+                seen[name] += 1
+                name = f'{name}.{seen[name]}'
+            else:
+                seen[name] = 0
+            names.append(name)
+    return names
+
+
+def _typed(values: List[Optional[str]]) -> pd.Series:
+    raw = pd.Series(values, dtype=object)
+    present = raw.notna()
+    if not present.any():
+        return raw
+    numeric = pd.to_numeric(raw.str.replace(',', '', regex=False), errors='coerce')
+    if numeric[present].notna().all():
+        return numeric
+    return raw
+
+
+def week_number(value) -> Optional[float]:
+    """Week as a number: numeric text as is, playoff rounds via PLAYOFF_WEEKS, else None."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    if not isinstance(value, str):
+        return None
+    return PLAYOFF_WEEKS.get(re.sub(r'[^a-z]', '', value.lower()))
+
+
+def _newer(text: str, threshold) -> bool:
+    number, limit = week_number(text), week_number(threshold)
+    if number is not None and limit is not None:
+        return number > limit
+    if not text:
+        return True
+    return text > str(threshold)
+
+
+def extract_table(html: str, table_id: str, include_footer: bool = False,
+                  newer_than: Optional[Tuple[str, object]] = None) -> Optional[pd.DataFrame]:
+    """Parse only the table with ``table_id`` into a DataFrame with typed columns.
+
+    The last ``<thead>`` row supplies the column names (the ``over_header`` row
+    above it is skipped). Repeated header rows inside ``<tbody>`` are dropped,
+    as are ``<tfoot>`` totals unless ``include_footer``. Columns whose
+    non-empty cells are all numeric come back as int64/float64; the rest
+    stay as strings, with empty cells as NaN.
+
+    ``newer_than=(column, value)`` keeps only rows whose ``column`` is past
+    ``value`` (numerically if both parse as numbers or playoff rounds, see
+    ``week_number``, else as strings, which orders ISO dates), so an incremental refresh only types the new games.
+    Rows with an empty ``column`` are kept.
+    """
+    table_html = find_table_html(html, table_id)
+    if table_html is None:
+        return None
+
+    header: List[Tuple[str, int]] = []
+    body: List[List[Tuple[str, int]]] = []
+    for section, row_class, cells in iter_rows(table_html):
+        if section == 'thead':
+            header = cells
+        elif section == 'tfoot' and not include_footer:
+            continue
+        elif not any(c in row_class.split() for c in _SKIP_ROW_CLASSES) and cells:
+            body.append(cells)
+    if not header and body:
+        header = body.pop(0)
+    names = _column_names(header)
+    header_texts = [text for text, _ in header]
+
+    key = names.index(newer_than[0]) if newer_than is not None and newer_than[0] in names else None
+
+    columns: Dict[str, List[Optional[str]]] = {name: [] for name in names}
+    for cells in body:
+        if [text for text, _ in cells] == header_texts:
+            continue
+        row: List[Optional[str]] = []
+        for text, span in cells:
+            row.extend([text or None] * span)
+        row = (row + [None] * len(names))[:len(names)]
+        if key is not None and not _newer(row[key] or '', newer_than[1]):
+            continue
+        for name, value in zip(names, row):
+            columns[name].append(value)
+    return pd.DataFrame({name: _typed(values) for name, values in columns.items()})
+
+
+def extract_tables(html: str, table_ids, newer_than: Optional[Tuple[str, object]] = None) -> List[pd.DataFrame]:
+    """``extract_table`` for each id in ``table_ids`` that is present on the page."""
+    tables = (extract_table(html, table_id, newer_than=newer_than) for table_id in table_ids)
+    return [t for t in tables if t is not None]
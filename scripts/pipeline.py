@@ -0,0 +1,452 @@
+"""Cached DAG runner for the fetch -> evaluate -> clean -> features -> backtest pipeline.
+
+Each ``Stage`` declares its input and output paths (files, directories or
+glob patterns) and a target, either a ``'module:function'`` string or a
+callable that takes ``params`` as keyword arguments. Dependencies come from
+the declarations: a stage depends on every stage that writes one of its
+inputs.
+
+A stage is skipped when its key is unchanged since its last successful run
+and its recorded outputs are still intact. The key is a SHA-256 over:
+
+- the target name and ``params``
+- the target's source file and every local module it imports, transitively
+  (``scripts.*``, relative and sibling-file imports, found by parsing, not
+  importing), so an edit to e.g. ``schema.py`` reruns the stages using it
+- the content hash of every input
+
+``always=True`` stages (fetch) run every time, but their dependents still
+skip when the fetch rewrote identical files. File hashes are memoized by
+(size, mtime), so unchanged inputs are not re-read. Independent branches run
+in parallel on a thread pool. Every run ends with a per-stage timing summary,
+and state is kept in ``data/cache/pipeline_state.json``.
+
+Usage:
+  python -m scripts.pipeline run --season 2025
+  python -m scripts.pipeline run --no-fetch --force clean
+  python -m scripts.pipeline run --dry-run
+  python -m scripts.pipeline status
+"""
+import fnmatch
+import glob
+import hashlib
+import importlib
+import importlib.util
+import inspect
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+STATE_VERSION = 1
+# packages whose modules count as a stage's code
+CODE_PACKAGES = ('scripts',)
+
+
+class Stage:
+    """One pipeline step: ``target(**params)`` reading ``inputs`` and writing ``outputs``."""
+
+    def __init__(self, name: str, target: Union[str, Callable], inputs: Sequence[str] = (),
+                 outputs: Sequence[str] = (), params: Optional[Dict] = None, always: bool = False):
+        self.name = name
+        self.target = target
+        self.inputs = [Path(p).as_posix() for p in inputs]
+        self.outputs = [Path(p).as_posix() for p in outputs]
+        self.params = params or {}
+        self.always = always
+
+    @property
+    def target_name(self) -> str:
+        if isinstance(self.target, str):
+            return self.target
+        return f'{self.target.__module__}:{self.target.__qualname__}'
+
+    def resolve(self) -> Callable:
+        if not isinstance(self.target, str):
+            return self.target
+        module, _, attr = self.target.partition(':')
+        return getattr(importlib.import_module(module), attr)
+
+    def __repr__(self):
+        return f'Stage({self.name!r})'
+
+
+def _module_path(name: str) -> Optional[Path]:
+    """Source file of a module in CODE_PACKAGES, looked up on disk (``find_spec`` of a
+    submodule would import its parents)."""
+    parts = name.split('.')
+    if parts[0] not in CODE_PACKAGES:
+        return None
+    try:
+        spec = importlib.util.find_spec(parts[0])
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    base = Path(list(spec.submodule_search_locations)[0]).joinpath(*parts[1:])
+    for candidate in ((base.parent / f'{base.name}.py') if parts[1:] else None, base / '__init__.py'):
+        if candidate is not None and candidate.is_file():
+            return candidate
+    return None
+
+
+# ``import a.b as c, d`` / ``from .x import (y, z)`` statements, at any indent. A
+# text scan instead of ast.parse: compiling every module per stage is slow, and
+# ast.parse is not safe to call from several worker threads on 3.11. A match
+# inside a string only makes the key stricter.
+_IMPORT = re.compile(r'^[ \t]*(?:from[ \t]+(\.*[\w.]*)[ \t]+import[ \t]+(\([^)]*\)|[^\n#;]*)'
+                     r'|import[ \t]+([^\n#;]*))', re.M)
+
+
+def _imported_names(clause: str) -> List[str]:
+    """Module/attribute names of an import clause, dropping ``as`` aliases."""
+    parts = (part.split() for part in re.sub(r'#[^\n]*', '', clause).strip('()').split(','))
+    return [part[0] for part in parts if part and part[0] != '*']
+
+
+def _local_imports(path: Path, module: str) -> List[Tuple[str, Path]]:
+    """(module name, source file) of every local module ``path`` imports, anywhere in the file."""
+    try:
+        text = path.read_text(encoding='utf8')
+    except (OSError, ValueError):
+        return []
+    package = module if path.name == '__init__.py' else module.rpartition('.')[0]
+    names = []
+    for match in _IMPORT.finditer(text):
+        source, imported, plain = match.groups()
+        if plain is not None:
+            names += _imported_names(plain)
+            continue
+        try:
+            base = importlib.util.resolve_name(source, package) if source.startswith('.') else source
+        except (ImportError, ValueError):
+            continue
+        if base:
+            # ``from pkg import name`` may name a submodule
+            names += [base] + [f'{base}.{name}' for name in _imported_names(imported)]
+    found = []
+    for name in names:
+        source = _module_path(name)
+        if source is None and '.' not in name:
+            # modules that put their own directory on sys.path import siblings by bare name
+            sibling = path.parent / f'{name}.py'
+            source = sibling if sibling.is_file() else None
+        if source is not None:
+            found.append((name, source))
+    return found
+
+
+def _covers(output: str, path: str) -> bool:
+    """Whether ``output`` (a file or directory path) provides ``path`` (a path or glob)."""
+    return (output == path or path.startswith(output.rstrip('/') + '/')
+            or fnmatch.fnmatch(output, path) or output.startswith(path.rstrip('/') + '/'))
+
+
+class PipelineRunner:
+    def __init__(self, stages: Iterable[Stage], state_path='data/cache/pipeline_state.json', workers: int = 4):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f'Duplicate stage name: {stage.name}')
+            self.stages[stage.name] = stage
+        self.state_path = Path(state_path)
+        self.workers = workers
+        self._lock = threading.Lock()
+        self.state = self._read_state()
+        self.wall_seconds = 0.0
+        self._imports: Dict[Path, List[Tuple[str, Path]]] = {}  # source file -> local imports
+        self.deps = {name: sorted(other.name for other in self.stages.values() if other is not stage
+                                  and any(_covers(o, i) for o in other.outputs for i in stage.inputs))
+                     for name, stage in self.stages.items()}
+        self.order = self._topological()
+
+    # -- state ---------------------------------------------------------------
+
+    def _read_state(self) -> Dict:
+        if self.state_path.exists():
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+            if state.get('version') == STATE_VERSION:
+                return state
+        return {'version': STATE_VERSION, 'stages': {}, 'files': {}}
+
+    def _write_state(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_name(self.state_path.name + '.tmp')
+        with self._lock:
+            with open(tmp, 'w') as f:
+                json.dump(self.state, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    def _topological(self) -> List[str]:
+        order, marks = [], {}
+
+        def visit(name, trail):
+            if marks.get(name) == 'done':
+                return
+            if marks.get(name) == 'active':
+                raise ValueError('Pipeline has a cycle: ' + ' -> '.join(trail + [name]))
+            marks[name] = 'active'
+            for dep in self.deps[name]:
+                visit(dep, trail + [name])
+            marks[name] = 'done'
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    # -- hashing -------------------------------------------------------------
+
+    def _file_hash(self, path: Path) -> str:
+        st = path.stat()
+        key = path.as_posix()
+        with self._lock:
+            memo = self.state['files'].get(key)
+        if memo and memo[0] == st.st_size and memo[1] == st.st_mtime_ns:
+            return memo[2]
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            self.state['files'][key] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def _path_hash(self, pattern: str) -> Dict[str, Optional[str]]:
+        """Content hash of every file a path, directory or glob names (``None`` when missing)."""
+        paths = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        out: Dict[str, Optional[str]] = {}
+        for p in paths:
+            path = Path(p)
+            if path.is_dir():
+                for f in sorted(path.rglob('*')):
+                    if f.is_file():
+                        out[f.as_posix()] = self._file_hash(f)
+            elif path.is_file():
+                out[path.as_posix()] = self._file_hash(path)
+            else:
+                out[path.as_posix()] = None
+        return out
+
+    def _code_hash(self, stage: Stage) -> Optional[str]:
+        try:
+            if isinstance(stage.target, str):
+                # located without importing, so a skipped stage never pays for its imports
+                module = stage.target.partition(':')[0]
+                source = importlib.util.find_spec(module).origin
+            else:
+                module = stage.target.__module__
+                source = inspect.getsourcefile(stage.target)
+            sources = {Path(source).resolve(): module}
+            todo = [(module, Path(source))]
+            while todo:
+                name, path = todo.pop()
+                if path not in self._imports:
+                    self._imports[path] = _local_imports(path, name)
+                for imported, imported_path in self._imports[path]:
+                    if imported_path.resolve() not in sources:
+                        sources[imported_path.resolve()] = imported
+                        todo.append((imported, imported_path))
+            # keyed by module name, so the key survives moving the checkout
+            files = sorted((name, self._file_hash(p)) for p, name in sources.items())
+            return hashlib.sha256(json.dumps(files).encode('utf8')).hexdigest()
+        except (AttributeError, TypeError, OSError, ImportError):
+            return None
+
+    def _key(self, stage: Stage) -> str:
+        code = self._code_hash(stage)
+        inputs = {}
+        for pattern in stage.inputs:
+            inputs.update(self._path_hash(pattern))
+        blob = json.dumps({'target': stage.target_name, 'params': stage.params, 'code': code, 'inputs': inputs},
+                          sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode('utf8')).hexdigest()
+
+    def _outputs(self, stage: Stage) -> Dict[str, Optional[str]]:
+        out = {}
+        for pattern in stage.outputs:
+            out.update(self._path_hash(pattern))
+        return out
+
+    def _fresh(self, stage: Stage, key: str) -> bool:
+        record = self.state['stages'].get(stage.name)
+        if stage.always or not record or record.get('key') != key:
+            return False
+        current = self._outputs(stage)
+        return bool(current) and None not in current.values() and current == record.get('outputs')
+
+    # -- running -------------------------------------------------------------
+
+    def _execute(self, stage: Stage, force: bool) -> Dict:
+        t0 = time.perf_counter()
+        key = self._key(stage)
+        if not force and self._fresh(stage, key):
+            return {'stage': stage.name, 'status': 'skipped', 'seconds': time.perf_counter() - t0}
+        try:
+            stage.resolve()(**stage.params)
+        except (Exception, SystemExit) as exc:
+            return {'stage': stage.name, 'status': 'failed', 'seconds': time.perf_counter() - t0,
+                    'error': f'{type(exc).__name__}: {exc}'}
+        outputs = self._outputs(stage)
+        missing = sorted(p for p, h in outputs.items() if h is None)
+        if missing:
+            return {'stage': stage.name, 'status': 'failed', 'seconds': time.perf_counter() - t0,
+                    'error': f'declared outputs not written: {missing}'}
+        # inputs may be rewritten by an always-run stage mid-flight; key what was actually read
+        with self._lock:
+            self.state['stages'][stage.name] = {'key': self._key(stage) if stage.always else key,
+                                                'outputs': outputs, 'ts': time.time()}
+        return {'stage': stage.name, 'status': 'ran', 'seconds': time.perf_counter() - t0}
+
+    def run(self, force: Iterable[str] = (), only: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Run (or skip) every stage in dependency order; returns one record per stage.
+
+        ``force`` names stages to rerun regardless of their key. With
+        ``only``, other stages are not run and count as up to date.
+        """
+        force, selected = set(force), set(only) if only is not None else set(self.stages)
+        unknown = (force | selected) - set(self.stages)
+        if unknown:
+            raise KeyError(f'Unknown stages: {sorted(unknown)}')
+        results: Dict[str, Dict] = {}
+        for name in self.stages:
+            if name not in selected:
+                results[name] = {'stage': name, 'status': 'excluded', 'seconds': 0.0}
+        running = {}
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while len(results) < len(self.stages):
+                for name in self.order:
+                    if name in results or name in running.values():
+                        continue
+                    deps = [results.get(d) for d in self.deps[name]]
+                    if any(d is None for d in deps):
+                        continue
+                    if any(d['status'] in ('failed', 'blocked') for d in deps):
+                        results[name] = {'stage': name, 'status': 'blocked', 'seconds': 0.0}
+                        continue
+                    running[pool.submit(self._execute, self.stages[name], name in force)] = name
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    results[running.pop(future)] = record
+                    self._write_state()
+        self.wall_seconds = time.perf_counter() - started
+        return [results[name] for name in self.order]
+
+    def plan(self, force: Iterable[str] = ()) -> List[Dict]:
+        """What ``run`` would do, without running anything."""
+        force, will_run, out = set(force), set(), []
+        for name in self.order:
+            stage = self.stages[name]
+            upstream = [d for d in self.deps[name] if d in will_run]
+            if name in force or stage.always or upstream or not self._fresh(stage, self._key(stage)):
+                will_run.add(name)
+                reason = ('forced' if name in force else 'always' if stage.always
+                          else f'after {", ".join(upstream)}' if upstream else 'inputs changed')
+                out.append({'stage': name, 'status': 'run', 'reason': reason})
+            else:
+                out.append({'stage': name, 'status': 'skip', 'reason': 'up to date'})
+        return out
+
+
+def format_report(records: List[Dict], wall_seconds: Optional[float] = None) -> str:
+    width = max(len(r['stage']) for r in records)
+    lines = [f'{"stage":<{width}}  {"status":<8}  {"seconds":>8}']
+    for r in records:
+        line = f'{r["stage"]:<{width}}  {r["status"]:<8}  {r.get("seconds", 0.0):>8.2f}'
+        if r.get('error') or r.get('reason'):
+            line += '  ' + (r.get('error') or r.get('reason'))
+        lines.append(line)
+    lines.append(f'{"total":<{width}}  {"":<8}  {sum(r.get("seconds", 0.0) for r in records):>8.2f}')
+    if wall_seconds is not None:
+        # below the total when branches overlapped
+        lines.append(f'{"wall":<{width}}  {"":<8}  {wall_seconds:>8.2f}')
+    return '\n'.join(lines)
+
+
+def update_feature_store(season: int, cache_dir='data/cache', root='data/cache/features'):
+    from scripts.feature_store import FeatureStore
+    from scripts.gamelog_join import cache_join
+
+    print(FeatureStore(root).update(cache_join(cache_dir, season).long()))
+
+
+def default_pipeline(season: int = 2025, cache_dir='data/cache', start: str = '2024-09-01',
+                     end: str = '2024-12-31', fetch: bool = True) -> List[Stage]:
+    """The repo's pipeline over the demo team/QB/WR logs of ``season``.
+
+    The merge and its derivatives get per-season files of their own; the
+    backtest reads ``merged_eval.csv`` (projections with ``*_actual``
+    outcomes), which no stage here writes.
+    """
+    base = Path(cache_dir)
+    team, qb, wr = (base / f'nfl_kc_{season}_team.csv', base / f'nfl_kc_mahomes_{season}.csv',
+                    base / f'nfl_kc_rashee_rice_{season}.csv')
+    merged, clean = base / f'merged_eval_{season}.csv', base / f'merged_eval_{season}_clean.csv'
+    features = base / f'features_{season}.csv'
+    stages = [
+        Stage('evaluate', 'scripts.evaluate_nfl:main', [team, qb, wr], [merged],
+              {'team_csv': str(team), 'qb_csv': str(qb), 'wr_csv': str(wr), 'out_path': str(merged)}),
+        Stage('clean', 'scripts.clean_merged_eval:main', [merged], [clean],
+              {'in_path': str(merged), 'out_path': str(clean)}),
+        Stage('features', 'scripts.feature_engineering:main', [clean], [features],
+              {'in_path': str(clean), 'out_path': str(features)}),
+        Stage('feature_store', 'scripts.pipeline:update_feature_store', [base / f'nfl_*_{season}*.csv'],
+              [base / 'features' / 'manifest.json'], {'season': season, 'cache_dir': str(base),
+                                                      'root': str(base / 'features')}),
+        Stage('backtest', 'scripts.backtest_nfl:main', [base / 'merged_eval.csv'],
+              [base / 'backtests' / f'{start}_{end}_summary.json'],
+              {'start_date': start, 'end_date': end, 'out_dir': str(base / 'backtests'),
+               'data_dir': str(base)}),
+    ]
+    if fetch:
+        stages.insert(0, Stage('fetch', 'scripts.fetch_pfr_2025:refresh_incremental', [], [team, qb, wr],
+                               {'out_dir': str(base), 'season': season}, always=True))
+    return stages
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='Run the data pipeline, skipping up-to-date stages')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p_run = sub.add_parser('run')
+    p_run.add_argument('--season', type=int, default=2025)
+    p_run.add_argument('--start', default='2024-09-01', help='Backtest start date')
+    p_run.add_argument('--end', default='2024-12-31', help='Backtest end date')
+    p_run.add_argument('--no-fetch', action='store_true', help='Work from the cached game logs only')
+    p_run.add_argument('--force', nargs='*', default=[], help='Stages to rerun regardless of their inputs')
+    p_run.add_argument('--only', nargs='*', help='Run just these stages')
+    p_run.add_argument('--workers', type=int, default=4)
+    p_run.add_argument('--dry-run', action='store_true', help='Show what would run')
+    p_status = sub.add_parser('status')
+    for p in (p_run, p_status):
+        p.add_argument('--cache-dir', default='data/cache')
+        p.add_argument('--state', default='data/cache/pipeline_state.json')
+    args = parser.parse_args()
+
+    if args.cmd == 'status':
+        state = PipelineRunner([], args.state).state
+        for name, record in sorted(state['stages'].items()):
+            print(f'{name:<14} last run {time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["ts"]))}'
+                  f'  outputs {len(record["outputs"])}')
+        sys.exit(0)
+
+    runner = PipelineRunner(default_pipeline(args.season, args.cache_dir, args.start, args.end,
+                                             fetch=not args.no_fetch), args.state, args.workers)
+    if args.dry_run:
+        print(format_report(runner.plan(args.force)))
+        sys.exit(0)
+    report = runner.run(args.force, args.only)
+    print(format_report(report, runner.wall_seconds))
+    sys.exit(1 if any(r['status'] in ('failed', 'blocked') for r in report) else 0)
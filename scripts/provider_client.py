@@ -0,0 +1,241 @@
+"""Pooled, rate-limited HTTP clients for projection/odds providers.
+
+One ``ProviderClient`` per provider keeps a ``requests.Session`` with its own
+keep-alive connection pool, a token bucket for the provider's request rate,
+and the quota the provider reports back in its response headers (The Odds
+API sends ``x-requests-remaining`` / ``x-requests-used``; others use the
+``X-RateLimit-*`` convention). Batches of parameter sets go out concurrently
+over the pooled connections:
+
+    client = get_client('theoddsapi', api_key)
+    results = client.fetch_many(batch_params(sports=['americanfootball_nfl', 'basketball_nba']))
+    client.remaining     # quota left after the batch
+
+Each result is ``{'params': ..., 'data': ..., 'error': None}``. A failing
+parameter set doesn't sink the batch. Once the reported quota (or the local
+``max_requests`` budget) reaches ``reserve``, later requests fail fast with
+``QuotaExhausted`` instead of spending the last calls.
+
+``scripts/stub_provider_server.py`` serves the same endpoints locally; point a
+client at it with ``base_url``.
+"""
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scripts.rate_limit import TokenBucket, retry_after
+
+logger = logging.getLogger(__name__)
+
+REMAINING_HEADERS = ('x-requests-remaining', 'x-ratelimit-remaining', 'ratelimit-remaining')
+USED_HEADERS = ('x-requests-used', 'x-ratelimit-used')
+
+
+class QuotaExhausted(RuntimeError):
+    """The provider's remaining quota (or our local budget) is used up."""
+
+
+RequestBuilder = Callable[[str, Dict], Tuple[str, Dict, Dict]]
+
+
+def _opticodds_request(api_key: str, params: Dict):
+    return '/v1/prizepicks/projections', {'Authorization': f'Bearer {api_key}'}, params
+
+
+def _betstamp_request(api_key: str, params: Dict):
+    return '/prizepicks', {'x-api-key': api_key}, params
+
+
+def _day_window(params: Dict, query: Dict):
+    # a 'date' (YYYY-MM-DD) narrows The Odds API to games starting that day
+    date = params.get('date')
+    if date:
+        query['commenceTimeFrom'] = f'{date}T00:00:00Z'
+        query['commenceTimeTo'] = f'{date}T23:59:59Z'
+    return query
+
+
+def _theoddsapi_request(api_key: str, params: Dict):
+    sport = params.get('sport', 'americanfootball_nfl')
+    query = {'apiKey': api_key, 'regions': params.get('region', 'us'), 'markets': params.get('market', 'totals'),
+             'oddsFormat': 'american'}
+    return f'/v4/sports/{sport}/odds', {}, _day_window(params, query)
+
+
+def _oddsapi_request(api_key: str, params: Dict):
+    # same API, but decimal prices and totals+spreads unless overridden
+    sport = params.get('sport', 'americanfootball_nfl')
+    query = {k: v for k, v in params.items() if k not in ('sport', 'date')}
+    for k, v in {'regions': 'us', 'markets': 'totals,spreads', 'oddsFormat': 'decimal'}.items():
+        query.setdefault(k, v)
+    query['apiKey'] = api_key
+    return f'/v4/sports/{sport}/odds/', {}, _day_window(params, query)
+
+
+# name -> (base URL, request builder, requests/second, burst)
+PROVIDERS: Dict[str, Tuple[str, RequestBuilder, float, float]] = {
+    'opticodds': ('https://api.opticodds.com', _opticodds_request, 5.0, 5.0),
+    'betstamp': ('https://api.betstamp.io', _betstamp_request, 2.0, 2.0),
+    'theoddsapi': ('https://api.the-odds-api.com', _theoddsapi_request, 5.0, 10.0),
+    'oddsapi': ('https://api.the-odds-api.com', _oddsapi_request, 5.0, 10.0),
+}
+ALIASES = {'theodds': 'theoddsapi'}
+
+
+def provider_name(provider: str) -> str:
+    name = provider.lower()
+    name = ALIASES.get(name, name)
+    if name not in PROVIDERS:
+        raise NotImplementedError(f'Provider {provider} not implemented')
+    return name
+
+
+def batch_params(sports: Optional[Iterable[str]] = None, markets: Optional[Iterable[str]] = None,
+                 dates: Optional[Iterable[str]] = None, **fixed) -> List[Dict]:
+    """Cartesian product of sports x markets x dates as a list of parameter sets."""
+    axes = [(key, list(values)) for key, values in (('sport', sports), ('market', markets), ('date', dates))
+            if values]
+    if not axes:
+        return [dict(fixed)]
+    keys = [key for key, _ in axes]
+    return [dict(fixed, **dict(zip(keys, combo))) for combo in itertools.product(*(v for _, v in axes))]
+
+
+def _header_int(headers, names) -> Optional[int]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return int(float(value))
+            except ValueError:
+                continue
+    return None
+
+
+class ProviderClient:
+    """Keep-alive session, rate budget and quota tracking for one provider."""
+
+    def __init__(self, provider: str, api_key: str, base_url: Optional[str] = None,
+                 rate: Optional[float] = None, burst: Optional[float] = None,
+                 max_requests: Optional[int] = None, reserve: int = 0, pool_size: int = 8,
+                 timeout: float = 15.0, retries: int = 2, backoff: float = 1.0):
+        if not api_key:
+            raise RuntimeError('Provider API key required')
+        self.provider = provider_name(provider)
+        default_base, self._build, default_rate, default_burst = PROVIDERS[self.provider]
+        self.base_url = (base_url or default_base).rstrip('/')
+        self.api_key = api_key
+        self.bucket = TokenBucket(rate or default_rate, burst or default_burst)
+        self.max_requests = max_requests
+        self.reserve = reserve
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff  # 429 pause without a usable Retry-After, doubled per retry
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._lock = threading.Lock()
+        self.remaining: Optional[int] = None
+        self.used: Optional[int] = None
+        self.requests = 0
+        self.throttled = 0
+        self._in_flight = 0
+
+    def _claim(self):
+        """Reserve one request against the quota, or raise ``QuotaExhausted``."""
+        with self._lock:
+            if self.max_requests is not None and self.requests >= self.max_requests:
+                raise QuotaExhausted(f'{self.provider}: local budget of {self.max_requests} requests used')
+            # in-flight requests count against the quota so concurrent workers can't overshoot
+            if self.remaining is not None and self.remaining - self._in_flight <= self.reserve:
+                raise QuotaExhausted(f'{self.provider}: {self.remaining} requests left (reserve {self.reserve})')
+            self.requests += 1
+            self._in_flight += 1
+
+    def _record(self, response):
+        with self._lock:
+            self._in_flight -= 1
+            if response is None:
+                return
+            remaining = _header_int(response.headers, REMAINING_HEADERS)
+            used = _header_int(response.headers, USED_HEADERS)
+            # concurrent responses can arrive out of order; keep the most-spent view
+            if used is not None and self.used is not None and used < self.used:
+                return
+            if used is not None:
+                self.used = used
+            if remaining is not None:
+                self.remaining = remaining if self.remaining is None or used is not None else min(self.remaining, remaining)
+
+    def fetch(self, params: Optional[Dict] = None) -> Any:
+        """GET one parameter set, retrying after 429s; returns the decoded JSON."""
+        path, headers, query = self._build(self.api_key, dict(params or {}))
+        url = self.base_url + path
+        for attempt in range(self.retries + 1):
+            self._claim()
+            response = None
+            try:
+                self.bucket.acquire()
+                response = self.session.get(url, headers=headers, params=query, timeout=self.timeout)
+            finally:
+                self._record(response)
+            if response.status_code == 429 and attempt < self.retries:
+                self.throttled += 1
+                pause = retry_after(response.headers, self.backoff * 2 ** attempt)
+                logger.warning('%s throttled; pausing %.1fs', self.provider, pause)
+                self.bucket.pause(pause)
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    def fetch_many(self, param_sets: Iterable[Optional[Dict]], max_workers: Optional[int] = None) -> List[Dict]:
+        """Fetch every parameter set concurrently over the pooled connections, in input order."""
+        param_sets = [dict(p or {}) for p in param_sets]
+
+        def one(params):
+            try:
+                return {'params': params, 'data': self.fetch(params), 'error': None}
+            except Exception as e:  # one bad sport/date shouldn't sink the batch
+                logger.warning('%s %s failed: %s', self.provider, params, e)
+                return {'params': params, 'data': None, 'error': str(e)}
+
+        if len(param_sets) <= 1:
+            return [one(p) for p in param_sets]
+        with ThreadPoolExecutor(max_workers=min(max_workers or self.pool_size, len(param_sets))) as pool:
+            return list(pool.map(one, param_sets))
+
+    def stats(self) -> Dict:
+        return {'provider': self.provider, 'requests': self.requests, 'throttled': self.throttled,
+                'remaining': self.remaining, 'used': self.used}
+
+    def close(self):
+        self.session.close()
+
+
+_CLIENTS: Dict[Tuple[str, str, str], ProviderClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(provider: str, api_key: str, base_url: Optional[str] = None, **kwargs) -> ProviderClient:
+    """Process-wide client per (provider, key, base URL), so repeated calls reuse the pool."""
+    name = provider_name(provider)
+    key = (name, api_key, base_url or PROVIDERS[name][0])
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _CLIENTS[key] = ProviderClient(name, api_key, base_url=base_url, **kwargs)
+        return client
+
+
+def close_clients():
+    with _CLIENTS_LOCK:
+        for client in _CLIENTS.values():
+            client.close()
+        _CLIENTS.clear()
@@ -4,19 +4,18 @@ This module extends the core metrics to handle multiple providers/books,
 generating comparative calibration curves and Brier score tables.
 """
 import json
+import os
 from pathlib import Path
 import pandas as pd
 import numpy as np
-from sklearn.metrics import brier_score_loss
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 from .metrics import calibration_by_bin
-from .demo_backtest import plot_calibration
 
 
 def compute_provider_metrics(df: pd.DataFrame, provider_col='provider', p_col='p_hit', outcome_col='outcome') -> dict:
     """Compute metrics for each provider."""
+    from sklearn.metrics import brier_score_loss
+
     results = {}
     
     for provider in df[provider_col].unique():
@@ -69,6 +68,9 @@ def plot_provider_calibration(
     outcome_col='outcome'
 ):
     """Generate calibration plots comparing providers."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     out_dir.mkdir(parents=True, exist_ok=True)
     
     # Overall calibration plot with all providers
@@ -123,10 +125,13 @@ def plot_provider_calibration(
     fig.savefig(brier_path, bbox_inches='tight', dpi=300)
     plt.close(fig)
     
-    # Save metrics as JSON
+    # Save metrics as JSON. Write to a temp file and rename so the API's
+    # calibration registry never reads a half-written file.
     metrics_path = out_dir / f'{prefix}provider_metrics.json'
-    with open(metrics_path, 'w') as f:
+    tmp_path = metrics_path.with_name(metrics_path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
         json.dump(metrics, f, indent=2)
+    os.replace(tmp_path, metrics_path)
     
     return {
         'calibration_plot': str(plot_path),
@@ -0,0 +1,59 @@
+"""Client-side rate limiting shared by the crawlers and provider clients."""
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``acquire`` blocks until a request may go out."""
+
+    def __init__(self, rate: float, capacity: float = 1.0, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is available; returns the wait."""
+        with self._lock:
+            self._refill(self._clock())
+            # reserve the token now (possibly going negative) so waiters queue fairly
+            self._tokens -= 1
+            wait_for = max(0.0, -self._tokens / self.rate)
+        if wait_for:
+            self._sleep(wait_for)
+        return wait_for
+
+    def pause(self, seconds: float):
+        """Hold back every caller for ``seconds`` (e.g. after a 429)."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+def retry_after(headers, default: float) -> float:
+    """Seconds to wait per ``Retry-After`` (delay-seconds or HTTP-date); ``default`` if absent or invalid."""
+    value = headers.get('Retry-After')
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
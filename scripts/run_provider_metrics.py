@@ -1,5 +1,6 @@
 import pandas as pd, json
 from pathlib import Path
+from scripts import schema
 from scripts.metrics import compute_metrics, calibration_by_bin
 import numpy as np
 import matplotlib.pyplot as plt
@@ -9,7 +10,8 @@ if not p.exists():
     print('Normalized CSV not found at', p)
     raise SystemExit(1)
 
-df = pd.read_csv(p)
+# Projection arrives as float and Date as datetime; no per-script coercion
+df = schema.read('provider_normalized', p)
 print('Rows in normalized CSV:', len(df))
 # filter only rows with a Projection
 
@@ -19,7 +21,6 @@ if 'Projection' not in df.columns:
 
 sdf = df[df['Projection'].notnull()].copy()
 if not sdf.empty:
-    sdf['Projection'] = pd.to_numeric(sdf['Projection'], errors='coerce')
     sdf['Projection'] = sdf['Projection'].clip(0,1)
 
 # Synthesize outcomes: Bernoulli(draw) using the projection as p
@@ -0,0 +1,358 @@
+"""Typed schemas for the cached datasets, parsed once and stored columnar.
+
+Every script used to re-coerce the CSVs it read: ``clean_df``,
+``feature_engineering``, ``utils.normalize.clean_numeric`` and
+``run_provider_metrics`` each ran ``pd.to_numeric(errors='coerce')`` over the
+same columns and re-parsed the same dates. ``SCHEMAS`` names the type of each
+column of each dataset once:
+
+- ``float``: float64; thousands separators are stripped before parsing
+- ``int``: nullable Int64; non-integral values are violations
+- ``date``: datetime64, any format pandas recognizes
+- ``str``: pandas string
+
+Columns a schema does not name are left as read. ``Schema.coerce`` converts
+only columns that do not already have their type, so a typed frame passes
+through untouched.
+
+``read(name, csv)`` parses a CSV once and stores the typed columns next to it
+in ``<csv>.typed/`` (one ``.npy`` per column, strings dictionary-encoded, plus
+``manifest.json``). While the CSV's size and mtime are unchanged, later reads
+memory-map those arrays and parse nothing. ``write(name, df, csv)`` writes the
+CSV and its typed copy together.
+
+``Schema.parse`` also validates, one vectorized pass per column, and returns
+the violations (values that do not parse, values out of range, missing
+required columns) rather than raising.
+
+Usage:
+  python -m scripts.schema list
+  python -m scripts.schema validate merged_eval data/cache/merged_eval.csv
+  python -m scripts.schema ingest merged_eval data/cache/merged_eval.csv
+"""
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+TYPED_VERSION = 1
+KINDS = ('float', 'int', 'date', 'str')
+
+
+class Column:
+    """Type and validity bounds of one column."""
+
+    def __init__(self, kind: str, min: Optional[float] = None, max: Optional[float] = None,
+                 required: bool = False):
+        if kind not in KINDS:
+            raise ValueError(f'unknown column kind {kind!r}')
+        self.kind = kind
+        self.min = min
+        self.max = max
+        self.required = required
+
+    def spec(self) -> Dict:
+        return {'kind': self.kind, 'min': self.min, 'max': self.max, 'required': self.required}
+
+
+class Schema:
+    """Named column types for one dataset."""
+
+    def __init__(self, name: str, columns: Dict[str, Column]):
+        self.name = name
+        self.columns = columns
+
+    @property
+    def version(self) -> str:
+        spec = {name: col.spec() for name, col in self.columns.items()}
+        return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+    def parse(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, List[Dict]]:
+        """Type the schema's columns of ``df`` in place; return it and the violations."""
+        violations = []
+        for name, col in self.columns.items():
+            if name not in df.columns:
+                if col.required:
+                    violations.append({'column': name, 'rule': 'missing column', 'count': len(df), 'rows': []})
+                continue
+            raw = df[name]
+            parsed = _parse(raw, col.kind)
+            if parsed is not raw:
+                # non-empty values that did not survive parsing
+                bad = (raw.notna() & parsed.isna()).to_numpy()
+                if bad.any():
+                    violations.append(_violation(name, f'not {col.kind}', bad, df.index))
+                df[name] = parsed
+            if col.kind in ('float', 'int'):
+                values = parsed.to_numpy('float64', na_value=np.nan)
+                if col.min is not None and (values < col.min).any():
+                    violations.append(_violation(name, f'< {col.min:g}', values < col.min, df.index))
+                if col.max is not None and (values > col.max).any():
+                    violations.append(_violation(name, f'> {col.max:g}', values > col.max, df.index))
+            if col.required and parsed.isna().any():
+                violations.append(_violation(name, 'missing value', parsed.isna().to_numpy(), df.index))
+        return df, violations
+
+    def coerce(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.parse(df)[0]
+
+    def __repr__(self):
+        return f'Schema({self.name!r})'
+
+
+def _violation(column: str, rule: str, mask: np.ndarray, index: pd.Index) -> Dict:
+    return {'column': column, 'rule': rule, 'count': int(mask.sum()), 'rows': index[mask][:5].tolist()}
+
+
+def _parse(series: pd.Series, kind: str) -> pd.Series:
+    """``series`` as ``kind``; the same object when it already has that type."""
+    dtype = series.dtype
+    if kind == 'float':
+        if dtype == np.float64:
+            return series
+        return _numeric(series).astype('float64')
+    if kind == 'int':
+        if isinstance(dtype, pd.Int64Dtype):
+            return series
+        values = _numeric(series)
+        return values.where(values == np.round(values)).astype('Int64')
+    if kind == 'date':
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            return series
+        return pd.to_datetime(series, errors='coerce', format='mixed')
+    if isinstance(dtype, pd.StringDtype):
+        return series
+    return series.astype('string')
+
+
+def _numeric(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return series.astype('float64')
+    text = series.astype('string').str.replace(',', '', regex=False).str.strip()
+    return pd.to_numeric(text, errors='coerce').astype('float64')
+
+
+def infer_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert text columns of ``df`` in place when every non-empty value is a number."""
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_datetime64_any_dtype(series.dtype):
+            continue
+        values = _numeric(series)
+        if not (series.notna() & values.isna()).any():
+            df[name] = values
+    return df
+
+
+def _game_stats(*names: str) -> Dict[str, Column]:
+    return {name: Column('float', min=0) for name in names}
+
+
+SCHEMAS: Dict[str, Schema] = {}
+
+
+def register(schema: Schema) -> Schema:
+    SCHEMAS[schema.name] = schema
+    return schema
+
+
+def get(name: str) -> Schema:
+    try:
+        return SCHEMAS[name]
+    except KeyError:
+        raise KeyError(f'no schema {name!r}; known: {", ".join(sorted(SCHEMAS))}') from None
+
+
+register(Schema('team_gamelog', {
+    'Season': Column('int', min=1920), 'Week': Column('int', min=1, max=23), 'Date': Column('date'),
+    'Opponent': Column('str'), 'is_away': Column('int', min=0, max=1),
+    **_game_stats('PF', 'PA'),
+}))
+register(Schema('qb_gamelog', {
+    'Date': Column('date'), 'G#': Column('float', min=1), 'Week': Column('float', min=1), 'Opp': Column('str'),
+    'QB_PassYds': Column('float'), **_game_stats('QB_PassTD', 'Cmp', 'Att'),
+}))
+register(Schema('wr_gamelog', {
+    'Date': Column('date'), 'WR_RecYds': Column('float'), **_game_stats('WR_RecTD', 'Rec', 'Tgt'),
+}))
+register(Schema('rb_gamelog', {
+    'Date': Column('date'), 'RB_RushYds': Column('float'), **_game_stats('RB_RushTD', 'Att'),
+}))
+# evaluate_nfl's team x QB x WR merge (and the cleaned copy); the short
+# Date/*_actual layout is the tiny demo file in data/cache/merged_eval.csv
+register(Schema('merged_eval', {
+    'Season': Column('int', min=1920), 'Week_team': Column('int', min=1, max=23), 'Date_team': Column('date'),
+    'Opponent': Column('str'), 'is_away': Column('int', min=0, max=1), **_game_stats('PF', 'PA'),
+    'Date_qb': Column('date'), 'G#': Column('float', min=1), 'Week_qb': Column('float', min=1),
+    'Opp': Column('str'), 'QB_PassYds': Column('float'), **_game_stats('QB_PassTD', 'Cmp', 'Att'),
+    'WR_RecYds': Column('float'), **_game_stats('WR_RecTD', 'Rec', 'Tgt'),
+    'Date': Column('date'), 'QB_PassYds_actual': Column('float'), 'WR_RecYds_actual': Column('float'),
+}))
+register(Schema('features', {
+    'Date': Column('date'), 'G#': Column('float', min=1), 'Week': Column('float', min=1), 'Opp': Column('str'),
+    'QB_PassYds': Column('float'), 'WR_RecYds': Column('float'), 'WR_RecYds_roll3': Column('float'),
+    'TargetShare': Column('float', min=0), 'QBxWR': Column('float'),
+}))
+register(Schema('nfl_features', {
+    'Date': Column('date'), 'Season': Column('int', min=1920), 'Week': Column('float', min=1),
+    'Opponent': Column('str'), 'is_away': Column('int', min=0, max=1), 'QB_PassYds': Column('float'),
+    'WR_RecYds': Column('float'), **_game_stats('QB_PassTD', 'WR_RecTD'), 'Diff_PF_PA': Column('float'),
+}))
+register(Schema('provider_normalized', {
+    'Date': Column('date'), 'PlayerName': Column('str', required=True), 'PlayerID': Column('str'),
+    'Team': Column('str'), 'PropType': Column('str'), 'Line': Column('float'),
+    'Projection': Column('float', min=0, max=1),
+}))
+
+
+def typed_path(csv_path) -> Path:
+    path = Path(csv_path)
+    return path.with_name(path.name + '.typed')
+
+
+def _source_stat(path: Path) -> List[int]:
+    st = path.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _read_manifest(directory: Path) -> Optional[Dict]:
+    try:
+        with open(directory / 'manifest.json', 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('version') == TYPED_VERSION else None
+
+
+def save_typed(df: pd.DataFrame, directory, schema: Optional[Schema] = None,
+               source: Optional[List[int]] = None) -> Path:
+    """Store ``df`` column by column under ``directory`` and swap the manifest in last."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    old = _read_manifest(directory)
+    generation = old['generation'] + 1 if old else 0
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        entry = {'name': name, 'file': f'g{generation}_c{i}.npy'}
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            tz = getattr(series.dt, 'tz', None)
+            values = series.dt.tz_convert('UTC').dt.tz_localize(None) if tz is not None else series
+            entry.update(kind='date', unit=values.dt.unit, tz=None if tz is None else 'UTC')
+            data = values.to_numpy().view('int64')
+        elif isinstance(series.dtype, pd.Int64Dtype):
+            entry.update(kind='int', mask=f'g{generation}_c{i}.na.npy')
+            np.save(directory / entry['mask'], series.isna().to_numpy())
+            data = series.fillna(0).to_numpy('int64')
+        elif isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biuf':
+            entry.update(kind='numeric')
+            data = series.to_numpy()
+        else:
+            # strings (and anything else) are dictionary-encoded; -1 marks missing
+            codes, uniques = pd.factorize(series)
+            entry.update(kind='str', dtype=str(series.dtype) if isinstance(series.dtype, pd.StringDtype) else 'object',
+                         values=[str(v) for v in uniques])
+            data = codes.astype(np.int32)
+        np.save(directory / entry['file'], np.ascontiguousarray(data))
+        columns.append(entry)
+
+    manifest = {'version': TYPED_VERSION, 'generation': generation, 'rows': len(df),
+                'schema': schema.name if schema else None, 'schema_version': schema.version if schema else None,
+                'source': source, 'columns': columns}
+    tmp = directory / 'manifest.json.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, directory / 'manifest.json')
+    keep = {c['file'] for c in columns} | {c['mask'] for c in columns if 'mask' in c}
+    for path in directory.glob('g*.npy'):
+        if path.name not in keep:
+            path.unlink(missing_ok=True)
+    return directory
+
+
+def load_typed(directory, manifest: Optional[Dict] = None) -> pd.DataFrame:
+    """Frame stored by ``save_typed``; numeric columns are read memory-mapped."""
+    directory = Path(directory)
+    manifest = manifest or _read_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f'no typed dataset in {directory}')
+    data = {}
+    for entry in manifest['columns']:
+        values = np.load(directory / entry['file'], mmap_mode='r')
+        kind = entry['kind']
+        if kind == 'date':
+            series = pd.Series(np.asarray(values).view(f"datetime64[{entry['unit']}]"))
+            data[entry['name']] = series.dt.tz_localize(entry['tz']) if entry['tz'] else series
+        elif kind == 'int':
+            mask = np.load(directory / entry['mask'])
+            data[entry['name']] = pd.arrays.IntegerArray(np.array(values), mask)
+        elif kind == 'numeric':
+            data[entry['name']] = values
+        else:
+            uniques = pd.array(entry['values'], dtype=entry['dtype'])
+            data[entry['name']] = uniques.take(np.asarray(values), allow_fill=True)
+    return pd.DataFrame(data, index=pd.RangeIndex(manifest['rows']))
+
+
+def read(name: str, csv_path, save: bool = True) -> pd.DataFrame:
+    """Typed frame of dataset ``name`` at ``csv_path``, parsing the CSV only when it changed."""
+    schema = get(name)
+    path = Path(csv_path)
+    directory = typed_path(path)
+    manifest = _read_manifest(directory)
+    source = _source_stat(path)
+    if manifest and manifest['source'] == source and manifest['schema_version'] == schema.version:
+        return load_typed(directory, manifest)
+    df = schema.coerce(pd.read_csv(path))
+    if save:
+        try:
+            save_typed(df, directory, schema, source)
+        except OSError:
+            pass
+    return df
+
+
+def write(name: str, df: pd.DataFrame, csv_path) -> pd.DataFrame:
+    """Write ``df`` (typed by schema ``name``) to ``csv_path`` and its typed copy."""
+    schema = get(name)
+    df = schema.coerce(df)
+    path = Path(csv_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False)
+    save_typed(df.reset_index(drop=True), typed_path(path), schema, _source_stat(path))
+    return df
+
+
+def format_violations(violations: List[Dict]) -> str:
+    if not violations:
+        return 'no violations'
+    lines = [f"{v['column']:<20} {v['rule']:<16} {v['count']:>7}  e.g. rows {v['rows']}" for v in violations]
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    sub.add_parser('list', help='Show registered schemas')
+    for cmd, help_text in (('validate', 'Report schema violations in a CSV'),
+                           ('ingest', 'Parse a CSV once and store its typed copy')):
+        p = sub.add_parser(cmd, help=help_text)
+        p.add_argument('schema')
+        p.add_argument('csv')
+    args = parser.parse_args()
+
+    if args.cmd == 'list':
+        for schema in SCHEMAS.values():
+            print(f'{schema.name}: ' + ', '.join(f'{n}:{c.kind}' for n, c in schema.columns.items()))
+    elif args.cmd == 'validate':
+        _, violations = get(args.schema).parse(pd.read_csv(args.csv))
+        print(format_violations(violations))
+        raise SystemExit(1 if violations else 0)
+    else:
+        df = read(args.schema, args.csv)
+        print(f'{args.csv}: {len(df)} rows typed in {typed_path(args.csv)}')
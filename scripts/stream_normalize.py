@@ -0,0 +1,335 @@
+"""Streaming normalization of large provider payloads.
+
+``normalize_provider_response`` needs the whole JSON document in memory plus
+one Python row per outcome. A full-market odds dump across every book and
+prop runs to hundreds of MB. This module reads the payload incrementally
+instead, one event or projection at a time, in fixed-size chunks:
+
+    for batch in normalize_stream('theoddsapi', 'dump.json.gz', batch_rows=50_000):
+        ...                        # DataFrame with NORMALIZED_COLUMNS, typed
+
+Memory is bounded by ``batch_rows`` plus the largest single event, whatever
+the payload size. Row mapping and column typing are shared with
+``normalize_provider_response``, so a batch is exactly the corresponding
+slice of the in-memory result.
+
+Batches can be written straight to a columnar sink:
+
+- ``normalize_to_csv``: appends each batch to one CSV
+- ``odds_to_ticks``: loads over/under markets of an odds dump (The Odds API
+  shape: events -> bookmakers -> markets -> outcomes) into the columnar tick
+  store (``scripts/odds_ticks.py``), one bulk segment per batch
+
+Usage:
+  python -m scripts.stream_normalize dump.json.gz --provider theoddsapi --csv out.csv
+  python -m scripts.stream_normalize --latest --provider theoddsapi --ticks data/cache/ticks
+"""
+import gzip
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, IO, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from scripts.fetch_prizepicks import (
+    NORMALIZED_COLUMNS,
+    finish_frame,
+    payload_keys,
+    payload_skips_empty,
+    provider_rows,
+)
+
+_WHITESPACE = ' \t\n\r'
+_DECODER = json.JSONDecoder()
+
+
+class _Reader:
+    """Pull parser over a text stream: decodes one JSON value at a time from a sliding buffer."""
+
+    def __init__(self, fp: IO[str], chunk_size: int = 1 << 16):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: Optional[int] = None) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fp.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # drop what has been consumed so the buffer stays around one item long
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f'Expected {char!r} at offset {self.pos}, got {self.peek()!r}')
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # incomplete value: read more, doubling so a huge value isn't re-decoded once per chunk
+                if not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            # a number that runs to the end of the buffer may continue in the next chunk
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def array(self) -> Iterator[Any]:
+        self.expect('[')
+        yield from self.elements()
+
+    def elements(self) -> Iterator[Any]:
+        """The rest of an array whose ``[`` has been consumed."""
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            sep = self.peek()
+            self.pos += 1
+            if sep == ']':
+                return
+            if sep != ',':
+                raise ValueError(f'Expected "," or "]" in array, got {sep!r}')
+
+
+def iter_items(fp: IO[str], keys: Sequence[str] = (), chunk_size: int = 1 << 16,
+               skip_empty: bool = False) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array, or of the ``keys`` list of a top-level object.
+
+    The list is picked like ``payload_items``: the first of ``keys`` in
+    preference order that is present or, with ``skip_empty``, non-empty.
+    Only one element is decoded at a time when the chosen list is the first
+    candidate in the document or every preferred key before it was already
+    seen and passed over; otherwise it is held until the end of the object
+    in case a preferred key follows. Values under other keys are decoded
+    and discarded.
+    """
+    reader = _Reader(fp, chunk_size)
+    first = reader.peek()
+    if first == '[':
+        yield from reader.array()
+        return
+    if first != '{':
+        raise ValueError(f'Expected a JSON array or object, got {first!r}')
+    reader.expect('{')
+    rank = {key: i for i, key in enumerate(keys)}
+    seen = set()
+    best, fallback = len(keys), []  # rank and items of the chosen list so far
+    while True:
+        c = reader.peek()
+        if c == '}' or c == '':
+            break
+        if c == ',':
+            reader.pos += 1
+            continue
+        key = reader.value()
+        reader.expect(':')
+        r = rank.get(key, len(keys))
+        if r >= best:
+            reader.value()
+            continue
+        seen.add(key)
+        final = all(k in seen for k in keys[:r])
+        if reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() != ']':
+                if final:
+                    yield from reader.elements()
+                    return
+                best, fallback = r, list(reader.elements())
+                continue
+            reader.pos += 1
+            empty = True
+        else:
+            empty = not reader.value()
+        if not (empty and skip_empty):
+            if final:
+                return
+            best, fallback = r, []
+    yield from fallback
+
+
+def _open(source: Union[str, Path, IO[str]]):
+    if hasattr(source, 'read'):
+        return source, False
+    path = Path(source)
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rt', encoding='utf8'), True
+    return open(path, 'r', encoding='utf8'), True
+
+
+def _typed_batch(provider: str, columns: List[list]) -> 'pd.DataFrame':
+    import pandas as pd
+
+    data = {}
+    for name, values in zip(NORMALIZED_COLUMNS, columns):
+        if name in ('Line', 'Projection'):
+            data[name] = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce')
+        else:
+            data[name] = pd.Series(values, dtype=object)
+    return finish_frame(provider, pd.DataFrame(data))
+
+
+def normalize_stream(provider: str, source, batch_rows: int = 50_000,
+                     chunk_size: int = 1 << 16) -> Iterator['pd.DataFrame']:
+    """Normalize a payload file (``.json`` or ``.json.gz``) or text stream in typed batches."""
+    fp, owned = _open(source)
+    try:
+        columns: List[list] = [[] for _ in NORMALIZED_COLUMNS]
+        n = 0
+        for item in iter_items(fp, payload_keys(provider), chunk_size, payload_skips_empty(provider)):
+            for row in provider_rows(provider, item):
+                for col, value in zip(columns, row):
+                    col.append(value)
+                n += 1
+                if n >= batch_rows:
+                    yield _typed_batch(provider, columns)
+                    columns = [[] for _ in NORMALIZED_COLUMNS]
+                    n = 0
+        if n:
+            yield _typed_batch(provider, columns)
+    finally:
+        if owned:
+            fp.close()
+
+
+def normalize_to_csv(provider: str, source, out_path, batch_rows: int = 50_000) -> int:
+    """Stream a payload into one CSV, batch by batch; returns the row count."""
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    rows = 0
+    with open(out_path, 'w', encoding='utf8', newline='') as f:
+        for batch in normalize_stream(provider, source, batch_rows):
+            batch.to_csv(f, index=False, header=rows == 0)
+            rows += len(batch)
+        if rows == 0:
+            f.write(','.join(NORMALIZED_COLUMNS) + '\n')
+    return rows
+
+
+def _quote_rows(event: Dict, default_ts: float) -> Iterator[Tuple]:
+    """(ts, book, player, market, line, over, under) for every over/under pair in an odds event."""
+    home, away = event.get('home_team'), event.get('away_team')
+    fixture = f'{away} @ {home}' if home and away else event.get('id') or ''
+    for bm in event.get('bookmakers') or []:
+        book = bm.get('key') or bm.get('title') or 'unknown'
+        for market in bm.get('markets') or []:
+            mkey = market.get('key') or market.get('market_key')
+            stamp = market.get('last_update') or bm.get('last_update')
+            ts = _epoch(stamp, default_ts)
+            # player props carry the player in 'description'; game totals use the fixture
+            pairs: Dict[Tuple, Dict[str, Any]] = {}
+            for o in market.get('outcomes') or []:
+                side = str(o.get('name', '')).lower()
+                if side not in ('over', 'under'):
+                    continue
+                key = (o.get('description') or fixture, o.get('point'))
+                pairs.setdefault(key, {})[side] = o.get('price')
+            for (player, line), sides in pairs.items():
+                yield (ts, book, player, mkey, line, sides.get('over'), sides.get('under'))
+
+
+def _epoch(stamp, default: float) -> float:
+    if not stamp:
+        return default
+    try:
+        return datetime.fromisoformat(str(stamp).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return default
+
+
+def _float(values) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def odds_to_ticks(source, store, batch_rows: int = 100_000, ts: Optional[float] = None,
+                  chunk_size: int = 1 << 16) -> int:
+    """Stream an odds dump's over/under quotes into a ``TickStore``; returns rows appended.
+
+    Prices are stored as the payload gives them (American or decimal). ``ts``
+    (default: now) stamps quotes without a ``last_update``.
+    """
+    default_ts = time.time() if ts is None else ts
+    fp, owned = _open(source)
+    total = 0
+    try:
+        columns: List[list] = [[] for _ in range(7)]
+
+        def flush():
+            nonlocal columns, total
+            if columns[0]:
+                t, book, player, market, line, over, under = columns
+                total += store.append_columns(t, book, player, market, _float(line), _float(over), _float(under))
+                columns = [[] for _ in range(7)]
+
+        for event in iter_items(fp, (), chunk_size):
+            for row in _quote_rows(event, default_ts):
+                for col, value in zip(columns, row):
+                    col.append(value)
+            if len(columns[0]) >= batch_rows:
+                flush()
+        flush()
+    finally:
+        if owned:
+            fp.close()
+    return total
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Stream-normalize a (large) provider payload')
+    parser.add_argument('source', nargs='?', help='Payload file (.json or .json.gz)')
+    parser.add_argument('--provider', required=True)
+    parser.add_argument('--latest', action='store_true', help='Use the newest payload in the payload store')
+    parser.add_argument('--store', default='data/cache/provider', help='Payload store root for --latest')
+    parser.add_argument('--csv', help='Write normalized rows to this CSV')
+    parser.add_argument('--ticks', help='Append over/under quotes to the tick store at this root')
+    parser.add_argument('--batch-rows', type=int, default=50_000)
+    args = parser.parse_args()
+
+    source = args.source
+    if args.latest:
+        from scripts.payload_store import PayloadStore
+
+        payloads = PayloadStore(args.store)
+        entry = payloads.latest(args.provider)
+        if entry is None:
+            raise SystemExit(f'No {args.provider} payloads in {args.store}')
+        source = payloads.blob_path(entry['hash'])
+        payloads.close()
+    if source is None:
+        raise SystemExit('Give a payload file or --latest')
+    if args.csv:
+        print(f'Wrote {normalize_to_csv(args.provider, source, args.csv, args.batch_rows)} rows to {args.csv}')
+    if args.ticks:
+        from scripts.odds_ticks import TickStore
+
+        ticks = TickStore(args.ticks)
+        print(f'Appended {odds_to_ticks(source, ticks, args.batch_rows)} quotes to {args.ticks}')
@@ -0,0 +1,171 @@
+"""
+Local stub projection/odds provider for tests and offline demos.
+
+Serves the endpoints ``scripts/provider_client.py`` knows about with
+synthetic payloads:
+
+- ``GET /v4/sports/{sport}/odds[/]``: The Odds API shaped events (totals)
+- ``GET /v1/prizepicks/projections`` and ``GET /prizepicks``:
+  ``{"projections": [...]}``
+
+Every response carries ``x-requests-remaining`` / ``x-requests-used``
+headers counted down from ``quota``. Once the quota is spent the stub answers
+429, and ``throttle`` makes the first N requests 429 with ``Retry-After: 0``.
+The server speaks HTTP/1.1 keep-alive and records each client connection, so
+tests can check that a batch reused pooled connections.
+
+Run standalone:
+    python -m scripts.stub_provider_server --port 8766 --quota 500 --delay 0.2
+
+then fetch from it:
+    python -m scripts.fetch_prizepicks --mode provider --provider theoddsapi --api-key test \
+        --base-url http://127.0.0.1:8766 --sport americanfootball_nfl --sport basketball_nba
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def _events(sport: str, n: int = 3):
+    events = []
+    for i in range(n):
+        home, away = f'{sport} Home {i}', f'{sport} Away {i}'
+        total = 40.5 + i
+        events.append({
+            'id': f'{sport}-{i}', 'sport_key': sport, 'commence_time': '2025-09-07T17:00:00Z',
+            'home_team': home, 'away_team': away,
+            'bookmakers': [{'key': 'stubbook', 'markets': [{'key': 'totals', 'outcomes': [
+                {'name': 'Over', 'price': -110, 'point': total},
+                {'name': 'Under', 'price': -110, 'point': total},
+            ]}]}],
+        })
+    return events
+
+
+def _projections(n: int = 5):
+    return {'projections': [{'player': f'Player {i}', 'team': 'KC', 'prop': 'rec_yds', 'line': 50.5 + i,
+                             'projection': 52.0 + i, 'ts': '2025-09-07T17:00:00Z'} for i in range(n)]}
+
+
+class StubProviderServer:
+    """Threaded keep-alive HTTP server imitating the supported providers."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, quota: Optional[int] = None,
+                 delay: float = 0.0, throttle: int = 0):
+        self.quota = quota
+        self.delay = delay
+        self.throttle = throttle
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = set()
+        self.paths: Dict[str, int] = {}
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _plan(self, client_address, path: str):
+        """Count the request; return (status, remaining, used)."""
+        with self._lock:
+            self.connections.add(client_address)
+            self.paths[path] = self.paths.get(path, 0) + 1
+            self.requests += 1
+            if self.requests <= self.throttle:
+                return 429, None, None
+            used = self.requests - self.throttle
+            if self.quota is None:
+                return 200, None, used
+            if used > self.quota:
+                return 429, 0, self.quota
+            return 200, self.quota - used, used
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                parts = [p for p in parsed.path.split('/') if p]
+                query = parse_qs(parsed.query)
+                if len(parts) == 4 and parts[:2] == ['v4', 'sports'] and parts[3] == 'odds':
+                    payload = _events(parts[2])
+                elif parts in (['v1', 'prizepicks', 'projections'], ['prizepicks']):
+                    payload = _projections()
+                else:
+                    return self._send(404, {'error': 'not found'})
+                if not (query.get('apiKey') or self.headers.get('Authorization') or self.headers.get('x-api-key')):
+                    return self._send(401, {'error': 'missing api key'})
+
+                status, remaining, used = server._plan(self.client_address, parsed.path)
+                headers = {}
+                if remaining is not None:
+                    headers['x-requests-remaining'] = str(remaining)
+                if used is not None:
+                    headers['x-requests-used'] = str(used)
+                if status == 429:
+                    headers['Retry-After'] = '0'
+                    return self._send(429, {'error': 'rate limited'}, headers)
+                if server.delay:
+                    time.sleep(server.delay)
+                return self._send(200, payload, headers)
+
+            def _send(self, status: int, payload, headers: Optional[Dict[str, str]] = None):
+                body = json.dumps(payload).encode('utf8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'StubProviderServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run a local stub projection/odds provider.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--quota', type=int, default=None, help='Requests before the stub starts answering 429')
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to sleep per request')
+    parser.add_argument('--throttle', type=int, default=0, help='Answer the first N requests with 429')
+    args = parser.parse_args()
+
+    stub = StubProviderServer(args.host, args.port, quota=args.quota, delay=args.delay, throttle=args.throttle)
+    print('Stub provider on', stub.base_url)
+    try:
+        stub._httpd.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
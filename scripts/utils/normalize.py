@@ -1,18 +1,26 @@
-import pandas as pd
-
 def canonicalize_opp(col):
     return col
 
 def join_qb_wr(team_df, qb_df, wr_df):
-    base = team_df[['Date','Season','Week','Opponent','is_away']].dropna()
-    out = base.merge(qb_df[['Date','QB_PassYds','QB_PassTD']], on='Date', how='left')
-    out = out.merge(wr_df[['Date','WR_RecYds','WR_RecTD']], on='Date', how='left')
-    out = out.dropna(subset=['QB_PassYds','WR_RecYds'])
+    from scripts.gamelog_join import GamelogJoin
+
+    base_cols = [c for c in ['Date', 'Season', 'Week', 'Opponent', 'is_away', 'PF', 'PA'] if c in team_df.columns]
+    join = GamelogJoin()
+    join.add_team(team_df, columns=base_cols, suffix='')
+    join.add_player(qb_df, 'qb', columns=['Date', 'QB_PassYds', 'QB_PassTD'])
+    join.add_player(wr_df, 'wr', columns=['WR_RecYds', 'WR_RecTD'])
+    out = join.frame(how='left').reset_index(drop=True)
+    # team pages may leave Date blank; the QB log dates the same game
+    out['Date'] = out['Date'].fillna(out.pop('Date_qb')) if 'Date' in out.columns else out.pop('Date_qb')
+    out = out.dropna(subset=['Date', 'QB_PassYds', 'WR_RecYds'])
     out['Diff_PF_PA'] = out['PF'] - out['PA'] if 'PF' in out.columns and 'PA' in out.columns else 0
-    return out
+    return out.drop(columns=[c for c in ('PF', 'PA') if c in out.columns])
+
+
+def clean_numeric(df, schema_name=None):
+    """Type ``df`` by a registered schema, or convert the all-numeric text columns."""
+    from scripts import schema
 
-def clean_numeric(df):
-    for c in df.columns:
-        if df[c].dtype == object:
-            df[c] = pd.to_numeric(df[c], errors='ignore')
-    return df
+    if schema_name is not None:
+        return schema.get(schema_name).coerce(df)
+    return schema.infer_numeric(df)
@@ -0,0 +1,59 @@
+"""Tests for API request metrics and the /metrics endpoint."""
+import random
+
+from frontend.api_metrics import LatencyHistogram, MetricsRegistry
+
+
+def test_histogram_quantiles_track_true_percentiles():
+    rng = random.Random(0)
+    samples = [rng.lognormvariate(-7, 1) for _ in range(20000)]
+    hist = LatencyHistogram()
+    for s in samples:
+        hist.observe(s)
+    samples.sort()
+    for q in (0.5, 0.95, 0.99):
+        true = samples[int(q * len(samples)) - 1]
+        assert abs(hist.quantile(q) - true) / true < 0.1
+    assert hist.quantile(1.0) <= hist.max
+
+
+def test_registry_counts_errors_and_renders_prometheus():
+    metrics = MetricsRegistry()
+    metrics.observe_request('/api/predict', 'POST', 200, 0.001)
+    metrics.observe_request('/api/predict', 'POST', 500, 0.002)
+    metrics.observe_provider('DraftKings', 0.05, 'timeout')
+    snap = metrics.snapshot()
+    assert snap['routes']['/api/predict']['requests'] == 2
+    assert snap['routes']['/api/predict']['errors'] == 1
+    assert snap['providers']['DraftKings']['calls'] == {'timeout': 1}
+
+    text = metrics.render_prometheus({'size': 1, 'endpoints': {
+        'odds': {'hits': 3, 'misses': 1, 'coalesced': 0, 'hit_ratio': 0.75}}})
+    assert 'api_requests_total{route="/api/predict",method="POST",status="500"} 1' in text
+    assert 'api_request_duration_seconds_bucket{route="/api/predict",le="+Inf"} 2' in text
+    assert 'api_request_duration_quantile_seconds{route="/api/predict",quantile="0.99"}' in text
+    assert 'odds_provider_calls_total{provider="DraftKings",outcome="timeout"} 1' in text
+    assert 'response_cache_hit_ratio{endpoint="odds"} 0.75' in text
+
+
+def test_flask_routes_are_instrumented():
+    from frontend.app import app, METRICS, RESPONSE_CACHE
+
+    from odds import get_provider
+
+    METRICS.reset()
+    RESPONSE_CACHE.invalidate('odds')
+    get_provider('mock').cache.invalidate()
+    client = app.test_client()
+    client.get('/health')
+    client.get('/api/odds?player=Patrick%20Mahomes&market=passing_yards&sportsbook=nobook')
+    client.get('/api/odds?player=Travis%20Kelce&market=receiving_yards')
+    client.get('/no-such-route')
+
+    snap = client.get('/metrics?format=json').get_json()
+    assert snap['routes']['/health']['requests'] == 1
+    assert snap['routes']['/api/odds']['requests'] == 2
+    assert snap['routes']['<unmatched>']['status'] == {'404': 1}
+    assert snap['providers']['MockOddsProvider']['calls'] == {'ok': 2}
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'api_requests_total{route="/health",method="GET",status="200"} 1' in text
@@ -0,0 +1,250 @@
+"""Tests for the async odds fan-out and the ASGI serving mode."""
+import asyncio
+import json
+import time
+
+import httpx
+
+from frontend.stub_odds_server import StubOddsServer
+from frontend.asgi import AsyncOddsApp, flask_app, RESPONSE_CACHE
+from odds import HTTPOddsProvider, async_http_client, close_async_http_client, gather_odds
+
+
+def _providers(stub, timeout):
+    return [HTTPOddsProvider(book, url, timeout=timeout) for book, url in stub.provider_urls().items()]
+
+
+def test_gather_odds_is_concurrent_and_respects_timeouts():
+    delays = {'DraftKings': 0.2, 'FanDuel': 0.2, 'BetMGM': 2.0}
+    with StubOddsServer(delays=delays, failing=['PointsBet']) as stub:
+        providers = _providers(stub, timeout=0.5)
+
+        async def run():
+            async_http_client()
+            try:
+                start = time.perf_counter()
+                data = await gather_odds('Patrick Mahomes', 'passing_yards', providers)
+                return data, time.perf_counter() - start
+            finally:
+                await close_async_http_client()
+
+        data, elapsed = asyncio.run(run())
+
+    # two 0.2s books fetched in parallel, slow book cut off at its 0.5s timeout
+    assert elapsed < 1.0
+    assert set(data['sportsbooks']) == {'DraftKings', 'FanDuel'}
+    assert data['errors']['BetMGM'] == 'timeout'
+    assert 'PointsBet' in data['errors']
+    assert data['sportsbooks']['DraftKings']['line'] == 300.5
+
+
+def test_asgi_app_serves_async_odds_and_flask_routes():
+    with StubOddsServer() as stub:
+        asgi_app = AsyncOddsApp(flask_app, providers=_providers(stub, timeout=1.0))
+        RESPONSE_CACHE.invalidate('odds')
+
+        async def run():
+            transport = httpx.ASGITransport(app=asgi_app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+                odds = await client.get('/api/odds', params={'player': 'Travis Kelce', 'market': 'receiving_yards'})
+                missing = await client.get('/api/odds', params={'player': 'Travis Kelce'})
+                health = await client.get('/health')
+            await asgi_app.aclose()
+            return odds, missing, health
+
+        odds, missing, health = asyncio.run(run())
+
+    assert odds.status_code == 200
+    body = odds.json()
+    assert body['success'] and body['data']['over']['sportsbook'] == 'FanDuel'
+    assert missing.status_code == 400
+    assert health.json()['status'] == 'ok'
+
+
+def test_asgi_app_runs_delegated_flask_routes_concurrently():
+    from flask import Flask
+
+    slow_app = Flask('slow')
+
+    @slow_app.route('/slow')
+    def slow():
+        time.sleep(0.5)
+        return 'ok'
+
+    asgi_app = AsyncOddsApp(slow_app, providers=[])
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi_app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+            start = time.perf_counter()
+            responses = await asyncio.gather(*(client.get('/slow') for _ in range(4)))
+            elapsed = time.perf_counter() - start
+        await asgi_app.aclose()
+        return responses, elapsed
+
+    responses, elapsed = asyncio.run(run())
+    assert [r.text for r in responses] == ['ok'] * 4
+    # four 0.5s requests overlap instead of queueing on one thread (~2s)
+    assert elapsed < 1.2
+
+
+def test_wsgi_adapter_passes_requests_through_and_streams_chunks():
+    from flask import Flask, Response, request
+
+    from frontend.asgi import PooledWsgiToAsgi
+
+    echo_app = Flask('echo')
+
+    @echo_app.route('/echo/<name>', methods=['POST'])
+    def echo(name):
+        return {'name': name, 'q': request.args.getlist('q'), 'body': request.get_json(),
+                'agent': request.headers.get('X-Agent'), 'script': request.script_root}, 201
+
+    @echo_app.route('/chunks')
+    def chunks():
+        return Response((f'{i};' for i in range(3)), mimetype='text/plain', headers={'X-Done': 'yes'})
+
+    adapter = PooledWsgiToAsgi(echo_app, max_threads=2)
+    sent = []
+
+    async def call(path, method='GET', body=b'', query=b''):
+        messages = [{'type': 'http.request', 'body': body[:3], 'more_body': True},
+                    {'type': 'http.request', 'body': body[3:], 'more_body': False}]
+        scope = {'type': 'http', 'method': method, 'path': path, 'root_path': '', 'query_string': query,
+                 'headers': [(b'content-type', b'application/json'), (b'x-agent', b'test')],
+                 'server': ('testserver', 80), 'client': ('127.0.0.1', 1234), 'http_version': '1.1'}
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        sent.clear()
+        await adapter(scope, receive, send)
+        return list(sent)
+
+    try:
+        out = asyncio.run(call('/echo/kelce', 'POST', json.dumps({'line': 70.5}).encode(), b'q=1&q=2'))
+        assert out[0]['status'] == 201
+        assert json.loads(b''.join(m.get('body', b'') for m in out[1:])) == {
+            'name': 'kelce', 'q': ['1', '2'], 'body': {'line': 70.5}, 'agent': 'test', 'script': ''}
+
+        out = asyncio.run(call('/chunks'))
+        assert (b'x-done', b'yes') in out[0]['headers']
+        assert [m['body'] for m in out[1:]] == [b'0;', b'1;', b'2;', b'']
+        assert out[-1]['more_body'] is False
+    finally:
+        adapter.shutdown()
+
+
+def test_hedged_fan_out_beats_slow_first_attempts_and_retries_failures():
+    from odds_fanout import fan_out
+
+    # every book's first request is slow; the hedge (second request) is fast
+    delays = {book: [1.0, 0.0] for book in ('DraftKings', 'FanDuel', 'BetMGM')}
+    with StubOddsServer(delays=delays, flaky={'PointsBet': [True, False]}) as stub:
+        providers = _providers(stub, timeout=1.5)
+
+        start = time.perf_counter()
+        data = fan_out('Patrick Mahomes', 'passing_yards', providers, timeout=1.5, hedge_after=0.1, retries=1)
+        elapsed = time.perf_counter() - start
+
+        # line shopping costs ~one hedge delay, not the sum (or max) of slow first attempts
+        assert elapsed < 0.6
+        assert set(data['sportsbooks']) == {'DraftKings', 'FanDuel', 'BetMGM', 'PointsBet'}
+        assert 'errors' not in data
+        assert stub.request_counts['PointsBet'] == 2  # failed once, retried
+
+        # without hedging, the deadline cuts off the slow books and keeps the rest
+        slow = StubOddsServer(delays={'DraftKings': 1.0}).start()
+        try:
+            providers = _providers(slow, timeout=2.0)
+            start = time.perf_counter()
+            data = fan_out('Patrick Mahomes', 'passing_yards', providers, timeout=2.0, deadline=0.3,
+                           hedge_after=None, retries=0)
+            assert time.perf_counter() - start < 0.6
+            assert data['errors'] == {'DraftKings': 'timeout'}
+            assert set(data['sportsbooks']) == {'FanDuel', 'BetMGM', 'PointsBet'}
+        finally:
+            slow.stop()
+
+
+def test_async_hedge_and_deadline():
+    delays = {'DraftKings': [1.0, 0.0], 'FanDuel': 1.0}
+    with StubOddsServer(delays=delays) as stub:
+        providers = _providers(stub, timeout=2.0)
+
+        async def run():
+            async_http_client()
+            try:
+                start = time.perf_counter()
+                data = await gather_odds('Travis Kelce', 'receiving_yards', providers, timeout=2.0,
+                                         deadline=0.5, hedge_after=0.1)
+                return data, time.perf_counter() - start
+            finally:
+                await close_async_http_client()
+
+        data, elapsed = asyncio.run(run())
+
+    assert elapsed < 0.9
+    assert 'DraftKings' in data['sportsbooks']
+    assert data['errors'] == {'FanDuel': 'timeout'}
+
+
+class _StaticBook:
+    def __init__(self, name, line):
+        self.name, self.line, self.timeout = name, line, 1.0
+
+    def get_odds_cached(self, player, market):
+        return {'source': self.name, 'sportsbooks': {self.name: {'line': self.line, 'over': -110, 'under': -110}}}
+
+
+def test_fan_out_after_fork_and_with_no_providers():
+    import os
+
+    import odds
+    from odds_fanout import fan_out, fan_out_async
+
+    assert asyncio.run(fan_out_async('Travis Kelce', 'receiving_yards', [], timeout=1.0)) is None
+
+    # the parent's pool and session exist before the fork, as after preload()
+    assert fan_out('Travis Kelce', 'receiving_yards', [_StaticBook('DraftKings', 70.5)], timeout=1.0)
+    parent_session = odds.http_session()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            data = fan_out('Travis Kelce', 'receiving_yards', [_StaticBook('FanDuel', 71.5)], timeout=1.0)
+            ok = data['sportsbooks']['FanDuel']['line'] == 71.5 and odds.http_session() is not parent_session
+            os.write(write_fd, b'ok' if ok else b'bad')
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    deadline = time.monotonic() + 5
+    while os.waitpid(pid, os.WNOHANG) == (0, 0):
+        if time.monotonic() > deadline:  # the child's fan-out hung
+            os.kill(pid, 9)
+            os.waitpid(pid, 0)
+            break
+        time.sleep(0.05)
+    assert os.read(read_fd, 8) == b'ok'
+    os.close(read_fd)
+
+
+def test_unquoted_prop_is_an_empty_result_and_negatively_cached():
+    # the stub's mock data has no Caesars quotes, so every lookup is a 404
+    with StubOddsServer(books=['Caesars']) as stub:
+        book = HTTPOddsProvider('Caesars', stub.provider_urls()['Caesars'])
+        assert book.get_odds_cached('Patrick Mahomes', 'passing_yards') is None
+        assert book.get_odds_cached('Patrick Mahomes', 'passing_yards') is None
+        assert stub.request_counts['Caesars'] == 1
+
+        async def lookup():
+            try:
+                return [await book.get_odds_cached_async('Travis Kelce', 'receiving_yards') for _ in range(2)]
+            finally:
+                await close_async_http_client()
+
+        assert asyncio.run(lookup()) == [None, None]
+        assert stub.request_counts['Caesars'] == 2
@@ -0,0 +1,86 @@
+"""Tests for the materialized best-line index and the slate endpoint."""
+import math
+
+from frontend.app import app
+from frontend.best_lines import BestLineIndex
+
+
+def test_best_over_under_prefer_line_then_price_and_fair_probs():
+    index = BestLineIndex()
+    index.update('Patrick Mahomes', 'passing_yards', 'DraftKings', 300.5, -110, -110)
+    index.update('Patrick Mahomes', 'passing_yards', 'FanDuel', 299.5, -105, -115)
+    index.update('Patrick Mahomes', 'passing_yards', 'BetMGM', 301.0, -120, +100)
+    s = index.summary('patrick mahomes', 'PASSING_YARDS')
+    assert s['over']['sportsbook'] == 'FanDuel' and s['over']['line'] == 299.5
+    assert s['under']['sportsbook'] == 'BetMGM' and s['under']['line'] == 301.0
+    assert s['line'] == 300.5                     # median across books, not the first book
+    assert math.isclose(s['fair']['by_book']['DraftKings'], 0.5)
+    assert math.isclose(s['fair']['over'] + s['fair']['under'], 1.0)
+
+
+def test_incremental_updates_only_rescan_when_the_best_book_worsens():
+    index = BestLineIndex()
+    for book, price in [('A', -110), ('B', -115), ('C', -120)]:
+        index.update('X', 'm', book, 50.5, price, -110)
+    assert index.summary('X', 'm')['over']['sportsbook'] == 'A'
+    recomputes = index.recomputes
+    assert not index.update('X', 'm', 'B', 50.5, -115, -110)   # unchanged quote is a no-op
+    index.update('X', 'm', 'C', 50.5, +105, -110)              # challenger wins without a rescan
+    assert index.recomputes == recomputes
+    assert index.summary('X', 'm')['over']['sportsbook'] == 'C'
+    index.update('X', 'm', 'C', 50.5, -130, -110)              # best book got worse -> rescan
+    assert index.recomputes == recomputes + 1
+    assert index.summary('X', 'm')['over']['sportsbook'] == 'A'
+    index.remove('X', 'm', 'A')
+    assert index.summary('X', 'm')['over']['sportsbook'] == 'B'
+
+
+def test_slate_scan_marks_unknown_props():
+    index = BestLineIndex()
+    index.update('X', 'm', 'A', 10.5, -110, -110)
+    cols = index.slate([('X', 'm'), ('Y', 'm')])
+    assert cols['found'].tolist() == [True, False]
+    assert cols['best_over_book'].tolist() == ['A', None]
+    assert math.isnan(cols['best_over_price'][1])
+
+
+def test_slate_endpoint_returns_best_lines():
+    client = app.test_client()
+    body = {'props': [{'player': 'Patrick Mahomes', 'market': 'passing_yards'},
+                      {'player': 'Travis Kelce', 'market': 'receiving_yards'}]}
+    data = client.post('/api/odds/slate', json=body).get_json()['data']
+    assert [row['over']['sportsbook'] for row in data] == ['FanDuel', 'FanDuel']
+    assert data[0]['books'] == 4 and data[0]['line'] == 300.25
+    assert client.post('/api/odds/slate', json={'props': [{'player': 'x'}]}).status_code == 400
+
+
+def test_ingest_drops_books_missing_from_the_sources_next_payload():
+    index = BestLineIndex()
+    quote = {'line': 50.5, 'over': -110, 'under': -110}
+    index.ingest({'player': 'X', 'market': 'm', 'source': 'p1',
+                  'sportsbooks': {'A': quote, 'B': dict(quote, over=+120)}})
+    index.ingest({'player': 'X', 'market': 'm', 'source': 'p2', 'sportsbooks': {'C': quote}})
+    assert index.summary('X', 'm')['over']['sportsbook'] == 'B'
+
+    # p1 stopped quoting B; p2's book C is untouched
+    assert index.ingest({'player': 'X', 'market': 'm', 'source': 'p1', 'sportsbooks': {'A': quote}}) == 1
+    s = index.summary('X', 'm')
+    assert set(s['all_sportsbooks']) == {'A', 'C'} and s['over']['sportsbook'] != 'B'
+    index.ingest({'player': 'X', 'market': 'm', 'source': 'p1', 'sportsbooks': {}})
+    assert set(index.summary('X', 'm')['all_sportsbooks']) == {'C'}
+
+
+def test_partial_fanout_payload_keeps_books_that_did_not_answer():
+    index = BestLineIndex()
+    quote = {'line': 50.5, 'over': -110, 'under': -110}
+    books = {'A': quote, 'B': dict(quote, line=49.5), 'C': quote}
+    index.ingest({'player': 'X', 'market': 'm', 'source': 'aggregate', 'sportsbooks': books})
+    assert index.summary('X', 'm')['over']['sportsbook'] == 'B'
+    # B timed out this round: its last quote (the best line) stays
+    index.ingest({'player': 'X', 'market': 'm', 'source': 'aggregate', 'errors': {'B': 'timeout'},
+                  'sportsbooks': {'A': quote, 'C': quote}})
+    s = index.summary('X', 'm')
+    assert sorted(s['all_sportsbooks']) == ['A', 'B', 'C'] and s['over']['sportsbook'] == 'B'
+    # a complete round without B means B pulled the prop
+    index.ingest({'player': 'X', 'market': 'm', 'source': 'aggregate', 'sportsbooks': {'A': quote, 'C': quote}})
+    assert sorted(index.summary('X', 'm')['all_sportsbooks']) == ['A', 'C']
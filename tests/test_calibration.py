@@ -0,0 +1,107 @@
+"""Tests for fitted calibration maps and their use in the prediction path."""
+import numpy as np
+import pandas as pd
+
+from scripts.calibration import (
+    CalibrationMap,
+    OutcomeAccumulator,
+    _pav,
+    fit_calibration_maps,
+    save_calibration_maps,
+)
+
+
+def _overconfident_outcomes(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    p = rng.uniform(0.05, 0.95, n)
+    # true hit rate is pulled halfway toward 0.5
+    y = (rng.uniform(size=n) < 0.5 + (p - 0.5) * 0.5).astype(int)
+    return pd.DataFrame({'provider': 'DraftKings', 'p_hit': p, 'outcome': y})
+
+
+def test_pav_is_monotone_and_preserves_weighted_mean():
+    values = np.array([0.1, 0.5, 0.3, 0.2, 0.9])
+    weights = np.array([1.0, 2.0, 1.0, 1.0, 1.0])
+    fitted = _pav(values, weights)
+    assert np.all(np.diff(fitted) >= 0)
+    assert np.isclose((fitted * weights).sum(), (values * weights).sum())
+
+
+def test_map_apply_scalar_and_array_agree():
+    m = CalibrationMap([0.2, 0.6], [0.1, 0.7])
+    assert np.isclose(m.apply(0.4), 0.4)
+    assert m.apply(0.0) == 0.1 and m.apply(1.0) == 0.7
+    assert np.allclose(m.apply(np.array([0.2, 0.4, 0.6])), [0.1, 0.4, 0.7])
+
+
+def test_fit_shrinks_overconfident_provider_and_skips_sparse_ones():
+    df = pd.concat([
+        _overconfident_outcomes(),
+        pd.DataFrame({'provider': 'FanDuel', 'p_hit': [0.7] * 5, 'outcome': [1, 0, 1, 0, 1]}),
+    ])
+    for method in ('isotonic', 'platt'):
+        maps, _ = fit_calibration_maps(df, method=method)
+        assert maps['FanDuel'].method == 'identity'
+        dk = maps['DraftKings']
+        assert dk.method == method
+        assert dk.apply(0.9) < 0.85 and dk.apply(0.1) > 0.15
+
+
+def test_accumulator_refit_matches_single_fit():
+    df = _overconfident_outcomes()
+    first, second = df.iloc[:200], df.iloc[200:]
+    acc = OutcomeAccumulator()
+    acc.add(first['provider'].values, first['p_hit'].values, first['outcome'].values)
+    acc.add(second['provider'].values, second['p_hit'].values, second['outcome'].values)
+    whole, _ = fit_calibration_maps(df)
+    incremental = acc.fit()
+    grid = np.linspace(0, 1, 11)
+    assert np.allclose(incremental['DraftKings'].apply(grid), whole['DraftKings'].apply(grid))
+    restored = OutcomeAccumulator.from_dict(acc.to_dict())
+    assert np.array_equal(restored.counts, acc.counts)
+
+
+def test_prediction_uses_registry_maps(tmp_path):
+    from frontend.app import _compute_batch, _compute_prediction
+    from frontend.calibration_registry import CalibrationRegistry
+
+    maps, acc = fit_calibration_maps(_overconfident_outcomes())
+    save_calibration_maps(maps, acc, tmp_path / 'sample_passing_yards_calibration_maps.json')
+    registry = CalibrationRegistry(tmp_path)
+    registry.refresh()
+    snapshot = registry.current()
+
+    bet = {'sportsbook': 'DraftKings', 'market': 'passing_yards', 'player': 'A',
+           'projection': 250, 'actual_or_estimate': 300, 'odds': -110}
+    response = _compute_prediction(bet, snapshot)
+    single = response['prediction']
+    assert single['calibration_method'] == 'isotonic'
+    assert single['p_hit'] < single['p_hit_raw']
+
+    other = dict(bet, sportsbook='FanDuel')
+    batch = _compute_batch([bet, other], snapshot)['predictions']
+    assert batch[0]['p_hit'] == single['p_hit'] and batch[0]['ev'] == response['valuation']['ev']
+    assert batch[1]['calibration_method'] == 'identity'
+    assert batch[1]['p_hit'] == batch[1]['p_hit_raw']
+
+
+def test_predict_cache_does_not_mix_market_spellings(tmp_path, monkeypatch):
+    import frontend.app as frontend_app
+    from frontend.calibration_registry import CalibrationRegistry
+
+    maps, acc = fit_calibration_maps(_overconfident_outcomes())
+    save_calibration_maps(maps, acc, tmp_path / 'sample_passing_yards_calibration_maps.json')
+    registry = CalibrationRegistry(tmp_path)
+    registry.refresh()
+    monkeypatch.setattr(frontend_app, 'CALIBRATION_REGISTRY', registry)
+
+    client = frontend_app.app.test_client()
+    bet = {'sportsbook': 'DraftKings', 'player': 'Cache Case', 'projection': 250, 'actual_or_estimate': 300,
+           'odds': -110}
+    upper = client.post('/api/predict', json=dict(bet, market='PASSING_YARDS')).get_json()['prediction']
+    lower = client.post('/api/predict', json=dict(bet, market='passing_yards')).get_json()['prediction']
+    assert upper['market'] == 'PASSING_YARDS' and upper['calibration_method'] == 'identity'
+    assert lower['market'] == 'passing_yards' and lower['calibration_method'] == 'isotonic'
+    # the sportsbook is case-folded by the handler, so it may share the entry
+    again = client.post('/api/predict', json=dict(bet, market='passing_yards', sportsbook='DRAFTKINGS'))
+    assert again.get_json()['prediction'] == lower
@@ -0,0 +1,66 @@
+"""Tests for the hot-reloadable provider calibration registry."""
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from frontend.calibration_registry import CalibrationRegistry, parse_metrics_filename
+
+
+def _write_metrics(path: Path, brier: float, bins):
+    payload = {
+        'DraftKings': {
+            'brier_score': brier,
+            'n_predictions': sum(n for n, _, _ in bins),
+            'calibration': [{'bin': 'x', 'n': n, 'p_mean': p, 'y_mean': y} for n, p, y in bins]
+            + [{'bin': 'empty', 'n': 0, 'p_mean': None, 'y_mean': None}],
+        }
+    }
+    path.write_text(json.dumps(payload))
+
+
+def test_parse_metrics_filename():
+    assert parse_metrics_filename(Path('2024-12-01_2024-12-31_passing_yards_provider_metrics.json')) == (
+        '2024-12-01_2024-12-31', 'passing_yards')
+    assert parse_metrics_filename(Path('baseline_sample_receiving_yards_provider_metrics.json')) == (
+        'baseline_sample', 'receiving_yards')
+    assert parse_metrics_filename(Path('baseline_sample_passing_yards.json')) is None
+
+
+def test_lookup_interpolates_between_bins():
+    from frontend.calibration_registry import ProviderCalibration
+
+    curve = ProviderCalibration.from_metrics('DraftKings', 'passing_yards', {
+        'brier_score': 0.2,
+        'calibration': [{'n': 5, 'p_mean': 0.6, 'y_mean': 0.7}, {'n': 5, 'p_mean': 0.2, 'y_mean': 0.1}],
+    })
+    assert curve.p_mean.tolist() == [0.2, 0.6]
+    assert np.isclose(curve.lookup(0.4), 0.4)
+    assert curve.lookup(0.0) == 0.1 and curve.lookup(1.0) == 0.7
+    assert np.allclose(curve.lookup(np.array([0.2, 0.6])), [0.1, 0.7])
+
+
+def test_registry_reloads_new_backtests_and_swaps_snapshot(tmp_path):
+    _write_metrics(tmp_path / 'baseline_sample_passing_yards_provider_metrics.json', 0.4, [(3, 0.3, 0.2)])
+    registry = CalibrationRegistry(tmp_path)
+    assert registry.refresh()
+    first = registry.current()
+    assert first.get('draftkings', 'passing_yards').brier_score == 0.4
+
+    # unchanged directory: no new version
+    assert not registry.refresh()
+
+    # a newer backtest for the same market replaces the old curve
+    newer = tmp_path / '2024-12-01_2024-12-31_passing_yards_provider_metrics.json'
+    _write_metrics(newer, 0.1, [(3, 0.3, 0.25), (3, 0.7, 0.8)])
+    future = time.time() + 10
+    os.utime(newer, (future, future))
+    assert registry.refresh()
+    second = registry.current()
+    assert second.version == first.version + 1
+    assert second.get('DraftKings', 'passing_yards').brier_score == 0.1
+    assert second.sources['passing_yards'] == newer.name
+    # the old snapshot object is untouched for readers still holding it
+    assert first.get('draftkings', 'passing_yards').brier_score == 0.4
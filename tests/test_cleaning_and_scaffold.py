@@ -17,6 +17,31 @@ def test_clean_detects_and_diffs():
     assert list(cleaned['WR_RecYds']) == [10, 20, 30, 40]
 
 
+def test_clean_converts_per_player_season():
+    import pandas as pd
+    # two players interleaved by date: rice is season-to-date, kelce per game;
+    # kelce's 2024 season total row has no date
+    df = pd.DataFrame({
+        'player': ['rice', 'kelce'] * 4 + ['kelce'],
+        'Season': [2024] * 9,
+        'Date_qb': ['2024-09-22', '2024-09-22', '2024-09-08', '2024-09-08',
+                    '2024-09-15', '2024-09-15', '2024-09-29', '2024-09-29', None],
+        'WR_RecYds': [130, 40, 50, 90, 80, 60, 210, 30, 220],
+        'Rec': [7, 4, 3, 7, 5, 5, 8, 3, 19],
+        'QB_PassYds': [250, 250, 8, 8, 300, 300, 280, 280, 0],
+    })
+    cleaned, report = cleaner.clean_report(df)
+    rice = cleaned[cleaned['player'] == 'rice'].sort_values('Date_qb')
+    assert list(rice['WR_RecYds']) == [50, 30, 50, 80]
+    assert list(rice['Rec']) == [3, 2, 2, 1]
+    kelce = cleaned[cleaned['player'] == 'kelce'].sort_values('Date_qb')
+    assert list(kelce['WR_RecYds']) == [60, 40, 30]  # week 1 dropped: 90 > 10 x 8
+    assert report['converted'] == {'WR_RecYds': 1, 'Rec': 1}
+    assert report['dropped']['WR_RecYds > 10x QB_PassYds'] == 1
+    assert report['dropped']['no date'] == 1
+    assert report['removed'] == 2
+
+
 def test_fetch_prizepicks_scaffold_loading():
     # Ensure the scaffold functions exist and do not perform network on import
     assert hasattr(fp, 'fetch_unofficial_prizepicks')
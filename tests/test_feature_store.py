@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from scripts.feature_store import FeatureStore
+
+
+def _games(seed=0, weeks=8):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for season in (2024, 2025):
+        for team, players in (('KC', ('rice', 'kelce')), ('LV', ('bowers',))):
+            for player in players:
+                for week in range(1, weeks + 1):
+                    rows.append({'player': player, 'season': season, 'week': week, 'team': team,
+                                 'game_id': f'{season}-{week:02d}-{team}',
+                                 'Tgt': float(rng.integers(2, 12)), 'WR_RecYds': float(rng.integers(0, 140))})
+    df = pd.DataFrame(rows)
+    df.loc[3, 'WR_RecYds'] = np.nan  # a missing stat inside a run
+    return df
+
+
+def _expected(games):
+    df = games.sort_values(['player', 'season', 'week']).reset_index(drop=True)
+    g = df.groupby(['player', 'season'])
+    for s in ('Tgt', 'WR_RecYds'):
+        df[f'{s}_roll3'] = g[s].transform(lambda x: x.rolling(3, min_periods=1).mean())
+        df[f'{s}_ewm4'] = g[s].transform(lambda x: x.ewm(span=4, adjust=False, ignore_na=True).mean())
+        df[f'{s}_share'] = df[s] / df.groupby(['team', 'season', 'week'])[s].transform('sum')
+    return df
+
+
+def _check(store, expected):
+    got = store.frame()
+    cols = [c for c in expected.columns if c.endswith(('_roll3', '_ewm4', '_share'))]
+    assert list(got['player']) == list(expected['player'])
+    np.testing.assert_allclose(got[cols].to_numpy(float), expected[cols].to_numpy(float), equal_nan=True)
+
+
+def test_incremental_updates_match_full_build(tmp_path):
+    games = _games()
+    full = FeatureStore(tmp_path / 'full', shares=['Tgt', 'WR_RecYds'])
+    full.update(games)
+    _check(full, _expected(games))
+
+    store = FeatureStore(tmp_path / 'inc', shares=['Tgt', 'WR_RecYds'])
+    for week in range(1, 9):
+        # nightly runs hand over the whole season so far; only the new week is recomputed
+        summary = store.update(games[games['week'] <= week])
+        assert summary['changed'] == len(games[games['week'] == week])
+    assert store.update(games)['changed'] == 0
+
+    # a stat correction in week 2 recomputes that player's tail and the team-game shares
+    fixed = games.copy()
+    fixed.loc[(fixed['player'] == 'rice') & (fixed['season'] == 2025) & (fixed['week'] == 2), 'Tgt'] = 30.0
+    summary = store.update(fixed)
+    assert summary['changed'] == 1 and summary['groups'] == 1
+    assert summary['written'] == 7 + 1  # rice weeks 2-8, plus kelce's week-2 share
+    _check(store, _expected(fixed))
+
+    assert len(store.segments) > 1
+    store.compact()
+    assert len(store.segments) == 1
+    reopened = FeatureStore(tmp_path / 'inc')
+    _check(reopened, _expected(fixed))
+    latest = reopened.latest(season=2025).set_index('player')
+    assert set(latest.index) == {'rice', 'kelce', 'bowers'} and (latest['week'] == 8).all()
@@ -0,0 +1,58 @@
+import pandas as pd
+
+from scripts.evaluate_nfl import merge_dfs
+from scripts.gamelog_join import KEY, GamelogJoin, from_cache
+
+
+def _schedule():
+    # week 3 is a bye, so the third game is week 4
+    return pd.DataFrame({
+        'Season': [2025] * 5, 'Week': [1, 2, 3, 4, 5],
+        'Date': ['2025-09-07', '2025-09-14', None, '2025-09-28', '2025-10-05'],
+        'Opponent': ['Denver Broncos', 'Buffalo Bills', 'Bye Week', 'Kansas City Chiefs', 'Miami Dolphins'],
+        'PF': [20, 17, None, 31, 24], 'PA': [10, 21, None, 28, 3],
+    })
+
+
+def test_keys_and_multiway_join():
+    join = GamelogJoin()
+    join.add_team(_schedule(), 'LV', columns=['PF', 'PA'])
+    # keyed by date only, by game number only, and by week for the opponent
+    join.add_player(pd.DataFrame({'Date': ['2025-09-14', '2025-09-07', '2025-09-28'],
+                                  'Yds': [250, 300, 180]}), 'qb', 'LV')
+    join.add_player(pd.DataFrame({'G#': [1, 2, 3, 4], 'Yds': [50, 60, 70, 80]}), 'wr', 'LV')
+    join.add_player(pd.DataFrame({'Week': [4], 'Opp': ['LVR'], 'Yds': [99]}), 'kc_wr', 'KC')
+    wide = join.frame(how='outer')
+
+    assert list(wide.index.names) == KEY
+    lv = wide.xs('LV', level='team')
+    assert list(lv.index.get_level_values('week')) == [1, 2, 4, 5]
+    assert list(lv['Yds_qb'].fillna(-1)) == [300, 250, 180, -1]
+    assert list(lv['Yds_wr']) == [50, 60, 70, 80]
+    # both sides of the week 4 game share its id
+    ids = wide.xs(4, level='week').index.get_level_values('game_id')
+    assert set(ids) == {'2025-04-KC-LV'}
+    assert wide.loc[(2025, 4, 'KC', '2025-04-KC-LV'), 'Yds_kc_wr'] == 99
+
+    left = join.frame()
+    assert len(left) == 4 and 'KC' not in left.index.get_level_values('team')
+    assert len(join.frame(how='inner')) == 0
+
+
+def test_merge_dfs_and_cache_roster(tmp_path):
+    team = _schedule()
+    team.to_csv(tmp_path / 'nfl_lv_2025_team.csv', index=False)
+    pd.DataFrame({'Date': ['2025-09-07', '2025-09-14', '2025-09-28'], 'Week': [1, 2, 4],
+                  'QB_PassYds': [300, 250, 180]}).to_csv(tmp_path / 'nfl_lv_geno_smith_2025.csv', index=False)
+    # no key columns at all: aligned by position with the played games
+    pd.DataFrame({'WR_RecYds': [50, 60, 70, 80]}).to_csv(tmp_path / 'nfl_lv_jakobi_meyers_2025.csv', index=False)
+
+    merged = merge_dfs(tmp_path / 'nfl_lv_2025_team.csv', tmp_path / 'nfl_lv_geno_smith_2025.csv',
+                       tmp_path / 'nfl_lv_jakobi_meyers_2025.csv')
+    assert list(merged['QB_PassYds']) == [300, 250, 180]
+    assert list(merged['WR_RecYds']) == [50, 60, 70]
+    assert {'Date_team', 'Date_qb', 'Week_team', 'Week_qb'} <= set(merged.columns)
+
+    roster = from_cache(tmp_path, 2025)
+    assert list(roster.columns) == ['PF', 'PA', 'QB_PassYds', 'WR_RecYds']
+    assert list(roster['WR_RecYds']) == [50, 60, 70, 80]
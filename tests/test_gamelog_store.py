@@ -0,0 +1,106 @@
+"""Tests for incremental, idempotent game-log ingestion."""
+from collections import Counter
+
+import pandas as pd
+
+from scripts import gamelog_store
+from scripts.gamelog_store import GamelogStore, IncrementalIngestor
+
+BASE = 'http://pfr.test'
+TEAM_URL = f'{BASE}/teams/kan/2024.htm'
+QB_URL = f'{BASE}/players/M/MahoPa00/gamelog/2024/'
+WR_URL = f'{BASE}/players/R/RiceRa00/gamelog/2024/'
+
+TEAM_GAMES = [[1, '2024-09-05', 'BAL', 27, 20], [2, '2024-09-15', 'CIN', 26, 25], [3, '2024-09-22', 'ATL', 22, 17]]
+QB_GAMES = [[1, '2024-09-05', 1, 1, 'BAL', 20, 28, 291, 1], [2, '2024-09-15', 2, 2, 'CIN', 18, 25, 151, 1],
+            [3, '2024-09-22', 3, 3, 'ATL', 25, 34, 217, 0]]
+WR_GAMES = [[1, '2024-09-05', 1, 1, 'BAL', 9, 7, 103, 0], [2, '2024-09-15', 2, 2, 'CIN', 12, 12, 103, 1],
+            [3, '2024-09-22', 3, 3, 'ATL', 8, 5, 75, 0]]
+
+
+def _table(table_id, header, rows):
+    head = ''.join(f'<th>{h}</th>' for h in header)
+    body = ''.join('<tr>' + ''.join(f'<td>{"" if v is None else v}</td>' for v in row) + '</tr>' for row in rows)
+    return f'<table id="{table_id}"><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+
+class _Site:
+    """Serves the first ``weeks`` weeks of each page; week ``weeks + 1`` is scheduled but unplayed."""
+
+    def __init__(self):
+        self.weeks = 1
+        self.hits = Counter()
+
+    def fetch(self, url):
+        self.hits[url] += 1
+        n = self.weeks
+        if url == TEAM_URL:
+            rows = TEAM_GAMES[:n] + [[n + 1, '2024-10-01', 'LAC', None, None]]
+            return _table('games', ['Week', 'Date', 'Opp', 'Tm', 'Opp.1'], rows)
+        header = ['Rk', 'Date', 'G#', 'Week', 'Opp']
+        if url == QB_URL:
+            return _table('stats', header + ['Cmp', 'Att', 'Yds', 'TD'], QB_GAMES[:n])
+        return _table('stats', header + ['Tgt', 'Rec', 'Yds', 'TD'], WR_GAMES[:n])
+
+
+PLAYERS = [{'team': 'KC', 'pfr_id': 'MahoPa00', 'name': 'Patrick Mahomes', 'pos': 'QB'},
+           {'team': 'KC', 'pfr_id': 'RiceRa00', 'name': 'Rashee Rice', 'pos': 'WR'}]
+
+
+def test_refresh_fetches_only_new_games_and_is_idempotent(tmp_path):
+    site = _Site()
+    store = GamelogStore(tmp_path / 'gamelogs.sqlite')
+    ingest = IncrementalIngestor(store, out_dir=tmp_path, base_url=BASE, fetch=site.fetch, rate=1000, burst=10)
+
+    first = ingest.refresh(2024, players=PLAYERS)
+    assert first['players_fetched'] == 2 and len(first['changes']) == 3      # team wk1 (wk2 unplayed) + 2 players
+    assert store.mark('team:KC', 2024) == ('01', None)
+
+    # nothing new on the team page: players are not fetched at all
+    quiet = ingest.refresh(2024, players=PLAYERS)
+    assert quiet['players_skipped'] == 2 and quiet['changes'] == []
+    assert site.hits[QB_URL] == 1
+
+    site.weeks = 3
+    weekly = ingest.refresh(2024, players=PLAYERS)
+    assert [(c['entity'], c['game_key'], c['op']) for c in weekly['changes']] == [
+        ('team:KC', '02', 'insert'), ('team:KC', '03', 'insert'),
+        ('player:MahoPa00', '2024-09-15', 'insert'), ('player:MahoPa00', '2024-09-22', 'insert'),
+        ('player:RiceRa00', '2024-09-15', 'insert'), ('player:RiceRa00', '2024-09-22', 'insert')]
+    assert store.changes_since(first['changes'][-1]['seq']) == weekly['changes']
+
+    qb = pd.read_csv(tmp_path / 'nfl_kc_patrick_mahomes_2024.csv')
+    assert qb['QB_PassYds'].tolist() == [291, 151, 217]
+    assert pd.read_csv(tmp_path / 'nfl_kc_2024_team.csv')['PF'].tolist() == [27, 26, 22]
+
+    # a full re-ingest of unchanged pages records nothing; a stat correction is an update
+    assert ingest.refresh(2024, players=PLAYERS, full=True)['changes'] == []
+    QB_GAMES[1][7] = 155
+    try:
+        corrected = ingest.refresh(2024, players=PLAYERS[:1], full=True)['changes']
+    finally:
+        QB_GAMES[1][7] = 151
+    assert [(c['game_key'], c['op'], c['row']['QB_PassYds']) for c in corrected] == [('2024-09-15', 'update', 155)]
+
+
+def test_playoff_rows_are_kept_and_not_reparsed(tmp_path, monkeypatch):
+    games = [[1, '2024-09-05', 'BAL', 27, 20], [18, '2025-01-05', 'DEN', 0, 38],
+             ['Wild Card', '2025-01-18', 'HOU', 23, 14]]
+    store = GamelogStore(tmp_path / 'gamelogs.sqlite')
+    ingest = IncrementalIngestor(store, out_dir=tmp_path, base_url=BASE, rate=1000, burst=10,
+                                 fetch=lambda url: _table('games', ['Week', 'Date', 'Opp', 'Tm', 'Opp.1'], games))
+    changes, week = ingest.refresh_team('KC', 2024)
+    assert [c['game_key'] for c in changes] == ['01', '18', '19'] and week == 19.0
+    assert pd.read_csv(tmp_path / 'nfl_kc_2024_team.csv')['Week'].astype(str).tolist() == ['1', '18', 'Wild Card']
+
+    # later refreshes only parse rounds past the mark
+    parsed = []
+    team_gamelog = gamelog_store.team_gamelog_from_tables
+    monkeypatch.setattr(gamelog_store, 'team_gamelog_from_tables',
+                        lambda tables, season: parsed.append(sum(map(len, tables))) or team_gamelog(tables, season))
+    games.append(['Division', '2025-01-25', 'BUF', 32, 29])
+    changes, week = ingest.refresh_team('KC', 2024)
+    assert [c['game_key'] for c in changes] == ['20'] and week == 20.0
+    assert ingest.refresh_team('KC', 2024) == ([], 20.0)
+    assert parsed == [1, 0]
+    assert len(pd.read_csv(tmp_path / 'nfl_kc_2024_team.csv')) == 4
@@ -0,0 +1,10 @@
+"""Guard against heavy imports creeping back onto the API/CLI startup path."""
+import pytest
+
+from scripts.bench_imports import measure
+
+
+@pytest.mark.parametrize('module', ['frontend.app', 'scripts.backtest_nfl'])
+def test_hot_modules_do_not_import_heavy_dependencies(module):
+    result = measure(module, repeat=1)
+    assert result['heavy'] == []
@@ -0,0 +1,153 @@
+"""Tests for the line-move stream (replay source, coalescing, SSE endpoint)."""
+import json
+
+from frontend.line_stream import LineStreamHub, ReplaySource, Subscription
+
+
+def _quote(line, over=-110, under=-110, book='DraftKings', player='Patrick Mahomes'):
+    return {'player': player, 'market': 'passing_yards', 'book': book,
+            'line': line, 'over': over, 'under': under}
+
+
+def _write_replay(path, snapshots):
+    with open(path, 'w') as f:
+        for quotes in snapshots:
+            f.write(json.dumps({'ts': 'x', 'quotes': quotes}) + '\n')
+    return path
+
+
+def test_hub_emits_snapshot_then_repriced_moves(tmp_path):
+    replay = _write_replay(tmp_path / 'snaps.jsonl', [
+        [_quote(300.5), _quote(299.5, book='FanDuel')],
+        [_quote(300.5), _quote(299.5, book='FanDuel')],   # no change
+        [_quote(310.5, over=-120), _quote(299.5, book='FanDuel')],
+    ])
+    hub = LineStreamHub(ReplaySource(replay), watch=[('Patrick Mahomes', 'passing_yards')])
+    sub = Subscription(coalesce_window=0)
+    hub._subscribers.append(sub)  # drive polls by hand instead of the thread
+
+    first = hub.poll_once()
+    assert [e['type'] for e in first] == ['snapshot', 'snapshot']
+    assert hub.poll_once() == []
+    moves = hub.poll_once()
+    assert len(moves) == 1 and moves[0]['type'] == 'move'
+    move = moves[0]
+    assert move['previous']['line'] == 300.5 and move['line'] == 310.5
+    # projection is the opening consensus (300), so a higher line favours the under
+    assert move['p_hit'] < move['previous']['p_hit']
+    assert move['ev_under'] > move['ev_over']
+
+    batch = sub.next_batch(timeout=0)
+    assert [e['type'] for e in batch] == ['snapshot', 'snapshot']  # move folded into pending snapshot
+    assert {e['book']: e['line'] for e in batch} == {'DraftKings': 310.5, 'FanDuel': 299.5}
+
+
+def test_subscription_coalesces_bursts_and_bounds_pending():
+    sub = Subscription(coalesce_window=0, max_pending=2)
+    move = lambda line, prev: dict(_quote(line), type='move', previous={'line': prev, 'over': -110, 'under': -110})
+    sub.offer([move(301, 300)])
+    sub.offer([move(302, 301)])
+    (event,) = sub.next_batch(timeout=0)
+    assert event['line'] == 302 and event['previous']['line'] == 300
+
+    # a burst that returns to the starting line is dropped
+    sub.offer([move(303, 302)])
+    sub.offer([move(302, 303)])
+    assert sub.next_batch(timeout=0) == []
+
+    # slow client: only the newest max_pending props are kept
+    sub.offer([dict(_quote(1, player=f'P{i}'), type='snapshot') for i in range(5)])
+    batch = sub.next_batch(timeout=0)
+    assert [e['player'] for e in batch] == ['P3', 'P4']
+    assert sub.dropped == 3
+
+
+def test_sse_endpoint_streams_replayed_moves(tmp_path, monkeypatch):
+    import frontend.app as app_module
+
+    replay = _write_replay(tmp_path / 'snaps.jsonl', [
+        [_quote(75.5, player='Travis Kelce') | {'market': 'receiving_yards'}],
+        [_quote(78.5, player='Travis Kelce') | {'market': 'receiving_yards'}],
+    ])
+    hub = LineStreamHub(ReplaySource(replay), poll_interval=0.05, coalesce_window=0)
+    monkeypatch.setattr(app_module, '_LINE_STREAM_HUB', hub)
+
+    client = app_module.app.test_client()
+    resp = client.get('/api/stream/lines?prop=Travis Kelce|receiving_yards&heartbeat=1', buffered=False)
+    assert resp.mimetype == 'text/event-stream'
+    frames = []
+    chunks = iter(resp.response)
+    while len([f for f in frames if f.startswith('event: ')]) < 2:
+        frames += [f for f in next(chunks).decode().split('\n') if f]
+    resp.close()
+    events = [json.loads(f[len('data: '):]) for f in frames if f.startswith('data: ')]
+    assert [e['type'] for e in events][:2] in (['snapshot', 'move'], ['snapshot', 'snapshot'])
+    assert events[-1]['line'] == 78.5
+    hub.stop()
+    assert hub.stats()['subscribers'] == 0
+
+
+def test_stream_heartbeat_is_clamped():
+    from frontend.app import stream_heartbeat
+
+    assert stream_heartbeat(None) == 15
+    assert stream_heartbeat('abc') == 15 and stream_heartbeat('nan') == 15
+    assert stream_heartbeat('0') == 1 and stream_heartbeat('-5') == 1
+    assert stream_heartbeat('1e9') == 60 and stream_heartbeat('inf') == 60
+    assert stream_heartbeat('2.5') == 2.5
+
+
+def test_asgi_stream_is_native_and_leaves_other_routes_free(tmp_path, monkeypatch):
+    import asyncio
+    import time
+
+    import httpx
+
+    import frontend.app as app_module
+    from frontend.asgi import AsyncOddsApp
+
+    replay = _write_replay(tmp_path / 'snaps.jsonl', [
+        [_quote(75.5, player='Travis Kelce') | {'market': 'receiving_yards'}],
+        [_quote(78.5, player='Travis Kelce') | {'market': 'receiving_yards'}],
+    ])
+    hub = LineStreamHub(ReplaySource(replay), poll_interval=0.05, coalesce_window=0)
+    monkeypatch.setattr(app_module, '_LINE_STREAM_HUB', hub)
+    # a single WSGI thread: a stream held on it would block /health
+    asgi_app = AsyncOddsApp(app_module.app, providers=[])
+    asgi_app.wsgi.max_threads = 1
+
+    async def run():
+        sent, disconnect = [], asyncio.Event()
+
+        async def receive():
+            if not sent:
+                return {'type': 'http.request', 'body': b''}
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/stream/lines', 'http_version': '1.1',
+                 'query_string': b'prop=Travis Kelce|receiving_yards&heartbeat=0.01', 'headers': []}
+        stream = asyncio.ensure_future(asgi_app(scope, receive, send))
+        while b'78.5' not in b''.join(m.get('body', b'') for m in sent):
+            await asyncio.sleep(0.02)
+
+        transport = httpx.ASGITransport(app=asgi_app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+            start = time.perf_counter()
+            health = await client.get('/health')
+            elapsed = time.perf_counter() - start
+        disconnect.set()
+        await asyncio.wait_for(stream, 2)
+        await asgi_app.aclose()
+        return sent, health, elapsed
+
+    sent, health, elapsed = asyncio.run(run())
+    hub.stop()
+    assert health.status_code == 200 and elapsed < 1.0
+    assert dict(sent[0]['headers'])[b'content-type'].startswith(b'text/event-stream')
+    body = b''.join(m.get('body', b'') for m in sent).decode()
+    assert 'event: snapshot' in body and ': keepalive' not in body  # heartbeat clamped to 1s
+    assert hub.stats()['subscribers'] == 0
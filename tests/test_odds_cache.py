@@ -0,0 +1,81 @@
+"""Tests for the per-provider odds cache and the shared provider registry."""
+import asyncio
+import time
+
+from frontend.odds_cache import FRESH, MISS, STALE, OddsCache
+from odds import OddsProvider, configured_providers, get_provider
+
+
+class CountingProvider(OddsProvider):
+    def __init__(self, **kwargs):
+        super().__init__('Counting', **kwargs)
+        self.calls = 0
+        self.line = 300.5
+
+    def get_odds(self, player, market):
+        self.calls += 1
+        if player == 'Nobody':
+            return None
+        return {'player': player, 'market': market, 'sportsbooks': {'DK': {'line': self.line}}}
+
+
+def test_lru_ttl_stale_and_negative_states():
+    now = [0.0]
+    cache = OddsCache(max_entries=2, ttl=10, stale_ttl=20, negative_ttl=5, clock=lambda: now[0])
+    cache.store('a', {'v': 1})
+    cache.store('n', None)
+    assert cache.lookup('a')[:2] == (FRESH, {'v': 1})
+    assert cache.lookup('n')[:2] == (FRESH, None)
+    now[0] = 6
+    assert cache.lookup('n')[0] == MISS          # negative entries expire on their own TTL
+    now[0] = 15
+    assert cache.lookup('a')[:2] == (STALE, {'v': 1})
+    now[0] = 31
+    assert cache.lookup('a')[0] == MISS
+    cache.store('x', 1), cache.store('y', 2), cache.store('z', 3)
+    assert 'x' not in cache and len(cache) == 2
+
+
+def test_stale_while_revalidate_refreshes_once_in_background():
+    provider = CountingProvider(cache_ttl=0.05)
+    provider.cache.stale_ttl = 10
+    assert provider.get_odds_cached('Patrick Mahomes', 'passing_yards')['sportsbooks']['DK']['line'] == 300.5
+    assert provider.get_odds_cached('patrick mahomes ', 'PASSING_YARDS') is not None
+    assert provider.calls == 1
+
+    time.sleep(0.06)
+    provider.line = 310.5
+    stale = provider.get_odds_cached('Patrick Mahomes', 'passing_yards')
+    assert stale['sportsbooks']['DK']['line'] == 300.5
+    deadline = time.time() + 2
+    while provider.calls < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.01)
+    assert provider.calls == 2
+    assert provider.get_odds_cached('Patrick Mahomes', 'passing_yards')['sportsbooks']['DK']['line'] == 310.5
+
+    # misses are cached too
+    assert provider.get_odds_cached('Nobody', 'passing_yards') is None
+    assert provider.get_odds_cached('Nobody', 'passing_yards') is None
+    assert provider.calls == 3
+
+    assert asyncio.run(provider.get_odds_cached_async('Patrick Mahomes', 'passing_yards')) is not None
+    assert provider.calls == 3
+
+
+def test_cache_persists_across_restarts(tmp_path):
+    path = tmp_path / 'counting.json'
+    first = CountingProvider(cache_path=path)
+    first.get_odds_cached('Patrick Mahomes', 'passing_yards')
+    first.get_odds_cached('Nobody', 'passing_yards')
+    first.cache.save()
+
+    second = CountingProvider(cache_path=path)
+    assert second.get_odds_cached('Patrick Mahomes', 'passing_yards') is not None
+    assert second.get_odds_cached('Nobody', 'passing_yards') is None
+    assert second.calls == 0
+
+
+def test_registry_shares_one_provider_per_process():
+    assert get_provider('mock') is get_provider('mock')
+    assert configured_providers()[0] is get_provider('mock')
@@ -0,0 +1,45 @@
+"""Tests for the vectorized odds math shared by the API and backtests."""
+import numpy as np
+import pytest
+
+from frontend.app import app
+from scripts import odds_math
+
+
+def test_conversions_match_scalar_definitions_and_keep_nan():
+    american = np.array([-110, +150, -100, +100, np.nan])
+    decimal = odds_math.american_to_decimal(american)
+    assert np.allclose(decimal[:4], [1 + 100 / 110, 2.5, 2.0, 2.0]) and np.isnan(decimal[4])
+    assert np.allclose(odds_math.american_to_implied(american[:2]), [110 / 210, 0.4])
+    assert np.allclose(odds_math.decimal_to_american(decimal[:2]), [-110, 150])
+    assert np.allclose(odds_math.implied_to_american([110 / 210, 0.4]), [-110, 150])
+    assert isinstance(odds_math.american_to_decimal(-110), float)
+
+
+@pytest.mark.parametrize('method', odds_math.VIG_METHODS)
+def test_vig_removal_sums_to_one_and_is_symmetric(method):
+    over, under = odds_math.fair_probabilities([-110, -300, np.nan], [-110, +240, -110], method)
+    assert np.allclose(over[:2] + under[:2], 1.0)
+    assert np.isclose(over[0], 0.5) and np.isnan(over[2])
+    assert over[1] > 0.7
+
+
+def test_power_and_shin_shade_the_longshot_more_than_multiplicative():
+    fav = {m: odds_math.fair_probabilities(-300, +240, m)[0] for m in odds_math.VIG_METHODS}
+    assert fav['multiplicative'] < fav['shin'] < fav['power']
+
+
+def test_consensus_fair_skips_books_without_quotes():
+    over = np.array([[-110, -105, np.nan], [np.nan, np.nan, np.nan]])
+    under = np.array([[-110, -115, np.nan], [np.nan, np.nan, np.nan]])
+    fair = odds_math.consensus_fair(over, under)
+    expected = (0.5 + odds_math.fair_probabilities(-105, -115)[0]) / 2
+    assert np.isclose(fair[0], expected) and np.isnan(fair[1])
+
+
+def test_multi_leg_uses_vectorized_pricing():
+    legs = [{'p_hit': 0.6, 'odds': -110}, {'p_hit': 0.55, 'odds': +120}]
+    body = app.test_client().post('/api/multi-leg', json={'legs': legs}).get_json()['multi_leg']
+    decimal = (1 + 100 / 110) * 2.2
+    assert body['combined_decimal_odds'] == round(decimal, 2)
+    assert body['combined_ev'] == round(0.33 * (decimal - 1) - 0.67, 4)
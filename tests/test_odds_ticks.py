@@ -0,0 +1,85 @@
+"""Tests for the columnar odds tick store."""
+import json
+import os
+
+import numpy as np
+
+from scripts.odds_ticks import TickReader, TickStore, import_replay, writer_store
+
+
+def _fill(store):
+    # DK holds 300.5 for 5 polls then moves to 301.5; FD never moves
+    for i in range(10):
+        line = 300.5 if i < 5 else 301.5
+        store.append(1000 + i, 'DraftKings', 'Patrick Mahomes', 'passing_yards', line, -110, -110)
+        store.append(1000 + i, 'FanDuel', 'Patrick Mahomes', 'passing_yards', 299.5, -105, -115)
+        store.append(1000 + i, 'DraftKings', 'Travis Kelce', 'receiving_yards', 75.5, -110, -110)
+
+
+def test_time_range_and_player_queries_across_segments(tmp_path):
+    store = TickStore(tmp_path, segment_rows=7, flush_seconds=None)
+    _fill(store)
+    assert len(store.segments) == 4 and len(store) == 30   # 2 rows still buffered
+
+    window = store.query(start=1002, end=1004)
+    assert window['ts'].tolist() == [1002] * 3 + [1003] * 3
+    mahomes = store.query(player='patrick mahomes', book='DraftKings')
+    assert mahomes['line'].tolist() == [300.5] * 5 + [301.5] * 5
+    assert store.query(player='Nobody')['ts'].size == 0
+    assert store.decode('player', window['player'][:1]).tolist() == ['Patrick Mahomes']
+
+    reopened = TickStore(tmp_path)
+    store.flush()
+    assert len(TickStore(tmp_path)) == 30 and len(reopened.dictionaries['player']) == 2
+
+
+def test_compaction_drops_repeated_quotes_and_keeps_line_moves(tmp_path):
+    store = TickStore(tmp_path, segment_rows=7, flush_seconds=None)
+    _fill(store)
+    result = store.compact(max_rows=2)
+    assert result['rows_before'] == 30 and result['rows_after'] == 4
+    assert all(s['order'] == 'player' for s in store.segments)
+    moves = store.query(player='Patrick Mahomes', book='DraftKings')
+    assert moves['ts'].tolist() == [1000, 1005] and moves['line'].tolist() == [300.5, 301.5]
+    assert store.query(start=1003)['ts'].tolist() == [1005]
+    frame = TickStore(tmp_path).frame(market='receiving_yards')
+    assert frame['player'].tolist() == ['Travis Kelce'] and np.isclose(frame['line'][0], 75.5)
+
+
+def test_import_replay_snapshots(tmp_path):
+    replay = tmp_path / 'lines.jsonl'
+    quotes = [{'player': 'Patrick Mahomes', 'market': 'passing_yards', 'book': 'DraftKings',
+               'line': 300.5, 'over': -110, 'under': -110}]
+    replay.write_text(json.dumps({'ts': '2025-09-07T12:00:00', 'quotes': quotes}) + '\n')
+    store = TickStore(tmp_path / 'ticks')
+    assert import_replay(store, [replay]) == 1
+    assert store.query(start='2025-09-07T00:00:00')['over'].tolist() == [-110]
+
+
+def test_bulk_append_columns(tmp_path):
+    store = TickStore(tmp_path, segment_rows=2)
+    n = store.append_columns([3, 1, 2], ['DK', 'FD', 'DK'], ['A', 'B', 'A'], ['m', 'm', 'm'],
+                             [1.5, 2.5, 1.5], [-110, -110, -105], [-110, -110, -115])
+    assert n == 3 and len(store.segments) == 2
+    assert store.query(player='a')['over'].tolist() == [-105, -110]
+
+
+def test_forked_writers_record_separately_and_readers_merge(tmp_path):
+    # a root-level store (e.g. imported snapshots) is merged with the writers
+    TickStore(tmp_path).append_columns([1], ['DK'], ['A'], ['m'], [1.5], [-110], [-110])
+    pid = os.fork()
+    if pid == 0:
+        store = writer_store(tmp_path)
+        store.append(3, 'FD', 'A', 'm', 2.5, -105, -115)
+        store.flush()
+        os._exit(0)
+    store = writer_store(tmp_path)
+    store.append(2, 'DK', 'a', 'm', 2.0, -110, -110)
+    store.flush()
+    assert os.waitpid(pid, 0)[1] == 0
+
+    reader = TickReader(tmp_path)
+    assert len(reader.stores) == 3 and len(reader) == 3
+    frame = reader.frame(player='A')
+    assert frame['book'].tolist() == ['DK', 'DK', 'FD'] and frame['line'].tolist() == [1.5, 2.0, 2.5]
+    assert len(TickReader(tmp_path / 'missing').frame()) == 0
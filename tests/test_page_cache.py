@@ -0,0 +1,109 @@
+"""Tests for the compressed PFR page cache and conditional revalidation."""
+import threading
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scripts.fetch_pfr_nfl import _fetch_html
+from scripts.page_cache import PageCache, season_of
+
+CURRENT = datetime.now().year + 1   # a season that can't have finished yet
+
+
+@pytest.fixture
+def site():
+    hits = Counter()
+    not_modified = Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits[self.path] += 1
+            if self.headers.get('If-None-Match') == '"v1"':
+                not_modified[self.path] += 1
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', '"v1"')
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.end_headers()
+            self.wfile.write(f'<html>{self.path}</html>'.encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}', hits, not_modified, server
+    server.shutdown()
+
+
+def test_season_of_urls():
+    assert season_of('https://x/teams/kan/2023.htm') == 2023
+    assert season_of('https://x/teams/kan/2023_roster.htm') == 2023
+    assert season_of('https://x/players/M/MahoPa00/gamelog/2024/') == 2024
+    assert season_of('https://x/players/M/MahoPa00.htm') is None
+
+
+def test_current_season_revalidates_and_past_season_stays_offline(site, tmp_path):
+    base, hits, not_modified, _ = site
+    cache = PageCache(tmp_path)
+    current = f'{base}/teams/kan/{CURRENT}.htm'
+    assert _fetch_html(current, retries=1, cache=cache) == f'<html>/teams/kan/{CURRENT}.htm</html>'
+    assert _fetch_html(current, retries=1, cache=cache).endswith('.htm</html>')
+    assert hits[f'/teams/kan/{CURRENT}.htm'] == 2 and not_modified[f'/teams/kan/{CURRENT}.htm'] == 1
+
+    past = f'{base}/teams/kan/2021.htm'
+    for _ in range(3):
+        assert _fetch_html(past, retries=1, cache=cache) == '<html>/teams/kan/2021.htm</html>'
+    assert hits['/teams/kan/2021.htm'] == 1
+    assert list(tmp_path.rglob('*.html.gz'))
+
+
+def test_offline_mode_and_site_outage_serve_cached_copy(site, tmp_path):
+    base, hits, _, server = site
+    url = f'{base}/players/M/MahoPa00/gamelog/{CURRENT}/'
+    _fetch_html(url, retries=1, cache=PageCache(tmp_path))
+    assert _fetch_html(url, retries=1, cache=PageCache(tmp_path, offline=True)).startswith('<html>')
+    assert hits[f'/players/M/MahoPa00/gamelog/{CURRENT}/'] == 1
+    server.shutdown()
+    server.server_close()
+    assert _fetch_html(url, retries=1, timeout=1, cache=PageCache(tmp_path)).startswith('<html>')
+
+
+def test_throttled_fetch_raises_instead_of_serving_cached_copy(tmp_path):
+    import urllib.error
+
+    status = {'code': 200}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(status['code'])
+            if status['code'] == 429:
+                self.send_header('Retry-After', '600')
+            self.end_headers()
+            if status['code'] == 200:
+                self.wfile.write(b'<html>page</html>')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f'http://127.0.0.1:{server.server_address[1]}/teams/kan/{CURRENT}.htm'
+        cache = PageCache(tmp_path)
+        assert _fetch_html(url, retries=1, cache=cache) == '<html>page</html>'
+        status['code'] = 429
+        with pytest.raises(RuntimeError) as raised:
+            _fetch_html(url, retries=3, backoff=0, cache=cache)
+        assert isinstance(raised.value.__cause__, urllib.error.HTTPError)
+        assert raised.value.__cause__.headers['Retry-After'] == '600'
+        # a server error still falls back to the cached page
+        status['code'] = 503
+        assert _fetch_html(url, retries=1, cache=cache) == '<html>page</html>'
+    finally:
+        server.shutdown()
+        server.server_close()
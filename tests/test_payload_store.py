@@ -0,0 +1,65 @@
+"""Tests for the content-addressed provider payload store."""
+import json
+
+from scripts.cache import get_latest_cache, read_json
+from scripts.normalize_cached_provider import main as normalize_main
+from scripts.payload_store import PayloadStore, import_legacy
+
+NFL = [{'home_team': 'KC', 'away_team': 'BAL', 'commence_time': '2024-09-05T00:20:00Z',
+        'bookmakers': [{'markets': [{'key': 'totals', 'outcomes': [{'name': 'Over', 'price': -110, 'point': 46.5}]}]}]}]
+
+
+def test_identical_payloads_share_one_blob_and_latest_uses_index(tmp_path):
+    store = PayloadStore(tmp_path)
+    first = store.put('theoddsapi', NFL, {'sport': 'nfl'}, ts=100)
+    again = store.put('theoddsapi', json.loads(json.dumps(NFL)), {'sport': 'nfl'}, ts=200)
+    store.put('theoddsapi', [], {'sport': 'nba'}, ts=300)
+    store.put('opticodds', {'projections': []}, ts=250)
+    assert first['hash'] == again['hash'] and first['new_blob'] and not again['new_blob']
+    assert store.stats()['fetches'] == 4 and store.stats()['blobs'] == 3
+    assert store.latest('theoddsapi')['params'] == {'sport': 'nba'}
+    assert store.latest('theoddsapi', {'sport': 'nfl'})['ts'] == 200
+    assert store.load_latest('theoddsapi', {'sport': 'nfl'}) == NFL
+    assert [e['ts'] for e in store.between(150, 300)] == [200, 250]
+    assert store.latest('betstamp') is None
+    plan = store._db.execute('EXPLAIN QUERY PLAN ' + store._select(['provider = ?', 'params_key = ?'])
+                             + ' ORDER BY ts DESC, id DESC LIMIT 1', ('theoddsapi', '{}')).fetchall()
+    assert 'fetches_key_ts' in str(plan)
+
+    # a second writer (another worker) sharing the root doesn't trip over the existing blob
+    other = PayloadStore(tmp_path)
+    assert not other.put('theoddsapi', NFL, {'sport': 'nfl'}, ts=400)['new_blob']
+    store.blob_path(first['hash']).unlink()
+    assert not other.put('theoddsapi', NFL, {'sport': 'nfl'}, ts=500)['new_blob']
+    assert store.load_latest('theoddsapi', {'sport': 'nfl'}) == NFL
+
+
+def test_retention_policies_drop_fetches_and_orphaned_blobs(tmp_path):
+    store = PayloadStore(tmp_path)
+    for ts in range(10):
+        store.put('theoddsapi', {'tick': ts, 'pad': 'x' * 2000}, ts=ts * 86400.0)
+    assert store.evict(keep_per_key=8)['fetches'] == 2
+    removed = store.evict(max_age_days=3, now=10 * 86400.0)
+    assert removed['fetches'] == 5 and store.stats()['fetches'] == 3
+    assert len(list((tmp_path / 'blobs').rglob('*.json.gz'))) == 3
+    one_blob = store.stats()['bytes'] // 3
+    bounded = PayloadStore(tmp_path, max_bytes=one_blob * 2)
+    bounded.put('theoddsapi', {'tick': 99, 'pad': 'y' * 2000}, ts=11 * 86400.0)
+    assert bounded.stats()['bytes'] <= one_blob * 2 + 64
+    assert bounded.latest('theoddsapi')['ts'] == 11 * 86400.0
+
+
+def test_legacy_files_import_and_normalize_from_store(tmp_path):
+    legacy = tmp_path / 'legacy'
+    legacy.mkdir()
+    for ts in (1700000000, 1700000100):
+        (legacy / f'provider_theoddsapi.{ts}.json').write_text(json.dumps(NFL))
+    store = PayloadStore(tmp_path / 'store')
+    assert import_legacy(store, legacy.glob('*.json')) == 2
+    assert store.stats()['blobs'] == 1 and store.latest()['ts'] == 1700000100
+    store.close()
+
+    path = get_latest_cache(tmp_path / 'store', 'provider_theoddsapi')
+    assert read_json(path) == NFL
+    out = normalize_main(None, str(tmp_path / 'store'), str(tmp_path / 'out'))
+    assert out.name == 'theoddsapi_normalized.csv' and out.read_text().count('\n') == 2
@@ -0,0 +1,153 @@
+"""Tests for the rate-limited, resumable PFR crawler against a local stand-in site."""
+import threading
+import time
+import urllib.error
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from scripts.page_cache import PageCache
+from scripts.pfr_crawler import DONE, FAILED, PENDING, JobLedger, PFRCrawler, TokenBucket, _retry_after, parse_roster
+
+
+def _table(table_id, header, rows):
+    head = ''.join(f'<th>{h}</th>' for h in header)
+    body = ''.join('<tr>' + ''.join(f'<td>{v}</td>' for v in row) + '</tr>' for row in rows)
+    return (f'<table id="{table_id}"><thead><tr><th colspan="{len(header)}">Over</th></tr>'
+            f'<tr>{head}</tr></thead><tbody>{body}</tbody></table>')
+
+
+TEAM_PAGE = '<html><body>' + _table('games', ['Week', 'Date', 'Opp', 'Tm', 'Opp.1'],
+                                    [[1, '2024-09-05', 'BAL', 27, 20], [2, '2024-09-15', 'CIN', 26, 25]]) + '</body></html>'
+ROSTER_PAGE = '''<html><body><div><!--
+<table id="roster"><tbody>
+<tr><td data-stat="player"><a href="/players/M/MahoPa00.htm">Patrick Mahomes</a></td><td data-stat="pos">QB</td></tr>
+<tr><td data-stat="player"><a href="/players/R/RiceRa00.htm">Rashee Rice</a></td><td data-stat="pos">WR</td></tr>
+<tr><td data-stat="player"><a href="/players/K/KelcTr00.htm">Travis Kelce</a></td><td data-stat="pos">TE</td></tr>
+<tr><td data-stat="player"><a href="/players/P/PachIs00.htm">Isiah Pacheco</a></td><td data-stat="pos">RB</td></tr>
+<tr><td data-stat="player"><a href="/players/B/ButkHa00.htm">Harrison Butker</a></td><td data-stat="pos">K</td></tr>
+</tbody></table>
+--></div></body></html>'''
+QB_PAGE = '<html><body>' + _table('stats', ['Rk', 'Date', 'G#', 'Week', 'Opp', 'Cmp', 'Att', 'Yds', 'TD'],
+                                  [[1, '2024-09-05', 1, 1, 'BAL', 20, 28, 291, 1]]) + '</body></html>'
+WR_PAGE = '<html><body>' + _table('stats', ['Rk', 'Date', 'G#', 'Week', 'Opp', 'Tgt', 'Rec', 'Yds', 'TD'],
+                                  [[1, '2024-09-05', 1, 1, 'BAL', 9, 7, 103, 0]]) + '</body></html>'
+RB_PAGE = '<html><body>' + _table('rushing_and_receiving',
+                                  ['Rk', 'Date', 'G#', 'Week', 'Opp', 'Att', 'Yds', 'TD', 'Tgt', 'Rec', 'Yds', 'TD'],
+                                  [[1, '2024-09-05', 1, 1, 'BAL', 15, 64, 1, 3, 2, 11, 0]]) + '</body></html>'
+
+
+class _StandIn:
+    """Tiny PFR look-alike: fixed pages, a 429 on first hit of one URL, 404 for Kelce."""
+
+    def __init__(self):
+        self.hits = Counter()
+        pages = {
+            '/teams/kan/2024.htm': TEAM_PAGE,
+            '/teams/kan/2024_roster.htm': ROSTER_PAGE,
+            '/players/M/MahoPa00/gamelog/2024/': QB_PAGE,
+            '/players/R/RiceRa00/gamelog/2024/': WR_PAGE,
+            '/players/P/PachIs00/gamelog/2024/': RB_PAGE,
+        }
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in.hits[self.path] += 1
+                if self.path == '/players/R/RiceRa00/gamelog/2024/' and stand_in.hits[self.path] == 1:
+                    self.send_response(429)
+                    self.send_header('Retry-After', '0')
+                    self.end_headers()
+                    return
+                body = pages.get(self.path)
+                self.send_response(200 if body else 404)
+                self.end_headers()
+                if body:
+                    self.wfile.write(body.encode())
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def stand_in():
+    site = _StandIn()
+    yield site
+    site.server.shutdown()
+
+
+def test_token_bucket_spaces_requests():
+    now = [0.0]
+    slept = []
+
+    def sleep(s):
+        slept.append(s)
+        now[0] += s
+
+    bucket = TokenBucket(rate=2.0, capacity=1.0, clock=lambda: now[0], sleep=sleep)
+    waits = [bucket.acquire() for _ in range(3)]
+    assert waits == [0.0, 0.5, 0.5]
+    bucket.pause(3.0)
+    assert bucket.acquire() == pytest.approx(3.5)
+
+
+def test_parse_roster_finds_commented_rows():
+    assert parse_roster(ROSTER_PAGE)[:2] == [('MahoPa00', 'Patrick Mahomes', 'QB'), ('RiceRa00', 'Rashee Rice', 'WR')]
+
+
+def test_crawl_resumes_from_ledger_without_refetching(stand_in, tmp_path):
+    ledger = JobLedger(tmp_path / 'crawl.sqlite')
+    cache = PageCache(tmp_path / 'html')
+    crawler = PFRCrawler(ledger, out_dir=tmp_path, base_url=stand_in.url, rate=1000, burst=10, workers=2,
+                         cache=cache)
+    assert crawler.seed([2024], ['KC']) == 2
+    crawler.run(max_jobs=2)                       # "interrupted" after team + roster
+    ledger.close()
+
+    ledger = JobLedger(tmp_path / 'crawl.sqlite')
+    resumed = PFRCrawler(ledger, out_dir=tmp_path, base_url=stand_in.url, rate=1000, burst=10, workers=2,
+                         retry_backoff=0.05, cache=cache)
+    assert resumed.seed([2024], ['KC']) == 0      # re-seeding is idempotent
+    counts = resumed.run()
+    assert counts == {DONE: 5, FAILED: 1}         # Kelce's page 404s; the kicker is never queued
+    assert [j['key'] for j in ledger.jobs(FAILED)] == ['player:KelcTr00:2024']
+    assert stand_in.hits['/teams/kan/2024.htm'] == 1
+    assert stand_in.hits['/players/M/MahoPa00/gamelog/2024/'] == 1
+    assert stand_in.hits['/players/R/RiceRa00/gamelog/2024/'] == 2   # 429 then retried
+    assert stand_in.hits['/players/K/KelcTr00/gamelog/2024/'] == 1   # 404 is not retried
+
+    qb = pd.read_csv(tmp_path / 'nfl_kc_patrick_mahomes_2024.csv')
+    assert qb['QB_PassYds'].tolist() == [291]
+    assert pd.read_csv(tmp_path / 'nfl_kc_rashee_rice_2024.csv')['WR_RecYds'].tolist() == [103]
+    rb = pd.read_csv(tmp_path / 'nfl_kc_isiah_pacheco_2024.csv')
+    assert rb[['RB_RushYds', 'RB_RushTD', 'Att']].values.tolist() == [[64, 1, 15]]
+    assert pd.read_csv(tmp_path / 'nfl_kc_2024_team.csv')['PF'].tolist() == [27, 26]
+
+
+def test_retried_jobs_back_off_before_they_are_claimed_again(tmp_path):
+    ledger = JobLedger(tmp_path / 'crawl.sqlite')
+    ledger.add('team:KC:2024', 'team', {'team': 'KC', 'season': 2024})
+    key = ledger.claim()[0]
+    ledger.fail(key, 'HTTPError: 503', retry=True, delay=60)
+    assert ledger.claim() is None
+    assert ledger.next_due() == pytest.approx(time.time() + 60, abs=5)
+    assert ledger.retry_failed() == 0 and ledger.counts() == {PENDING: 1}
+
+    ledger.fail(key, 'HTTPError: 503', retry=True, delay=0)
+    assert ledger.claim()[3] == 2
+
+
+def test_crawler_honours_http_date_retry_after():
+    error = urllib.error.HTTPError('http://x', 429, 'Too Many Requests',
+                                   {'Retry-After': formatdate(time.time() + 30, usegmt=True)}, None)
+    wrapped = RuntimeError('fetch failed')
+    wrapped.__cause__ = error
+    assert 28 < _retry_after(wrapped, 5.0) <= 30
+    assert _retry_after(RuntimeError('timed out'), 5.0) == 5.0
@@ -0,0 +1,43 @@
+"""Tests for targeted, id-based PFR table extraction."""
+import pandas as pd
+
+from scripts.fetch_pfr_nfl import PLAYER_GAMELOG_TABLE_IDS, _gamelog_tables, qb_gamelog_from_tables
+from scripts.pfr_tables import extract_table, find_table_html
+
+GAMELOG = '''<html><body>
+<table id="last5"><thead><tr><th>Date</th><th>Yds</th></tr></thead><tbody><tr><td>x</td><td>1</td></tr></tbody></table>
+<div class="placeholder"></div><!--
+<table class="stats_table" id="stats">
+<thead>
+<tr class="over_header"><th colspan="5"></th><th colspan="4">Passing</th></tr>
+<tr><th>Rk</th><th>Date</th><th>G#</th><th>Week</th><th></th><th>Cmp</th><th>Att</th><th>Yds</th><th>TD</th></tr>
+</thead>
+<tbody>
+<tr><th>1</th><td>2024-09-05</td><td>1</td><td>1</td><td></td><td>20</td><td>28</td><td>1,291</td><td>1</td></tr>
+<tr class="thead"><th>Rk</th><th>Date</th><th>G#</th><th>Week</th><th></th><th>Cmp</th><th>Att</th><th>Yds</th><th>TD</th></tr>
+<tr><th>2</th><td>2024-09-15</td><td>2</td><td>2</td><td>@</td><td>18</td><td>25</td><td>151</td><td></td></tr>
+<tr><th>3</th><td>2024-09-22</td><td colspan="3">Did Not Play</td><td></td><td></td><td></td><td></td></tr>
+</tbody>
+<tfoot><tr><th></th><td colspan="4">Season</td><td>38</td><td>53</td><td>1442</td><td>1</td></tr></tfoot>
+</table>
+--></body></html>'''
+
+
+def test_extracts_commented_table_by_id_with_typed_columns():
+    df = extract_table(GAMELOG, 'stats')
+    assert list(df.columns) == ['Rk', 'Date', 'G#', 'Week', 'Unnamed: 4', 'Cmp', 'Att', 'Yds', 'TD']
+    assert df['Rk'].tolist() == [1, 2, 3]                      # repeated header row and tfoot dropped
+    assert df['Yds'].iloc[:2].tolist() == [1291, 151]           # thousands separator stripped
+    assert pd.api.types.is_numeric_dtype(df['Cmp']) and pd.isna(df.loc[2, 'Cmp'])
+    assert df['Unnamed: 4'].iloc[1] == '@' and pd.isna(df['Unnamed: 4'].iloc[0])
+    assert df.loc[2, 'G#'] == 'Did Not Play'                     # colspan cells fill every column they cover
+    assert extract_table(GAMELOG, 'stats', include_footer=True)['Yds'].iloc[-1] == 1442
+    assert extract_table(GAMELOG, 'passing') is None
+    assert find_table_html(GAMELOG, 'last5').endswith('</table>')
+
+
+def test_gamelog_tables_feed_existing_parsers():
+    tables = _gamelog_tables(GAMELOG, PLAYER_GAMELOG_TABLE_IDS)
+    assert len(tables) == 1                                      # the unrelated 'last5' table is skipped
+    qb = qb_gamelog_from_tables(tables)
+    assert qb['QB_PassYds'].iloc[:2].tolist() == [1291, 151] and pd.isna(qb['QB_PassYds'].iloc[2])
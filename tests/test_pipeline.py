@@ -0,0 +1,113 @@
+import shutil
+import sys
+import time
+from pathlib import Path
+
+from scripts.pipeline import PipelineRunner, Stage, default_pipeline, format_report
+
+CALLS = []
+
+
+def _concat(inputs, out, delay=0.0, fail=False):
+    CALLS.append(Path(out).name)
+    time.sleep(delay)
+    if fail:
+        raise RuntimeError('boom')
+    Path(out).write_text(''.join(Path(p).read_text() for p in inputs).upper())
+
+
+def _stages(d, delay=0.25, fail_b=False):
+    p = {name: str(d / name) for name in ('src.txt', 'src2.txt', 'a.txt', 'b.txt', 'c.txt', 'd.txt')}
+    return [
+        Stage('d', _concat, [p['b.txt'], p['c.txt']], [p['d.txt']], {'inputs': [p['b.txt'], p['c.txt']], 'out': p['d.txt']}),
+        Stage('a', _concat, [p['src.txt']], [p['a.txt']], {'inputs': [p['src.txt']], 'out': p['a.txt'], 'delay': delay}),
+        Stage('b', _concat, [p['a.txt']], [p['b.txt']], {'inputs': [p['a.txt']], 'out': p['b.txt'], 'fail': fail_b}),
+        Stage('c', _concat, [str(d / 'src*.txt')], [p['c.txt']],
+              {'inputs': [p['src2.txt']], 'out': p['c.txt'], 'delay': delay}),
+    ]
+
+
+def _statuses(report):
+    return {r['stage']: r['status'] for r in report}
+
+
+def test_runner_skips_unchanged_and_reruns_dependents(tmp_path):
+    (tmp_path / 'src.txt').write_text('x')
+    (tmp_path / 'src2.txt').write_text('y')
+    state = tmp_path / 'state.json'
+
+    runner = PipelineRunner(_stages(tmp_path), state)
+    assert runner.deps == {'a': [], 'b': ['a'], 'c': [], 'd': ['b', 'c']}
+    assert runner.order.index('d') == 3
+    report = runner.run()
+    assert set(_statuses(report).values()) == {'ran'}
+    # a and c are independent branches and sleep concurrently
+    assert runner.wall_seconds < 0.45
+    assert (tmp_path / 'd.txt').read_text() == 'XY'
+    assert 'wall' in format_report(report, runner.wall_seconds)
+
+    CALLS.clear()
+    assert set(_statuses(PipelineRunner(_stages(tmp_path), state).run()).values()) == {'skipped'}
+    assert CALLS == []
+
+    # a rewrite with identical content (new mtime) is still a skip
+    (tmp_path / 'src.txt').write_text('x')
+    (tmp_path / 'src2.txt').write_text('z')
+    runner = PipelineRunner(_stages(tmp_path), state)
+    assert _statuses(runner.plan()) == {'a': 'skip', 'b': 'skip', 'c': 'run', 'd': 'run'}
+    assert _statuses(runner.run()) == {'a': 'skipped', 'b': 'skipped', 'c': 'ran', 'd': 'ran'}
+    assert (tmp_path / 'd.txt').read_text() == 'XZ'
+
+    # a deleted output is rebuilt; a forced stage reruns
+    (tmp_path / 'b.txt').unlink()
+    assert _statuses(PipelineRunner(_stages(tmp_path), state).run(force=['c'])) == \
+        {'a': 'skipped', 'b': 'ran', 'c': 'ran', 'd': 'skipped'}
+
+
+def test_failed_stage_blocks_only_its_dependents(tmp_path):
+    (tmp_path / 'src.txt').write_text('x')
+    (tmp_path / 'src2.txt').write_text('y')
+    report = PipelineRunner(_stages(tmp_path, fail_b=True), tmp_path / 'state.json').run()
+    assert _statuses(report) == {'a': 'ran', 'b': 'failed', 'c': 'ran', 'd': 'blocked'}
+    assert 'boom' in next(r['error'] for r in report if r['stage'] == 'b')
+
+
+def test_default_pipeline_runs_end_to_end_on_the_fixture(tmp_path):
+    cache = Path('data/cache')
+    for name in ('nfl_kc_2025_team.csv', 'nfl_kc_mahomes_2025.csv', 'nfl_kc_rashee_rice_2025.csv',
+                 'merged_eval.csv'):
+        shutil.copy(cache / name, tmp_path / name)
+    fixture = (tmp_path / 'merged_eval.csv').read_bytes()
+    stages = default_pipeline(2025, tmp_path, start='2024-09-01', end='2024-12-31', fetch=False)
+
+    runner = PipelineRunner(stages, tmp_path / 'state.json')
+    assert runner.deps['backtest'] == []
+    report = runner.run()
+    assert _statuses(report) == {name: 'ran' for name in runner.order}, format_report(report)
+    assert (tmp_path / 'merged_eval.csv').read_bytes() == fixture
+    assert (tmp_path / 'merged_eval_2025.csv').exists() and (tmp_path / 'features_2025.csv').exists()
+    assert (tmp_path / 'backtests' / '2024-09-01_2024-12-31_summary.json').exists()
+
+    report = PipelineRunner(stages, tmp_path / 'state.json').run()
+    assert set(_statuses(report).values()) == {'skipped'}
+
+
+def test_stage_key_covers_transitively_imported_code(tmp_path, monkeypatch):
+    pkg = tmp_path / 'scripts'
+    pkg.mkdir()
+    (pkg / '__init__.py').write_text('')
+    (pkg / 'stage_mod.py').write_text('from . import helper_a\n\ndef main():\n    pass\n')
+    (pkg / 'helper_a.py').write_text('def f():\n    from scripts.helper_b import g\n')
+    (pkg / 'helper_b.py').write_text('X = 1\n')
+    (pkg / 'unrelated.py').write_text('Y = 1\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'scripts')
+    for name in [m for m in sys.modules if m.startswith('scripts.')]:
+        monkeypatch.delitem(sys.modules, name)
+
+    stage = Stage('s', 'scripts.stage_mod:main')
+    key = PipelineRunner([stage], tmp_path / 'state.json')._key(stage)
+    (pkg / 'unrelated.py').write_text('Y = 2\n')
+    assert PipelineRunner([stage], tmp_path / 'state.json')._key(stage) == key
+    (pkg / 'helper_b.py').write_text('X = 2\n')
+    assert PipelineRunner([stage], tmp_path / 'state.json')._key(stage) != key
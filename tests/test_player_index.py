@@ -0,0 +1,68 @@
+"""Tests for the player autocomplete index."""
+import random
+import string
+import time
+
+from frontend.player_index import PlayerIndex, collect_players, load_or_build, normalize_name
+
+
+def test_normalize_name():
+    assert normalize_name("Ja'Marr Chase") == 'jamarr chase'
+    assert normalize_name('Amon-Ra St. Brown') == 'amon ra st brown'
+    assert normalize_name('  José   Ramírez ') == 'jose ramirez'
+
+
+def test_prefix_on_any_token_ranked_by_popularity_and_fuzzy_fallback(tmp_path):
+    index = PlayerIndex.build({
+        'Patrick Mahomes': 50, 'Travis Kelce': 40, 'Travis Etienne': 60,
+        "Ja'Marr Chase": 30, 'Mack Hollins': 5,
+    })
+    index = PlayerIndex.load(index.save(tmp_path / 'idx'))
+    assert index.search('trav') == ['Travis Etienne', 'Travis Kelce']
+    assert index.search('mahomes') == ['Patrick Mahomes']
+    assert index.search('jamar') == ["Ja'Marr Chase"]
+    assert index.search('ma')[:2] == ['Patrick Mahomes', 'Mack Hollins']
+    # typo: no prefix match, trigram match still finds him
+    assert index.search('mahomse')[0] == 'Patrick Mahomes'
+    assert index.search('')[:1] == ['Travis Etienne']
+    assert index.search('zzzz') == []
+
+
+def test_collect_players_from_gamelogs_folds_surname_slugs(tmp_path):
+    (tmp_path / 'nfl_kc_mahomes_2023.csv').write_text('Date,QB_PassYds\n2023-09-07,226\n2023-09-17,305\n')
+    (tmp_path / 'nfl_kc_rashee_rice_2023.csv').write_text('WR_RecYds\n454\n')
+    (tmp_path / 'nfl_kc_2023_team.csv').write_text('Season,Week\n2023,1\n')
+    players = collect_players(tmp_path, mapping_path=tmp_path / 'none.csv', featured=['Patrick Mahomes'])
+    assert players == {'Patrick Mahomes': 1002, 'Rashee Rice': 1}
+
+    index = load_or_build(tmp_path / 'idx', tmp_path, featured=['Patrick Mahomes'])
+    assert index.search('ric') == ['Rashee Rice']
+    assert (tmp_path / 'idx' / 'manifest.json').exists()
+
+    # a truncated array (crash mid-write by an older build) is rebuilt, not served
+    keys = tmp_path / 'idx' / 'keys.npy'
+    keys.write_bytes(keys.read_bytes()[:-8])
+    assert load_or_build(tmp_path / 'idx', tmp_path, featured=['Patrick Mahomes']).search('ric') == ['Rashee Rice']
+    assert load_or_build(tmp_path / 'idx', tmp_path).search('mah') == ['Patrick Mahomes']   # loaded as saved
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_dir()) == ['idx']
+
+
+def test_keystroke_search_is_fast_on_large_roster(tmp_path):
+    rng = random.Random(0)
+
+    def word():
+        return rng.choice(string.ascii_uppercase) + ''.join(
+            rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+
+    index = PlayerIndex.build({f'{word()} {word()}': rng.randint(1, 300) for _ in range(12000)})
+    index = PlayerIndex.load(index.save(tmp_path / 'idx'))
+    queries = ['a', 'ma', 'mah', 'maho', 'mahomse', 'xqzzy']
+    for q in queries:
+        index.search(q)
+    start = time.perf_counter()
+    for _ in range(50):
+        for q in queries:
+            index.search(q)
+    per_query = (time.perf_counter() - start) / (50 * len(queries))
+    # budget is 1ms per keystroke; leave headroom for slow CI machines
+    assert per_query < 0.005
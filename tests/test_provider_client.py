@@ -0,0 +1,62 @@
+"""Tests for pooled, rate-limited provider clients against the local stub provider."""
+import time
+from email.utils import formatdate
+
+import pytest
+
+from scripts.fetch_prizepicks import fetch_batch, fetch_from_provider, normalize_provider_response
+from scripts.provider_client import ProviderClient, QuotaExhausted, batch_params
+from scripts.rate_limit import retry_after
+from scripts.stub_provider_server import StubProviderServer
+
+SPORTS = ['americanfootball_nfl', 'basketball_nba', 'baseball_mlb', 'icehockey_nhl']
+
+
+def test_batch_params_is_a_cartesian_product():
+    sets = batch_params(sports=['nfl', 'nba'], dates=['2025-09-07', '2025-09-08'], region='us')
+    assert len(sets) == 4 and sets[0] == {'region': 'us', 'sport': 'nfl', 'date': '2025-09-07'}
+    assert batch_params() == [{}]
+
+
+def test_batch_runs_concurrently_over_reused_connections():
+    with StubProviderServer(delay=0.2, quota=100) as stub:
+        client = ProviderClient('theoddsapi', 'test', base_url=stub.base_url, rate=100, burst=10, pool_size=4)
+        started = time.perf_counter()
+        results = client.fetch_many(batch_params(sports=SPORTS))
+        assert time.perf_counter() - started < 0.6          # serial would take >= 0.8s
+        assert [r['error'] for r in results] == [None] * 4
+        assert [r['data'][0]['sport_key'] for r in results] == SPORTS
+        client.fetch_many(batch_params(sports=SPORTS))
+        assert stub.requests == 8 and len(stub.connections) <= 4   # second batch rides the same sockets
+        assert client.remaining == 92 and client.used == 8
+        client.close()
+
+
+def test_quota_headers_stop_requests_at_reserve():
+    with StubProviderServer(quota=3) as stub:
+        client = ProviderClient('theoddsapi', 'test', base_url=stub.base_url, rate=100, burst=10, reserve=1)
+        results = client.fetch_many(batch_params(sports=SPORTS), max_workers=1)
+        assert [r['error'] is None for r in results] == [True, True, False, False]
+        assert 'requests left' in results[2]['error']
+        assert stub.requests == 2
+        with pytest.raises(QuotaExhausted):
+            ProviderClient('betstamp', 'test', base_url=stub.base_url, max_requests=0).fetch()
+
+
+def test_throttled_requests_are_retried_and_helpers_normalize():
+    with StubProviderServer(throttle=1) as stub:
+        data = fetch_from_provider('theoddsapi', 'test', {'sport': 'basketball_nba'}, base_url=stub.base_url)
+        assert stub.requests == 2
+        df = normalize_provider_response('theoddsapi', data)
+        assert len(df) == 6 and df['Projection'].between(0, 1).all()
+        results = fetch_batch('opticodds', 'test', [{'date': '2025-09-07'}, {'date': '2025-09-08'}],
+                              base_url=stub.base_url)
+        assert all(len(r['data']['projections']) == 5 for r in results)
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    assert retry_after({'Retry-After': '3'}, 1.0) == 3.0
+    assert 28 < retry_after({'Retry-After': formatdate(time.time() + 30, usegmt=True)}, 1.0) <= 30
+    assert retry_after({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}, 1.0) == 0.0
+    assert retry_after({'Retry-After': 'soon'}, 2.0) == 2.0
+    assert retry_after({}, 4.0) == 4.0
@@ -0,0 +1,76 @@
+"""Tests for the frontend response cache."""
+import threading
+import time
+
+from frontend.response_cache import ResponseCache, normalize_params
+
+
+def test_normalize_params_only_folds_the_fields_the_handler_folds():
+    a = normalize_params({'player': 'Patrick Mahomes', 'sportsbook': 'DraftKings', 'odds': '-110', 'x': None},
+                         fold_case=('sportsbook',), numeric=('odds',))
+    b = normalize_params({'odds': -110.0, 'sportsbook': 'draftkings', 'player': 'Patrick Mahomes'},
+                         fold_case=('sportsbook',), numeric=('odds',))
+    assert a == b
+    assert normalize_params({'market': 'PASSING_YARDS'}) != normalize_params({'market': 'passing_yards'})
+    assert normalize_params({'player': '300'}) != normalize_params({'player': 300})
+    assert normalize_params({'sportsbook': 'dk '}, fold_case=('sportsbook',)) != \
+        normalize_params({'sportsbook': 'dk'}, fold_case=('sportsbook',))
+
+
+def test_ttl_and_lru_eviction():
+    now = [0.0]
+    cache = ResponseCache(max_entries=2, ttls={'odds': 10.0}, clock=lambda: now[0])
+    calls = []
+
+    def compute(v):
+        calls.append(v)
+        return v
+
+    assert cache.get_or_compute('odds', 'a', lambda: compute('a')) == 'a'
+    assert cache.get_or_compute('odds', 'a', lambda: compute('a')) == 'a'
+    assert calls == ['a']
+
+    # expire the entry
+    now[0] = 11.0
+    cache.get_or_compute('odds', 'a', lambda: compute('a'))
+    assert calls == ['a', 'a']
+
+    # third key evicts the least recently used one
+    cache.get_or_compute('odds', 'b', lambda: compute('b'))
+    cache.get_or_compute('odds', 'c', lambda: compute('c'))
+    assert cache.get('odds', 'a') == (False, None)
+    stats = cache.stats()['endpoints']['odds']
+    assert stats['hits'] == 1 and stats['misses'] == 4 and stats['evictions'] == 1
+
+
+def test_single_flight_coalesces_concurrent_misses():
+    cache = ResponseCache()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return 42
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('predict', 'k', slow)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [42] * 8
+    assert len(calls) == 1
+
+
+def test_odds_endpoint_uses_shared_cache():
+    from frontend.app import app, RESPONSE_CACHE
+
+    RESPONSE_CACHE.invalidate()
+    client = app.test_client()
+    before = RESPONSE_CACHE.stats()['endpoints'].get('odds', {}).get('hits', 0)
+    for _ in range(3):
+        resp = client.get('/api/odds?player=Patrick%20Mahomes&market=passing_yards')
+        assert resp.status_code == 200
+    stats = client.get('/api/cache/stats').get_json()
+    assert stats['endpoints']['odds']['hits'] - before == 2
@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from scripts import schema
+
+
+def test_parse_reports_violations_and_typed_copy_round_trips(tmp_path):
+    raw = pd.DataFrame({
+        'Season': ['2025', '2025', '2025'],
+        'Date_qb': ['2025-09-05', 'not a date', '2025-09-14'],
+        'Opp': ['LAC', 'PHI', None],
+        'QB_PassYds': ['1,258', '240', 'bye'],
+        'Rec': [4, -1, 7],
+        'note': ['a', 'b', 'c'],
+    })
+    df, violations = schema.get('merged_eval').parse(raw.copy())
+    assert df['QB_PassYds'].tolist()[:2] == [1258.0, 240.0] and np.isnan(df['QB_PassYds'][2])
+    assert str(df['Season'].dtype) == 'Int64' and df['Date_qb'].isna().tolist() == [False, True, False]
+    found = {(v['column'], v['rule']): v['rows'] for v in violations}
+    assert found == {('Date_qb', 'not date'): [1], ('QB_PassYds', 'not float'): [2], ('Rec', '< 0'): [1]}
+
+    # an already typed frame is not parsed again; only the range check remains
+    dtypes = df.dtypes.copy()
+    _, again = schema.get('merged_eval').parse(df)
+    assert df.dtypes.equals(dtypes)
+    assert [(v['column'], v['rule']) for v in again] == [('Rec', '< 0')]
+
+    csv = tmp_path / 'merged_eval.csv'
+    schema.write('merged_eval', df, csv)
+    assert (schema.typed_path(csv) / 'manifest.json').exists()
+    back = schema.read('merged_eval', csv)
+    pd.testing.assert_frame_equal(back, df)
+
+    # editing the CSV invalidates the typed copy
+    text = csv.read_text().replace('LAC', 'KC')
+    csv.write_text(text)
+    os.utime(csv, ns=(0, 1))
+    assert schema.read('merged_eval', csv)['Opp'][0] == 'KC'
+    assert schema.read('merged_eval', csv, save=False)['Opp'][0] == 'KC'
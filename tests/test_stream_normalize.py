@@ -0,0 +1,80 @@
+"""Tests for streaming, bounded-memory normalization of provider payloads."""
+import gzip
+import io
+import json
+import tracemalloc
+
+import pandas as pd
+
+from scripts.fetch_prizepicks import _synthetic_provider_response, normalize_provider_response
+from scripts.odds_ticks import TickStore
+from scripts.stream_normalize import iter_items, normalize_stream, normalize_to_csv, odds_to_ticks
+
+
+def _event(i):
+    return {'id': f'ev{i}', 'commence_time': '2025-09-07T17:00:00Z', 'home_team': f'Home {i}',
+            'away_team': f'Away {i}', 'bookmakers': [
+                {'key': book, 'last_update': '2025-09-07T12:00:00Z', 'markets': [
+                    {'key': 'totals', 'outcomes': [{'name': 'Over', 'price': -110, 'point': 44.5 + i % 7},
+                                                   {'name': 'Under', 'price': -105 - i % 5, 'point': 44.5 + i % 7}]},
+                    {'key': 'player_pass_yds', 'outcomes': [
+                        {'name': 'Over', 'description': f'QB {i}', 'price': -115, 'point': 250.5},
+                        {'name': 'Under', 'description': f'QB {i}', 'price': -105, 'point': 250.5}]}]}
+                for book in ('draftkings', 'fanduel', 'betmgm')]}
+
+
+def test_iter_items_streams_arrays_and_keyed_lists_across_chunk_boundaries():
+    doc = json.dumps({'meta': {'n': [1, 2, {'x': '}]'}]}, 'projections': [{'v': 12345678901}, {'v': -1.5e3}]})
+    assert list(iter_items(io.StringIO(doc), ('projections',), chunk_size=3)) == [{'v': 12345678901}, {'v': -1500.0}]
+    assert list(iter_items(io.StringIO(' [ ] '))) == []
+    assert list(iter_items(io.StringIO('[1, 22 ,"a"]'), chunk_size=1)) == [1, 22, 'a']
+    doc = '{"projections": [], "data": [1, 2], "items": [3]}'
+    assert list(iter_items(io.StringIO(doc), ('projections', 'data'), skip_empty=True)) == [1, 2]
+    assert list(iter_items(io.StringIO(doc), ('projections', 'data'))) == []
+    assert list(iter_items(io.StringIO(doc), ('items', 'data'))) == [3]
+
+
+def test_batches_match_in_memory_normalizer(tmp_path):
+    events = [_event(i) for i in range(40)]
+    path = tmp_path / 'dump.json.gz'
+    with gzip.open(path, 'wt', encoding='utf8') as f:
+        json.dump(events, f)
+    projections = _synthetic_provider_response('x', 50)['projections']
+    for provider, data, source in (('oddsapi', events, path), ('theoddsapi', events, path),
+                                   ('opticodds', _synthetic_provider_response('x', 50), None),
+                                   # an empty preferred key falls through; a later preferred one wins
+                                   ('opticodds', {'projections': [], 'data': projections}, None),
+                                   ('opticodds', {'data': projections[:5], 'projections': projections}, None),
+                                   ('prizepicks', {'items': projections[:5], 'projections': projections}, None)):
+        if source is None:
+            source = io.StringIO(json.dumps(data))
+        batches = list(normalize_stream(provider, source, batch_rows=17, chunk_size=256))
+        assert batches
+        assert max(len(b) for b in batches) == 17
+        streamed = pd.concat(batches, ignore_index=True)
+        expected = normalize_provider_response(provider, data)
+        assert streamed.to_csv(index=False) == expected.to_csv(index=False)
+        assert pd.api.types.is_float_dtype(streamed['Projection'])
+    assert normalize_to_csv('oddsapi', path, tmp_path / 'out.csv', batch_rows=10) == 40 * 3 * 2
+
+
+def test_large_dump_streams_in_bounded_memory_and_into_tick_store(tmp_path):
+    path = tmp_path / 'big.json'
+    with open(path, 'w', encoding='utf8') as f:
+        f.write('[')
+        f.write(','.join(json.dumps(_event(i)) for i in range(4000)))
+        f.write(']')
+    tracemalloc.start()
+    rows = sum(len(batch) for batch in normalize_stream('oddsapi', path, batch_rows=2000))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert rows == 4000 * 3 * 2
+    assert peak < path.stat().st_size / 2            # never holds the whole document
+
+    store = TickStore(tmp_path / 'ticks', flush_seconds=None)
+    assert odds_to_ticks(path, store, batch_rows=2000) == 4000 * 3 * 2
+    assert max(s['rows'] for s in store.segments) < 2010   # one bulk segment per ~2000-row batch
+    frame = store.frame(player='QB 7')
+    assert frame['book'].nunique() == 3 and (frame['line'] == 250.5).all() and (frame['under'] == -105).all()
+    totals = store.frame(player='Away 3 @ Home 3')
+    assert totals['over'].tolist() == [-110.0] * 3 and totals['under'].tolist() == [-108.0] * 3